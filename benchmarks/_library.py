@@ -0,0 +1,80 @@
+"""Synthetic library builder shared by the storage benchmarks."""
+
+import tempfile
+import time
+from pathlib import Path
+
+from learnlock import config, storage
+
+
+def use_database(db_path: Path) -> None:
+    """Point learnlock at ``db_path`` and drop any pooled connections."""
+    config.DB_PATH = db_path
+    config.DATA_DIR = db_path.parent
+    storage.reset_init_cache()
+    storage.init_db(db_path)
+
+
+def build_library(
+    db_path: Path,
+    n_concepts: int,
+    concepts_per_source: int = 10,
+    reviews_per_concept: int = 0,
+) -> None:
+    """Create ``n_concepts`` concepts spread over sources of ``concepts_per_source``.
+
+    Each concept also gets ``reviews_per_concept`` explanations and, when
+    reviewed, duel memory and one cached claim.
+    """
+    use_database(db_path)
+    fill_library(n_concepts, concepts_per_source, reviews_per_concept)
+
+
+def fill_library(
+    n_concepts: int, concepts_per_source: int = 10, reviews_per_concept: int = 0
+) -> None:
+    """build_library()'s rows, written through the active storage backend."""
+    for source_index in range(0, n_concepts, concepts_per_source):
+        storage.add_source_with_concepts(
+            url=f"https://example.com/source/{source_index}",
+            title=f"Source {source_index}",
+            source_type="article",
+            raw_content=f"Synthetic content for source {source_index}. " * 20,
+            concepts=[
+                {
+                    "name": f"Concept {source_index + offset}",
+                    "source_quote": f"Quote for concept {source_index + offset}",
+                    "question": f"What is concept {source_index + offset}?",
+                }
+                for offset in range(min(concepts_per_source, n_concepts - source_index))
+            ],
+        )
+    if not reviews_per_concept:
+        return
+    with storage.session():
+        for concept_id in range(1, n_concepts + 1):
+            for review in range(reviews_per_concept):
+                storage.add_explanation(concept_id, f"answer {review} for {concept_id}", 4)
+            storage.save_duel_memory(concept_id, f"belief {concept_id}", "", "")
+            storage.save_cached_claims(
+                concept_id,
+                [{"statement": f"claim {concept_id}", "claim_type": "definition",
+                  "claim_index": 0}],
+            )
+
+
+def temp_library(n_concepts: int, name: str = "bench.db", reviews_per_concept: int = 0) -> Path:
+    """Build a library in a fresh temp directory and return its path."""
+    db_path = Path(tempfile.mkdtemp(prefix="learnlock-bench-")) / name
+    started = time.perf_counter()
+    build_library(db_path, n_concepts, reviews_per_concept=reviews_per_concept)
+    print(f"built {n_concepts} concepts in {time.perf_counter() - started:.1f}s -> {db_path}")
+    return db_path
+
+
+def per_call_us(fn, calls: int) -> float:
+    """Average wall time of ``fn()`` in microseconds."""
+    started = time.perf_counter()
+    for _ in range(calls):
+        fn()
+    return (time.perf_counter() - started) / calls * 1e6
@@ -0,0 +1,63 @@
+"""Per-call latency of storage calls on the file, in-memory SQLite and dict backends.
+
+The file and memory backends run the same SQL, so their difference is what
+the file costs (page reads through the OS, WAL appends and syncs). The dict
+backend keeps the same rows and rollups in plain Python with no SQL at all,
+so memory over dict is what the SQLite engine itself costs per call.
+
+    python benchmarks/bench_backends.py [--concepts 5000] [--calls 2000]
+"""
+
+import argparse
+from datetime import datetime, timedelta, timezone
+
+from _library import per_call_us, temp_library
+
+from learnlock import storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=5_000)
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    file_backend = storage.SQLiteBackend(temp_library(args.concepts, reviews_per_concept=2))
+    memory_backend = storage.MemoryBackend()
+    memory_backend.import_all_data(file_backend.export_all_data())
+    dict_backend = storage.DictBackend()
+    dict_backend.import_all_data(file_backend.export_all_data())
+    concept_id = args.concepts // 2
+    due = datetime.now(timezone.utc) + timedelta(days=1)
+
+    def review(backend):
+        with backend.session():
+            backend.add_explanation(concept_id, "benchmark answer", 4)
+            backend.update_progress(concept_id, 2.5, 1.0, due, 1, 4)
+
+    calls = {
+        "review (write)": review,
+        "get_progress": lambda backend: backend.get_progress(concept_id),
+        "get_stats": lambda backend: backend.get_stats(),
+        "get_due_concepts(20)": lambda backend: backend.get_due_concepts(limit=20),
+        "search": lambda backend: backend.search("Concept 12", limit=10),
+    }
+
+    print(
+        f"{'call':<22}{'file us':>10}{'memory us':>12}{'dict us':>10}"
+        f"{'file/memory':>13}{'memory/dict':>13}"
+    )
+    for label, fn in calls.items():
+        on_file = per_call_us(lambda: fn(file_backend), args.calls)
+        in_memory = per_call_us(lambda: fn(memory_backend), args.calls)
+        in_dicts = per_call_us(lambda: fn(dict_backend), args.calls)
+        print(
+            f"{label:<22}{on_file:>10.1f}{in_memory:>12.1f}{in_dicts:>10.1f}"
+            f"{on_file / in_memory:>12.1f}x{in_memory / in_dicts:>12.1f}x"
+        )
+    memory_backend.close()
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
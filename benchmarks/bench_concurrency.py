@@ -0,0 +1,100 @@
+"""Write throughput with several learnlock processes sharing one database.
+
+Each process runs ``--threads`` threads that alternate adding a source and
+reviewing a concept every process shares, so every review is a contended
+read-modify-write. After the run the script checks that no write was lost.
+Pass ``--queue`` to serialise each process's writes on its writer thread.
+
+    python benchmarks/bench_concurrency.py [--processes 4] [--threads 2] [--ops 200] [--queue]
+"""
+
+import argparse
+import multiprocessing
+import threading
+import time
+
+from _library import temp_library, use_database
+
+from learnlock import config, scheduler, storage
+
+
+def worker(db_path, process, threads, ops, queue, latencies):
+    config.SQLITE_WRITE_QUEUE = queue
+    use_database(db_path)
+    slowest = []
+
+    def run(thread):
+        worst = 0.0
+        for i in range(ops):
+            started = time.perf_counter()
+            if i % 2:
+                with storage.session() as unit:
+                    scheduler.update_after_review(1, 4, session=unit)
+                    storage.add_explanation(1, f"answer {process}/{thread}/{i}", 4)
+            else:
+                storage.add_source(
+                    f"https://example.com/p{process}/t{thread}/{i}", "Bench", "article", "body"
+                )
+            worst = max(worst, time.perf_counter() - started)
+        slowest.append(worst)
+
+    pool = [threading.Thread(target=run, args=(n,)) for n in range(threads)]
+    for thread in pool:
+        thread.start()
+    for thread in pool:
+        thread.join()
+    latencies.put(max(slowest))
+    storage.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=2)
+    parser.add_argument("--ops", type=int, default=200, help="writes per thread")
+    parser.add_argument("--queue", action="store_true", help="enable the per-process write queue")
+    args = parser.parse_args()
+
+    library = temp_library(10)
+    before = storage.get_stats()
+    storage.close()
+
+    context = multiprocessing.get_context()
+    latencies = context.Queue()
+    processes = [
+        context.Process(
+            target=worker,
+            args=(library, n, args.threads, args.ops, args.queue, latencies),
+        )
+        for n in range(args.processes)
+    ]
+    started = time.perf_counter()
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+    elapsed = time.perf_counter() - started
+    failed = sum(process.exitcode != 0 for process in processes)
+    worst = max((latencies.get() for _ in range(len(processes) - failed)), default=0.0)
+
+    use_database(library)
+    after = storage.get_stats()
+    writers = args.processes * args.threads
+    reviews = writers * (args.ops // 2)
+    sources = writers * args.ops - reviews
+    lost = (
+        sources - (after["total_sources"] - before["total_sources"])
+        + reviews - (after["total_reviews"] - before["total_reviews"])
+        + reviews - storage.get_progress(1)["review_count"]
+    )
+    print(
+        f"{args.processes} processes x {args.threads} threads, "
+        f"queue {'on' if args.queue else 'off'}: {writers * args.ops} writes in {elapsed:.2f}s "
+        f"({writers * args.ops / elapsed:.0f}/s), slowest {worst * 1000:.0f} ms, lost {lost}"
+        + (f", {failed} processes failed" if failed else "")
+    )
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""Per-call latency of storage reads with and without the connection pool.
+
+"Unpooled" closes the pool after every call, reproducing the old behaviour of
+opening a connection, running the PRAGMA setup, and closing it each time.
+
+    python benchmarks/bench_connections.py [--concepts 50000] [--calls 2000]
+"""
+
+import argparse
+
+from _library import per_call_us, temp_library
+
+from learnlock import storage
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=50_000)
+    parser.add_argument("--calls", type=int, default=2_000)
+    args = parser.parse_args()
+
+    temp_library(args.concepts)
+    concept_id = args.concepts // 2
+
+    calls = {
+        "get_progress": lambda: storage.get_progress(concept_id),
+        "get_duel_memory": lambda: storage.get_duel_memory(concept_id),
+        "get_cached_claims": lambda: storage.get_cached_claims(concept_id),
+        "get_due_concepts(1)": lambda: storage.get_due_concepts(limit=1),
+    }
+
+    print(f"{'call':<22}{'unpooled us':>14}{'pooled us':>12}{'speedup':>10}")
+    for label, fn in calls.items():
+
+        def unpooled(fn=fn):
+            fn()
+            storage.close()
+
+        before = per_call_us(unpooled, args.calls)
+        after = per_call_us(fn, args.calls)
+        print(f"{label:<22}{before:>14.1f}{after:>12.1f}{before / after:>9.1f}x")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
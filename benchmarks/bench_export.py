@@ -0,0 +1,62 @@
+"""Peak Python memory of a JSON vs NDJSON export/import round trip.
+
+    python benchmarks/bench_export.py [--concepts 100000]
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from _library import temp_library, use_database
+
+from learnlock import storage
+
+
+def measured(fn) -> tuple[float, float]:
+    """Return (seconds, peak MiB) for ``fn()``."""
+    tracemalloc.start()
+    started = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    library = temp_library(args.concepts, reviews_per_concept=1)
+    json_path = library.with_name("export.json")
+    ndjson_path = library.with_name("export.ndjson")
+
+    def export_json():
+        json_path.write_text(json.dumps(storage.export_all_data()), encoding="utf-8")
+
+    def export_ndjson():
+        with ndjson_path.open("w", encoding="utf-8") as fp:
+            storage.export_ndjson(fp)
+
+    def import_json():
+        storage.import_all_data(json.loads(json_path.read_text(encoding="utf-8")))
+
+    def import_ndjson():
+        with ndjson_path.open(encoding="utf-8") as fp:
+            storage.import_ndjson(fp)
+
+    print(f"{'step':<16}{'seconds':>9}{'peak MiB':>10}")
+    for label, fn in (("export json", export_json), ("export ndjson", export_ndjson)):
+        elapsed, peak = measured(fn)
+        print(f"{label:<16}{elapsed:>9.2f}{peak:>10.1f}")
+    for label, fn in (("import json", import_json), ("import ndjson", import_ndjson)):
+        use_database(library.with_name(f"{label.split()[1]}.db"))
+        elapsed, peak = measured(fn)
+        print(f"{label:<16}{elapsed:>9.2f}{peak:>10.1f}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
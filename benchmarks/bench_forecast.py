@@ -0,0 +1,58 @@
+"""Time scheduler.forecast() over a library with spread-out schedules.
+
+Concepts get SM-2-like intervals (1 to 180 days) and due dates anywhere from
+five days overdue to one interval ahead; every seventh review failed. Each
+window is timed best of three, SM-2 and FSRS.
+
+    python benchmarks/bench_forecast.py [--concepts 100000] [--reviews 3]
+"""
+
+import argparse
+import random
+import time
+
+import numpy  # noqa: F401  (imported up front so the timing excludes it)
+from _library import temp_library
+
+from learnlock import config, scheduler, storage
+
+
+def spread_schedules(seed: int = 3) -> None:
+    rnd = random.Random(seed)
+    now = time.time() * 1000
+    progress, _ = storage.get_schedule_inputs()
+    rows = []
+    for concept_id, ease, *_ in progress:
+        interval = rnd.choice((1, 1, 6, 6, 15, 15, 37, 90, 180))
+        due = round(now + rnd.uniform(-5, interval) * 86_400_000)
+        rows.append((ease, interval, due, rnd.randint(0, 5), 4, None, None, concept_id))
+    storage.reschedule_progress(rows)
+    with storage.session():
+        for concept_id, *_ in progress[::7]:
+            storage.add_explanation(concept_id, "missed", 1)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=100_000)
+    parser.add_argument("--reviews", type=int, default=3)
+    args = parser.parse_args()
+
+    temp_library(args.concepts, reviews_per_concept=args.reviews)
+    spread_schedules()
+
+    print(f"{'engine':<8}{'days':>6}{'concepts':>10}{'runs':>6}{'ms':>8}")
+    for engine in ("sm2", "fsrs"):
+        config.SCHEDULER = engine
+        for days in (2, 14, 30, 90):
+            best = float("inf")
+            for _ in range(3):
+                started = time.perf_counter()
+                result = scheduler.forecast(days, seed=0)
+                best = min(best, time.perf_counter() - started)
+            print(f"{engine:<8}{days:>6}{result.concepts:>10}{result.runs:>6}{best * 1000:>8.0f}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Row-by-row vs set-based import of a full export, and streaming import memory.
+
+Two scenarios per engine: importing into an empty database (all inserts) and
+re-importing into the database the export came from (all merges). Then the
+NDJSON import of growing libraries, each in a fresh process, reporting how
+far peak RSS (VmHWM, so Linux only) rose during the import. The mmap window
+is turned off there, since mapped database pages count toward RSS without
+being heap; what is left should level off at about twice SQLite's page
+cache (LEARNLOCK_SQLITE_CACHE_SIZE_KB: the cache plus a sort buffer of the
+same size) whatever the library size.
+
+    python benchmarks/bench_import.py [--concepts 100000]
+"""
+
+import argparse
+import multiprocessing
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from _library import temp_library, use_database
+
+from learnlock import config, storage
+
+
+def timed_import(data: dict, bulk: bool) -> float:
+    started = time.perf_counter()
+    storage.import_all_data(data, bulk=bulk)
+    return time.perf_counter() - started
+
+
+def peak_rss_mib() -> float:
+    # Not ru_maxrss: Linux carries the forking parent's peak over into it.
+    for line in Path("/proc/self/status").read_text().splitlines():
+        if line.startswith("VmHWM:"):
+            return int(line.split()[1]) / 1024
+    raise RuntimeError("no VmHWM in /proc/self/status")
+
+
+def ndjson_import_rss(db_path: str, export_path: str) -> float:
+    """Import ``export_path`` into ``db_path``; return the rise in peak RSS in MiB."""
+    config.SQLITE_MMAP_SIZE = 0
+    use_database(Path(db_path))
+    before = peak_rss_mib()
+    with open(export_path, encoding="utf-8") as fp:
+        storage.import_ndjson(fp)
+    return peak_rss_mib() - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=100_000)
+    args = parser.parse_args()
+
+    library = temp_library(args.concepts, reviews_per_concept=1)
+    data = storage.export_all_data()
+    storage.close()
+
+    print(f"{'scenario':<12}{'row-by-row s':>14}{'set-based s':>13}{'speedup':>10}")
+    for scenario in ("empty", "merge"):
+        timings = {}
+        for bulk in (False, True):
+            target = library.with_name(f"{scenario}-{bulk}.db")
+            if scenario == "merge":
+                shutil.copy(library, target)
+            use_database(target)
+            timings[bulk] = timed_import(data, bulk)
+        speedup = timings[False] / timings[True]
+        print(f"{scenario:<12}{timings[False]:>14.2f}{timings[True]:>13.2f}{speedup:>9.1f}x")
+    storage.close()
+
+    print(f"\n{'concepts':<12}{'ndjson MiB':>12}{'peak RSS +MiB':>15}")
+    spawn = multiprocessing.get_context("spawn")
+    for concepts in (args.concepts // 8, args.concepts // 4, args.concepts // 2, args.concepts):
+        source = temp_library(concepts, reviews_per_concept=1)
+        export = source.with_name("export.ndjson")
+        with export.open("w", encoding="utf-8") as fp:
+            storage.export_ndjson(fp)
+        storage.close()
+        # A fresh process per size: the peak never goes down.
+        with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            rise = pool.submit(
+                ndjson_import_rss, str(source.with_name("import.db")), str(export)
+            ).result()
+        size = export.stat().st_size / 2**20
+        print(f"{concepts:<12}{size:>12.1f}{rise:>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Time scheduler.reschedule_all() stages: load, replay (NumPy vs pure Python), write.
+
+The synthetic library's progress rows were never updated by its reviews, so
+every concept comes out of the replay changed and the write covers them all.
+``--scheduler fsrs`` replays with the FSRS engine instead of SM-2.
+
+    python benchmarks/bench_reschedule.py [--concepts 1000000] [--reviews 3] [--scheduler sm2]
+"""
+
+import argparse
+import time
+
+import numpy  # noqa: F401  (imported up front so the replay timing excludes it)
+from _library import temp_library
+
+from learnlock import config, scheduler, storage
+
+
+def timed(fn):
+    started = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=1_000_000)
+    parser.add_argument("--reviews", type=int, default=3)
+    parser.add_argument("--scheduler", choices=("sm2", "fsrs"), default="sm2")
+    args = parser.parse_args()
+    config.SCHEDULER = args.scheduler
+    engine = scheduler.get_engine()
+
+    temp_library(args.concepts, reviews_per_concept=args.reviews)
+    inputs, load = timed(storage.get_schedule_inputs)
+    changes, numpy_replay = timed(lambda: scheduler._replay_numpy(engine, *inputs))
+    _, python_replay = timed(lambda: scheduler._replay_python(engine, *inputs))
+    rows = [(c[2], c[4], c[6], *c[7:], c[0]) for c in changes]
+    written, write = timed(lambda: storage.reschedule_progress(rows))
+
+    print(f"{len(inputs[0])} progress rows, {len(inputs[1])} reviews, {written} rows rewritten")
+    print(f"{'stage':<16}{'s':>8}")
+    for label, seconds in (
+        ("load", load),
+        ("replay numpy", numpy_replay),
+        ("replay python", python_replay),
+        ("write", write),
+    ):
+        print(f"{label:<16}{seconds:>8.2f}")
+    print(f"numpy replay {python_replay / numpy_replay:.1f}x faster than pure Python")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
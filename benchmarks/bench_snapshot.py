@@ -0,0 +1,66 @@
+"""Time and file size of a SQLite snapshot vs a JSON export/import round trip.
+
+The JSON path is what /export writes by default (indented JSON); the
+snapshot path is /export --format sqlite, plain and gzipped. Imports run
+into an empty database, then again into the populated one (a pure merge).
+
+    python benchmarks/bench_snapshot.py [--concepts 50000] [--reviews 4]
+"""
+
+import argparse
+import json
+import time
+
+from _library import temp_library, use_database
+
+from learnlock import storage
+
+
+def timed(fn) -> float:
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concepts", type=int, default=50_000)
+    parser.add_argument("--reviews", type=int, default=4)
+    args = parser.parse_args()
+
+    library = temp_library(args.concepts, reviews_per_concept=args.reviews)
+    exports = {
+        "json": library.with_name("export.json"),
+        "sqlite": library.with_name("export.sqlite"),
+        "sqlite.gz": library.with_name("export.sqlite.gz"),
+    }
+
+    def export(fmt):
+        if fmt == "json":
+            with exports[fmt].open("w", encoding="utf-8") as fp:
+                json.dump(storage.export_all_data(), fp, indent=2)
+        else:
+            storage.export_snapshot(exports[fmt], compress=fmt.endswith(".gz"))
+
+    def load(fmt):
+        if fmt == "json":
+            with exports[fmt].open(encoding="utf-8") as fp:
+                storage.import_all_data(json.load(fp))
+        else:
+            storage.import_snapshot(exports[fmt])
+
+    print(f"database {library.stat().st_size / 2**20:.1f} MiB")
+    print(f"{'format':<11}{'export s':>9}{'MiB':>8}{'import s':>10}{'merge s':>9}")
+    for fmt, path in exports.items():
+        use_database(library)
+        exported = timed(lambda: export(fmt))
+        use_database(library.with_name(f"import-{fmt}.db"))
+        imported = timed(lambda: load(fmt))
+        merged = timed(lambda: load(fmt))
+        size = path.stat().st_size / 2**20
+        print(f"{fmt:<11}{exported:>9.2f}{size:>8.1f}{imported:>10.2f}{merged:>9.2f}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    main()
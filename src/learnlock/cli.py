@@ -6,6 +6,9 @@ import readline  # noqa: F401 — enables arrow keys / history in input()
 import select
 import sys
 import warnings
+from contextlib import closing
+from datetime import timedelta
+from itertools import chain
 from pathlib import Path
 from typing import Callable, Optional
 from urllib.parse import urlparse
@@ -84,14 +87,22 @@ HELP_TEXT = """
   [cyan]/add[/cyan] <source>              Add YouTube, article, GitHub, or PDF
   [cyan]/study[/cyan]                     Start adversarial study session
   [cyan]/stats[/cyan]                     Show your progress
+  [cyan]/storage[/cyan]                   Show content store size and load time
+  [cyan]/maintain[/cyan] [--vacuum]       Analyze, checkpoint and optionally vacuum the database
+  [cyan]/reschedule[/cyan] [--dry-run]    Recompute due dates after changing scheduler settings
+  [cyan]/tune[/cyan]                      Fit the FSRS scheduler to your review history
+  [cyan]/forecast[/cyan] \\[days]           Simulate how many reviews fall due each day
   [cyan]/list[/cyan]                      List all concepts
   [cyan]/due[/cyan]                       Show what's due
+  [cyan]/search[/cyan] <text>             Search concepts, claims, and sources
   [cyan]/skip[/cyan]   <name>             Skip a concept
   [cyan]/unskip[/cyan] <name>             Restore skipped concept
   [cyan]/claims[/cyan] <name>             View/edit/delete claims for a concept
   [cyan]/delete[/cyan] <source>           Delete a source and its concepts
-  [cyan]/export[/cyan] [file]                   Export all data to JSON
-  [cyan]/import[/cyan] <file>             Import and merge a JSON backup
+  [cyan]/skip[/cyan]   --<filter> ...     Bulk /skip, /unskip or /delete (with --dry-run)
+                             --source --name --max-score --max-ease --older-than
+  [cyan]/export[/cyan] \\[file]             Export data (--format json|ndjson|sqlite, --since <rev>)
+  [cyan]/import[/cyan] <file>             Import and merge a JSON/NDJSON/SQLite backup
   [cyan]/visual[/cyan] [name]                   Inspect the linked YouTube frame on demand
   [cyan]/key[/cyan]    <provider> <key>   Set API key (groq or gemini)
   [cyan]/config[/cyan]                    Show configuration
@@ -183,6 +194,9 @@ def _print_status():
         parts = []
         if summary["due_now"] > 0:
             parts.append(f"[cyan]{summary['due_now']} due[/cyan]")
+        tomorrow = _forecast_tomorrow() if summary["total_concepts"] > 0 else 0
+        if tomorrow:
+            parts.append(f"[cyan]~{tomorrow} tomorrow[/cyan]")
         if summary["total_concepts"] > 0:
             parts.append(f"[dim]{summary['total_concepts']} concepts[/dim]")
         if summary["mastered"] > 0:
@@ -193,6 +207,15 @@ def _print_status():
         pass
 
 
+def _forecast_tomorrow() -> int:
+    """Expected reviews due tomorrow (0 without NumPy)."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        return 0
+    return round(scheduler.forecast(2).expected[1])
+
+
 def _check_api_keys(*, require_groq: bool = False, require_any: bool = False) -> bool:
     """Check whether the required LLM credentials are available."""
     has_groq = bool(os.environ.get("GROQ_API_KEY"))
@@ -244,35 +267,8 @@ def _truncate_stored_content(content: str) -> str:
     return content[: config.MAX_STORED_CONTENT_CHARS]
 
 
-def _all_concepts_for_lookup() -> list[dict]:
-    """Include skipped concepts so admin commands can still target them."""
-    concepts = {concept["id"]: concept for concept in storage.get_all_concepts()}
-    for concept in storage.get_skipped_concepts():
-        concepts.setdefault(concept["id"], concept)
-    return list(concepts.values())
-
-
-def _match_records(records: list[dict], query: str, label_key: str) -> list[dict]:
-    """Resolve numeric ids first, then exact names, then fuzzy substring matches."""
-    query = query.strip()
-    if not query:
-        return []
-
-    if query.isdigit():
-        exact_id = [record for record in records if int(record["id"]) == int(query)]
-        if exact_id:
-            return exact_id
-
-    lowered = query.casefold()
-    exact = [record for record in records if str(record[label_key]).casefold() == lowered]
-    if exact:
-        return exact
-
-    return [record for record in records if lowered in str(record[label_key]).casefold()]
-
-
-def _resolve_source(query: str) -> dict | None:
-    matches = _match_records(storage.get_all_sources(), query, "title")
+def _resolve_source(query: str) -> storage.SourceSummary | None:
+    matches = storage.resolve_sources(query)
     if not matches:
         console.print(f"[red]No source matching '{query}'[/red]")
         return None
@@ -280,10 +276,9 @@ def _resolve_source(query: str) -> dict | None:
     if len(matches) > 1:
         console.print("[yellow]Multiple matches:[/yellow]")
         for match in matches:
-            concepts = storage.get_concepts_for_source(match["id"])
             console.print(
-                f"  [dim]{match['id']}.[/dim] {match['title']} "
-                f"[dim]({len(concepts)} concepts)[/dim]"
+                f"  [dim]{match.id}.[/dim] {match.title} "
+                f"[dim]({match.concept_count} concepts)[/dim]"
             )
         console.print("[dim]Use the numeric source id to disambiguate.[/dim]")
         return None
@@ -292,7 +287,8 @@ def _resolve_source(query: str) -> dict | None:
 
 
 def _resolve_concept(query: str) -> dict | None:
-    matches = _match_records(_all_concepts_for_lookup(), query, "name")
+    # Skipped concepts are included so admin commands can still target them.
+    matches = storage.resolve_concepts(query)
     if not matches:
         console.print(f"[red]No concept matching '{query}'[/red]")
         return None
@@ -300,14 +296,13 @@ def _resolve_concept(query: str) -> dict | None:
     if len(matches) > 1:
         console.print("[yellow]Multiple matches:[/yellow]")
         for match in matches:
-            source_title = match.get("source_title", "Unknown source")
             console.print(
-                f"  [dim]{match['id']}.[/dim] {match['name']} [dim]({source_title})[/dim]"
+                f"  [dim]{match.id}.[/dim] {match.name} [dim]({match.source_title})[/dim]"
             )
         console.print("[dim]Use the numeric concept id to disambiguate.[/dim]")
         return None
 
-    return matches[0]
+    return storage.get_concept(matches[0].id)
 
 
 def _time_label(seconds: float) -> str:
@@ -325,11 +320,12 @@ def _visual_context_for_source(
         return None
 
     segments = None
-    if source.get("segments"):
+    if source.get("segments_hash"):
         import json
 
+        # Segments live in the content store and are only loaded on demand.
         try:
-            segments = json.loads(source["segments"])
+            segments = json.loads(storage.get_source_segments(source["id"]))
         except (json.JSONDecodeError, TypeError):
             segments = None
 
@@ -400,8 +396,7 @@ def cmd_add(url: str) -> bool:
     existing = storage.get_source_by_url(url)
     if existing:
         console.print(f"[yellow]Already added:[/yellow] {existing['title']}")
-        concepts = storage.get_concepts_for_source(existing["id"])
-        console.print(f"[dim]{len(concepts)} concepts[/dim]")
+        console.print(f"[dim]{storage.count_concepts_for_source(existing['id'])} concepts[/dim]")
         return True
 
     from rich.progress import BarColumn, Progress, SpinnerColumn, TextColumn
@@ -475,13 +470,14 @@ def cmd_add(url: str) -> bool:
 
 def cmd_study() -> bool:
     """Interactive study session with Duel Engine - adversarial Socratic interrogation."""
-    from .duel import belief_to_score, create_duel, save_duel_data
+    from .duel import belief_to_score, create_duel, record_outcome, save_duel_data
     from .hud import render_attack, render_duel_state, render_reveal
 
     if not _check_api_keys(require_any=True):
         return True
 
-    due = scheduler.get_next_due()
+    queue = scheduler.StudyQueue()
+    due = queue.peek()
 
     if not due:
         summary = scheduler.get_study_summary()
@@ -492,7 +488,7 @@ def cmd_study() -> bool:
             console.print("[green]OK[/green] All caught up! Nothing due for review.")
         return True
 
-    initial_due = len(scheduler.get_all_due())
+    initial_due = len(queue)
     studied = 0
 
     console.print()
@@ -571,6 +567,7 @@ def cmd_study() -> bool:
 
             if answer.lower() in ("skip", "s", "/skip"):
                 storage.skip_concept(due["id"])
+                queue.discard(due["id"])
                 console.print("[yellow]Skipped[/yellow]")
                 skipped = True
                 break
@@ -602,24 +599,17 @@ def cmd_study() -> bool:
                 render_attack(result["message"], console)
 
         if skipped:
-            due = scheduler.get_next_due()
+            due = queue.peek()
             continue
 
         # REVEAL with HUD
         reveal = duel.get_reveal()
         render_reveal(reveal, console)
-        _show_source_help(due, due["source_quote"])
+        _show_source_help(due, due["source_quote"], queue.source(due["source_id"]))
 
         # Score
         score = belief_to_score(duel.state)
 
-        # Save duel memory
-        errors_str = (
-            "; ".join(e.description for e in reveal["errors"][:2]) if reveal["errors"] else ""
-        )
-        last_attack = reveal["attacks"][-1] if reveal.get("attacks") else ""
-        storage.save_duel_memory(due["id"], reveal["belief"], errors_str, last_attack)
-
         # Save duel data for research
         if config.AUTO_EXPORT_DUELS:
             try:
@@ -627,26 +617,18 @@ def cmd_study() -> bool:
             except Exception:
                 pass
 
-        # Store explanation
-        storage.add_explanation(
-            concept_id=due["id"],
-            text=" | ".join(reveal["evidence"]),
-            score=score,
-            covered=None,
-            missed=errors_str,
-            feedback=reveal["belief"],
-        )
+        # Duel memory, explanation, and schedule commit together in one transaction
+        with storage.session() as unit:
+            record_outcome(due["id"], reveal, score, session=unit)
+            sched_result = scheduler.update_after_review(due["id"], score, session=unit)
+        queue.reviewed(due["id"], sched_result["due_date"])
+        due = queue.peek()
 
-        # Update scheduler
-        sched_result = scheduler.update_after_review(due["id"], score)
         console.print()
         console.print(f"[dim]Next review: {sched_result['next_review']}[/dim]")
 
-        # Next
-        due = scheduler.get_next_due()
-
         if due:
-            remaining = len(scheduler.get_all_due())
+            remaining = len(queue)
             console.print()
             try:
                 cont = _input(
@@ -664,11 +646,12 @@ def cmd_study() -> bool:
     return True
 
 
-def _show_source_help(due: dict, source_quote: str):
+def _show_source_help(due: dict, source_quote: str, source: dict | None = None):
     """Show timestamp link for failed YouTube concepts. Visual extraction is opt-in."""
     global _last_visual_context
 
-    source = storage.get_source(due["source_id"])
+    if source is None:
+        source = storage.get_source(due["source_id"])
     if not source:
         return
     context = _visual_context_for_source(source, due["name"], source_quote)
@@ -704,6 +687,8 @@ def cmd_stats() -> bool:
     due_cell = f"[cyan]{summary['due_now']}[/cyan]" if summary["due_now"] > 0 else "[dim]0[/dim]"
     table.add_row("Due now", due_cell)
     table.add_row("Reviews", str(stats["total_reviews"]))
+    if stats["reviews_last_7_days"]:
+        table.add_row("Last 7 days", str(stats["reviews_last_7_days"]))
 
     if stats["avg_score"] > 0:
         avg = stats["avg_score"]
@@ -722,54 +707,304 @@ def cmd_stats() -> bool:
     return True
 
 
+def _format_bytes(size: float) -> str:
+    for unit in ("B", "KB", "MB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+def cmd_search(query: str) -> bool:
+    """Full-text search across concepts, claims and sources."""
+    query = query.strip()
+    if not query:
+        console.print("[yellow]Usage: /search <text>[/yellow]")
+        return True
+
+    from rich.markup import escape
+
+    hits = storage.search(query, mark=("\x02", "\x03"))
+    if not hits:
+        console.print(f"[dim]No results for '{escape(query)}'.[/dim]")
+        return True
+
+    for hit in hits:
+        snippet = (
+            escape(" ".join(hit.snippet.split()))
+            .replace("\x02", "[bold cyan]")
+            .replace("\x03", "[/bold cyan]")
+        )
+        console.print(f"  [dim]{hit.kind} {hit.id}.[/dim] [bold]{escape(hit.title)}[/bold]")
+        if snippet and hit.snippet != hit.title:
+            console.print(f"    [dim]{snippet}[/dim]")
+    return True
+
+
+def cmd_storage() -> bool:
+    """Show content store size and load latency."""
+    report = storage.get_content_stats()
+
+    table = Table(box=box.ROUNDED, show_header=False, border_style="cyan")
+    table.add_column("", style="dim", width=15)
+    table.add_column("", style="bold")
+
+    table.add_row("Sources", str(report["sources"]))
+    table.add_row("Blobs", str(report["blobs"]))
+    table.add_row("Content", _format_bytes(report["referenced_bytes"]))
+    table.add_row("Deduplicated", _format_bytes(report["unique_bytes"]))
+    table.add_row("On disk", _format_bytes(report["stored_bytes"]))
+    if report["referenced_bytes"]:
+        saved = 1 - report["stored_bytes"] / report["referenced_bytes"]
+        table.add_row("Saved", f"[green]{saved:.0%}[/green]")
+    if report["sampled"]:
+        table.add_row(
+            "Load time",
+            f"{report['avg_load_ms']:.2f} ms avg, {report['max_load_ms']:.2f} ms max "
+            f"[dim]({report['sampled']} largest)[/dim]",
+        )
+
+    console.print(Panel(table, title="[bold]Content Store[/bold]", border_style="cyan"))
+    return True
+
+
+def cmd_maintain(args: str = "") -> bool:
+    """Run database maintenance and report what it reclaimed."""
+    vacuum = args.strip() in ("--vacuum", "-v", "vacuum")
+    console.print("[dim]Maintaining database...[/dim]")
+    report = storage.maintain(vacuum=vacuum)
+
+    table = Table(box=box.ROUNDED, show_header=False, border_style="cyan")
+    table.add_column("", style="dim", width=15)
+    table.add_column("", style="bold")
+
+    reclaimed = report["size_before"] - report["size_after"]
+    table.add_row(
+        "Size",
+        f"{_format_bytes(report['size_before'])} → {_format_bytes(report['size_after'])}",
+    )
+    table.add_row("Reclaimed", f"[green]{_format_bytes(max(reclaimed, 0))}[/green]")
+    table.add_row(
+        "WAL",
+        f"{_format_bytes(report['wal_before'])} → {_format_bytes(report['wal_after'])}",
+    )
+    table.add_row(
+        "Free pages", f"{report['free_pages_before']} → {report['free_pages_after']}"
+    )
+    table.add_row("Vacuum", report["vacuumed"] or "[dim]skipped (use --vacuum)[/dim]")
+    if report["reviews_archived"]:
+        table.add_row("Archived", f"{report['reviews_archived']} review texts")
+    table.add_row("Time", f"{report['elapsed_ms']:.0f} ms")
+
+    console.print(Panel(table, title="[bold]Maintenance[/bold]", border_style="cyan"))
+    if report["checkpoint_blocked"]:
+        console.print(
+            "[yellow]Another process is using the database; WAL not fully truncated.[/yellow]"
+        )
+    return True
+
+
+def cmd_reschedule(args: str = "") -> bool:
+    """Recompute every due date under the current scheduler engine and settings."""
+    dry_run = args.strip() in ("--dry-run", "-n")
+    if args.strip() and not dry_run:
+        console.print("[yellow]Usage: /reschedule [--dry-run][/yellow]")
+        return True
+    result = scheduler.reschedule_all(dry_run=dry_run)
+    if not result["changed"]:
+        console.print(f"[green]OK[/green] All {result['concepts']} schedules are current.")
+        return True
+
+    summary = (
+        f"{result['changed']} of {result['concepts']} concepts "
+        f"({result['earlier']} due earlier, {result['later']} later)"
+    )
+    if not dry_run:
+        console.print(f"[green]OK[/green] Rescheduled {summary}.")
+        return True
+
+    table = Table(box=box.SIMPLE)
+    table.add_column("Concept")
+    table.add_column("Ease", justify="right")
+    table.add_column("Interval (days)", justify="right")
+    table.add_column("Due", justify="right")
+    for change in result["changes"][:20]:
+        concept = storage.get_concept(change.concept_id)
+        table.add_row(
+            concept["name"] if concept else str(change.concept_id),
+            f"{change.ease_before:.2f} → {change.ease_after:.2f}",
+            f"{change.interval_before:.1f} → {change.interval_after:.1f}",
+            f"{change.due_before:%Y-%m-%d} → {change.due_after:%Y-%m-%d}",
+        )
+    console.print(table)
+    if result["changed"] > 20:
+        console.print(f"  [dim]... and {result['changed'] - 20} more[/dim]")
+    console.print(f"[dim]Dry run: would reschedule {summary}.[/dim]")
+    return True
+
+
+def cmd_forecast(args: str = "") -> bool:
+    """Show the simulated review load of the coming days."""
+    arg = args.strip()
+    if arg and (not arg.isdigit() or not 1 <= int(arg) <= 365):
+        console.print("[yellow]Usage: /forecast \\[days]  (1-365, default 14)[/yellow]")
+        return True
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        console.print('[yellow]/forecast needs NumPy: pip install "learn-lock[numpy]"[/yellow]')
+        return True
+    result = scheduler.forecast(int(arg) if arg else 14)
+    days = len(result.expected)
+    if not result.concepts:
+        console.print(f"[green]OK[/green] Nothing falls due in the next {days} days.")
+        return True
+
+    peak = max(result.high) or 1
+    table = Table(box=box.SIMPLE)
+    table.add_column("Day")
+    table.add_column("Reviews", justify="right")
+    table.add_column("Range", justify="right", style="dim")
+    table.add_column("")
+    for offset, (expected, low, high) in enumerate(
+        zip(result.expected, result.low, result.high)
+    ):
+        day = result.start + timedelta(days=offset)
+        table.add_row(
+            "Today" if offset == 0 else f"{day:%a %d %b}",
+            f"{expected:.0f}",
+            f"{low}-{high}",
+            "[cyan]" + "█" * round(expected / peak * 40) + "[/cyan]",
+        )
+    console.print(table)
+    console.print(
+        f"[dim]{result.runs} simulated runs over {result.concepts} concepts at a "
+        f"{result.pass_rate:.0%} base pass rate; today includes overdue reviews.[/dim]"
+    )
+    return True
+
+
+def cmd_tune(args: str = "") -> bool:
+    """Fit the FSRS engine to the review history and offer to switch to it."""
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        console.print('[yellow]/tune needs NumPy: pip install "learn-lock[numpy]"[/yellow]')
+        return True
+    with _spinner("Fitting FSRS to your review history..."):
+        result = scheduler.tune()
+    if result is None:
+        console.print(
+            f"[yellow]Not enough history to tune yet: need {scheduler.TUNE_MIN_REVIEWS} "
+            "repeat reviews.[/yellow]"
+        )
+        return True
+
+    table = Table(box=box.SIMPLE)
+    table.add_column("Engine")
+    table.add_column("Log loss", justify="right")
+    table.add_column("Calibration RMSE", justify="right")
+    table.add_column("Predicted recall", justify="right")
+    table.add_column("Actual recall", justify="right")
+    for label, key in (("SM-2", "sm2"), ("FSRS (default)", "fsrs"), ("FSRS (tuned)", "fsrs-tuned")):
+        metrics = result["engines"][key]
+        table.add_row(
+            label + (" [dim](current)[/dim]" if key == config.SCHEDULER else ""),
+            f"{metrics['log_loss']:.3f}",
+            f"{metrics['rmse']:.3f}",
+            f"{metrics['predicted']:.0%}",
+            f"{metrics['actual']:.0%}",
+        )
+    console.print(table)
+    scope = (
+        f"all {result['holdout']} repeat reviews (too few to hold any out)"
+        if result["in_sample"]
+        else f"{result['holdout']} held-out repeat reviews, fitted on {result['reviews']}"
+    )
+    console.print(f"[dim]Scored on {scope}; lower is better.[/dim]")
+
+    engines = result["engines"]
+    if engines["fsrs-tuned"]["log_loss"] >= engines["sm2"]["log_loss"]:
+        console.print("[dim]The tuned FSRS engine does not beat SM-2 on this history.[/dim]")
+        return True
+    try:
+        confirm = _input("\033[2mSchedule with the tuned FSRS engine? Type 'yes' to save: \033[0m")
+    except (EOFError, KeyboardInterrupt):
+        console.print("[dim]Cancelled.[/dim]")
+        return True
+    if confirm.strip().lower() != "yes":
+        console.print("[dim]Cancelled.[/dim]")
+        return True
+
+    env_path = _save_env(
+        {
+            "LEARNLOCK_SCHEDULER": "fsrs",
+            "LEARNLOCK_FSRS_WEIGHTS": ",".join(str(w) for w in result["weights"]),
+        }
+    )
+    config.SCHEDULER, config.FSRS_WEIGHTS = "fsrs", result["weights"]
+    console.print(f"[green]OK[/green] Saved the tuned FSRS engine to {env_path}.")
+    console.print("[dim]Run /reschedule to apply it to existing due dates.[/dim]")
+    return True
+
+
 def cmd_list(args: str = "") -> bool:
     """List sources and concepts."""
     if args.strip() in ("-s", "--sources", "sources"):
-        sources = storage.get_all_sources()
+        sources = storage.list_source_summaries()
         if not sources:
             console.print("[dim]No sources yet.[/dim]")
             return True
 
         for s in sources:
-            concepts = storage.get_concepts_for_source(s["id"])
-            console.print(f"[bold]{s['title']}[/bold] [dim]({len(concepts)} concepts)[/dim]")
-            console.print(f"  [dim]{s['url']}[/dim]")
+            console.print(f"[bold]{s.title}[/bold] [dim]({s.concept_count} concepts)[/dim]")
+            console.print(f"  [dim]{s.url}[/dim]")
         return True
 
-    concepts = storage.get_all_concepts()
-    if not concepts:
-        console.print("[dim]No concepts yet. Add some content:[/dim]")
-        console.print("  [cyan]/add[/cyan] <url>")
-        return True
+    with closing(storage.iter_concepts_with_progress()) as concepts:
+        first = next(concepts, None)
+        if first is None:
+            console.print("[dim]No concepts yet. Add some content:[/dim]")
+            console.print("  [cyan]/add[/cyan] <url>")
+            return True
 
-    # Group by source
-    by_source = {}
-    for c in concepts:
-        src = c["source_title"]
-        if src not in by_source:
-            by_source[src] = []
-        by_source[src].append(c)
-
-    for src_title, src_concepts in by_source.items():
-        console.print(f"\n[bold]{src_title}[/bold]")
-        for c in src_concepts:
-            progress = storage.get_progress(c["id"])
-            if progress and progress["review_count"] > 0:
-                score = progress.get("last_score")
-                score_str = f"[dim]({progress['review_count']}x"
-                if score:
-                    score_str += f", last: {score}/5"
+        # Rows arrive grouped by source, so print as they stream in and pause
+        # between pages instead of loading the whole library first.
+        source_id = None
+        shown = 0
+        for c in chain([first], concepts):
+            if shown and shown % config.LIST_PAGE_SIZE == 0 and not _continue_listing():
+                break
+            if c.source_id != source_id:
+                source_id = c.source_id
+                console.print(f"\n[bold]{c.source_title}[/bold]")
+            if c.review_count > 0:
+                score_str = f"[dim]({c.review_count}x"
+                if c.last_score:
+                    score_str += f", last: {c.last_score}/5"
                 score_str += ")[/dim]"
-                console.print(f"  • {c['name']} {score_str}")
+                console.print(f"  • {c.name} {score_str}")
             else:
-                console.print(f"  • {c['name']} [dim](new)[/dim]")
+                console.print(f"  • {c.name} [dim](new)[/dim]")
+            shown += 1
 
     return True
 
 
+def _continue_listing() -> bool:
+    """Page prompt for long listings. Non-interactive output is not paged."""
+    if not sys.stdin.isatty():
+        return True
+    try:
+        answer = _input("\033[2mEnter for more, 'q' to stop: \033[0m")
+    except (EOFError, KeyboardInterrupt):
+        return False
+    return answer.strip().lower() not in ("q", "quit")
+
+
 def cmd_due() -> bool:
     """Show due concepts."""
-    due = scheduler.get_all_due()
+    due = storage.list_due_concepts()
 
     if not due:
         console.print("[green]OK[/green] Nothing due! All caught up.")
@@ -779,23 +1014,123 @@ def cmd_due() -> bool:
     console.print()
 
     for d in due:
-        console.print(f"  • {d['name']}")
-        console.print(f"    [dim]{d['source_title']}[/dim]")
+        console.print(f"  • {d.name}")
+        console.print(f"    [dim]{d.source_title}[/dim]")
 
     console.print()
     console.print("[dim]Run /study to start reviewing[/dim]")
     return True
 
 
+CONCEPT_FILTER_FLAGS = ("--source", "--name", "--max-score", "--max-ease", "--older-than")
+
+# Bulk command -> (storage operation, skipped state it applies to, past tense)
+BULK_CONCEPT_ACTIONS = {
+    "skip": (storage.skip_concepts_matching, False, "Skipped"),
+    "unskip": (storage.unskip_concepts_matching, True, "Restored"),
+    "delete": (storage.delete_concepts_matching, None, "Deleted"),
+}
+
+
+def _is_bulk_command(args: str) -> bool:
+    return any(part in CONCEPT_FILTER_FLAGS or part == "--dry-run" for part in args.split())
+
+
+def _parse_concept_filter(command: str, args: str) -> tuple[storage.ConceptFilter, bool] | None:
+    """Parse bulk filter flags into (filter, dry_run); None after printing usage."""
+    import shlex
+
+    try:
+        parts = shlex.split(args)
+    except ValueError:
+        parts = args.split()
+    dry_run = "--dry-run" in parts
+    parts = [part for part in parts if part != "--dry-run"]
+    values = {flag: _pop_option(parts, flag) for flag in CONCEPT_FILTER_FLAGS}
+    usage = (
+        f"[yellow]Usage: /{command} [--source <source>] [--name <text>] [--max-score N] "
+        "[--max-ease X] [--older-than <days>] [--dry-run][/yellow]"
+    )
+    given = [value for value in values.values() if value is not None]
+    if parts or not given or "" in given:
+        console.print(usage)
+        return None
+
+    source_id = None
+    if values["--source"] is not None:
+        source = _resolve_source(values["--source"])
+        if source is None:
+            return None
+        source_id = source.id
+    try:
+        where = storage.ConceptFilter(
+            source_id=source_id,
+            name=values["--name"],
+            max_score=int(values["--max-score"]) if values["--max-score"] else None,
+            max_ease=float(values["--max-ease"]) if values["--max-ease"] else None,
+            older_than_days=(
+                float(values["--older-than"]) if values["--older-than"] else None
+            ),
+        )
+    except ValueError:
+        console.print(usage)
+        return None
+    return where, dry_run
+
+
+def _bulk_concepts(command: str, args: str) -> bool:
+    """Run /skip, /unskip or /delete over every concept a filter selects."""
+    parsed = _parse_concept_filter(command, args)
+    if parsed is None:
+        return True
+    where, dry_run = parsed
+    action, skipped, done = BULK_CONCEPT_ACTIONS[command]
+    where = where._replace(skipped=skipped)
+
+    count = storage.count_concepts_matching(where)
+    if not count:
+        console.print("[dim]No concepts match.[/dim]")
+        return True
+
+    if dry_run or command == "delete":
+        preview = storage.list_concepts_matching(where, limit=10)
+        for concept in preview:
+            console.print(f"  • {concept.name} [dim]({concept.source_title})[/dim]")
+        if count > len(preview):
+            console.print(f"  [dim]... and {count - len(preview)} more[/dim]")
+    if dry_run:
+        console.print(f"[dim]Dry run: {count} concepts would be {done.lower()}.[/dim]")
+        return True
+
+    if command == "delete":
+        console.print(
+            f"[yellow]Delete[/yellow] {count} concepts "
+            "[dim](with their progress, reviews and claims)?[/dim]"
+        )
+        try:
+            confirm = _input("\033[2mType 'yes' to confirm: \033[0m")
+        except (EOFError, KeyboardInterrupt):
+            console.print("[dim]Cancelled.[/dim]")
+            return True
+        if confirm.strip().lower() != "yes":
+            console.print("[dim]Cancelled.[/dim]")
+            return True
+
+    changed = action(where)
+    console.print(f"[green]OK[/green] {done} {changed} concepts.")
+    return True
+
+
 def cmd_skip(name: str) -> bool:
-    """Skip a concept."""
+    """Skip a concept, or every concept matching filter flags."""
+    if _is_bulk_command(name):
+        return _bulk_concepts("skip", name)
     name = name.strip()
     if not name:
         console.print("[yellow]Usage: /skip <concept-name>[/yellow]")
         return True
 
-    concepts = storage.get_all_concepts()
-    matches = [c for c in concepts if name.lower() in c["name"].lower()]
+    matches = storage.resolve_concepts(name, skipped=False)
 
     if not matches:
         console.print(f"[red]No concept matching '{name}'[/red]")
@@ -804,33 +1139,35 @@ def cmd_skip(name: str) -> bool:
     if len(matches) > 1:
         console.print("[yellow]Multiple matches:[/yellow]")
         for m in matches:
-            console.print(f"  • {m['name']}")
+            console.print(f"  • {m.name}")
         console.print("[dim]Be more specific.[/dim]")
         return True
 
-    storage.skip_concept(matches[0]["id"])
-    console.print(f"[green]OK[/green] Skipped: {matches[0]['name']}")
+    storage.skip_concept(matches[0].id)
+    console.print(f"[green]OK[/green] Skipped: {matches[0].name}")
     return True
 
 
 def cmd_unskip(name: str) -> bool:
-    """Unskip a concept."""
+    """Unskip a concept, or every skipped concept matching filter flags."""
+    if _is_bulk_command(name):
+        return _bulk_concepts("unskip", name)
     name = name.strip()
-    skipped = storage.get_skipped_concepts()
 
     if not name:
+        skipped = storage.list_concepts(skipped=True)
         if not skipped:
             console.print("[dim]No skipped concepts.[/dim]")
             return True
 
         console.print("[bold]Skipped concepts:[/bold]")
         for s in skipped:
-            console.print(f"  • {s['name']}")
+            console.print(f"  • {s.name}")
         console.print()
         console.print("[dim]Usage: /unskip <name>[/dim]")
         return True
 
-    matches = [c for c in skipped if name.lower() in c["name"].lower()]
+    matches = storage.resolve_concepts(name, skipped=True)
 
     if not matches:
         console.print(f"[red]No skipped concept matching '{name}'[/red]")
@@ -839,16 +1176,18 @@ def cmd_unskip(name: str) -> bool:
     if len(matches) > 1:
         console.print("[yellow]Multiple matches:[/yellow]")
         for m in matches:
-            console.print(f"  • {m['name']}")
+            console.print(f"  • {m.name}")
         return True
 
-    storage.unskip_concept(matches[0]["id"])
-    console.print(f"[green]OK[/green] Restored: {matches[0]['name']}")
+    storage.unskip_concept(matches[0].id)
+    console.print(f"[green]OK[/green] Restored: {matches[0].name}")
     return True
 
 
 def cmd_delete(name: str) -> bool:
-    """Delete a source and all its concepts."""
+    """Delete a source and all its concepts, or the concepts matching filter flags."""
+    if _is_bulk_command(name):
+        return _bulk_concepts("delete", name)
     name = name.strip()
     if not name:
         console.print("[yellow]Usage: /delete <source-title>[/yellow]")
@@ -857,10 +1196,9 @@ def cmd_delete(name: str) -> bool:
     source = _resolve_source(name)
     if source is None:
         return True
-    concepts = storage.get_concepts_for_source(source["id"])
     console.print(
-        f"[yellow]Delete[/yellow] {source['title']} "
-        f"[dim]({len(concepts)} concepts)?[/dim]"
+        f"[yellow]Delete[/yellow] {source.title} "
+        f"[dim]({source.concept_count} concepts)?[/dim]"
     )
     try:
         confirm = _input("\033[2mType 'yes' to confirm: \033[0m")
@@ -872,9 +1210,9 @@ def cmd_delete(name: str) -> bool:
         console.print("[dim]Cancelled.[/dim]")
         return True
 
-    removed = storage.delete_source(source["id"])
+    removed = storage.delete_source(source.id)
     console.print(
-        f"[green]OK[/green] Deleted {source['title']} "
+        f"[green]OK[/green] Deleted {source.title} "
         f"and {removed} concepts."
     )
     return True
@@ -920,14 +1258,22 @@ def cmd_claims(name: str) -> bool:
     console.print("[dim]Actions:[/dim]")
     console.print("  [cyan]edit <#> <new statement>[/cyan]")
     console.print("  [cyan]delete <#>[/cyan]")
-    console.print("  [cyan]done[/cyan] (or just press Enter)")
+    console.print("  [cyan]done[/cyan] (or just press Enter) saves your edits")
     console.print()
 
+    # Edits are queued against a running claim count and written in one
+    # transaction at done; Ctrl+C discards them.
+    edits: list[storage.ClaimEdit] = []
+    remaining = len(claims)
     while True:
         try:
             action = _input("\033[1mclaims> \033[0m").strip()
-        except (EOFError, KeyboardInterrupt):
+        except EOFError:
             break
+        except KeyboardInterrupt:
+            if edits:
+                console.print(f"[dim]Discarded {len(edits)} unsaved edit(s).[/dim]")
+            return True
 
         if not action or action.lower() == "done":
             break
@@ -948,9 +1294,8 @@ def cmd_claims(name: str) -> bool:
             if len(new_stmt) < 10:
                 console.print("[red]Statement too short.[/red]")
                 continue
-            if storage.update_cached_claim(
-                concept["id"], idx, new_stmt
-            ):
+            if 0 <= idx < remaining:
+                edits.append(storage.ClaimEdit("replace", idx, new_stmt))
                 console.print(f"[green]OK[/green] Claim {idx + 1} updated.")
             else:
                 console.print(f"[red]Claim {idx + 1} not found.[/red]")
@@ -963,14 +1308,15 @@ def cmd_claims(name: str) -> bool:
                 continue
 
             # Don't allow deleting the last claim
-            current = storage.get_cached_claims(concept["id"])
-            if current and len(current) <= 1:
+            if remaining <= 1:
                 console.print(
                     "[red]Can't delete the last claim.[/red]"
                 )
                 continue
 
-            if storage.delete_cached_claim(concept["id"], idx):
+            if 0 <= idx < remaining:
+                edits.append(storage.ClaimEdit("delete", idx))
+                remaining -= 1
                 console.print(
                     f"[green]OK[/green] Claim {idx + 1} deleted."
                 )
@@ -979,37 +1325,129 @@ def cmd_claims(name: str) -> bool:
         else:
             console.print("[dim]Unknown action. Try edit, delete, or done.[/dim]")
 
+    if edits:
+        storage.apply_claim_edits(concept["id"], edits)
+        console.print(f"[dim]Saved {len(edits)} edit(s).[/dim]")
     return True
 
 
-def cmd_export(path: str) -> bool:
-    """Export all data to a JSON file."""
+EXPORT_FORMATS = ("json", "ndjson", "sqlite")
+SNAPSHOT_SUFFIXES = (".sqlite", ".sqlite3", ".db", ".sqlite.gz", ".sqlite3.gz", ".db.gz")
+
+
+def _pop_option(parts: list[str], name: str) -> str | None:
+    """Remove '<name> <value>' from ``parts``; the value, "" if missing, None if absent."""
+    if name not in parts:
+        return None
+    index = parts.index(name)
+    value = parts[index + 1] if index + 1 < len(parts) else ""
+    del parts[index : index + 2]
+    return value
+
+
+def _parse_export_args(args: str) -> tuple[str, str | None, str | None]:
+    """Split '/export' arguments into (path, --format value, --since value)."""
+    parts = args.split()
+    fmt = _pop_option(parts, "--format")
+    since = _pop_option(parts, "--since")
+    return " ".join(parts), fmt.lower() if fmt is not None else None, since
+
+
+def _is_ndjson_export(path: Path) -> bool:
+    """NDJSON exports start with a one-line {"table": "meta", ...} header."""
     import json
 
-    path = path.strip()
+    with open(path, encoding="utf-8") as f:
+        first_line = f.readline()
+    try:
+        header = json.loads(first_line)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(header, dict) and header.get("table") == "meta"
+
+
+def cmd_export(args: str) -> bool:
+    """Export all data, or the changes since a revision, to a JSON or NDJSON file."""
+    import json
+
+    path, fmt, since_arg = _parse_export_args(args.strip())
+    if fmt is None:
+        if path.lower().endswith(SNAPSHOT_SUFFIXES):
+            fmt = "sqlite"
+        elif path.lower().endswith((".ndjson", ".jsonl")):
+            fmt = "ndjson"
+        else:
+            fmt = "json"
+    if fmt not in EXPORT_FORMATS:
+        console.print(f"[yellow]Unknown format '{fmt}'. Use: {', '.join(EXPORT_FORMATS)}[/yellow]")
+        return True
+    since = None
+    if since_arg is not None:
+        if not since_arg.isdigit():
+            console.print("[yellow]Usage: /export \\[file] --since <revision>[/yellow]")
+            return True
+        if fmt == "sqlite":
+            console.print("[yellow]--since works with json and ndjson exports.[/yellow]")
+            return True
+        since = int(since_arg)
     if not path:
-        path = "learnlock-export.json"
+        path = f"learnlock-export.{fmt}"
 
-    data = storage.export_all_data()
     out = Path(_expand_user_path(path)).resolve()
+    if fmt == "sqlite":
+        return _export_snapshot(out)
     try:
         out.parent.mkdir(parents=True, exist_ok=True)
         with open(out, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2)
+            if fmt == "ndjson":
+                # Read first: a revision at or before the snapshot only makes
+                # the next delta repeat a few rows, never miss one.
+                revision = storage.current_revision()
+                counts = storage.export_ndjson(f, since=since)
+            else:
+                data = storage.export_all_data(since=since)
+                revision = data["revision"]
+                counts = {key: len(data[key]) for key in ("sources", "concepts")}
+                json.dump(data, f, indent=2)
     except OSError as e:
         console.print(f"[red]Error writing export: {e}[/red]")
         return True
 
-    console.print(f"[green]OK[/green] Exported to {out}")
+    label = f"Exported changes since revision {since}" if since is not None else "Exported"
+    console.print(f"[green]OK[/green] {label} to {out}")
+    console.print(
+        f"[dim]{counts['sources']} sources, "
+        f"{counts['concepts']} concepts[/dim]"
+    )
+    console.print(
+        f"[dim]Revision {revision}; next time export only what changed with "
+        f"/export --since {revision}[/dim]"
+    )
+    return True
+
+
+def _export_snapshot(out: Path) -> bool:
+    """Write a SQLite snapshot; a .gz path gets a gzipped one."""
+    try:
+        report = storage.export_snapshot(out, compress=out.name.lower().endswith(".gz"))
+    except OSError as e:
+        console.print(f"[red]Error writing export: {e}[/red]")
+        return True
+
+    console.print(f"[green]OK[/green] Exported snapshot to {out}")
+    console.print(
+        f"[dim]{report['sources']} sources, {report['concepts']} concepts, "
+        f"{_format_bytes(report['bytes'])}[/dim]"
+    )
     console.print(
-        f"[dim]{len(data['sources'])} sources, "
-        f"{len(data['concepts'])} concepts[/dim]"
+        f"[dim]Revision {report['revision']}; next time export only what changed with "
+        f"/export --since {report['revision']}[/dim]"
     )
     return True
 
 
 def cmd_import(path: str) -> bool:
-    """Import data from a JSON export file."""
+    """Import data from a JSON, NDJSON or SQLite snapshot export file."""
     import json
 
     path = path.strip()
@@ -1023,14 +1461,18 @@ def cmd_import(path: str) -> bool:
         return True
 
     try:
-        with open(resolved, encoding="utf-8") as f:
-            data = json.load(f)
-    except (json.JSONDecodeError, OSError) as e:
+        if storage.is_snapshot(resolved):
+            result = storage.import_snapshot(resolved)
+        elif _is_ndjson_export(resolved):
+            with open(resolved, encoding="utf-8") as f:
+                result = storage.import_ndjson(f)
+        else:
+            with open(resolved, encoding="utf-8") as f:
+                data = json.load(f)
+            result = storage.import_all_data(data)
+    except (json.JSONDecodeError, UnicodeDecodeError, OSError) as e:
         console.print(f"[red]Error reading file: {e}[/red]")
         return True
-
-    try:
-        result = storage.import_all_data(data)
     except storage.ImportValidationError as e:
         console.print(f"[red]{e}[/red]")
         return True
@@ -1149,6 +1591,42 @@ def cmd_config() -> bool:
     return True
 
 
+def _save_env(values: dict[str, str]) -> Path:
+    """Set ``values`` in ~/.learnlock/.env and in this process; returns the file."""
+    env_path = config.DATA_DIR / ".env"
+
+    # Create ~/.learnlock/ if needed
+    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+    # Read existing .env content
+    existing_lines = []
+    if env_path.exists():
+        existing_lines = env_path.read_text().splitlines()
+
+    # Replace or append each value
+    pending = dict(values)
+    new_lines = []
+    for line in existing_lines:
+        env_name = line.strip().partition("=")[0]
+        if env_name in pending:
+            new_lines.append(f"{env_name}={pending.pop(env_name)}")
+        else:
+            new_lines.append(line)
+    new_lines.extend(f"{env_name}={value}" for env_name, value in pending.items())
+
+    env_path.write_text("\n".join(new_lines) + "\n")
+
+    # Set restrictive permissions (owner read/write only)
+    try:
+        env_path.chmod(0o600)
+    except OSError:
+        pass
+
+    # Activate immediately in current session
+    os.environ.update(values)
+    return env_path
+
+
 def cmd_key(args: str) -> bool:
     """Set an API key. Usage: /key groq <key> or /key gemini <key>"""
     parts = args.strip().split(maxsplit=1)
@@ -1181,38 +1659,7 @@ def cmd_key(args: str) -> bool:
         return True
 
     env_name = key_map[provider]
-    env_path = config.DATA_DIR / ".env"
-
-    # Create ~/.learnlock/ if needed
-    config.DATA_DIR.mkdir(parents=True, exist_ok=True)
-
-    # Read existing .env content
-    existing_lines = []
-    if env_path.exists():
-        existing_lines = env_path.read_text().splitlines()
-
-    # Replace or append the key
-    found = False
-    new_lines = []
-    for line in existing_lines:
-        if line.strip().startswith(f"{env_name}="):
-            new_lines.append(f"{env_name}={key_value}")
-            found = True
-        else:
-            new_lines.append(line)
-    if not found:
-        new_lines.append(f"{env_name}={key_value}")
-
-    env_path.write_text("\n".join(new_lines) + "\n")
-
-    # Set restrictive permissions (owner read/write only)
-    try:
-        env_path.chmod(0o600)
-    except OSError:
-        pass
-
-    # Activate immediately in current session
-    os.environ[env_name] = key_value
+    env_path = _save_env({env_name: key_value})
 
     masked = key_value[:6] + "..." + key_value[-4:]
     console.print(
@@ -1240,6 +1687,12 @@ COMMANDS: dict[str, Callable] = {
     "add": lambda args: cmd_add(args),
     "study": lambda args: cmd_study(),
     "stats": lambda args: cmd_stats(),
+    "storage": lambda args: cmd_storage(),
+    "maintain": lambda args: cmd_maintain(args),
+    "reschedule": lambda args: cmd_reschedule(args),
+    "tune": lambda args: cmd_tune(args),
+    "forecast": lambda args: cmd_forecast(args),
+    "search": lambda args: cmd_search(args),
     "list": lambda args: cmd_list(args),
     "ls": lambda args: cmd_list(args),
     "due": lambda args: cmd_due(),
@@ -1370,23 +1823,27 @@ def cli(
 
     from .hud import set_gentle_mode
 
-    auto_gentle = storage.get_stats()["successful_reviews"] < 5
-    set_gentle_mode(gentle or auto_gentle)
-
-    if print_mode and prompt:
-        # Non-interactive mode
-        handle_input(prompt)
-    elif prompt:
-        # Single command then interactive
-        console.clear()
-        _print_banner()
-        console.print()
-        handle_input(prompt)
-        console.print()
-        interactive_mode()
-    else:
-        # Interactive mode
-        interactive_mode()
+    try:
+        auto_gentle = storage.count_successful_reviews() < 5
+        set_gentle_mode(gentle or auto_gentle)
+        storage.maintain_if_needed()
+
+        if print_mode and prompt:
+            # Non-interactive mode
+            handle_input(prompt)
+        elif prompt:
+            # Single command then interactive
+            console.clear()
+            _print_banner()
+            console.print()
+            handle_input(prompt)
+            console.print()
+            interactive_mode()
+        else:
+            # Interactive mode
+            interactive_mode()
+    finally:
+        storage.close()
 
 
 def main():
@@ -32,6 +32,17 @@ def _float(env_var: str, default: float) -> float:
         return default
 
 
+def _floats(env_var: str) -> tuple[float, ...] | None:
+    """Parse comma-separated floats from an environment variable, returning None on failure."""
+    raw = os.getenv(env_var)
+    if not raw:
+        return None
+    try:
+        return tuple(float(part) for part in raw.split(","))
+    except ValueError:
+        return None
+
+
 # ============ PATHS ============
 DATA_DIR = Path(os.getenv("LEARNLOCK_DATA_DIR", Path.home() / ".learnlock"))
 DB_PATH = DATA_DIR / "data.db"
@@ -58,12 +69,53 @@ AUTO_EXPORT_DUELS = os.getenv("LEARNLOCK_AUTO_EXPORT_DUELS", "0").lower() in {
     "on",
 }
 
+# ============ SQLITE TUNING ============
+SQLITE_CACHE_SIZE_KB = _int("LEARNLOCK_SQLITE_CACHE_SIZE_KB", 16384)
+SQLITE_MMAP_SIZE = _int("LEARNLOCK_SQLITE_MMAP_SIZE", 64 * 1024 * 1024)
+SQLITE_TEMP_STORE = os.getenv("LEARNLOCK_SQLITE_TEMP_STORE", "memory").lower()
+# Run every storage write on one background thread per process instead of the caller's.
+SQLITE_WRITE_QUEUE = os.getenv("LEARNLOCK_SQLITE_WRITE_QUEUE", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+# Startup runs a maintenance pass when the WAL or the free-page share grows past these.
+MAINTAIN_WAL_BYTES = _int("LEARNLOCK_MAINTAIN_WAL_BYTES", 32 * 1024 * 1024)
+MAINTAIN_FREE_RATIO = _float("LEARNLOCK_MAINTAIN_FREE_RATIO", 0.25)
+
+# ============ REVIEW LOG ============
+# Maintenance moves the free text of older reviews to gzip archives next to the
+# database; scores and stats are kept, but exports no longer carry the text.
+# 0 (the default) keeps the text forever.
+REVIEW_TEXT_RETENTION_DAYS = _int("LEARNLOCK_REVIEW_TEXT_RETENTION_DAYS", 0)
+
 # ============ SPACED REPETITION (SM-2) ============
 SM2_INITIAL_EASE = _float("LEARNLOCK_SM2_INITIAL_EASE", 2.5)
 SM2_INITIAL_INTERVAL = _float("LEARNLOCK_SM2_INITIAL_INTERVAL", 1.0)
 SM2_MIN_EASE = _float("LEARNLOCK_SM2_MIN_EASE", 1.3)
 SM2_MAX_INTERVAL = _float("LEARNLOCK_SM2_MAX_INTERVAL", 180)
 
+# ============ SCHEDULER ENGINE ============
+# "sm2" (above) or "fsrs"; FSRS reuses SM2_INITIAL_INTERVAL/SM2_MAX_INTERVAL as bounds.
+SCHEDULER = os.getenv("LEARNLOCK_SCHEDULER", "sm2").lower()
+# Recall probability FSRS schedules the next review at.
+FSRS_RETENTION = _float("LEARNLOCK_FSRS_RETENTION", 0.9)
+# 17 comma-separated weights, as /tune writes them; unset uses the FSRS-4.5 defaults.
+FSRS_WEIGHTS = _floats("LEARNLOCK_FSRS_WEIGHTS")
+
+# ============ LOAD SMOOTHING ============
+# Move each review's next due date, within a window proportional to its
+# interval, onto the day with the fewest concepts due.
+LOAD_BALANCE = os.getenv("LEARNLOCK_LOAD_BALANCE", "0").lower() in {
+    "1",
+    "true",
+    "yes",
+    "on",
+}
+# New concepts that may fall due per UTC day; the rest queue onto later days. 0 = no cap.
+NEW_CONCEPTS_PER_DAY = _int("LEARNLOCK_NEW_CONCEPTS_PER_DAY", 0)
+
 # ============ MASTERY THRESHOLDS ============
 MASTERY_MIN_EASE = _float("LEARNLOCK_MASTERY_MIN_EASE", 2.5)
 MASTERY_MIN_REVIEWS = _int("LEARNLOCK_MASTERY_MIN_REVIEWS", 3)
@@ -87,6 +139,9 @@ MAX_FEEDBACK_LENGTH = _int("LEARNLOCK_MAX_FEEDBACK_LENGTH", 500)
 MAX_COVERED_MISSED_ITEMS = _int("LEARNLOCK_MAX_COVERED_MISSED_ITEMS", 5)
 MAX_COVERED_MISSED_LENGTH = _int("LEARNLOCK_MAX_COVERED_MISSED_LENGTH", 200)
 
+# ============ DISPLAY ============
+LIST_PAGE_SIZE = _int("LEARNLOCK_LIST_PAGE_SIZE", 40)
+
 # ============ OCR ============
 MAX_IMAGE_FILE_BYTES = _int("LEARNLOCK_MAX_IMAGE_FILE_BYTES", 10 * 1024 * 1024)  # 10MB
 
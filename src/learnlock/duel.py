@@ -652,7 +652,12 @@ def primary_error(errors: list[BeliefError]) -> BeliefError | None:
     )
 
 
-def get_or_create_claims(ground_truth: str, concept_id: int | None = None) -> list[Claim]:
+def get_or_create_claims(
+    ground_truth: str,
+    concept_id: int | None = None,
+    *,
+    session: storage.Session | None = None,
+) -> list[Claim]:
     """Load cached claims when possible, otherwise parse and persist them."""
     cached = storage.get_cached_claims(concept_id) if concept_id is not None else None
     if cached:
@@ -663,20 +668,48 @@ def get_or_create_claims(ground_truth: str, concept_id: int | None = None) -> li
 
     claims = _parse_claims(ground_truth)
     if concept_id is not None and claims:
-        storage.save_cached_claims(
-            concept_id,
-            [
-                {
-                    "statement": claim.statement,
-                    "claim_type": claim.claim_type,
-                    "claim_index": claim.index,
-                }
-                for claim in claims
-            ],
-        )
+        with storage.session(session):
+            storage.save_cached_claims(
+                concept_id,
+                [
+                    {
+                        "statement": claim.statement,
+                        "claim_type": claim.claim_type,
+                        "claim_index": claim.index,
+                    }
+                    for claim in claims
+                ],
+            )
     return claims
 
 
+def record_outcome(
+    concept_id: int,
+    reveal: dict,
+    score: int,
+    *,
+    session: storage.Session | None = None,
+) -> str:
+    """Persist a finished duel's memory and explanation. Returns the error summary."""
+    errors_str = (
+        "; ".join(e.description for e in reveal["errors"][:2]) if reveal["errors"] else ""
+    )
+    last_attack = reveal["attacks"][-1] if reveal.get("attacks") else ""
+    with storage.session(session):
+        storage.save_duel_memory(concept_id, reveal["belief"], errors_str, last_attack)
+        storage.add_explanation(
+            concept_id=concept_id,
+            text=" | ".join(reveal["evidence"]),
+            score=score,
+            covered=None,
+            missed=errors_str,
+            feedback=reveal["belief"],
+            turns=reveal.get("turns"),
+            error_codes=",".join(dict.fromkeys(e.type for e in reveal["errors"])) or None,
+        )
+    return errors_str
+
+
 class DuelEngine:
     """Adversarial Socratic interrogation engine."""
 
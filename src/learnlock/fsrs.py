@@ -0,0 +1,136 @@
+"""FSRS-style scheduler engine: per-concept memory stability and difficulty.
+
+Stability S is the number of days until recall drops to 90%; difficulty D
+(1-10) sets how fast S grows. A review predicts recall R from the days since
+the last one on FSRS-4.5's power-law forgetting curve, R = (1 + 19/81 t/S)^-0.5,
+then updates S and D, and the next review is scheduled when R is expected to
+fall to FSRS_RETENTION. The curve, the update rules and the default weights
+are those of FSRS-4.5; ``scheduler.tune()`` fits the weights to the
+review log. Scores map to FSRS grades: below SCORE_PASS_THRESHOLD is
+"again" (1), the threshold itself "hard" (2), one above "good" (3) and
+anything higher "easy" (4).
+"""
+
+import math
+from typing import Any, Sequence
+
+from . import config
+from .scheduler import Schedule
+
+DEFAULT_WEIGHTS = (
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031, 1.6474,
+    0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755,
+)
+# Range each weight is kept in while fitting (from the FSRS-4.5 optimizer).
+WEIGHT_BOUNDS = (
+    (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (0.1, 100.0), (1.0, 10.0), (0.1, 5.0),
+    (0.1, 5.0), (0.0, 0.5), (0.0, 3.0), (0.1, 0.8), (0.01, 2.5), (0.5, 5.0),
+    (0.01, 0.2), (0.01, 0.9), (0.01, 2.0), (0.0, 1.0), (1.0, 6.0),
+)
+MIN_STABILITY = 0.01
+# FSRS-4.5 forgetting curve R = (1 + FACTOR * t / S) ** DECAY; R(S) = 0.9.
+DECAY = -0.5
+FACTOR = 19 / 81
+
+
+class FSRSEngine:
+    """FSRS-4.5 rules with configurable weights and target retention."""
+
+    name = "fsrs"
+
+    def __init__(self, weights: Sequence[float] | None = None, retention: float = 0.9):
+        weights = tuple(weights or DEFAULT_WEIGHTS)
+        if len(weights) != len(DEFAULT_WEIGHTS):
+            raise ValueError(f"FSRS needs {len(DEFAULT_WEIGHTS)} weights, got {len(weights)}")
+        if not 0 < retention < 1:
+            raise ValueError(f"FSRS retention must be between 0 and 1, got {retention}")
+        self.weights = weights
+        self.retention = retention
+
+    def initial(self) -> Schedule:
+        return Schedule(config.SM2_INITIAL_EASE, 0.0, 0)
+
+    def current(self, xp: Any, state: Schedule) -> Schedule:
+        """Stored progress as FSRS state.
+
+        Rows SM-2 wrote (or that came from a JSON import) carry no stability:
+        a concept never passed counts as new, otherwise S is the stability
+        its current interval implies and D starts at a "good" first review's.
+        """
+        stability = xp.where(
+            xp.isnan(state.stability),
+            xp.where(
+                state.review_count > 0,
+                xp.maximum(MIN_STABILITY, state.interval_days / self._interval_factor()),
+                math.nan,
+            ),
+            state.stability,
+        )
+        difficulty = xp.where(
+            xp.isnan(stability),
+            math.nan,
+            xp.where(
+                xp.isnan(state.difficulty), self._initial_difficulty(xp, 3), state.difficulty
+            ),
+        )
+        return state._replace(stability=stability, difficulty=difficulty)
+
+    def step(self, xp: Any, state: Schedule, score: Any, elapsed: Any) -> Schedule:
+        w = self.weights
+        stability, difficulty = state.stability, state.difficulty
+        new = xp.isnan(stability)
+        grade = xp.where(
+            score < config.SCORE_PASS_THRESHOLD,
+            1,
+            xp.minimum(4, score - config.SCORE_PASS_THRESHOLD + 2),
+        )
+        recall = self.recall(xp, state, elapsed)
+
+        hard = xp.where(grade == 2, w[15], 1.0)
+        easy = xp.where(grade == 4, w[16], 1.0)
+        recalled = stability * (
+            1
+            + math.exp(w[8])
+            * (11 - difficulty)
+            * stability ** -w[9]
+            * (xp.exp(w[10] * (1 - recall)) - 1)
+            * hard
+            * easy
+        )
+        forgotten = xp.minimum(
+            stability,
+            w[11]
+            * difficulty ** -w[12]
+            * ((stability + 1) ** w[13] - 1)
+            * xp.exp(w[14] * (1 - recall)),
+        )
+        first = xp.where(
+            grade < 3, xp.where(grade == 1, w[0], w[1]), xp.where(grade == 3, w[2], w[3])
+        )
+        stability = xp.where(new, first, xp.where(grade > 1, recalled, forgotten))
+        stability = xp.maximum(MIN_STABILITY, stability)
+
+        # Mean reversion towards a "good" first review's difficulty.
+        reverted = w[7] * self._initial_difficulty(xp, 3) + (1 - w[7]) * (
+            difficulty - w[6] * (grade - 3)
+        )
+        difficulty = xp.where(new, self._initial_difficulty(xp, grade), reverted)
+        difficulty = xp.minimum(10.0, xp.maximum(1.0, difficulty))
+
+        interval = xp.minimum(
+            config.SM2_MAX_INTERVAL,
+            xp.maximum(config.SM2_INITIAL_INTERVAL, stability * self._interval_factor()),
+        )
+        count = xp.where(grade > 1, state.review_count + 1, 0)
+        return Schedule(state.ease_factor, interval, count, stability, difficulty)
+
+    def recall(self, xp: Any, state: Schedule, elapsed: Any) -> Any:
+        return (1 + FACTOR * elapsed / state.stability) ** DECAY
+
+    def _initial_difficulty(self, xp: Any, grade: Any) -> Any:
+        w = self.weights
+        return xp.minimum(10.0, xp.maximum(1.0, w[4] - (grade - 3) * w[5]))
+
+    def _interval_factor(self) -> float:
+        """Days per unit of stability until recall falls to the target retention."""
+        return (self.retention ** (1 / DECAY) - 1) / FACTOR
@@ -1,6 +1,10 @@
-"""SM-2 Spaced Repetition Scheduler."""
+"""Spaced repetition scheduler: SM-2 by default, FSRS optionally (see fsrs.py)."""
 
-from datetime import datetime, timedelta, timezone
+import heapq
+import math
+from datetime import date, datetime, timedelta, timezone
+from itertools import chain
+from typing import Any, NamedTuple, Protocol
 
 from . import config, storage
 
@@ -9,17 +13,135 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def update_after_review(concept_id: int, score: int) -> dict:
+# ============ ENGINES ============
+
+
+class Schedule(NamedTuple):
+    """The progress fields a scheduler engine reads and writes.
+
+    Fields hold scalars for one concept or NumPy arrays for many; a
+    ``stability``/``difficulty`` of NaN means the engine has no state yet.
+    """
+
+    ease_factor: Any
+    interval_days: Any
+    review_count: Any
+    stability: Any = math.nan
+    difficulty: Any = math.nan
+
+
+class _ScalarOps:
+    """The NumPy functions engine rules use, for plain floats."""
+
+    exp = staticmethod(math.exp)
+    isnan = staticmethod(math.isnan)
+    minimum = staticmethod(min)
+    maximum = staticmethod(max)
+
+    @staticmethod
+    def where(condition, if_true, if_false):
+        return if_true if condition else if_false
+
+
+class SchedulerEngine(Protocol):
+    """A scheduling model.
+
+    ``step`` and ``recall`` are written against ``xp``: ``_ScalarOps`` for a
+    live review, ``numpy`` when reschedule_all() and tune() replay every
+    concept at once, so both paths share one set of rules. Scores arrive
+    clamped to SCORE_MIN..SCORE_MAX; ``elapsed`` is days since the concept's
+    previous review.
+    """
+
+    name: str
+
+    def initial(self) -> Schedule:
+        """State before a concept's first review."""
+        ...
+
+    def current(self, xp: Any, state: Schedule) -> Schedule:
+        """Stored progress as this engine's state (it may have been written by another)."""
+        ...
+
+    def step(self, xp: Any, state: Schedule, score: Any, elapsed: Any) -> Schedule:
+        """Apply one review."""
+        ...
+
+    def recall(self, xp: Any, state: Schedule, elapsed: Any) -> Any:
+        """Predicted probability of recalling the concept ``elapsed`` days after a review."""
+        ...
+
+
+class SM2Engine:
+    """SM-2: an ease factor per concept that grows or shrinks the interval."""
+
+    name = "sm2"
+    second_interval = 6.0  # days after the second consecutive pass
+    lapse_penalty = 0.2  # ease lost on a failed review
+
+    def initial(self) -> Schedule:
+        return Schedule(config.SM2_INITIAL_EASE, 0.0, 0)
+
+    def current(self, xp: Any, state: Schedule) -> Schedule:
+        return state
+
+    def step(self, xp: Any, state: Schedule, score: Any, elapsed: Any) -> Schedule:
+        ease, interval, count = state.ease_factor, state.interval_days, state.review_count
+        passed = score >= config.SCORE_PASS_THRESHOLD
+        # SM-2 formula: EF' = EF + (0.1 - (5-q) * (0.08 + (5-q) * 0.02))
+        q = config.SCORE_MAX - score
+        grown = xp.where(
+            count == 0,
+            config.SM2_INITIAL_INTERVAL,
+            xp.where(count == 1, self.second_interval, interval * ease),
+        )
+        ease = xp.maximum(
+            config.SM2_MIN_EASE,
+            xp.where(passed, ease + (0.1 - q * (0.08 + q * 0.02)), ease - self.lapse_penalty),
+        )
+        # Failed - reset
+        interval = xp.where(passed, grown, config.SM2_INITIAL_INTERVAL)
+        interval = xp.minimum(
+            config.SM2_MAX_INTERVAL, xp.maximum(config.SM2_INITIAL_INTERVAL, interval)
+        )
+        return Schedule(ease, interval, xp.where(passed, count + 1, 0))
+
+    def recall(self, xp: Any, state: Schedule, elapsed: Any) -> Any:
+        # SM-2 has no forgetting curve; assume the interval targets 90% recall.
+        return 1 / (1 + elapsed / (9 * xp.maximum(state.interval_days, 1e-3)))
+
+
+def get_engine() -> SchedulerEngine:
+    """The engine LEARNLOCK_SCHEDULER selects: "sm2" (default) or "fsrs"."""
+    if config.SCHEDULER == "fsrs":
+        from .fsrs import FSRSEngine
+
+        return FSRSEngine(config.FSRS_WEIGHTS, config.FSRS_RETENTION)
+    return SM2Engine()
+
+
+def update_after_review(
+    concept_id: int,
+    score: int,
+    *,
+    session: storage.Session | None = None,
+) -> dict:
     """Update progress after a review based on score.
-    SM-2 Algorithm:
+    The configured engine (see get_engine()) computes the new schedule:
     - score >= SCORE_PASS_THRESHOLD: Pass, increase interval
     - score < SCORE_PASS_THRESHOLD: Fail, reset interval
     Args:
         concept_id: The concept that was reviewed
         score: Score from SCORE_MIN to SCORE_MAX
+        session: Optional storage session to join instead of committing alone
     Returns:
         Updated progress info dict
     """
+    with storage.session(session):
+        return _update_after_review(concept_id, score)
+
+
+def _update_after_review(concept_id: int, score: int) -> dict:
     progress = storage.get_progress(concept_id)
     if not progress:
         raise ValueError(f"No progress found for concept {concept_id}")
@@ -27,56 +149,91 @@ def update_after_review(concept_id: int, score: int) -> dict:
     # Clamp score to valid range
     score = max(config.SCORE_MIN, min(config.SCORE_MAX, score))
 
-    ease = progress["ease_factor"]
+    engine = get_engine()
+    now = _utcnow()
     interval = progress["interval_days"]
-    review_count = progress["review_count"]
-
-    if score >= config.SCORE_PASS_THRESHOLD:
-        # Passed - increase interval using SM-2
-        if review_count == 0:
-            interval = config.SM2_INITIAL_INTERVAL
-        elif review_count == 1:
-            interval = 6.0
-        else:
-            interval = interval * ease
-
-        # Update ease factor based on score
-        # SM-2 formula: EF' = EF + (0.1 - (5-q) * (0.08 + (5-q) * 0.02))
-        ease = ease + (
-            0.1 - (config.SCORE_MAX - score) * (0.08 + (config.SCORE_MAX - score) * 0.02)
-        )
-        ease = max(config.SM2_MIN_EASE, ease)
-        review_count += 1
-    else:
-        # Failed - reset
-        review_count = 0
-        interval = config.SM2_INITIAL_INTERVAL
-        ease = max(config.SM2_MIN_EASE, ease - 0.2)
-
-    # Cap interval
-    interval = min(config.SM2_MAX_INTERVAL, max(config.SM2_INITIAL_INTERVAL, interval))
-
-    due_date = _utcnow() + timedelta(days=interval)
+    reviewed_at = datetime.fromisoformat(progress["due_date"]) - timedelta(days=interval)
+    elapsed = max(0.0, (now - reviewed_at).total_seconds() / 86_400)
+    state = engine.step(
+        _ScalarOps,
+        engine.current(
+            _ScalarOps,
+            Schedule(
+                progress["ease_factor"],
+                interval,
+                progress["review_count"],
+                _nan(progress["stability"]),
+                _nan(progress["difficulty"]),
+            )
+        ),
+        score,
+        elapsed,
+    )
+    interval = state.interval_days
+    if config.LOAD_BALANCE:
+        interval = _balanced_interval(now, interval)
+    due_date = now + timedelta(days=interval)
 
     storage.update_progress(
         concept_id=concept_id,
-        ease_factor=ease,
+        ease_factor=state.ease_factor,
         interval_days=interval,
         due_date=due_date,
-        review_count=review_count,
+        review_count=state.review_count,
         last_score=score,
+        stability=_none(state.stability),
+        difficulty=_none(state.difficulty),
     )
 
     return {
-        "ease_factor": round(ease, 2),
+        "ease_factor": round(state.ease_factor, 2),
         "interval_days": round(interval, 1),
         "due_date": due_date.isoformat(),
-        "review_count": review_count,
+        "review_count": state.review_count,
         "next_review": _format_interval(interval),
         "passed": score >= config.SCORE_PASS_THRESHOLD,
     }
 
 
+def _nan(value: float | None) -> float:
+    return math.nan if value is None else value
+
+
+def _none(value: float) -> float | None:
+    return None if math.isnan(value) else value
+
+
+# ============ LOAD SMOOTHING ============
+
+
+def _fuzz_days(interval: float) -> float:
+    """How far a load-balanced due date may move either way: none below 2.5
+    days, then 15% of the interval up to a week, 10% up to 20 days and 5% beyond."""
+    if interval < 2.5:
+        return 0.0
+    return (
+        1.0
+        + 0.15 * (min(interval, 7.0) - 2.5)
+        + 0.10 * max(0.0, min(interval, 20.0) - 7.0)
+        + 0.05 * max(0.0, interval - 20.0)
+    )
+
+
+def _balanced_interval(now: datetime, interval: float) -> float:
+    """``interval`` moved by whole days, within its fuzz window, to the UTC
+    day with the fewest concepts due (the nearest such day on a tie)."""
+    fuzz = _fuzz_days(interval)
+    if not fuzz:
+        return interval
+    low = max(config.SM2_INITIAL_INTERVAL, interval - fuzz)
+    high = min(max(config.SM2_MAX_INTERVAL, interval), interval + fuzz)
+    today = now.timestamp() / 86_400
+    first, last, target = (math.floor(today + days) for days in (low, high, interval))
+    loads = storage.get_due_histogram(first, last - first + 1)
+    best = min(range(first, last + 1), key=lambda day: (loads[day - first], abs(day - target)))
+    return min(high, max(low, interval + best - target))
+
+
 def _format_interval(days: float) -> str:
     """Format interval as human-readable string."""
     if days < 1:
@@ -95,12 +252,13 @@ def _format_interval(days: float) -> str:
         return f"in {int(days)} days"
 
 
-def get_next_due():
+def get_next_due(*, session: storage.Session | None = None):
     """Get the next concept due for review.
     Returns:
         Concept dict with progress info, or None if nothing due
     """
-    due = storage.get_due_concepts(limit=1)
+    with storage.session(session):
+        due = storage.get_due_concepts(limit=1)
     return due[0] if due else None
 
 
@@ -109,6 +267,78 @@ def get_all_due() -> list[dict]:
     return storage.get_due_concepts()
 
 
+class StudyQueue:
+    """The concepts due in a study session, held in memory.
+
+    Loads every due concept and its source once, then serves them soonest
+    first from a heap keyed by due date. After each review, reviewed() moves
+    or drops the concept in place; len() is the number still due. The queue
+    reloads only when another connection has written to the database (its
+    ``PRAGMA data_version`` moved) or when a concept not yet due at load
+    time has since fallen due.
+    """
+
+    def __init__(self):
+        self._heap: list[tuple[datetime, int]] = []
+        self._due: dict[int, dict] = {}
+        self._keys: dict[int, datetime] = {}
+        self._sources: dict[int, dict] = {}
+        self._version = None
+        self._next_due: datetime | None = None
+        self.refresh()
+
+    def refresh(self) -> None:
+        """Reload the due concepts and their sources from the database."""
+        self._version, due, self._sources, self._next_due = storage.get_study_queue()
+        self._due = {row["id"]: row for row in due}
+        self._keys = {row["id"]: datetime.fromisoformat(row["due_date"]) for row in due}
+        self._heap = [(due_date, concept_id) for concept_id, due_date in self._keys.items()]
+        heapq.heapify(self._heap)
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def peek(self) -> dict | None:
+        """The concept due soonest (as a get_due_concepts() row), or None."""
+        if storage.get_data_version() != self._version or (
+            self._next_due is not None and self._next_due <= _utcnow()
+        ):
+            self.refresh()
+        heap = self._heap
+        while heap:
+            due_date, concept_id = heap[0]
+            if self._keys.get(concept_id) == due_date:
+                return self._due[concept_id]
+            heapq.heappop(heap)  # dropped, or superseded by a later push
+        return None
+
+    def source(self, source_id: int) -> dict | None:
+        """A due concept's source row (as get_source() returns it)."""
+        if source_id not in self._sources:
+            self._sources[source_id] = storage.get_source(source_id)
+        return self._sources[source_id]
+
+    def reviewed(self, concept_id: int, due_date: datetime | str) -> None:
+        """Reschedule ``concept_id``: requeue it if still due, else drop it."""
+        if isinstance(due_date, str):
+            due_date = datetime.fromisoformat(due_date)
+        if concept_id not in self._due:
+            return
+        if due_date > _utcnow():
+            self.discard(concept_id)
+            if self._next_due is None or due_date < self._next_due:
+                self._next_due = due_date
+            return
+        self._due[concept_id]["due_date"] = due_date.isoformat()
+        self._keys[concept_id] = due_date
+        heapq.heappush(self._heap, (due_date, concept_id))
+
+    def discard(self, concept_id: int) -> None:
+        """Take ``concept_id`` out of the queue (skipped or deleted)."""
+        self._due.pop(concept_id, None)
+        self._keys.pop(concept_id, None)
+
+
 def get_study_summary() -> dict:
     """Get summary of study status."""
     stats = storage.get_stats()
@@ -121,3 +351,478 @@ def get_study_summary() -> dict:
         "avg_score": stats["avg_score"],
         "skipped": stats["skipped_concepts"],
     }
+
+
+# ============ BULK RESCHEDULING ============
+
+_DAY_MS = 86_400_000
+# Due dates closer than this to the stored one do not count as a change; a
+# live review stamps its event and its due date a few milliseconds apart.
+_DUE_TOLERANCE_MS = 60_000
+# Likewise relative differences below this in ease, interval or engine state.
+_STATE_RTOL = 1e-6
+
+
+class ScheduleChange(NamedTuple):
+    concept_id: int
+    ease_before: float
+    ease_after: float
+    interval_before: float
+    interval_after: float
+    due_before: datetime
+    due_after: datetime
+
+
+def reschedule_all(*, dry_run: bool = False) -> dict:
+    """Recompute every concept's schedule under the current engine and settings.
+
+    Each concept's scored reviews are replayed from the review log through
+    get_engine(), starting from its initial state, and its next due date is
+    counted from the last review. A replay must end with the stored
+    review_count (the passes since the last lapse); when it does not, the log
+    is missing reviews (progress imported or written without a logged event)
+    and, like concepts without scored reviews, the concept keeps its state,
+    clamped to SM2_MIN_EASE and SM2_MAX_INTERVAL. Dates come out
+    exact: LOAD_BALANCE only moves them as reviews happen. The replay runs
+    vectorised across all concepts with NumPy when it is installed
+    (``pip install learn-lock[numpy]``), else in pure Python; changed rows are
+    written with one executemany.
+
+    Returns counts of concepts, changed, moved earlier and later, the replay
+    used ("numpy" or "python") and the scheduler engine's name; a
+    ``dry_run`` writes nothing and adds the ScheduleChange list.
+    """
+    engine = get_engine()
+    progress, reviews = storage.get_schedule_inputs()
+    try:
+        import numpy  # noqa: F401
+
+        replay, changes = "numpy", _replay_numpy(engine, progress, reviews)
+    except ImportError:
+        replay, changes = "python", _replay_python(engine, progress, reviews)
+
+    result = {
+        "concepts": len(progress),
+        "changed": len(changes),
+        "earlier": sum(change[6] < change[5] for change in changes),
+        "later": sum(change[6] > change[5] for change in changes),
+        "engine": replay,
+        "scheduler": engine.name,
+    }
+    if dry_run:
+        result["changes"] = [
+            ScheduleChange(*change[:5], _from_ms(change[5]), _from_ms(change[6]))
+            for change in changes
+        ]
+    else:
+        storage.reschedule_progress(
+            (change[2], change[4], change[6], *change[7:], change[0]) for change in changes
+        )
+    return result
+
+
+def _from_ms(ms: int) -> datetime:
+    return datetime.fromtimestamp(ms / 1000, timezone.utc)
+
+
+# Both replays return the changed concepts as (concept_id, ease_before,
+# ease_after, interval_before, interval_after, due_before, due_after,
+# review_count, last_score, stability, difficulty) tuples, due dates in
+# epoch ms and missing engine state as None.
+
+
+def _replay_python(
+    engine: SchedulerEngine, progress: list[tuple], reviews: list[tuple]
+) -> list[tuple]:
+    replayed: dict[int, tuple] = {}
+    for concept_id, created_at, score in reviews:
+        state, _, reviewed_at = replayed.get(concept_id, (engine.initial(), None, created_at))
+        score = max(config.SCORE_MIN, min(config.SCORE_MAX, score))
+        elapsed = (created_at - reviewed_at) / _DAY_MS
+        replayed[concept_id] = (engine.step(_ScalarOps, state, score, elapsed), score, created_at)
+
+    changes = []
+    for concept_id, ease, interval, due, count, last_score, stability, difficulty in progress:
+        if concept_id in replayed and replayed[concept_id][0].review_count == count:
+            state, new_score, reviewed_at = replayed[concept_id]
+            new_due = reviewed_at + round(state.interval_days * _DAY_MS)
+        else:
+            state = Schedule(
+                max(config.SM2_MIN_EASE, ease),
+                min(config.SM2_MAX_INTERVAL, interval),
+                count,
+                _nan(stability),
+                _nan(difficulty),
+            )
+            new_due = due - round((interval - state.interval_days) * _DAY_MS)
+            new_score = last_score
+        new_stability, new_difficulty = _none(state.stability), _none(state.difficulty)
+        if (
+            not math.isclose(state.ease_factor, ease, rel_tol=_STATE_RTOL)
+            or not math.isclose(state.interval_days, interval, rel_tol=_STATE_RTOL)
+            or abs(new_due - due) > _DUE_TOLERANCE_MS
+            or (state.review_count, new_score) != (count, last_score)
+            or not _same(new_stability, stability)
+            or not _same(new_difficulty, difficulty)
+        ):
+            changes.append(
+                (concept_id, ease, state.ease_factor, interval, state.interval_days, due, new_due,
+                 state.review_count, new_score, new_stability, new_difficulty)
+            )
+    return changes
+
+
+def _same(a: float | None, b: float | None) -> bool:
+    if a is None or b is None:
+        return a is b
+    return math.isclose(a, b, rel_tol=_STATE_RTOL)
+
+
+class _Plan(NamedTuple):
+    """Scored reviews laid out for a vectorised replay (see _plan())."""
+
+    rows: Any  # state row of each review; reviews stay sorted by concept then time
+    times: Any
+    scores: Any  # clamped to SCORE_MIN..SCORE_MAX
+    elapsed: Any  # days since the concept's previous review, 0 for its first
+    starts: Any  # index of each replayed concept's first review
+    batches: list  # batch k holds every concept's k-th review
+
+
+def _plan(np: Any, ids: Any, reviews: list[tuple]) -> _Plan | None:
+    """Plan a replay of ``reviews`` onto the sorted concept ``ids`` (None: the reviewed ones)."""
+    events = np.fromiter(chain.from_iterable(reviews), np.float64, 3 * len(reviews))
+    events = events.reshape(-1, 3)
+    concepts = events[:, 0].astype(np.int64)
+    if ids is None:
+        ids = np.unique(concepts)
+    rows = np.searchsorted(ids, concepts)
+    known = rows < len(ids)
+    known[known] = ids[rows[known]] == concepts[known]
+    rows, events = rows[known], events[known]
+    if not len(rows):
+        return None
+    starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    times = events[:, 1]
+    elapsed = np.diff(times, prepend=times[0]) / _DAY_MS
+    elapsed[starts] = 0.0
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(np.r_[starts, len(rows)]))
+    order = np.argsort(rank, kind="stable")
+    bounds = np.searchsorted(rank[order], np.arange(rank.max() + 2))
+    return _Plan(
+        rows,
+        times,
+        np.clip(events[:, 2], config.SCORE_MIN, config.SCORE_MAX),
+        elapsed,
+        starts,
+        [order[start:stop] for start, stop in zip(bounds[:-1], bounds[1:])],
+    )
+
+
+def _run(np: Any, engine: SchedulerEngine, plan: _Plan, state: list, predict: bool = False):
+    """Replay ``plan`` into ``state``, one array per Schedule field indexed by row.
+
+    Step k applies every concept's k-th review at once. With ``predict``,
+    returns the recall the engine predicted before each review after a
+    concept's first, and whether that review passed.
+    """
+    predicted, passed = [], []
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        for k, batch in enumerate(plan.batches):
+            at, scores, elapsed = plan.rows[batch], plan.scores[batch], plan.elapsed[batch]
+            current = Schedule(*(column[at] for column in state))
+            if predict and k:
+                predicted.append(engine.recall(np, current, elapsed))
+                passed.append(scores >= config.SCORE_PASS_THRESHOLD)
+            for column, value in zip(state, engine.step(np, current, scores, elapsed)):
+                column[at] = value
+    if predict:
+        return np.concatenate(predicted or [np.empty(0)]), np.concatenate(passed or [np.empty(0)])
+    return None
+
+
+def _replay_numpy(
+    engine: SchedulerEngine, progress: list[tuple], reviews: list[tuple]
+) -> list[tuple]:
+    import numpy as np
+
+    if not progress:
+        return []
+    # None (no last score or engine state yet) becomes NaN; ids and epoch ms are exact in float64.
+    columns = np.array(progress, dtype=np.float64)
+    ids = columns[:, 0].astype(np.int64)
+    old_ease, old_interval, old_due, old_count, old_score, old_stability, old_difficulty = (
+        columns[:, 1:].T
+    )
+    ease = np.maximum(config.SM2_MIN_EASE, old_ease)
+    interval = np.minimum(config.SM2_MAX_INTERVAL, old_interval)
+    due = old_due - np.round((old_interval - interval) * _DAY_MS)
+    count, score = old_count.copy(), old_score.copy()
+    stability, difficulty = old_stability.copy(), old_difficulty.copy()
+
+    plan = _plan(np, ids, reviews)
+    if plan is not None:
+        columns = [ease, interval, count, stability, difficulty]
+        state = [column.copy() for column in columns]
+        replayed = plan.rows[plan.starts]
+        for column, value in zip(state, engine.initial()):
+            column[replayed] = value
+        _run(np, engine, plan, state)
+        last = np.r_[plan.starts[1:], len(plan.rows)] - 1
+        # Incomplete logs end on another review count; those concepts keep their state.
+        complete = state[2][replayed] == old_count[replayed]
+        replayed, last = replayed[complete], last[complete]
+        for column, value in zip(columns, state):
+            column[replayed] = value[replayed]
+        score[replayed] = plan.scores[last]
+        due[replayed] = plan.times[last] + np.round(interval[replayed] * _DAY_MS)
+
+    def differs(new, old):
+        return ~(np.isclose(new, old, rtol=_STATE_RTOL, atol=0) | (np.isnan(new) & np.isnan(old)))
+
+    changed = (
+        differs(ease, old_ease)
+        | differs(interval, old_interval)
+        | (np.abs(due - old_due) > _DUE_TOLERANCE_MS)
+        | (count != old_count)
+        | differs(score, old_score)
+        | differs(stability, old_stability)
+        | differs(difficulty, old_difficulty)
+    )
+    picked = np.flatnonzero(changed)
+
+    def optional(values, cast=float):
+        return [None if math.isnan(value) else cast(value) for value in values[picked].tolist()]
+
+    return list(
+        zip(
+            ids[picked].tolist(),
+            old_ease[picked].tolist(),
+            ease[picked].tolist(),
+            old_interval[picked].tolist(),
+            interval[picked].tolist(),
+            old_due[picked].astype(np.int64).tolist(),
+            due[picked].astype(np.int64).tolist(),
+            count[picked].astype(np.int64).tolist(),
+            optional(score, int),
+            optional(stability),
+            optional(difficulty),
+        )
+    )
+
+
+# ============ EVALUATION AND TUNING ============
+
+# Predictions (reviews after a concept's first) tune() needs before fitting.
+TUNE_MIN_REVIEWS = 50
+# Every TUNE_HOLDOUT-th concept (by id) is held out of the fit for evaluation.
+TUNE_HOLDOUT = 5
+# Factors each weight is tried at, one pass per tuple.
+_TUNE_STEPS = ((0.5, 0.8, 1.25, 2.0), (0.7, 0.9, 1.1, 1.4), (0.95, 1.05))
+
+
+def evaluate(
+    engine: SchedulerEngine | None = None, reviews: list[tuple] | None = None
+) -> dict | None:
+    """Compare an engine's predicted recall with the recorded scores.
+
+    Replays ``reviews`` (default: the review log) through ``engine``
+    (default: get_engine()) and, before every review after a concept's
+    first, takes the recall the engine predicts; a review scored at least
+    SCORE_PASS_THRESHOLD counts as recalled. Returns the number of
+    predictions, mean predicted and actual recall, log loss and the
+    calibration RMSE over ten predicted-recall bins, or None when there is
+    nothing to predict. Requires NumPy.
+    """
+    import numpy as np
+
+    if reviews is None:
+        reviews = storage.get_schedule_inputs()[1]
+    plan = _plan(np, None, reviews) if reviews else None
+    return _evaluate(np, engine or get_engine(), plan)
+
+
+def _evaluate(np: Any, engine: SchedulerEngine, plan: _Plan | None) -> dict | None:
+    if plan is None or len(plan.rows) == len(plan.starts):
+        return None
+    state = [np.full(plan.rows.max() + 1, value, np.float64) for value in engine.initial()]
+    predicted, passed = _run(np, engine, plan, state, predict=True)
+    p = np.clip(np.nan_to_num(predicted, nan=0.5), 1e-6, 1 - 1e-6)
+    y = passed.astype(np.float64)
+    bins = np.minimum((p * 10).astype(np.int64), 9)
+    counts = np.bincount(bins, minlength=10)
+    filled = counts > 0
+    gap = (np.bincount(bins, p, 10) - np.bincount(bins, y, 10))[filled] / counts[filled]
+    return {
+        "reviews": len(p),
+        "predicted": float(p.mean()),
+        "actual": float(y.mean()),
+        "log_loss": float(-np.mean(y * np.log(p) + (1 - y) * np.log1p(-p))),
+        "rmse": float(np.sqrt(np.sum(counts[filled] * gap**2) / len(p))),
+    }
+
+
+def tune(reviews: list[tuple] | None = None) -> dict | None:
+    """Fit FSRS weights to the review log and compare engines on held-out concepts.
+
+    The weights are fitted by coordinate grid search on log loss: each pass
+    tries every weight at each of a few factors of its current value (kept
+    within fsrs.WEIGHT_BOUNDS), keeping any that improves the fit. Every
+    TUNE_HOLDOUT-th concept is left out of the fit, and SM-2, default FSRS
+    and the fitted FSRS are evaluated on those; when there are too few to
+    judge by, all three are scored on the whole log and ``in_sample`` is
+    True. Returns None below TUNE_MIN_REVIEWS predictions. Requires NumPy.
+
+    Returns ``{"weights", "reviews", "holdout", "in_sample", "engines"}``,
+    ``engines`` mapping "sm2", "fsrs" and "fsrs-tuned" to evaluate() results.
+    """
+    import numpy as np
+
+    from .fsrs import WEIGHT_BOUNDS, FSRSEngine
+
+    if reviews is None:
+        reviews = storage.get_schedule_inputs()[1]
+    if not reviews:
+        return None
+    fit = _plan(np, None, [r for r in reviews if r[0] % TUNE_HOLDOUT])
+    holdout = _plan(np, None, [r for r in reviews if not r[0] % TUNE_HOLDOUT])
+    in_sample = _predictions(fit) < TUNE_MIN_REVIEWS or _predictions(holdout) < max(
+        10, TUNE_MIN_REVIEWS // TUNE_HOLDOUT
+    )
+    if in_sample:
+        fit = holdout = _plan(np, None, reviews)
+        if _predictions(fit) < TUNE_MIN_REVIEWS:
+            return None
+
+    baseline = FSRSEngine(retention=config.FSRS_RETENTION)
+    weights = list(baseline.weights)
+    best = _evaluate(np, baseline, fit)["log_loss"]
+    for factors in _TUNE_STEPS:
+        for i, (low, high) in enumerate(WEIGHT_BOUNDS):
+            current = weights[i]
+            for factor in factors:
+                trial = weights.copy()
+                trial[i] = min(high, max(low, current * factor))
+                loss = _evaluate(np, FSRSEngine(trial, baseline.retention), fit)["log_loss"]
+                if loss < best:
+                    best, weights = loss, trial
+    tuned = FSRSEngine(weights, baseline.retention)
+
+    return {
+        "weights": tuple(round(w, 4) for w in weights),
+        "reviews": _predictions(fit),
+        "holdout": _predictions(holdout),
+        "in_sample": in_sample,
+        "engines": {
+            "sm2": _evaluate(np, SM2Engine(), holdout),
+            "fsrs": _evaluate(np, baseline, holdout),
+            "fsrs-tuned": _evaluate(np, tuned, holdout),
+        },
+    }
+
+
+def _predictions(plan: _Plan | None) -> int:
+    return 0 if plan is None else len(plan.rows) - len(plan.starts)
+
+
+# ============ FORECAST ============
+
+# Concept-runs simulated per forecast, spread over the concepts due in the
+# window; the number of runs stays within the bounds below.
+FORECAST_SAMPLES = 300_000
+FORECAST_MIN_RUNS = 4
+FORECAST_MAX_RUNS = 200
+# Pass rate assumed before there are any scored reviews.
+_FORECAST_DEFAULT_PASS_RATE = 0.9
+# Weight, in reviews, of the library-wide pass rate in each concept's estimate.
+_FORECAST_PRIOR_REVIEWS = 4
+
+
+class Forecast(NamedTuple):
+    start: date  # day 0, today (UTC); its load includes every overdue review
+    expected: list[float]  # mean reviews per day over the runs
+    low: list[int]  # 10th percentile per day
+    high: list[int]  # 90th percentile per day
+    concepts: int  # concepts due at least once in the window
+    runs: int
+    pass_rate: float  # library-wide rate the per-concept estimates shrink towards
+
+
+def forecast(days: int = 14, *, runs: int | None = None, seed: int | None = None) -> Forecast:
+    """Simulate how many reviews fall due on each of the next ``days`` UTC days.
+
+    Each run reviews every concept on the day it falls due (overdue ones
+    today), passes or fails it at random, and reschedules it with
+    get_engine() until its next due date leaves the window. A concept's pass
+    probability is its pass rate over past scores, shrunk towards the
+    library's so that new concepts start at the library's; a pass is scored
+    one above SCORE_PASS_THRESHOLD and a failure SCORE_MIN. All runs advance
+    together as one set of NumPy arrays; without ``runs``, FORECAST_SAMPLES
+    concept-runs are spread over the concepts due in the window. Requires
+    NumPy.
+    """
+    import numpy as np
+
+    engine = get_engine()
+    now = _utcnow()
+    start = now.replace(hour=0, minute=0, second=0, microsecond=0)
+    progress, failures = storage.get_forecast_inputs(start + timedelta(days=days))
+    if not progress:
+        return Forecast(
+            start.date(), [0.0] * days, [0] * days, [0] * days, 0, 0, _FORECAST_DEFAULT_PASS_RATE
+        )
+
+    columns = np.array(progress, dtype=np.float64)
+    ids = columns[:, 0].astype(np.int64)
+    due_ms, ease, interval, count, stability, difficulty, scored = columns[:, 1:].T
+    failed = np.zeros(len(ids))
+    if failures:
+        failed_ids, failed_counts = np.array(failures, dtype=np.int64).T
+        order = np.argsort(failed_ids)
+        failed_ids, failed_counts = failed_ids[order], failed_counts[order]
+        at = np.searchsorted(failed_ids, ids)
+        found = at < len(failed_ids)
+        found[found] = failed_ids[at[found]] == ids[found]
+        failed[found] = failed_counts[at[found]]
+    total = scored.sum()
+    pass_rate = 1 - failed.sum() / total if total else _FORECAST_DEFAULT_PASS_RATE
+    p_pass = (scored - failed + _FORECAST_PRIOR_REVIEWS * pass_rate) / (
+        scored + _FORECAST_PRIOR_REVIEWS
+    )
+
+    # Sample r of concept i starts at r * n + i; times are days since the start
+    # of today. Each round reviews every sample once and drops those whose next
+    # review leaves the window, so the arrays shrink as the simulation runs.
+    n = len(ids)
+    runs = runs or min(FORECAST_MAX_RUNS, max(FORECAST_MIN_RUNS, FORECAST_SAMPLES // n))
+    today = (now - start).total_seconds() / 86_400
+    due = np.tile((due_ms - start.timestamp() * 1000) / _DAY_MS, runs)
+    p_pass = np.tile(p_pass, runs)
+    bucket = np.repeat(np.arange(runs) * days, n)
+    load = np.zeros(runs * days, np.int64)
+    pass_score = min(config.SCORE_MAX, config.SCORE_PASS_THRESHOLD + 1)
+    rng = np.random.default_rng(seed)
+    with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+        stored = Schedule(ease, interval, count, stability, difficulty)
+        state = engine.current(np, Schedule(*(np.tile(column, runs) for column in stored)))
+        last = due - state.interval_days
+        while due.size:
+            at = np.maximum(due, today)
+            load += np.bincount(bucket + at.astype(np.int64), minlength=runs * days)
+            scores = np.where(rng.random(due.size) < p_pass, pass_score, config.SCORE_MIN)
+            state = engine.step(np, state, scores, at - last)
+            due = at + state.interval_days
+            keep = due < days
+            state = Schedule(*(value[keep] if np.ndim(value) else value for value in state))
+            due, last, p_pass, bucket = due[keep], at[keep], p_pass[keep], bucket[keep]
+
+    load = load.reshape(runs, days)
+    return Forecast(
+        start.date(),
+        load.mean(axis=0).tolist(),
+        np.percentile(load, 10, axis=0, method="nearest").tolist(),
+        np.percentile(load, 90, axis=0, method="nearest").tolist(),
+        n,
+        runs,
+        float(pass_rate),
+    )
@@ -1,60 +1,120 @@
 """Local SQLite storage for learn-lock."""
 
+import bisect
+import functools
+import gzip
+import hashlib
+import inspect
+import itertools
+import json
 import os
+import random
+import re
+import shutil
 import sqlite3
-from collections.abc import Mapping
+import tempfile
+import threading
+import time
+import weakref
+import zlib
+from collections.abc import Callable, Iterable, Iterator, Mapping
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import contextmanager
-from datetime import datetime, timezone
+from contextvars import ContextVar, copy_context
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional
+from typing import IO, NamedTuple, Optional, Protocol, runtime_checkable
 
 from . import __version__, config
 
 _initialized_dbs: set[str] = set()
 EXPORT_SCHEMA_VERSION = 1
 
+# Per-thread connection pool. Each thread keeps one open connection per database
+# path so that PRAGMA setup and statement preparation happen once, not per call;
+# they are closed when the thread exits (or by close()).
+STATEMENT_CACHE_SIZE = 256
+_local = threading.local()
+_pool_lock = threading.Lock()
+_pool_generation = 0
+_open_connections: list[sqlite3.Connection] = []
+
 
 class ImportValidationError(ValueError):
     """Raised when an import payload is missing required structure."""
 
 
+# Export tables in dependency order, with the fields each row must carry.
+_REQUIRED_EXPORT_FIELDS = {
+    "sources": {"id", "url", "title", "source_type", "raw_content"},
+    "concepts": {"id", "source_id", "name", "source_quote"},
+    "progress": {"concept_id", "due_date"},
+    "explanations": {"concept_id", "text"},
+    "duel_memory": {"concept_id"},
+    "cached_claims": {"concept_id", "statement", "claim_type", "claim_index"},
+}
+
+
+# Timestamps are stored as INTEGER UTC epoch milliseconds. Getters and exports
+# format them as ISO-8601 in their SELECT lists (_iso_sql) and import payloads
+# are parsed once on the way in, so comparisons, merges and range queries work
+# on plain integers.
+_TIMESTAMP_COLUMNS = ("created_at", "due_date", "updated_at")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MILLISECOND = timedelta(milliseconds=1)
+_MISSING_TS = -(2**62)  # Sort key for absent/unparseable timestamps
+
+
 def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
-def _parse_timestamp(value: object) -> datetime:
-    """Best-effort ISO timestamp parsing for import/export merges."""
-    if not isinstance(value, str) or not value:
-        return datetime.min.replace(tzinfo=timezone.utc)
-    try:
-        parsed = datetime.fromisoformat(value)
-    except ValueError:
-        return datetime.min.replace(tzinfo=timezone.utc)
-    if parsed.tzinfo is None:
-        return parsed.replace(tzinfo=timezone.utc)
-    return parsed.astimezone(timezone.utc)
-
-
-def _earliest_timestamp(*values: object) -> str:
-    timestamps = [
-        (parsed, raw)
-        for raw in values
-        if isinstance(raw, str) and raw
-        for parsed in [_parse_timestamp(raw)]
-        if parsed != datetime.min.replace(tzinfo=timezone.utc)
-    ]
-    return min(timestamps, key=lambda item: item[0])[1] if timestamps else _utcnow().isoformat()
+def _epoch_ms(value: object) -> int | None:
+    """SQL ``ll_epoch_ms()``: ISO string or datetime -> UTC epoch milliseconds.
+
+    Naive values are taken as UTC. Returns None when the value is unparseable.
+    """
+    if isinstance(value, str) and value:
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return (value - _EPOCH) // _MILLISECOND
 
 
-def _latest_timestamp(*values: object) -> str:
-    timestamps = [
-        (parsed, raw)
-        for raw in values
-        if isinstance(raw, str) and raw
-        for parsed in [_parse_timestamp(raw)]
-        if parsed != datetime.min.replace(tzinfo=timezone.utc)
-    ]
-    return max(timestamps, key=lambda item: item[0])[1] if timestamps else _utcnow().isoformat()
+def _now_ms() -> int:
+    return _epoch_ms(_utcnow())
+
+
+def _iso_sql(column: str) -> str:
+    """SELECT-list expression formatting an epoch-ms column as ISO-8601 UTC."""
+    alias = column.rpartition(".")[2]
+    return f"strftime('%Y-%m-%dT%H:%M:%f+00:00', {column} / 1000.0, 'unixepoch') AS {alias}"
+
+
+def _epoch_row(row: Mapping[str, object]) -> dict:
+    """Import row as a dict, with timestamps parsed to epoch ms (None if invalid)."""
+    data = dict(row)
+    for column in _TIMESTAMP_COLUMNS:
+        if column in data:
+            data[column] = _epoch_ms(data[column])
+    return data
+
+
+def _stamp(value: int | None, default: int) -> int:
+    return default if value is None else value
+
+
+def _ts_rank(value: int | None) -> int:
+    return _MISSING_TS if value is None else value
+
+
+def _earliest_timestamp(now: int, *values: int | None) -> int:
+    return min((value for value in values if value is not None), default=now)
 
 
 def _prefer_text(existing: object, incoming: object) -> str | None:
@@ -90,11 +150,7 @@ def _require_keys(row: Mapping[str, object], key: str, required: set[str], index
         )
 
 
-def validate_import_data(data: object) -> dict:
-    """Validate and normalize an export payload before import."""
-    if not isinstance(data, Mapping):
-        raise ImportValidationError("Invalid export: top-level JSON value must be an object.")
-
+def _validated_schema_version(data: Mapping[str, object]) -> int:
     schema_version = data.get("schema_version", 0)
     if not isinstance(schema_version, int):
         raise ImportValidationError("Invalid export: 'schema_version' must be an integer.")
@@ -103,6 +159,15 @@ def validate_import_data(data: object) -> dict:
             f"Unsupported export schema version {schema_version}. "
             f"This build supports up to {EXPORT_SCHEMA_VERSION}."
         )
+    return schema_version
+
+
+def validate_import_data(data: object) -> dict:
+    """Validate and normalize an export payload before import."""
+    if not isinstance(data, Mapping):
+        raise ImportValidationError("Invalid export: top-level JSON value must be an object.")
+
+    schema_version = _validated_schema_version(data)
 
     normalized = {
         "schema_version": schema_version,
@@ -110,16 +175,7 @@ def validate_import_data(data: object) -> dict:
         "exported_at": data.get("exported_at"),
     }
 
-    required_rows = {
-        "sources": {"id", "url", "title", "source_type", "raw_content"},
-        "concepts": {"id", "source_id", "name", "source_quote"},
-        "progress": {"concept_id", "due_date"},
-        "explanations": {"concept_id", "text"},
-        "duel_memory": {"concept_id"},
-        "cached_claims": {"concept_id", "statement", "claim_type", "claim_index"},
-    }
-
-    for key, required in required_rows.items():
+    for key, required in _REQUIRED_EXPORT_FIELDS.items():
         rows = _validated_list(data, key)
         for index, row in enumerate(rows):
             _require_keys(row, key, required, index)
@@ -151,1109 +207,6424 @@ def validate_import_data(data: object) -> dict:
     return normalized
 
 
-def _connect(db_path: Path) -> sqlite3.Connection:
-    conn = sqlite3.connect(db_path, timeout=config.SQLITE_TIMEOUT_SECONDS)
+# ---- Content store ----
+#
+# Source text and segment JSON live in content_blobs, keyed by the SHA-256 of
+# the text and zlib-compressed, so sources with identical content share a row
+# and metadata queries never touch the payload. The legacy inline columns
+# sources.raw_content/segments were emptied into the store and later dropped.
+
+CONTENT_COMPRESS_LEVEL = 6
+_CODEC_ZLIB = "zlib"
+_CODEC_PLAIN = "plain"  # Used when compression would not save space.
+
+# Metadata columns returned by the source getters; content loads separately.
+_SOURCE_COLUMNS = (
+    f"s.id, s.url, s.title, s.source_type, s.content_hash, s.segments_hash, "
+    f"{_iso_sql('s.created_at')}"
+)
+
+# Sources with their content inflated, in the export row shape. The merge
+# reads the same rows with the raw epoch created_at.
+_SOURCE_CONTENT_SQL = """
+    SELECT s.id, s.url, s.title, s.source_type,
+           COALESCE(ll_inflate(c.codec, c.data), '') AS raw_content,
+           ll_inflate(g.codec, g.data) AS segments,
+           {created_at}
+    FROM sources s
+    LEFT JOIN content_blobs c ON c.hash = s.content_hash
+    LEFT JOIN content_blobs g ON g.hash = s.segments_hash
+"""
+_SOURCE_EXPORT_SQL = _SOURCE_CONTENT_SQL.format(created_at=_iso_sql("s.created_at"))
+_SOURCE_MERGE_SQL = _SOURCE_CONTENT_SQL.format(created_at="s.created_at")
+
+
+def _compress(raw: bytes) -> tuple[str, bytes]:
+    """(codec, payload) for ``raw``; stored plain when zlib would not save space."""
+    data = zlib.compress(raw, CONTENT_COMPRESS_LEVEL)
+    if len(data) >= len(raw):
+        return _CODEC_PLAIN, raw
+    return _CODEC_ZLIB, data
+
+
+def _pack_content(text: object) -> tuple[str, str, int, int, bytes] | None:
+    """Return the content_blobs row for ``text``, or None when there is nothing to store."""
+    if not isinstance(text, str) or not text:
+        return None
+    raw = text.encode("utf-8")
+    codec, data = _compress(raw)
+    return hashlib.sha256(raw).hexdigest(), codec, len(text), len(raw), data
+
+
+def _inflate(codec: object, data: object) -> str | None:
+    """SQL ``ll_inflate()``: decode a content_blobs payload."""
+    if data is None:
+        return None
+    if codec == _CODEC_ZLIB:
+        data = zlib.decompress(data)
+    return bytes(data).decode("utf-8")
+
+
+def _store_content(conn: sqlite3.Connection, text: object) -> str | None:
+    """Save ``text`` in the content store (deduplicated). Returns its hash."""
+    return _store_packed(conn, _pack_content(text))
+
+
+def _store_packed(
+    conn: sqlite3.Connection, packed: tuple[str, str, int, int, bytes] | None
+) -> str | None:
+    """Save a :func:`_pack_content` row, so compression can run before the transaction."""
+    if packed is None:
+        return None
+    conn.execute(
+        "INSERT OR IGNORE INTO content_blobs (hash, codec, text_length, raw_size, data) "
+        "VALUES (?, ?, ?, ?, ?)",
+        packed,
+    )
+    return packed[0]
+
+
+def _prune_content(conn: sqlite3.Connection) -> int:
+    """Delete blobs no source references any more. Returns the number removed."""
+    return conn.execute(
+        """
+        DELETE FROM content_blobs
+        WHERE hash NOT IN (
+            SELECT content_hash FROM sources WHERE content_hash IS NOT NULL
+            UNION
+            SELECT segments_hash FROM sources WHERE segments_hash IS NOT NULL
+        )
+        """
+    ).rowcount
+
+
+def _move_inline_content(conn: sqlite3.Connection) -> int:
+    """Move legacy inline raw_content/segments into content_blobs."""
+    source_ids = [
+        row[0]
+        for row in conn.execute(
+            "SELECT id FROM sources WHERE raw_content != '' OR segments IS NOT NULL"
+        ).fetchall()
+    ]
+    for source_id in source_ids:
+        row = conn.execute(
+            "SELECT raw_content, segments FROM sources WHERE id = ?", (source_id,)
+        ).fetchone()
+        conn.execute(
+            """
+            UPDATE sources
+            SET content_hash = COALESCE(?, content_hash),
+                segments_hash = COALESCE(?, segments_hash),
+                raw_content = '', segments = NULL
+            WHERE id = ?
+            """,
+            (
+                _store_content(conn, row["raw_content"]),
+                _store_content(conn, row["segments"]),
+                source_id,
+            ),
+        )
+    return len(source_ids)
+
+
+_TEMP_STORE_MODES = {"default": 0, "file": 1, "memory": 2}
+_AUTO_VACUUM_INCREMENTAL = 2
+
+
+def _connect(db_path: Path | str) -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        db_path,
+        timeout=config.SQLITE_TIMEOUT_SECONDS,
+        # A str location is a SQLite URI (see MemoryBackend); plain file names
+        # still open as files.
+        uri=isinstance(db_path, str),
+        cached_statements=STATEMENT_CACHE_SIZE,
+        # Pooled connections are only used by their owning thread; this lets
+        # close() shut down every thread's connection from the main thread.
+        check_same_thread=False,
+        # Implicit transactions take the write lock up front, so they never
+        # fail to upgrade a read snapshot that another writer made stale.
+        isolation_level="IMMEDIATE",
+    )
     conn.row_factory = sqlite3.Row
+    conn.create_function("ll_epoch_ms", 1, _epoch_ms, deterministic=True)
+    conn.create_function("ll_inflate", 2, _inflate, deterministic=True)
     conn.execute("PRAGMA foreign_keys = ON")
     conn.execute(f"PRAGMA busy_timeout = {int(config.SQLITE_TIMEOUT_SECONDS * 1000)}")
+    conn.execute(f"PRAGMA cache_size = {-abs(int(config.SQLITE_CACHE_SIZE_KB))}")
+    conn.execute(f"PRAGMA mmap_size = {max(int(config.SQLITE_MMAP_SIZE), 0)}")
+    conn.execute(f"PRAGMA temp_store = {_TEMP_STORE_MODES.get(config.SQLITE_TEMP_STORE, 2)}")
+    # Only takes effect while the file is still empty (and must precede the
+    # switch to WAL); older databases convert on their first maintain(vacuum=True).
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
     conn.execute("PRAGMA journal_mode = WAL")
     return conn
 
 
-def init_db(db_path: Path | None = None) -> None:
-    """Initialize database with schema. Only runs once per path."""
-    if db_path is None:
-        db_path = config.DB_PATH
+class _ThreadConnections(dict):
+    """One thread's path -> connection map; a dict subclass so it can be weakly referenced."""
 
-    db_key = str(db_path.resolve())
-    if db_key in _initialized_dbs:
-        return
+    def __init__(self):
+        super().__init__()
+        self.opened: list[sqlite3.Connection] = []
 
-    db_path.parent.mkdir(parents=True, exist_ok=True)
 
-    # Use hardcoded defaults in CREATE TABLE to prevent SQL injection via env vars
-    with _connect(db_path) as conn:
-        conn.executescript("""
-            CREATE TABLE IF NOT EXISTS sources (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                url TEXT UNIQUE NOT NULL,
-                title TEXT NOT NULL,
-                source_type TEXT NOT NULL,
-                raw_content TEXT NOT NULL,
-                segments TEXT,
-                created_at TEXT NOT NULL
-            );
-
-            CREATE TABLE IF NOT EXISTS concepts (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                source_id INTEGER NOT NULL,
-                name TEXT NOT NULL,
-                source_quote TEXT NOT NULL,
-                ground_truth TEXT,
-                question TEXT,
-                skipped INTEGER DEFAULT 0,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
-            );
-
-            CREATE TABLE IF NOT EXISTS explanations (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER NOT NULL,
-                text TEXT NOT NULL,
-                score INTEGER,
-                covered TEXT,
-                missed TEXT,
-                feedback TEXT,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            );
-
-            CREATE TABLE IF NOT EXISTS progress (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER UNIQUE NOT NULL,
-                ease_factor REAL DEFAULT 2.5,
-                interval_days REAL DEFAULT 1.0,
-                due_date TEXT NOT NULL,
-                review_count INTEGER DEFAULT 0,
-                last_score INTEGER,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            );
-
-            CREATE TABLE IF NOT EXISTS duel_memory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER UNIQUE NOT NULL,
-                last_belief TEXT,
-                last_errors TEXT,
-                last_attack TEXT,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            );
-
-            CREATE TABLE IF NOT EXISTS cached_claims (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER NOT NULL,
-                statement TEXT NOT NULL,
-                claim_type TEXT NOT NULL,
-                claim_index INTEGER NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            );
-
-            CREATE INDEX IF NOT EXISTS idx_progress_due ON progress(due_date);
-            CREATE INDEX IF NOT EXISTS idx_concepts_source ON concepts(source_id);
-            CREATE INDEX IF NOT EXISTS idx_concepts_skipped ON concepts(skipped);
-            CREATE INDEX IF NOT EXISTS idx_cached_claims_concept ON cached_claims(concept_id);
-        """)
+def _release_connections(connections: list[sqlite3.Connection], pid: int) -> None:
+    """Close a finished thread's connections (run when its pool is garbage collected)."""
+    if os.getpid() != pid:
+        return  # a forked child's inherited copies belong to the parent
+    with _pool_lock:
+        for conn in connections:
+            try:
+                _open_connections.remove(conn)
+            except ValueError:
+                pass  # already closed by close()
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
 
-        # Migrations for older databases
-        cursor = conn.execute("PRAGMA table_info(sources)")
-        cols = [row[1] for row in cursor.fetchall()]
-        if "segments" not in cols:
-            conn.execute("ALTER TABLE sources ADD COLUMN segments TEXT")
 
-        cursor = conn.execute("PRAGMA table_info(concepts)")
-        cols = [row[1] for row in cursor.fetchall()]
-        if "ground_truth" not in cols:
-            conn.execute("ALTER TABLE concepts ADD COLUMN ground_truth TEXT")
-            conn.execute(
-                "UPDATE concepts SET ground_truth = source_quote WHERE ground_truth IS NULL"
-            )
+def _thread_pool() -> _ThreadConnections:
+    """Return this thread's path -> connection map, discarding stale state."""
+    pool = getattr(_local, "connections", None)
+    if (
+        pool is None
+        or _local.generation != _pool_generation
+        or _local.pid != os.getpid()
+    ):
+        # New thread, close() was called, or we are in a forked child whose
+        # inherited connections must not be touched.
+        pool = _local.connections = _ThreadConnections()
+        # The thread-local is dropped when the thread exits, and the pool with it.
+        weakref.finalize(pool, _release_connections, pool.opened, os.getpid())
+        _local.sessions = {}
+        _local.generation = _pool_generation
+        _local.pid = os.getpid()
+    return pool
+
+
+def _pooled_connection(db_path: Path | str) -> sqlite3.Connection:
+    pool = _thread_pool()
+    key = str(db_path)
+    conn = pool.get(key)
+    if conn is None:
+        conn = _connect(db_path)
+        pool[key] = conn
+        pool.opened.append(conn)
+        with _pool_lock:
+            _open_connections.append(conn)
+    return conn
+
+
+def close() -> None:
+    """Close every pooled connection (all threads). Safe to call repeatedly."""
+    global _pool_generation
+    with _pool_lock:
+        connections = list(_open_connections)
+        _open_connections.clear()
+        _pool_generation += 1
+    for conn in connections:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    _local.connections = None
+
+
+# ---- Full-text search index ----
+#
+# One FTS5 table (trigram tokenizer, so substring queries and LIKE are
+# indexed) holds a row per concept, cached claim and source, kept in sync by
+# triggers. The FTS rowid encodes the base row: id * 4 + kind, which lets the
+# triggers and lookups address entries by rowid instead of scanning.
+
+SEARCH_KIND_CONCEPT = 0
+SEARCH_KIND_CLAIM = 1
+SEARCH_KIND_SOURCE = 2
+
+_SEARCH_INDEX_SCHEMA = """
+    CREATE VIRTUAL TABLE search_index USING fts5(name, body, tokenize = 'trigram');
+
+    CREATE TRIGGER search_concepts_ai AFTER INSERT ON concepts BEGIN
+        INSERT INTO search_index (rowid, name, body)
+        VALUES (NEW.id * 4, NEW.name,
+                COALESCE(NEW.question, '') || ' ' || COALESCE(NEW.ground_truth, ''));
+    END;
+    CREATE TRIGGER search_concepts_au AFTER UPDATE OF name, question, ground_truth
+    ON concepts BEGIN
+        UPDATE search_index
+        SET name = NEW.name,
+            body = COALESCE(NEW.question, '') || ' ' || COALESCE(NEW.ground_truth, '')
+        WHERE rowid = NEW.id * 4;
+    END;
+    CREATE TRIGGER search_concepts_ad AFTER DELETE ON concepts BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 4;
+    END;
+
+    CREATE TRIGGER search_claims_ai AFTER INSERT ON cached_claims BEGIN
+        INSERT INTO search_index (rowid, name, body)
+        VALUES (NEW.id * 4 + 1, '', NEW.statement);
+    END;
+    CREATE TRIGGER search_claims_au AFTER UPDATE OF statement ON cached_claims BEGIN
+        UPDATE search_index SET body = NEW.statement WHERE rowid = NEW.id * 4 + 1;
+    END;
+    CREATE TRIGGER search_claims_ad AFTER DELETE ON cached_claims BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 4 + 1;
+    END;
+
+    -- Source text is read from the content store through ll_inflate(), which
+    -- learnlock registers on every connection it opens.
+    CREATE TRIGGER search_sources_ai AFTER INSERT ON sources BEGIN
+        INSERT INTO search_index (rowid, name, body)
+        VALUES (NEW.id * 4 + 2, NEW.title,
+                COALESCE((SELECT ll_inflate(codec, data) FROM content_blobs
+                          WHERE hash = NEW.content_hash), ''));
+    END;
+    CREATE TRIGGER search_sources_au AFTER UPDATE OF title, content_hash ON sources BEGIN
+        UPDATE search_index
+        SET name = NEW.title,
+            body = COALESCE((SELECT ll_inflate(codec, data) FROM content_blobs
+                             WHERE hash = NEW.content_hash), '')
+        WHERE rowid = NEW.id * 4 + 2;
+    END;
+    CREATE TRIGGER search_sources_ad AFTER DELETE ON sources BEGIN
+        DELETE FROM search_index WHERE rowid = OLD.id * 4 + 2;
+    END;
+"""
+
+
+def _has_search_index(conn: sqlite3.Connection) -> bool:
+    return (
+        conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'search_index'"
+        ).fetchone()
+        is not None
+    )
 
-        # Add duel_memory table if missing (migration for pre-duel databases)
-        cursor = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='duel_memory'"
-        )
-        if not cursor.fetchone():
-            conn.execute("""CREATE TABLE duel_memory (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER UNIQUE NOT NULL,
-                last_belief TEXT,
-                last_errors TEXT,
-                last_attack TEXT,
-                updated_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            )""")
-
-        # Add cached_claims table if missing (migration)
-        cursor = conn.execute(
-            "SELECT name FROM sqlite_master WHERE type='table' AND name='cached_claims'"
-        )
-        if not cursor.fetchone():
-            conn.execute("""CREATE TABLE cached_claims (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                concept_id INTEGER NOT NULL,
-                statement TEXT NOT NULL,
-                claim_type TEXT NOT NULL,
-                claim_index INTEGER NOT NULL,
-                created_at TEXT NOT NULL,
-                FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
-            )""")
-            conn.execute(
-                "CREATE INDEX IF NOT EXISTS idx_cached_claims_concept ON cached_claims(concept_id)"
-            )
 
+def _rebuild_search_index(conn: sqlite3.Connection) -> None:
+    """Repopulate search_index from the base tables."""
+    _execute_statements(conn, """
+        DELETE FROM search_index;
+        INSERT INTO search_index (rowid, name, body)
+        SELECT id * 4, name, COALESCE(question, '') || ' ' || COALESCE(ground_truth, '')
+        FROM concepts;
+        INSERT INTO search_index (rowid, name, body)
+        SELECT id * 4 + 1, '', statement FROM cached_claims;
+        INSERT INTO search_index (rowid, name, body)
+        SELECT s.id * 4 + 2, s.title, COALESCE(ll_inflate(b.codec, b.data), '')
+        FROM sources s LEFT JOIN content_blobs b ON b.hash = s.content_hash
+    """)
+
+
+def _ensure_search_index(conn: sqlite3.Connection) -> bool:
+    """Create and fill the search index if missing. False when FTS5 is unavailable."""
+    if _has_search_index(conn):
+        return True
     try:
-        os.chmod(db_path, 0o600)
-    except OSError:
-        pass
+        conn.execute("SAVEPOINT search_index")
+        _execute_statements(conn, _SEARCH_INDEX_SCHEMA)
+        _rebuild_search_index(conn)
+        conn.execute("RELEASE search_index")
+    except sqlite3.OperationalError:
+        # SQLite built without FTS5 or the trigram tokenizer (< 3.34): search and
+        # name resolution fall back to LIKE scans.
+        conn.execute("ROLLBACK TO search_index")
+        conn.execute("RELEASE search_index")
+        return False
+    return True
 
-    _initialized_dbs.add(db_key)
 
+# ---- Stats counters ----
+#
+# get_stats() totals live in a single stats_counters row maintained by
+# triggers, so /stats and startup read one row instead of scanning the review
+# history. Mastery depends on configurable thresholds; the row records the
+# thresholds its mastered count was computed with. The review totals are fed
+# by the review log triggers below.
+
+_STATS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS stats_counters (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        sources INTEGER NOT NULL DEFAULT 0,
+        active_concepts INTEGER NOT NULL DEFAULT 0,
+        skipped_concepts INTEGER NOT NULL DEFAULT 0,
+        reviews INTEGER NOT NULL DEFAULT 0,
+        scored_reviews INTEGER NOT NULL DEFAULT 0,
+        score_sum REAL NOT NULL DEFAULT 0,
+        successful_reviews INTEGER NOT NULL DEFAULT 0,
+        mastered INTEGER NOT NULL DEFAULT 0,
+        mastery_min_ease REAL,
+        mastery_min_reviews INTEGER
+    );
+
+    CREATE TRIGGER IF NOT EXISTS stats_sources_ai AFTER INSERT ON sources BEGIN
+        UPDATE stats_counters SET sources = sources + 1;
+    END;
+    CREATE TRIGGER IF NOT EXISTS stats_sources_ad AFTER DELETE ON sources BEGIN
+        UPDATE stats_counters SET sources = sources - 1;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_concepts_ai AFTER INSERT ON concepts BEGIN
+        UPDATE stats_counters
+        SET active_concepts = active_concepts + (NEW.skipped IS 0),
+            skipped_concepts = skipped_concepts + (NEW.skipped IS 1);
+    END;
+    CREATE TRIGGER IF NOT EXISTS stats_concepts_au AFTER UPDATE OF skipped ON concepts BEGIN
+        UPDATE stats_counters
+        SET active_concepts = active_concepts + (NEW.skipped IS 0) - (OLD.skipped IS 0),
+            skipped_concepts = skipped_concepts + (NEW.skipped IS 1) - (OLD.skipped IS 1);
+    END;
+    CREATE TRIGGER IF NOT EXISTS stats_concepts_ad AFTER DELETE ON concepts BEGIN
+        UPDATE stats_counters
+        SET active_concepts = active_concepts - (OLD.skipped IS 0),
+            skipped_concepts = skipped_concepts - (OLD.skipped IS 1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS stats_progress_ai AFTER INSERT ON progress BEGIN
+        UPDATE stats_counters
+        SET mastered = mastered + ((NEW.ease_factor >= mastery_min_ease
+                                    AND NEW.review_count >= mastery_min_reviews) IS 1);
+    END;
+    CREATE TRIGGER IF NOT EXISTS stats_progress_au AFTER UPDATE OF ease_factor, review_count
+    ON progress BEGIN
+        UPDATE stats_counters
+        SET mastered = mastered
+            + ((NEW.ease_factor >= mastery_min_ease
+                AND NEW.review_count >= mastery_min_reviews) IS 1)
+            - ((OLD.ease_factor >= mastery_min_ease
+                AND OLD.review_count >= mastery_min_reviews) IS 1);
+    END;
+    CREATE TRIGGER IF NOT EXISTS stats_progress_ad AFTER DELETE ON progress BEGIN
+        UPDATE stats_counters
+        SET mastered = mastered - ((OLD.ease_factor >= mastery_min_ease
+                                    AND OLD.review_count >= mastery_min_reviews) IS 1);
+    END;
+"""
+
+_MASTERED_SQL = (
+    "SELECT COUNT(*) FROM progress WHERE ease_factor >= :ease AND review_count >= :reviews"
+)
+
+
+def _recompute_stats(conn: sqlite3.Connection) -> None:
+    """Rebuild the stats_counters row from the base tables and review rollups."""
+    conn.execute(
+        f"""
+        INSERT OR REPLACE INTO stats_counters (
+            id, sources, active_concepts, skipped_concepts, reviews, scored_reviews,
+            score_sum, successful_reviews, mastered, mastery_min_ease, mastery_min_reviews
+        )
+        SELECT 1,
+               (SELECT COUNT(*) FROM sources),
+               (SELECT COUNT(*) FROM concepts WHERE skipped = 0),
+               (SELECT COUNT(*) FROM concepts WHERE skipped = 1),
+               COALESCE(SUM(reviews), 0),
+               COALESCE(SUM(scored_reviews), 0),
+               COALESCE(SUM(score_sum), 0),
+               COALESCE(SUM(successful_reviews), 0),
+               ({_MASTERED_SQL}),
+               :ease,
+               :reviews
+        FROM review_concepts
+        """,
+        {"ease": config.MASTERY_MIN_EASE, "reviews": config.MASTERY_MIN_REVIEWS},
+    )
 
-def reset_init_cache() -> None:
-    """Reset the initialization cache. Useful for testing."""
-    _initialized_dbs.clear()
 
+def _stats_counters(conn: sqlite3.Connection) -> sqlite3.Row:
+    """Read the counters row, refreshing mastery if the thresholds changed."""
+    row = conn.execute("SELECT * FROM stats_counters WHERE id = 1").fetchone()
+    if row is None:
+        _recompute_stats(conn)
+    elif (row["mastery_min_ease"], row["mastery_min_reviews"]) != (
+        config.MASTERY_MIN_EASE,
+        config.MASTERY_MIN_REVIEWS,
+    ):
+        conn.execute(
+            f"""
+            UPDATE stats_counters
+            SET mastered = ({_MASTERED_SQL}), mastery_min_ease = :ease,
+                mastery_min_reviews = :reviews
+            WHERE id = 1
+            """,
+            {"ease": config.MASTERY_MIN_EASE, "reviews": config.MASTERY_MIN_REVIEWS},
+        )
+    else:
+        return row
+    return conn.execute("SELECT * FROM stats_counters WHERE id = 1").fetchone()
+
+
+# ---- Review log ----
+#
+# Each duel appends one compact review_events row: concept, epoch ms, score,
+# turn count and error codes. Its free text (answers, missed points, final
+# belief) is a zlib-compressed JSON array in review_text, so aggregates never
+# page it in. The log is append-only; triggers keep two rollups current,
+# review_daily (per UTC day) and review_concepts (per concept), and feed the
+# stats_counters review totals. archive_review_text() moves old free text out
+# to gzip files; the event row and its text_hash stay behind, so stats and
+# import de-duplication are unaffected.
+
+_DAY_MS = 86_400_000
+_REVIEW_TEXT_FIELDS = ("text", "covered", "missed", "feedback")
+
+_REVIEW_LOG_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS review_events (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concept_id INTEGER NOT NULL,
+        created_at INTEGER NOT NULL,
+        score INTEGER,
+        turns INTEGER,
+        error_codes TEXT,
+        text_hash TEXT NOT NULL,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+    CREATE INDEX IF NOT EXISTS idx_review_events_concept_created
+        ON review_events(concept_id, created_at);
+
+    CREATE TABLE IF NOT EXISTS review_text (
+        event_id INTEGER PRIMARY KEY,
+        codec TEXT NOT NULL,
+        data BLOB NOT NULL,
+        FOREIGN KEY (event_id) REFERENCES review_events(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS review_daily (
+        day INTEGER PRIMARY KEY,
+        reviews INTEGER NOT NULL DEFAULT 0,
+        scored_reviews INTEGER NOT NULL DEFAULT 0,
+        score_sum REAL NOT NULL DEFAULT 0,
+        successful_reviews INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS review_concepts (
+        concept_id INTEGER PRIMARY KEY,
+        reviews INTEGER NOT NULL DEFAULT 0,
+        scored_reviews INTEGER NOT NULL DEFAULT 0,
+        score_sum REAL NOT NULL DEFAULT 0,
+        successful_reviews INTEGER NOT NULL DEFAULT 0,
+        last_review_at INTEGER,
+        last_score INTEGER,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+
+    CREATE TRIGGER IF NOT EXISTS review_events_ai AFTER INSERT ON review_events BEGIN
+        INSERT INTO review_daily (day, reviews, scored_reviews, score_sum, successful_reviews)
+        VALUES (NEW.created_at / 86400000, 1, NEW.score IS NOT NULL,
+                COALESCE(NEW.score, 0), (NEW.score >= 4) IS 1)
+        ON CONFLICT(day) DO UPDATE SET
+            reviews = reviews + 1,
+            scored_reviews = scored_reviews + excluded.scored_reviews,
+            score_sum = score_sum + excluded.score_sum,
+            successful_reviews = successful_reviews + excluded.successful_reviews;
+
+        INSERT INTO review_concepts (
+            concept_id, reviews, scored_reviews, score_sum, successful_reviews,
+            last_review_at, last_score
+        )
+        VALUES (NEW.concept_id, 1, NEW.score IS NOT NULL, COALESCE(NEW.score, 0),
+                (NEW.score >= 4) IS 1, NEW.created_at, NEW.score)
+        ON CONFLICT(concept_id) DO UPDATE SET
+            reviews = reviews + 1,
+            scored_reviews = scored_reviews + excluded.scored_reviews,
+            score_sum = score_sum + excluded.score_sum,
+            successful_reviews = successful_reviews + excluded.successful_reviews,
+            last_score = CASE WHEN last_review_at > excluded.last_review_at
+                              THEN last_score ELSE excluded.last_score END,
+            last_review_at = MAX(COALESCE(last_review_at, excluded.last_review_at),
+                                 excluded.last_review_at);
+
+        UPDATE stats_counters
+        SET reviews = reviews + 1,
+            scored_reviews = scored_reviews + (NEW.score IS NOT NULL),
+            score_sum = score_sum + COALESCE(NEW.score, 0),
+            successful_reviews = successful_reviews + ((NEW.score >= 4) IS 1);
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS review_events_ad AFTER DELETE ON review_events BEGIN
+        UPDATE review_daily
+        SET reviews = reviews - 1,
+            scored_reviews = scored_reviews - (OLD.score IS NOT NULL),
+            score_sum = score_sum - COALESCE(OLD.score, 0),
+            successful_reviews = successful_reviews - ((OLD.score >= 4) IS 1)
+        WHERE day = OLD.created_at / 86400000;
+
+        UPDATE review_concepts
+        SET reviews = reviews - 1,
+            scored_reviews = scored_reviews - (OLD.score IS NOT NULL),
+            score_sum = score_sum - COALESCE(OLD.score, 0),
+            successful_reviews = successful_reviews - ((OLD.score >= 4) IS 1),
+            (last_review_at, last_score) = (
+                SELECT created_at, score FROM review_events
+                WHERE concept_id = OLD.concept_id
+                ORDER BY created_at DESC, id DESC LIMIT 1
+            )
+        WHERE concept_id = OLD.concept_id;
 
-@contextmanager
-def get_db(db_path: Path | None = None):
-    """Get database connection."""
-    if db_path is None:
-        db_path = config.DB_PATH
+        UPDATE stats_counters
+        SET reviews = reviews - 1,
+            scored_reviews = scored_reviews - (OLD.score IS NOT NULL),
+            score_sum = score_sum - COALESCE(OLD.score, 0),
+            successful_reviews = successful_reviews - ((OLD.score >= 4) IS 1);
+    END;
+"""
 
-    init_db(db_path)
-    conn = _connect(db_path)
-    try:
-        yield conn
-        conn.commit()
-    finally:
-        conn.close()
 
+def _review_text_hash(row: Mapping[str, object]) -> str:
+    """Dedup key for a review's text. Export rows whose text was archived carry it."""
+    if not row.get("text") and row.get("text_hash"):
+        return str(row["text_hash"])
+    return hashlib.sha256(str(row.get("text") or "").encode("utf-8")).hexdigest()
 
-# ============ SOURCES ============
 
+def _pack_review_text(row: Mapping[str, object]) -> tuple[str, bytes] | None:
+    """review_text (codec, data) for a row's free-text fields, or None when all are empty."""
+    fields = [row.get(field) or None for field in _REVIEW_TEXT_FIELDS]
+    if not any(fields):
+        return None
+    return _compress(json.dumps(fields, separators=(",", ":")).encode("utf-8"))
 
-def add_source(
-    url: str, title: str, source_type: str, raw_content: str, segments: str | None = None
-) -> int:
-    """Add a source. Returns source ID."""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "INSERT INTO sources (url, title, source_type, raw_content, segments, created_at) "
-            "VALUES (?, ?, ?, ?, ?, ?)",
-            (url, title, source_type, raw_content, segments, _utcnow().isoformat()),
-        )
-        return cursor.lastrowid
 
+def _unpack_review_text(codec: object, data: object) -> dict:
+    """Free-text fields of a review; archived or empty text reads as ""/None."""
+    body = _inflate(codec, data)
+    fields = json.loads(body) if body else [None] * len(_REVIEW_TEXT_FIELDS)
+    unpacked = dict(zip(_REVIEW_TEXT_FIELDS, fields))
+    unpacked["text"] = unpacked["text"] or ""
+    return unpacked
 
-def add_source_with_concepts(
-    *,
-    url: str,
-    title: str,
-    source_type: str,
-    raw_content: str,
-    concepts: list[dict],
-    segments: str | None = None,
-) -> int:
-    """Atomically save a source and its extracted concepts."""
 
-    now = _utcnow()
-    with get_db() as conn:
-        source_cursor = conn.execute(
-            """
-            INSERT INTO sources (url, title, source_type, raw_content, segments, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (url, title, source_type, raw_content, segments, now.isoformat()),
+def _insert_review(conn: sqlite3.Connection, concept_id: int, row: Mapping[str, object]) -> int:
+    """Append one review event (and its compressed text). ``row`` is export-shaped."""
+    cursor = conn.execute(
+        "INSERT INTO review_events "
+        "(concept_id, created_at, score, turns, error_codes, text_hash) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            concept_id,
+            row["created_at"],
+            row.get("score"),
+            row.get("turns"),
+            row.get("error_codes") or None,
+            _review_text_hash(row),
+        ),
+    )
+    packed = _pack_review_text(row)
+    if packed is not None:
+        conn.execute(
+            "INSERT INTO review_text (event_id, codec, data) VALUES (?, ?, ?)",
+            (cursor.lastrowid, *packed),
         )
-        source_id = source_cursor.lastrowid
+    return cursor.lastrowid
+
+
+# ---- Due histogram ----
+#
+# due_daily counts the active (non-skipped) concepts due on each UTC day, and
+# how many of them are new (never scored). Triggers keep it current on every
+# progress write and skip toggle, so the load-balancing scheduler and the
+# new-concept intake cap read a handful of rows instead of grouping progress.
+
+_DUE_DAILY_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS due_daily (
+        day INTEGER PRIMARY KEY,
+        due INTEGER NOT NULL DEFAULT 0,
+        new INTEGER NOT NULL DEFAULT 0
+    );
+
+    CREATE TRIGGER IF NOT EXISTS due_daily_progress_ai AFTER INSERT ON progress
+    WHEN (SELECT skipped FROM concepts WHERE id = NEW.concept_id) IS NOT 1 BEGIN
+        INSERT INTO due_daily (day, due, new)
+        VALUES (NEW.due_date / 86400000, 1, NEW.last_score IS NULL)
+        ON CONFLICT(day) DO UPDATE SET due = due + 1, new = new + excluded.new;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS due_daily_progress_au
+    AFTER UPDATE OF due_date, last_score ON progress
+    WHEN (OLD.due_date / 86400000 IS NOT NEW.due_date / 86400000
+          OR (OLD.last_score IS NULL) IS NOT (NEW.last_score IS NULL))
+     AND (SELECT skipped FROM concepts WHERE id = NEW.concept_id) IS NOT 1 BEGIN
+        UPDATE due_daily
+        SET due = due - 1, new = new - (OLD.last_score IS NULL)
+        WHERE day = OLD.due_date / 86400000;
+        INSERT INTO due_daily (day, due, new)
+        VALUES (NEW.due_date / 86400000, 1, NEW.last_score IS NULL)
+        ON CONFLICT(day) DO UPDATE SET due = due + 1, new = new + excluded.new;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS due_daily_progress_ad AFTER DELETE ON progress
+    WHEN (SELECT skipped FROM concepts WHERE id = OLD.concept_id) IS NOT 1 BEGIN
+        UPDATE due_daily
+        SET due = due - 1, new = new - (OLD.last_score IS NULL)
+        WHERE day = OLD.due_date / 86400000;
+    END;
+
+    CREATE TRIGGER IF NOT EXISTS due_daily_concepts_au AFTER UPDATE OF skipped ON concepts
+    WHEN (OLD.skipped IS 1) IS NOT (NEW.skipped IS 1) BEGIN
+        INSERT INTO due_daily (day, due, new)
+        SELECT due_date / 86400000, 1 - 2 * (NEW.skipped IS 1),
+               (last_score IS NULL) * (1 - 2 * (NEW.skipped IS 1))
+        FROM progress WHERE concept_id = NEW.id
+        ON CONFLICT(day) DO UPDATE SET due = due + excluded.due, new = new + excluded.new;
+    END;
+
+    -- Deleting a concept cascades to its progress row once the concept is
+    -- gone, so due_daily_progress_ad cannot see that it was skipped and
+    -- subtracts it anyway; count a skipped concept back in first.
+    CREATE TRIGGER IF NOT EXISTS due_daily_concepts_bd BEFORE DELETE ON concepts
+    WHEN OLD.skipped IS 1 BEGIN
+        INSERT INTO due_daily (day, due, new)
+        SELECT due_date / 86400000, 1, last_score IS NULL
+        FROM progress WHERE concept_id = OLD.id
+        ON CONFLICT(day) DO UPDATE SET due = due + 1, new = new + excluded.new;
+    END;
+"""
+
+
+def _migrate_due_histogram(conn: sqlite3.Connection) -> None:
+    _execute_statements(conn, _DUE_DAILY_SCHEMA)
+    conn.execute(
+        """
+        INSERT INTO due_daily (day, due, new)
+        SELECT p.due_date / 86400000, COUNT(*), SUM(p.last_score IS NULL)
+        FROM progress p JOIN concepts c ON c.id = p.concept_id
+        WHERE c.skipped = 0
+        GROUP BY p.due_date / 86400000
+        """
+    )
 
-        for concept in concepts:
-            concept_cursor = conn.execute(
-                """
-                INSERT INTO concepts
-                (source_id, name, source_quote, ground_truth, question, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)
-                """,
-                (
-                    source_id,
-                    concept["name"],
-                    concept["source_quote"],
-                    concept.get("ground_truth", concept["source_quote"]),
-                    concept.get("question"),
-                    now.isoformat(),
-                ),
-            )
-            conn.execute(
-                "INSERT INTO progress (concept_id, due_date, created_at) VALUES (?, ?, ?)",
-                (concept_cursor.lastrowid, now.isoformat(), now.isoformat()),
-            )
 
-        return source_id
+def _intake_due_dates(conn: sqlite3.Connection, now: int, count: int) -> list[int]:
+    """Due dates for ``count`` new concepts under the NEW_CONCEPTS_PER_DAY cap.
 
+    Today takes what the cap leaves after the new concepts already due by
+    now; each later UTC day takes what it leaves on that day, due at its
+    midnight. Without a cap every new concept is due ``now``.
+    """
+    cap = config.NEW_CONCEPTS_PER_DAY
+    if cap <= 0:
+        return [now] * count
+    today = now // _DAY_MS
+    taken = dict(
+        conn.execute("SELECT day, new FROM due_daily WHERE day > ? AND new > 0", (today,))
+    )
+    taken[today] = conn.execute(
+        "SELECT COALESCE(SUM(new), 0) FROM due_daily WHERE day <= ?", (today,)
+    ).fetchone()[0]
+    dates: list[int] = []
+    day = today
+    while len(dates) < count:
+        free = min(cap - taken.get(day, 0), count - len(dates))
+        dates.extend([now if day == today else day * _DAY_MS] * max(free, 0))
+        day += 1
+    return dates
+
+
+# ---- Change log ----
+#
+# Inserts and real updates on the synced tables record (table, row id) in
+# change_log under a fresh revision. A row keeps only its latest revision and
+# deleting a row drops its entry, so the log holds at most one entry per live
+# row. export_all_data(since=rev) reads the rows changed after ``rev``.
+# Updates that leave every column as it was are not logged, so a delta merged
+# into another database is not echoed back by that database's next delta.
+
+# Synced table -> columns whose change makes a row part of the next delta.
+_CHANGE_LOG_COLUMNS = {
+    "sources": ("url", "title", "source_type", "content_hash", "segments_hash", "created_at"),
+    "concepts": (
+        "source_id", "name", "source_quote", "ground_truth", "question", "skipped",
+        "created_at",
+    ),
+    "progress": (
+        "concept_id", "ease_factor", "interval_days", "due_date", "review_count",
+        "last_score", "created_at",
+    ),
+    "review_events": ("concept_id", "created_at", "score", "turns", "error_codes", "text_hash"),
+    "duel_memory": ("concept_id", "last_belief", "last_errors", "last_attack", "updated_at"),
+    "cached_claims": ("concept_id", "statement", "claim_type", "claim_index", "created_at"),
+}
+
+
+def _change_log_schema() -> str:
+    statements = ["""
+        CREATE TABLE IF NOT EXISTS change_log (
+            rev INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL
+        );
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_row ON change_log(table_name, row_id);
+    """]
+    for table, columns in _CHANGE_LOG_COLUMNS.items():
+        log_row = f"""
+            DELETE FROM change_log WHERE table_name = '{table}' AND row_id = NEW.id;
+            INSERT INTO change_log (table_name, row_id) VALUES ('{table}', NEW.id);
+        """
+        changed = " OR ".join(f"NEW.{column} IS NOT OLD.{column}" for column in columns)
+        statements.append(f"""
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_ai AFTER INSERT ON {table}
+            BEGIN {log_row} END;
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_au AFTER UPDATE ON {table}
+            WHEN {changed}
+            BEGIN {log_row} END;
+            CREATE TRIGGER IF NOT EXISTS change_log_{table}_ad AFTER DELETE ON {table} BEGIN
+                DELETE FROM change_log WHERE table_name = '{table}' AND row_id = OLD.id;
+            END;
+        """)
+    return "\n".join(statements)
 
-def get_source_by_url(url: str) -> Optional[dict]:
-    """Get source by URL."""
-    with get_db() as conn:
-        row = conn.execute("SELECT * FROM sources WHERE url = ?", (url,)).fetchone()
-        return dict(row) if row else None
 
+def _current_revision(conn: sqlite3.Connection) -> int:
+    # The sequence, not MAX(rev): the newest entry may belong to a deleted row.
+    row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return row[0] if row else 0
 
-def get_all_sources() -> list[dict]:
-    """Get all sources."""
-    with get_db() as conn:
-        rows = conn.execute("SELECT * FROM sources ORDER BY created_at DESC").fetchall()
-        return [dict(row) for row in rows]
 
+# ---- Schema migrations ----
+#
+# PRAGMA user_version records how many entries of _MIGRATIONS have been applied.
+# A fresh database runs all of them in order. Databases from releases that
+# predate user_version report 0 and take the same path, so every step
+# tolerates the older shapes (missing columns and tables). A current database
+# costs one pragma read.
 
-def get_source(source_id: int) -> Optional[dict]:
-    """Get source by ID."""
-    with get_db() as conn:
-        row = conn.execute(
-            "SELECT * FROM sources WHERE id = ?", (source_id,)
-        ).fetchone()
-        return dict(row) if row else None
 
+class SchemaVersionError(RuntimeError):
+    """Raised when the database was written by a newer learnlock schema."""
 
-def delete_source(source_id: int) -> int:
-    """Delete a source and all its concepts/progress/claims (cascade).
 
-    Returns the number of concepts that were removed.
-    """
-    with get_db() as conn:
-        count = conn.execute(
-            "SELECT COUNT(*) FROM concepts WHERE source_id = ?",
-            (source_id,),
-        ).fetchone()[0]
-        conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
-        return count
+def _table_columns(conn: sqlite3.Connection, table: str) -> set[str]:
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()}
 
 
-# ============ CONCEPTS ============
+def _migrate_base_tables(conn: sqlite3.Connection) -> None:
+    """Core tables, plus the columns added to them before versioning existed."""
+    # Use hardcoded defaults in CREATE TABLE to prevent SQL injection via env vars
+    _execute_statements(conn, """
+        CREATE TABLE IF NOT EXISTS sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            source_type TEXT NOT NULL,
+            raw_content TEXT NOT NULL,
+            segments TEXT,
+            created_at TEXT NOT NULL
+        );
+
+        CREATE TABLE IF NOT EXISTS concepts (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            source_quote TEXT NOT NULL,
+            ground_truth TEXT,
+            question TEXT,
+            skipped INTEGER DEFAULT 0,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS explanations (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            score INTEGER,
+            covered TEXT,
+            missed TEXT,
+            feedback TEXT,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS progress (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER UNIQUE NOT NULL,
+            ease_factor REAL DEFAULT 2.5,
+            interval_days REAL DEFAULT 1.0,
+            due_date TEXT NOT NULL,
+            review_count INTEGER DEFAULT 0,
+            last_score INTEGER,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS duel_memory (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER UNIQUE NOT NULL,
+            last_belief TEXT,
+            last_errors TEXT,
+            last_attack TEXT,
+            updated_at TEXT NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        );
+
+        CREATE TABLE IF NOT EXISTS cached_claims (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER NOT NULL,
+            statement TEXT NOT NULL,
+            claim_type TEXT NOT NULL,
+            claim_index INTEGER NOT NULL,
+            created_at TEXT NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        );
+    """)
+
+    if "segments" not in _table_columns(conn, "sources"):
+        conn.execute("ALTER TABLE sources ADD COLUMN segments TEXT")
+    if "ground_truth" not in _table_columns(conn, "concepts"):
+        conn.execute("ALTER TABLE concepts ADD COLUMN ground_truth TEXT")
+        conn.execute("UPDATE concepts SET ground_truth = source_quote WHERE ground_truth IS NULL")
+
+
+def _migrate_content_store(conn: sqlite3.Connection) -> None:
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS content_blobs (
+            hash TEXT PRIMARY KEY,
+            codec TEXT NOT NULL,
+            text_length INTEGER NOT NULL,
+            raw_size INTEGER NOT NULL,
+            data BLOB NOT NULL
+        )
+    """)
+    if "content_hash" not in _table_columns(conn, "sources"):
+        conn.execute("ALTER TABLE sources ADD COLUMN content_hash TEXT")
+        conn.execute("ALTER TABLE sources ADD COLUMN segments_hash TEXT")
+    _move_inline_content(conn)
+
+
+def _migrate_search_index(conn: sqlite3.Connection) -> None:
+    _ensure_search_index(conn)
+
+
+def _migrate_stats_counters(conn: sqlite3.Connection) -> None:
+    # The counters are filled by _migrate_review_log(), once the review
+    # rollups they are computed from exist.
+    _execute_statements(conn, _STATS_SCHEMA)
+
+
+def _migrate_query_indexes(conn: sqlite3.Connection) -> None:
+    _execute_statements(conn, """
+        -- Due queue: range scan in due order, covering the join key.
+        CREATE INDEX IF NOT EXISTS idx_progress_due_concept
+            ON progress(due_date, concept_id);
+        -- Skipped concepts are the exception; index only those so the
+        -- planner never drives the due queue from a skipped = 0 lookup.
+        CREATE INDEX IF NOT EXISTS idx_concepts_skipped_only
+            ON concepts(id) WHERE skipped = 1;
+        CREATE INDEX IF NOT EXISTS idx_concepts_source_name
+            ON concepts(source_id, lower(name));
+        CREATE INDEX IF NOT EXISTS idx_explanations_concept_created
+            ON explanations(concept_id, created_at);
+        CREATE INDEX IF NOT EXISTS idx_cached_claims_concept_index
+            ON cached_claims(concept_id, claim_index);
+
+        -- Single-column indexes superseded by the ones above
+        DROP INDEX IF EXISTS idx_progress_due;
+        DROP INDEX IF EXISTS idx_concepts_source;
+        DROP INDEX IF EXISTS idx_concepts_skipped;
+        DROP INDEX IF EXISTS idx_cached_claims_concept;
+    """)
+
+
+# Shape of the tables rebuilt by _migrate_epoch_timestamps(). explanations was
+# later replaced by the review log.
+_EPOCH_TABLES = {
+    "sources": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            url TEXT UNIQUE NOT NULL,
+            title TEXT NOT NULL,
+            source_type TEXT NOT NULL,
+            content_hash TEXT,
+            segments_hash TEXT,
+            created_at INTEGER NOT NULL
+        )
+    """,
+    "concepts": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            source_id INTEGER NOT NULL,
+            name TEXT NOT NULL,
+            source_quote TEXT NOT NULL,
+            ground_truth TEXT,
+            question TEXT,
+            skipped INTEGER DEFAULT 0,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
+        )
+    """,
+    "explanations": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER NOT NULL,
+            text TEXT NOT NULL,
+            score INTEGER,
+            covered TEXT,
+            missed TEXT,
+            feedback TEXT,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        )
+    """,
+    "progress": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER UNIQUE NOT NULL,
+            ease_factor REAL DEFAULT 2.5,
+            interval_days REAL DEFAULT 1.0,
+            due_date INTEGER NOT NULL,
+            review_count INTEGER DEFAULT 0,
+            last_score INTEGER,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        )
+    """,
+    "duel_memory": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER UNIQUE NOT NULL,
+            last_belief TEXT,
+            last_errors TEXT,
+            last_attack TEXT,
+            updated_at INTEGER NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        )
+    """,
+    "cached_claims": """
+        CREATE TABLE {name} (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            concept_id INTEGER NOT NULL,
+            statement TEXT NOT NULL,
+            claim_type TEXT NOT NULL,
+            claim_index INTEGER NOT NULL,
+            created_at INTEGER NOT NULL,
+            FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+        )
+    """,
+}
 
 
-def add_concept(
-    source_id: int,
-    name: str,
-    source_quote: str,
-    question: str | None = None,
-    ground_truth: str | None = None,
-) -> int:
-    """Add a concept with initial progress. Returns concept ID.
+def _migrate_epoch_timestamps(conn: sqlite3.Connection) -> None:
+    """Store timestamps as INTEGER epoch ms; drop the emptied inline content columns.
 
-    New concepts are due immediately so user can study right after adding.
+    SQLite cannot change a column's type in place, so each table is rebuilt
+    (create, copy, drop, rename) and its indexes and triggers are re-created
+    from their saved SQL. Row ids are kept, so the search index and stats
+    counters stay valid. Unparseable legacy timestamps become the upgrade time.
     """
-    now = _utcnow()
-    # Due immediately - user should study right after adding
-    due = now
+    now = _now_ms()
+    for table, ddl in _EPOCH_TABLES.items():
+        rebuilt = f"{table}_rebuild"
+        dependents = [
+            row[0]
+            for row in conn.execute(
+                "SELECT sql FROM sqlite_master "
+                "WHERE type IN ('index', 'trigger') AND tbl_name = ? AND sql IS NOT NULL",
+                (table,),
+            ).fetchall()
+        ]
+        sequence = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = ?", (table,)
+        ).fetchone()
 
-    with get_db() as conn:
+        conn.execute(ddl.format(name=rebuilt))
+        columns = [row[1] for row in conn.execute(f"PRAGMA table_info({rebuilt})").fetchall()]
+        selected = ", ".join(
+            f"COALESCE(ll_epoch_ms({column}), :now)" if column in _TIMESTAMP_COLUMNS else column
+            for column in columns
+        )
+        conn.execute(
+            f"INSERT INTO {rebuilt} ({', '.join(columns)}) SELECT {selected} FROM {table}",
+            {"now": now},
+        )
+        conn.execute(f"DROP TABLE {table}")
+        conn.execute(f"ALTER TABLE {rebuilt} RENAME TO {table}")
+        if sequence is not None:
+            # Keep AUTOINCREMENT from reusing ids of rows deleted before the upgrade.
+            conn.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = ?",
+                (sequence[0], table),
+            )
+        for sql in dependents:
+            conn.execute(sql)
+
+
+def _migrate_review_log(conn: sqlite3.Connection) -> None:
+    """Move explanations into review_events/review_text and build the rollups.
+
+    Event ids are the explanation ids. The insert trigger fills the rollups as
+    rows are copied; stats_counters is recomputed once the old table is gone.
+    """
+    _execute_statements(conn, _REVIEW_LOG_SCHEMA)
+    if "explanations" in {
+        row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")
+    }:
         cursor = conn.execute(
-            """
-            INSERT INTO concepts
-            (source_id, name, source_quote, ground_truth, question, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-            """,
-            (
-                source_id,
-                name,
-                source_quote,
-                ground_truth or source_quote,
-                question,
-                now.isoformat(),
-            ),
+            "SELECT id, concept_id, text, score, covered, missed, feedback, created_at "
+            "FROM explanations ORDER BY id"
         )
-        concept_id = cursor.lastrowid
+        while chunk := cursor.fetchmany(EXPORT_CHUNK_ROWS):
+            rows = [dict(row) for row in chunk]
+            conn.executemany(
+                "INSERT INTO review_events (id, concept_id, created_at, score, text_hash) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [
+                    (row["id"], row["concept_id"], row["created_at"], row["score"],
+                     _review_text_hash(row))
+                    for row in rows
+                ],
+            )
+            conn.executemany(
+                "INSERT INTO review_text (event_id, codec, data) VALUES (?, ?, ?)",
+                [
+                    (row["id"], *packed)
+                    for row in rows
+                    if (packed := _pack_review_text(row)) is not None
+                ],
+            )
+        sequence = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'explanations'"
+        ).fetchone()
+        conn.execute("DROP TABLE explanations")
+        if sequence is not None:
+            updated = conn.execute(
+                "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'review_events'",
+                (sequence[0],),
+            ).rowcount
+            if not updated:
+                conn.execute(
+                    "INSERT INTO sqlite_sequence (name, seq) VALUES ('review_events', ?)",
+                    (sequence[0],),
+                )
+    _recompute_stats(conn)
 
+
+def _migrate_change_log(conn: sqlite3.Connection) -> None:
+    """Create the change log; every existing row starts out changed at revision 1..n."""
+    _execute_statements(conn, _change_log_schema())
+    for table in _CHANGE_LOG_COLUMNS:
         conn.execute(
-            "INSERT INTO progress (concept_id, due_date, created_at) VALUES (?, ?, ?)",
-            (concept_id, due.isoformat(), now.isoformat()),
+            f"INSERT OR IGNORE INTO change_log (table_name, row_id) "
+            f"SELECT '{table}', id FROM {table} ORDER BY id"
         )
-        return concept_id
 
 
-def get_concept(concept_id: int) -> Optional[dict]:
-    """Get concept by ID with source info."""
-    with get_db() as conn:
-        row = conn.execute(
-            """
-            SELECT c.*, s.title as source_title, s.url as source_url
-            FROM concepts c
-            JOIN sources s ON c.source_id = s.id
-            WHERE c.id = ?
-        """,
-            (concept_id,),
-        ).fetchone()
-        return dict(row) if row else None
+def _migrate_engine_state(conn: sqlite3.Connection) -> None:
+    """Add per-engine scheduler state to progress (NULL until an engine that needs it runs)."""
+    conn.execute("ALTER TABLE progress ADD COLUMN stability REAL")
+    conn.execute("ALTER TABLE progress ADD COLUMN difficulty REAL")
 
 
-def get_concepts_for_source(source_id: int) -> list[dict]:
-    """Get all concepts for a source."""
-    with get_db() as conn:
-        rows = conn.execute(
-            "SELECT * FROM concepts WHERE source_id = ? ORDER BY id", (source_id,)
-        ).fetchall()
-        return [dict(row) for row in rows]
+# Append only: an entry's position (1-based) is the user_version it produces.
+_MIGRATIONS = (
+    _migrate_base_tables,
+    _migrate_content_store,
+    _migrate_search_index,
+    _migrate_stats_counters,
+    _migrate_query_indexes,
+    _migrate_epoch_timestamps,
+    _migrate_review_log,
+    _migrate_change_log,
+    _migrate_engine_state,
+    _migrate_due_histogram,
+)
+SCHEMA_VERSION = len(_MIGRATIONS)
 
 
-def get_all_concepts() -> list[dict]:
-    """Get all concepts with source info (excluding skipped)."""
-    with get_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT c.*, s.title as source_title, s.url as source_url
-            FROM concepts c
-            JOIN sources s ON c.source_id = s.id
-            WHERE c.skipped = 0
-            ORDER BY c.created_at DESC
-        """
-        ).fetchall()
-        return [dict(row) for row in rows]
+def _schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
 
 
-def skip_concept(concept_id: int) -> None:
-    """Mark concept as skipped."""
-    with get_db() as conn:
-        conn.execute("UPDATE concepts SET skipped = 1 WHERE id = ?", (concept_id,))
+def _apply_migrations(conn: sqlite3.Connection, target: int = SCHEMA_VERSION) -> int:
+    """Bring the schema up to ``target`` in one transaction. Returns the start version.
 
+    BEGIN IMMEDIATE serialises concurrent upgrades; the version is re-read
+    once the write lock is held, so a process that lost the race does nothing.
+    Foreign keys are off while migrating (the pragma is a no-op inside a
+    transaction) so table rebuilds do not cascade deletes.
+    """
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        with conn:
+            conn.execute("BEGIN IMMEDIATE")
+            version = _schema_version(conn)
+            if version > SCHEMA_VERSION:
+                raise SchemaVersionError(
+                    f"Database schema version {version} is newer than this learnlock "
+                    f"supports ({SCHEMA_VERSION}). Upgrade learnlock."
+                )
+            for number in range(version + 1, target + 1):
+                _MIGRATIONS[number - 1](conn)
+                conn.execute(f"PRAGMA user_version = {number}")
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return version
 
-def unskip_concept(concept_id: int) -> None:
-    """Unmark concept as skipped."""
-    with get_db() as conn:
-        conn.execute("UPDATE concepts SET skipped = 0 WHERE id = ?", (concept_id,))
 
+def init_db(db_path: Path | str | None = None) -> None:
+    """Initialize or upgrade the database schema. Only runs once per path."""
+    if db_path is None:
+        db_path = _default_db_path()
 
-def get_skipped_concepts() -> list[dict]:
-    """Get all skipped concepts with source info."""
-    with get_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT c.*, s.title as source_title
-            FROM concepts c JOIN sources s ON c.source_id = s.id
-            WHERE c.skipped = 1
-        """
-        ).fetchall()
-        return [dict(r) for r in rows]
+    on_disk = isinstance(db_path, Path)
+    db_key = str(db_path.resolve()) if on_disk else db_path
+    if db_key in _initialized_dbs:
+        return
 
+    if on_disk:
+        db_path.parent.mkdir(parents=True, exist_ok=True)
 
-# ============ PROGRESS ============
+    conn = _pooled_connection(db_path)
+    if _schema_version(conn) != SCHEMA_VERSION:
+        _apply_migrations(conn)
 
+    if on_disk:
+        try:
+            os.chmod(db_path, 0o600)
+        except OSError:
+            pass
 
-def get_due_concepts(limit: int | None = None) -> list[dict]:
-    """Get concepts due for review (not skipped)."""
-    if limit is None:
-        limit = 100  # Reasonable default
+    _initialized_dbs.add(db_key)
 
-    now = _utcnow().isoformat()
-    with get_db() as conn:
-        rows = conn.execute(
-            """
-            SELECT c.*, p.ease_factor, p.interval_days, p.due_date,
-                   p.review_count, p.last_score,
-                   s.title as source_title, s.url as source_url
-            FROM concepts c
-            JOIN progress p ON c.id = p.concept_id
-            JOIN sources s ON c.source_id = s.id
-            WHERE p.due_date <= ? AND c.skipped = 0
-            ORDER BY p.due_date ASC
-            LIMIT ?
-        """,
-            (now, limit),
-        ).fetchall()
-        return [dict(row) for row in rows]
 
+def reset_init_cache() -> None:
+    """Reset the initialization cache and pooled connections. Useful for testing."""
+    close()
+    _initialized_dbs.clear()
 
-def get_progress(concept_id: int) -> Optional[dict]:
-    """Get progress for a concept."""
-    with get_db() as conn:
-        row = conn.execute("SELECT * FROM progress WHERE concept_id = ?", (concept_id,)).fetchone()
-        return dict(row) if row else None
 
+# Jittered exponential backoff for BEGIN IMMEDIATE (seconds).
+WRITE_RETRY_BASE_DELAY = 0.002
+WRITE_RETRY_MAX_DELAY = 0.1
 
-def update_progress(
-    concept_id: int,
-    ease_factor: float,
-    interval_days: float,
-    due_date: datetime,
-    review_count: int,
-    last_score: int,
-) -> None:
-    """Update progress for a concept."""
-    with get_db() as conn:
-        conn.execute(
-            """
-            UPDATE progress
-            SET ease_factor = ?, interval_days = ?, due_date = ?,
-                review_count = ?, last_score = ?
-            WHERE concept_id = ?
-        """,
-            (
-                ease_factor,
-                interval_days,
-                due_date.isoformat(),
-                review_count,
-                last_score,
-                concept_id,
-            ),
-        )
 
+def _is_busy(error: sqlite3.OperationalError) -> bool:
+    code = getattr(error, "sqlite_errorcode", None)
+    if code is None:
+        return "locked" in str(error) or "busy" in str(error)
+    return code & 0xFF in (sqlite3.SQLITE_BUSY, sqlite3.SQLITE_LOCKED)
 
-# ============ EXPLANATIONS ============
 
+def _begin_immediate(conn: sqlite3.Connection) -> None:
+    """BEGIN IMMEDIATE, retrying with jittered backoff while another writer holds the lock.
 
-def add_explanation(
-    concept_id: int,
-    text: str,
-    score: int | None = None,
-    covered: str | None = None,
-    missed: str | None = None,
-    feedback: str | None = None,
-) -> int:
-    """Add an explanation with evaluation results."""
-    with get_db() as conn:
-        cursor = conn.execute(
-            """INSERT INTO explanations
-               (concept_id, text, score, covered, missed, feedback, created_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?)""",
-            (concept_id, text, score, covered, missed, feedback, _utcnow().isoformat()),
-        )
-        return cursor.lastrowid
+    SQLite's busy handler retries on a fixed schedule, so writers that
+    collided once tend to keep colliding; random waits spread them out. Gives
+    up after config.SQLITE_TIMEOUT_SECONDS, as the busy handler would.
+    """
+    deadline = time.monotonic() + config.SQLITE_TIMEOUT_SECONDS
+    delay = WRITE_RETRY_BASE_DELAY
+    conn.execute("PRAGMA busy_timeout = 0")
+    try:
+        while True:
+            try:
+                conn.execute("BEGIN IMMEDIATE")
+                return
+            except sqlite3.OperationalError as e:
+                if not _is_busy(e) or time.monotonic() >= deadline:
+                    raise
+            time.sleep(random.uniform(0, delay))
+            delay = min(delay * 2, WRITE_RETRY_MAX_DELAY)
+    finally:
+        conn.execute(f"PRAGMA busy_timeout = {int(config.SQLITE_TIMEOUT_SECONDS * 1000)}")
 
 
-def get_explanations(concept_id: int) -> list[dict]:
-    """Get all explanations for a concept."""
-    with get_db() as conn:
-        rows = conn.execute(
-            "SELECT * FROM explanations WHERE concept_id = ? ORDER BY created_at DESC",
-            (concept_id,),
-        ).fetchall()
-        return [dict(row) for row in rows]
+class Session:
+    """Handle for a unit of work opened with :func:`session`.
 
+    Storage calls made on the owning thread while the session is active join
+    its transaction instead of committing on their own.
+    """
 
-# ============ STATS ============
+    __slots__ = ("conn", "db_key", "active")
 
+    def __init__(self, conn: sqlite3.Connection, db_key: str):
+        self.conn = conn
+        self.db_key = db_key
+        self.active = True
 
-def get_stats() -> dict:
-    """Get overall statistics."""
-    with get_db() as conn:
-        total_sources = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
-        total_concepts = conn.execute("SELECT COUNT(*) FROM concepts WHERE skipped = 0").fetchone()[
-            0
-        ]
-        skipped_concepts = conn.execute(
-            "SELECT COUNT(*) FROM concepts WHERE skipped = 1"
-        ).fetchone()[0]
-        total_explanations = conn.execute("SELECT COUNT(*) FROM explanations").fetchone()[0]
 
-        now = _utcnow().isoformat()
-        due_count = conn.execute(
-            """
-            SELECT COUNT(*) FROM progress p
-            JOIN concepts c ON p.concept_id = c.id
-            WHERE p.due_date <= ? AND c.skipped = 0
-        """,
-            (now,),
-        ).fetchone()[0]
+@contextmanager
+def get_db(db_path: Path | str | None = None):
+    """Borrow this thread's pooled connection.
+
+    Commits on success and rolls back on error, so the connection is always
+    returned to the pool without an open transaction. Inside an active
+    :func:`session` the commit is deferred to the end of the session, and a
+    block nested in another get_db() block's open transaction joins it as a
+    SAVEPOINT. Under a write operation the block is one BEGIN IMMEDIATE
+    transaction, so keep work that does not need the database outside it.
+    """
+    if db_path is None:
+        db_path = _default_db_path()
+
+    key = str(db_path)
+    conn = _thread_pool().get(key)
+    if conn is None:
+        init_db(db_path)
+        conn = _pooled_connection(db_path)
+    elif key in _local.sessions:
+        yield conn
+        return
+    if conn.in_transaction:
+        # Committing here would commit the enclosing block's work too.
+        conn.execute("SAVEPOINT get_db")
+        try:
+            yield conn
+        except BaseException:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK TO get_db")
+                conn.execute("RELEASE get_db")
+            raise
+        if conn.in_transaction:
+            conn.execute("RELEASE get_db")
+        return
+    if _write_intent.get():
+        _begin_immediate(conn)
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
 
-        avg_score = conn.execute(
-            "SELECT AVG(score) FROM explanations WHERE score IS NOT NULL"
-        ).fetchone()[0]
 
-        mastered = conn.execute(
-            """
-            SELECT COUNT(*) FROM progress
-            WHERE ease_factor >= ? AND review_count >= ?
-        """,
-            (config.MASTERY_MIN_EASE, config.MASTERY_MIN_REVIEWS),
-        ).fetchone()[0]
-        successful_reviews = conn.execute(
-            "SELECT COUNT(*) FROM explanations WHERE score >= 4"
-        ).fetchone()[0]
+@contextmanager
+def session(
+    existing: Session | None = None,
+    db_path: Path | str | None = None,
+    *,
+    readonly: bool = False,
+):
+    """Run a group of storage calls as one transaction with a single commit.
+
+    Passing an active ``existing`` session (or nesting on the same thread)
+    joins it rather than starting a new transaction. The transaction takes the
+    write lock up front (BEGIN IMMEDIATE) unless ``readonly``, which only
+    pins a read snapshot. With a non-SQLite backend active the backend's own
+    ``session()`` is used.
+    """
+    if existing is not None and existing.active:
+        yield existing
+        return
 
-        return {
-            "total_sources": total_sources,
-            "total_concepts": total_concepts,
-            "skipped_concepts": skipped_concepts,
-            "total_reviews": total_explanations,
-            "successful_reviews": successful_reviews,
-            "due_now": due_count,
-            "avg_score": round(avg_score, 1) if avg_score else 0,
-            "mastered": mastered,
-        }
+    if db_path is None:
+        backend = _active_backend()
+        if not isinstance(backend, SQLiteBackend):
+            with backend.session(existing) as unit:
+                yield unit
+            return
+        db_path = backend.db_path
+    key = str(db_path)
+
+    with get_db(db_path) as conn:
+        active = _local.sessions.get(key)
+        if active is not None:
+            yield active
+            return
+
+        if not conn.in_transaction:
+            if readonly:
+                conn.execute("BEGIN")
+            else:
+                _begin_immediate(conn)
+        unit = Session(conn, key)
+        _local.sessions[key] = unit
+        try:
+            yield unit
+        finally:
+            unit.active = False
+            _local.sessions.pop(key, None)
 
 
-# ============ DUEL MEMORY ============
+# ---- Backend dispatch ----
+#
+# Every public data function below is registered with @_operation. The module
+# function is a facade over the active backend (see BACKENDS at the end of
+# this file): SQLite backends run the function body against their database,
+# anything else receives the call as a method of the same name.
 
+_OPERATIONS: dict[str, Callable] = {}
 
-def save_duel_memory(concept_id: int, belief: str, errors: str, attack: str) -> None:
-    """Save last duel state for a concept."""
-    with get_db() as conn:
-        conn.execute(
-            """
-            INSERT INTO duel_memory (concept_id, last_belief, last_errors, last_attack, updated_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(concept_id) DO UPDATE SET
-                last_belief = excluded.last_belief,
-                last_errors = excluded.last_errors,
-                last_attack = excluded.last_attack,
-                updated_at = excluded.updated_at
-        """,
-            (concept_id, belief, errors, attack, _utcnow().isoformat()),
-        )
+# Backend a SQLiteBackend method is currently running against; module-level
+# calls made while it is set (including nested ones) use its database.
+_bound_backend: ContextVar[Optional["StorageBackend"]] = ContextVar(
+    "learnlock_storage_backend", default=None
+)
 
 
-def get_duel_memory(concept_id: int) -> Optional[dict]:
-    """Get last duel state for a concept."""
-    with get_db() as conn:
-        row = conn.execute(
-            "SELECT last_belief, last_errors, last_attack FROM duel_memory WHERE concept_id = ?",
-            (concept_id,),
-        ).fetchone()
-        if row:
-            return {
-                "last_belief": row[0],
-                "last_errors": row[1],
-                "last_attack": row[2],
-            }
-        return None
+def _active_backend() -> "StorageBackend":
+    return _bound_backend.get() or _backend
 
 
-# ============ CACHED CLAIMS ============
+def _default_db_path() -> Path | str:
+    """Database used when a call does not name one: the active backend's."""
+    return getattr(_active_backend(), "db_path", None) or config.DB_PATH
 
 
-def get_cached_claims(concept_id: int) -> list[dict] | None:
-    """Get cached claims for a concept. Returns None if no cache exists."""
-    with get_db() as conn:
-        rows = conn.execute(
-            "SELECT statement, claim_type, claim_index FROM cached_claims "
-            "WHERE concept_id = ? ORDER BY claim_index",
-            (concept_id,),
-        ).fetchall()
+def _operation(fn: Callable) -> Callable:
+    """Register ``fn`` as a backend operation and return its module facade."""
+    name = fn.__name__
+    _OPERATIONS[name] = fn
 
-        if not rows:
-            return None
+    @functools.wraps(fn)
+    def facade(*args, **kwargs):
+        backend = _active_backend()
+        if isinstance(backend, SQLiteBackend):
+            return fn(*args, **kwargs)
+        return getattr(backend, name)(*args, **kwargs)
 
-        return [{"statement": row[0], "claim_type": row[1], "claim_index": row[2]} for row in rows]
+    return facade
 
 
-def save_cached_claims(concept_id: int, claims: list[dict]) -> None:
-    """Cache parsed claims for a concept. Replaces any existing cache."""
-    with get_db() as conn:
-        conn.execute(
-            "DELETE FROM cached_claims WHERE concept_id = ?",
-            (concept_id,),
-        )
-        now = _utcnow().isoformat()
-        for claim in claims:
-            conn.execute(
-                "INSERT INTO cached_claims "
-                "(concept_id, statement, claim_type, claim_index, created_at) "
-                "VALUES (?, ?, ?, ?, ?)",
-                (
-                    concept_id,
-                    claim["statement"],
-                    claim["claim_type"],
-                    claim["claim_index"],
-                    now,
-                ),
-            )
+# ---- Write coordination ----
+#
+# Write operations open their transactions with BEGIN IMMEDIATE (get_db()
+# checks _write_intent), so concurrent processes queue for the lock instead
+# of failing to upgrade a read. With config.SQLITE_WRITE_QUEUE they also run
+# on one background thread per process, which serialises the process's
+# writes on a single connection; calls inside a session stay on the caller's
+# thread so they join its transaction.
 
+_write_intent: ContextVar[bool] = ContextVar("learnlock_write_intent", default=False)
+_writer_lock = threading.Lock()
+_writer: ThreadPoolExecutor | None = None
+_writer_pid: int | None = None
 
-def update_cached_claim(
-    concept_id: int, claim_index: int, statement: str
-) -> bool:
-    """Update a single cached claim's statement. Returns True if updated."""
-    with get_db() as conn:
-        now = _utcnow().isoformat()
-        cursor = conn.execute(
-            "UPDATE cached_claims SET statement = ?, created_at = ? "
-            "WHERE concept_id = ? AND claim_index = ?",
-            (statement, now, concept_id, claim_index),
-        )
-        return cursor.rowcount > 0
 
+def _mark_writer_thread() -> None:
+    _local.writer = True
 
-def delete_cached_claim(concept_id: int, claim_index: int) -> bool:
-    """Delete a single cached claim. Returns True if deleted."""
-    with get_db() as conn:
-        cursor = conn.execute(
-            "DELETE FROM cached_claims "
-            "WHERE concept_id = ? AND claim_index = ?",
-            (concept_id, claim_index),
-        )
-        if cursor.rowcount > 0:
-            now = _utcnow().isoformat()
-            # Re-index remaining claims
-            rows = conn.execute(
-                "SELECT id FROM cached_claims "
-                "WHERE concept_id = ? ORDER BY claim_index",
-                (concept_id,),
-            ).fetchall()
-            for i, row in enumerate(rows):
-                conn.execute(
-                    "UPDATE cached_claims SET claim_index = ?, created_at = ? WHERE id = ?",
-                    (i, now, row[0]),
-                )
-            return True
+
+def _write_queue() -> ThreadPoolExecutor:
+    global _writer, _writer_pid
+    with _writer_lock:
+        # A forked child inherits the executor object but not its thread.
+        if _writer is None or _writer_pid != os.getpid():
+            _writer = ThreadPoolExecutor(
+                max_workers=1,
+                thread_name_prefix="learnlock-writer",
+                initializer=_mark_writer_thread,
+            )
+            _writer_pid = os.getpid()
+    return _writer
+
+
+def _queue_write() -> bool:
+    if not config.SQLITE_WRITE_QUEUE or _write_intent.get():
         return False
+    _thread_pool()
+    return not (getattr(_local, "writer", False) or _local.sessions)
 
 
-# ============ EXPORT / IMPORT ============
+def _write_operation(fn: Callable) -> Callable:
+    """Register a backend operation that writes (see Write coordination)."""
 
+    @functools.wraps(fn)
+    def write(*args, **kwargs):
+        if _queue_write():
+            return _write_queue().submit(copy_context().run, write, *args, **kwargs).result()
+        token = _write_intent.set(True)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _write_intent.reset(token)
 
-def export_all_data() -> dict:
-    """Export entire database to a JSON-serializable dict."""
-    with get_db() as conn:
-        sources = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM sources ORDER BY id"
-            ).fetchall()
-        ]
-        concepts = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM concepts ORDER BY id"
-            ).fetchall()
-        ]
-        progress = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM progress ORDER BY id"
-            ).fetchall()
-        ]
-        explanations = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM explanations ORDER BY id"
-            ).fetchall()
-        ]
-        duel_memory = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM duel_memory ORDER BY id"
-            ).fetchall()
-        ]
-        cached_claims = [
-            dict(r) for r in conn.execute(
-                "SELECT * FROM cached_claims ORDER BY id"
-            ).fetchall()
-        ]
+    return _operation(write)
 
-    return {
-        "schema_version": EXPORT_SCHEMA_VERSION,
-        "version": __version__,
-        "exported_at": _utcnow().isoformat(),
-        "sources": sources,
-        "concepts": concepts,
-        "progress": progress,
-        "explanations": explanations,
-        "duel_memory": duel_memory,
-        "cached_claims": cached_claims,
-    }
 
+# ============ SOURCES ============
 
-def _merge_progress_row(
-    conn: sqlite3.Connection,
-    concept_id: int,
-    imported: Mapping[str, object] | None,
-    imported_activity_at: str,
-    now: str,
-) -> bool:
-    """Merge progress by keeping the row with stronger evidence of recency."""
-    existing = conn.execute(
-        "SELECT * FROM progress WHERE concept_id = ?",
-        (concept_id,),
-    ).fetchone()
 
-    if imported is None:
-        if existing is None:
+def _insert_source(
+    conn: sqlite3.Connection,
+    url: str,
+    title: str,
+    source_type: str,
+    content: tuple[str, str, int, int, bytes] | None,
+    segments: tuple[str, str, int, int, bytes] | None,
+    created_at: int,
+) -> int:
+    """Insert a source row; ``content``/``segments`` come from :func:`_pack_content`."""
+    cursor = conn.execute(
+        """
+        INSERT INTO sources (url, title, source_type, content_hash, segments_hash, created_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        """,
+        (
+            url,
+            title,
+            source_type,
+            _store_packed(conn, content),
+            _store_packed(conn, segments),
+            created_at,
+        ),
+    )
+    return cursor.lastrowid
+
+
+@_write_operation
+def add_source(
+    url: str, title: str, source_type: str, raw_content: str, segments: str | None = None
+) -> int:
+    """Add a source. Returns source ID."""
+    content, packed_segments = _pack_content(raw_content), _pack_content(segments)
+    with get_db() as conn:
+        return _insert_source(conn, url, title, source_type, content, packed_segments, _now_ms())
+
+
+@_write_operation
+def add_source_with_concepts(
+    *,
+    url: str,
+    title: str,
+    source_type: str,
+    raw_content: str,
+    concepts: list[dict],
+    segments: str | None = None,
+) -> int:
+    """Atomically save a source and its extracted concepts.
+
+    The concepts are due at once, up to the NEW_CONCEPTS_PER_DAY cap; the
+    rest are queued onto the following days.
+    """
+
+    # Hash and compress before taking the write lock.
+    content, packed_segments = _pack_content(raw_content), _pack_content(segments)
+    now = _now_ms()
+    with get_db() as conn:
+        source_id = _insert_source(conn, url, title, source_type, content, packed_segments, now)
+
+        for concept, due in zip(concepts, _intake_due_dates(conn, now, len(concepts))):
+            concept_cursor = conn.execute(
+                """
+                INSERT INTO concepts
+                (source_id, name, source_quote, ground_truth, question, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    source_id,
+                    concept["name"],
+                    concept["source_quote"],
+                    concept.get("ground_truth", concept["source_quote"]),
+                    concept.get("question"),
+                    now,
+                ),
+            )
             conn.execute(
                 "INSERT INTO progress (concept_id, due_date, created_at) VALUES (?, ?, ?)",
-                (concept_id, now, now),
+                (concept_cursor.lastrowid, due, now),
             )
-        return False
 
-    if existing is None:
-        conn.execute(
+        return source_id
+
+
+@_operation
+def get_source_by_url(url: str) -> Optional[dict]:
+    """Get source metadata by URL."""
+    with get_db() as conn:
+        row = conn.execute(
+            f"SELECT {_SOURCE_COLUMNS} FROM sources s WHERE s.url = ?", (url,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+@_operation
+def get_all_sources() -> list[dict]:
+    """Get metadata for all sources."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT {_SOURCE_COLUMNS} FROM sources s ORDER BY s.created_at DESC"
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+@_operation
+def get_source(source_id: int) -> Optional[dict]:
+    """Get source metadata by ID.
+
+    The stored text is not included; use get_source_content() or
+    get_source_segments() when it is actually needed.
+    """
+    with get_db() as conn:
+        row = conn.execute(
+            f"SELECT {_SOURCE_COLUMNS} FROM sources s WHERE s.id = ?", (source_id,)
+        ).fetchone()
+        return dict(row) if row else None
+
+
+def _load_source_blob(source_id: int, column: str) -> Optional[str]:
+    with get_db() as conn:
+        row = conn.execute(
+            f"""
+            SELECT b.codec, b.data
+            FROM sources s JOIN content_blobs b ON b.hash = s.{column}
+            WHERE s.id = ?
+            """,
+            (source_id,),
+        ).fetchone()
+        return _inflate(row["codec"], row["data"]) if row else None
+
+
+@_operation
+def get_source_content(source_id: int) -> Optional[str]:
+    """Load a source's stored text from the content store."""
+    return _load_source_blob(source_id, "content_hash")
+
+
+@_operation
+def get_source_segments(source_id: int) -> Optional[str]:
+    """Load a source's timestamped segments JSON from the content store."""
+    return _load_source_blob(source_id, "segments_hash")
+
+
+@_operation
+def get_content_stats(sample: int = 20) -> dict:
+    """Size and load-latency figures for the content store.
+
+    Latency is measured by loading the ``sample`` largest blobs.
+    """
+    with get_db() as conn:
+        sizes = conn.execute(
             """
-            INSERT INTO progress
-            (concept_id, ease_factor, interval_days, due_date, review_count, last_score, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
+            SELECT COUNT(*) AS blobs,
+                   COALESCE(SUM(raw_size), 0) AS unique_bytes,
+                   COALESCE(SUM(length(data)), 0) AS stored_bytes
+            FROM content_blobs
+            """
+        ).fetchone()
+        referenced_bytes = conn.execute(
+            """
+            SELECT COALESCE(SUM(b.raw_size), 0)
+            FROM sources s JOIN content_blobs b ON b.hash IN (s.content_hash, s.segments_hash)
+            """
+        ).fetchone()[0]
+        sources = conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+        hashes = [
+            row[0]
+            for row in conn.execute(
+                "SELECT hash FROM content_blobs ORDER BY raw_size DESC LIMIT ?", (sample,)
+            ).fetchall()
+        ]
+        timings = []
+        for blob_hash in hashes:
+            started = time.perf_counter()
+            row = conn.execute(
+                "SELECT codec, data FROM content_blobs WHERE hash = ?", (blob_hash,)
+            ).fetchone()
+            _inflate(row["codec"], row["data"])
+            timings.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "sources": sources,
+        "blobs": sizes["blobs"],
+        "referenced_bytes": referenced_bytes,
+        "unique_bytes": sizes["unique_bytes"],
+        "stored_bytes": sizes["stored_bytes"],
+        "sampled": len(timings),
+        "avg_load_ms": round(sum(timings) / len(timings), 3) if timings else 0.0,
+        "max_load_ms": round(max(timings), 3) if timings else 0.0,
+    }
+
+
+@_write_operation
+def delete_source(source_id: int) -> int:
+    """Delete a source and all its concepts/progress/claims (cascade).
+
+    Returns the number of concepts that were removed.
+    """
+    with get_db() as conn:
+        count = conn.execute(
+            "SELECT COUNT(*) FROM concepts WHERE source_id = ?",
+            (source_id,),
+        ).fetchone()[0]
+        conn.execute("DELETE FROM sources WHERE id = ?", (source_id,))
+        _prune_content(conn)
+        return count
+
+
+# ============ CONCEPTS ============
+
+# Every concepts column (alias c), with created_at formatted for callers.
+_CONCEPT_COLUMNS = (
+    "c.id, c.source_id, c.name, c.source_quote, c.ground_truth, c.question, c.skipped, "
+    + _iso_sql("c.created_at")
+)
+
+
+@_write_operation
+def add_concept(
+    source_id: int,
+    name: str,
+    source_quote: str,
+    question: str | None = None,
+    ground_truth: str | None = None,
+) -> int:
+    """Add a concept with initial progress. Returns concept ID.
+
+    New concepts are due immediately so user can study right after adding,
+    unless today's NEW_CONCEPTS_PER_DAY intake is used up.
+    """
+    now = _now_ms()
+
+    with get_db() as conn:
+        (due,) = _intake_due_dates(conn, now, 1)
+        cursor = conn.execute(
+            """
+            INSERT INTO concepts
+            (source_id, name, source_quote, ground_truth, question, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
             """,
             (
-                concept_id,
-                imported.get("ease_factor", 2.5),
-                imported.get("interval_days", 1.0),
-                imported.get("due_date", now),
-                imported.get("review_count", 0),
-                imported.get("last_score"),
-                imported.get("created_at", now),
+                source_id,
+                name,
+                source_quote,
+                ground_truth or source_quote,
+                question,
+                now,
             ),
         )
-        return True
+        concept_id = cursor.lastrowid
 
-    existing_activity_at = conn.execute(
-        "SELECT MAX(created_at) FROM explanations WHERE concept_id = ?",
-        (concept_id,),
-    ).fetchone()[0] or existing["due_date"]
+        conn.execute(
+            "INSERT INTO progress (concept_id, due_date, created_at) VALUES (?, ?, ?)",
+            (concept_id, due, now),
+        )
+        return concept_id
 
-    imported_rank = (
-        int(imported.get("review_count", 0) or 0),
-        _parse_timestamp(imported_activity_at),
-        _parse_timestamp(imported.get("due_date")),
-    )
-    existing_rank = (
-        int(existing["review_count"] or 0),
-        _parse_timestamp(existing_activity_at),
-        _parse_timestamp(existing["due_date"]),
-    )
 
-    if imported_rank > existing_rank:
-        conn.execute(
+@_operation
+def get_concept(concept_id: int) -> Optional[dict]:
+    """Get concept by ID with source info."""
+    with get_db() as conn:
+        row = conn.execute(
+            f"""
+            SELECT {_CONCEPT_COLUMNS}, s.title as source_title, s.url as source_url
+            FROM concepts c
+            JOIN sources s ON c.source_id = s.id
+            WHERE c.id = ?
+        """,
+            (concept_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+@_operation
+def get_concepts_for_source(source_id: int) -> list[dict]:
+    """Get all concepts for a source."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT {_CONCEPT_COLUMNS} FROM concepts c WHERE c.source_id = ? ORDER BY c.id",
+            (source_id,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+@_operation
+def get_all_concepts() -> list[dict]:
+    """Get all concepts with source info (excluding skipped)."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {_CONCEPT_COLUMNS}, s.title as source_title, s.url as source_url
+            FROM concepts c
+            JOIN sources s ON c.source_id = s.id
+            WHERE c.skipped = 0
+            ORDER BY c.created_at DESC
+        """
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+@_write_operation
+def skip_concept(concept_id: int) -> None:
+    """Mark concept as skipped."""
+    with get_db() as conn:
+        conn.execute("UPDATE concepts SET skipped = 1 WHERE id = ?", (concept_id,))
+
+
+@_write_operation
+def unskip_concept(concept_id: int) -> None:
+    """Unmark concept as skipped."""
+    with get_db() as conn:
+        conn.execute("UPDATE concepts SET skipped = 0 WHERE id = ?", (concept_id,))
+
+
+@_operation
+def get_skipped_concepts() -> list[dict]:
+    """Get all skipped concepts with source info."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"""
+            SELECT {_CONCEPT_COLUMNS}, s.title as source_title
+            FROM concepts c JOIN sources s ON c.source_id = s.id
+            WHERE c.skipped = 1
+        """
+        ).fetchall()
+        return [dict(r) for r in rows]
+
+
+# ============ LISTINGS ============
+#
+# Projection queries for the listing commands: only the displayed columns,
+# returned as compact NamedTuple records instead of full row dicts.
+
+
+class SourceSummary(NamedTuple):
+    id: int
+    title: str
+    url: str
+    concept_count: int
+
+
+class ConceptListing(NamedTuple):
+    id: int
+    name: str
+    source_id: int
+    source_title: str
+    review_count: int
+    last_score: Optional[int]
+
+
+class DueConcept(NamedTuple):
+    id: int
+    name: str
+    source_title: str
+    due_date: str
+
+
+def _fetch_records(
+    conn: sqlite3.Connection, record: type[NamedTuple], sql: str, params: tuple = ()
+) -> list:
+    cursor = conn.cursor()
+    cursor.row_factory = lambda _cursor, row: record._make(row)
+    return cursor.execute(sql, params).fetchall()
+
+
+@_operation
+def list_source_summaries() -> list[SourceSummary]:
+    """Sources (newest first) with their concept counts, skipped included."""
+    with get_db() as conn:
+        return _fetch_records(
+            conn,
+            SourceSummary,
             """
-            UPDATE progress
-            SET ease_factor = ?, interval_days = ?, due_date = ?,
-                review_count = ?, last_score = ?, created_at = ?
-            WHERE concept_id = ?
+            SELECT s.id, s.title, s.url, COUNT(c.id)
+            FROM sources s LEFT JOIN concepts c ON c.source_id = s.id
+            GROUP BY s.id
+            ORDER BY s.created_at DESC
             """,
-            (
-                imported.get("ease_factor", existing["ease_factor"]),
-                imported.get("interval_days", existing["interval_days"]),
-                imported.get("due_date", existing["due_date"]),
-                imported.get("review_count", existing["review_count"]),
-                imported.get("last_score", existing["last_score"]),
-                imported.get("created_at", existing["created_at"]),
-                concept_id,
+        )
+
+
+@_operation
+def count_concepts_for_source(source_id: int) -> int:
+    """Number of concepts (skipped included) extracted from a source."""
+    with get_db() as conn:
+        return conn.execute(
+            "SELECT COUNT(*) FROM concepts WHERE source_id = ?", (source_id,)
+        ).fetchone()[0]
+
+
+LISTING_CHUNK_ROWS = 200
+
+
+@_operation
+def iter_concepts_with_progress(
+    *, skipped: bool = False, chunk_rows: int = LISTING_CHUNK_ROWS
+) -> Iterator[ConceptListing]:
+    """Stream active (or skipped) concepts with source title and review progress.
+
+    Rows come from one ordered query, grouped by source (newest source first,
+    concepts in extraction order), and are fetched ``chunk_rows`` at a time.
+    """
+    with get_db() as conn:
+        cursor = conn.cursor()
+        cursor.row_factory = lambda _cursor, row: ConceptListing._make(row)
+        cursor.execute(
+            """
+            SELECT c.id, c.name, c.source_id, s.title,
+                   COALESCE(p.review_count, 0), p.last_score
+            FROM concepts c
+            JOIN sources s ON c.source_id = s.id
+            LEFT JOIN progress p ON p.concept_id = c.id
+            WHERE c.skipped = ?
+            ORDER BY s.created_at DESC, s.id DESC, c.created_at DESC, c.id
+            """,
+            (int(skipped),),
+        )
+        while rows := cursor.fetchmany(chunk_rows):
+            yield from rows
+
+
+@_operation
+def list_concepts(*, skipped: bool = False) -> list[ConceptListing]:
+    """All rows of iter_concepts_with_progress() as a list."""
+    return list(iter_concepts_with_progress(skipped=skipped))
+
+
+@_operation
+def list_due_concepts(limit: int = 100) -> list[DueConcept]:
+    """Due, non-skipped concepts in due order (projection of get_due_concepts())."""
+    with get_db() as conn:
+        return _fetch_records(
+            conn,
+            DueConcept,
+            f"""
+            SELECT c.id, c.name, s.title, {_iso_sql("p.due_date")}
+            FROM concepts c
+            JOIN progress p ON c.id = p.concept_id
+            JOIN sources s ON c.source_id = s.id
+            WHERE p.due_date <= ? AND c.skipped = 0
+            ORDER BY p.due_date ASC
+            LIMIT ?
+            """,
+            (_now_ms(), limit),
+        )
+
+
+@_operation
+def count_due_concepts() -> int:
+    """Number of due, non-skipped concepts."""
+    with get_db() as conn:
+        return conn.execute(
+            """
+            SELECT COUNT(*)
+            FROM concepts c JOIN progress p ON c.id = p.concept_id
+            WHERE p.due_date <= ? AND c.skipped = 0
+            """,
+            (_now_ms(),),
+        ).fetchone()[0]
+
+
+# ============ SEARCH ============
+
+
+class SearchHit(NamedTuple):
+    kind: str  # "concept", "claim" or "source"
+    id: int  # Concept id for concept/claim hits, source id for source hits
+    title: str
+    snippet: str
+
+
+_SEARCH_MIN_TERM = 3  # Shortest term the trigram index can match
+
+
+def _like_pattern(text: str) -> tuple[str, str]:
+    """Return a ``%text%`` LIKE pattern and the ESCAPE clause it needs.
+
+    The trigram index only serves LIKE without ESCAPE, so the clause is added
+    just for queries that contain wildcard characters.
+    """
+    if not any(char in text for char in "%_\\"):
+        return f"%{text}%", ""
+    escaped = text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%", " ESCAPE '\\'"
+
+
+@_operation
+def search(query: str, limit: int = 20, *, mark: tuple[str, str] = ("[", "]")) -> list[SearchHit]:
+    """Ranked full-text search over concepts, cached claims and sources.
+
+    Every term of at least three characters must match; ``mark`` brackets the
+    matched text in snippets. Without an FTS5 index (or with only short
+    terms) this falls back to a LIKE scan of names and titles.
+    """
+    terms = [term for term in query.split() if len(term) >= _SEARCH_MIN_TERM]
+    with get_db() as conn:
+        if terms and _has_search_index(conn):
+            match = " ".join('"' + term.replace('"', '""') + '"' for term in terms)
+            return _fetch_records(
+                conn,
+                SearchHit,
+                """
+                SELECT CASE h.rowid % 4 WHEN 0 THEN 'concept' WHEN 1 THEN 'claim'
+                       ELSE 'source' END,
+                       COALESCE(c.id, s.id),
+                       COALESCE(c.name, s.title),
+                       snippet(search_index, -1, ?, ?, '…', 12)
+                FROM search_index h
+                LEFT JOIN cached_claims cc ON h.rowid % 4 = 1 AND cc.id = h.rowid / 4
+                LEFT JOIN concepts c ON c.id = CASE h.rowid % 4
+                    WHEN 0 THEN h.rowid / 4 WHEN 1 THEN cc.concept_id END
+                LEFT JOIN sources s ON h.rowid % 4 = 2 AND s.id = h.rowid / 4
+                WHERE search_index MATCH ?
+                ORDER BY bm25(search_index, 4.0, 1.0)
+                LIMIT ?
+                """,
+                (mark[0], mark[1], match, limit),
+            )
+
+        text = query.strip()
+        if not text:
+            return []
+        pattern, escape = _like_pattern(text)
+        return _fetch_records(
+            conn,
+            SearchHit,
+            f"""
+            SELECT 'concept', id, name, name FROM concepts WHERE name LIKE ?{escape}
+            UNION ALL
+            SELECT 'source', id, title, title FROM sources WHERE title LIKE ?{escape}
+            LIMIT ?
+            """,
+            (pattern, pattern, limit),
+        )
+
+
+def _prefer_exact(records: list, label: str, query: str) -> list:
+    """Exact (casefolded) label matches win over substring matches."""
+    lowered = query.casefold()
+    exact = [record for record in records if getattr(record, label).casefold() == lowered]
+    return exact or records
+
+
+def _name_match_sql(conn: sqlite3.Connection, kind: int, column: str, query: str) -> tuple:
+    """WHERE clause matching ``column`` by substring, through the index when possible."""
+    pattern, escape = _like_pattern(query)
+    if len(query) >= _SEARCH_MIN_TERM and _has_search_index(conn):
+        return (
+            f"id IN (SELECT rowid / 4 FROM search_index "
+            f"WHERE name LIKE ?{escape} AND rowid % 4 = {kind})",
+            (pattern,),
+        )
+    return f"{column} LIKE ?{escape}", (pattern,)
+
+
+@_operation
+def resolve_concepts(query: str, *, skipped: bool | None = None) -> list[ConceptListing]:
+    """Resolve a concept by numeric id, exact name, then name substring.
+
+    ``skipped`` restricts matches to skipped (True) or active (False) concepts;
+    None searches both.
+    """
+    query = query.strip()
+    if not query:
+        return []
+    skipped_filter = "" if skipped is None else f" AND c.skipped = {int(skipped)}"
+    listing = f"""
+        SELECT c.id, c.name, c.source_id, s.title,
+               COALESCE(p.review_count, 0), p.last_score
+        FROM concepts c
+        JOIN sources s ON c.source_id = s.id
+        LEFT JOIN progress p ON p.concept_id = c.id
+        WHERE {{where}}{skipped_filter}
+        ORDER BY c.id
+    """
+    with get_db() as conn:
+        if query.isdigit():
+            by_id = _fetch_records(
+                conn, ConceptListing, listing.format(where="c.id = ?"), (int(query),)
+            )
+            if by_id:
+                return by_id
+        where, params = _name_match_sql(conn, SEARCH_KIND_CONCEPT, "name", query)
+        matches = _fetch_records(
+            conn, ConceptListing, listing.format(where=f"c.{where}"), params
+        )
+    return _prefer_exact(matches, "name", query)
+
+
+@_operation
+def resolve_sources(query: str) -> list[SourceSummary]:
+    """Resolve a source by numeric id, exact title, then title substring."""
+    query = query.strip()
+    if not query:
+        return []
+    summary = """
+        SELECT s.id, s.title, s.url,
+               (SELECT COUNT(*) FROM concepts WHERE source_id = s.id)
+        FROM sources s
+        WHERE {where}
+        ORDER BY s.created_at DESC
+    """
+    with get_db() as conn:
+        if query.isdigit():
+            by_id = _fetch_records(
+                conn, SourceSummary, summary.format(where="s.id = ?"), (int(query),)
+            )
+            if by_id:
+                return by_id
+        where, params = _name_match_sql(conn, SEARCH_KIND_SOURCE, "title", query)
+        matches = _fetch_records(conn, SourceSummary, summary.format(where=f"s.{where}"), params)
+    return _prefer_exact(matches, "title", query)
+
+
+# ---- Bulk administration ----
+
+
+class ConceptFilter(NamedTuple):
+    """Criteria for the *_concepts_matching() operations; unset fields match everything."""
+
+    source_id: Optional[int] = None
+    name: Optional[str] = None  # Name substring
+    max_score: Optional[int] = None  # Last review scored at most this (reviewed concepts)
+    max_ease: Optional[float] = None  # Ease factor at most this
+    older_than_days: Optional[float] = None  # Added more than this many days ago
+    skipped: Optional[bool] = None
+
+
+def _concept_filter_sql(conn: sqlite3.Connection, where: ConceptFilter) -> tuple[str, list]:
+    """WHERE clause over unqualified ``concepts`` columns for ``where``."""
+    clauses, params = [], []
+    if where.source_id is not None:
+        clauses.append("source_id = ?")
+        params.append(where.source_id)
+    if where.name:
+        clause, name_params = _name_match_sql(conn, SEARCH_KIND_CONCEPT, "name", where.name)
+        clauses.append(clause)
+        params.extend(name_params)
+    progress = []
+    if where.max_score is not None:
+        progress.append("last_score <= ?")
+        params.append(where.max_score)
+    if where.max_ease is not None:
+        progress.append("ease_factor <= ?")
+        params.append(where.max_ease)
+    if progress:
+        clauses.append(
+            f"id IN (SELECT concept_id FROM progress WHERE {' AND '.join(progress)})"
+        )
+    if where.older_than_days is not None:
+        clauses.append("created_at < ?")
+        params.append(_now_ms() - int(where.older_than_days * _DAY_MS))
+    if where.skipped is not None:
+        clauses.append("skipped = ?")
+        params.append(int(where.skipped))
+    return " AND ".join(clauses) or "1", params
+
+
+def _require_criteria(where: ConceptFilter) -> None:
+    """Refuse a bulk write whose filter selects every concept (``skipped`` aside)."""
+    if where._replace(name=where.name or None, skipped=None) == ConceptFilter():
+        raise ValueError("Bulk changes need at least one filter criterion besides skipped.")
+
+
+@_operation
+def count_concepts_matching(where: ConceptFilter) -> int:
+    """Number of concepts ``where`` selects (the dry-run count for bulk changes)."""
+    with get_db() as conn:
+        clause, params = _concept_filter_sql(conn, where)
+        return conn.execute(f"SELECT COUNT(*) FROM concepts WHERE {clause}", params).fetchone()[0]
+
+
+@_operation
+def list_concepts_matching(where: ConceptFilter, limit: int = 20) -> list[ConceptListing]:
+    """The first ``limit`` concepts ``where`` selects, in id order."""
+    with get_db() as conn:
+        clause, params = _concept_filter_sql(conn, where)
+        return _fetch_records(
+            conn,
+            ConceptListing,
+            f"""
+            SELECT c.id, c.name, c.source_id, s.title,
+                   COALESCE(p.review_count, 0), p.last_score
+            FROM concepts c
+            JOIN sources s ON c.source_id = s.id
+            LEFT JOIN progress p ON p.concept_id = c.id
+            WHERE c.id IN (SELECT id FROM concepts WHERE {clause} ORDER BY id LIMIT ?)
+            ORDER BY c.id
+            """,
+            (*params, limit),
+        )
+
+
+@_write_operation
+def skip_concepts_matching(where: ConceptFilter) -> int:
+    """Skip every active concept ``where`` selects in one UPDATE. Returns the count."""
+    _require_criteria(where)
+    with get_db() as conn:
+        clause, params = _concept_filter_sql(conn, where._replace(skipped=False))
+        return conn.execute(f"UPDATE concepts SET skipped = 1 WHERE {clause}", params).rowcount
+
+
+@_write_operation
+def unskip_concepts_matching(where: ConceptFilter) -> int:
+    """Restore every skipped concept ``where`` selects in one UPDATE. Returns the count."""
+    _require_criteria(where)
+    with get_db() as conn:
+        clause, params = _concept_filter_sql(conn, where._replace(skipped=True))
+        return conn.execute(f"UPDATE concepts SET skipped = 0 WHERE {clause}", params).rowcount
+
+
+@_write_operation
+def delete_concepts_matching(where: ConceptFilter) -> int:
+    """Delete the concepts ``where`` selects in one DELETE. Returns the count.
+
+    Progress, reviews, duel memory and claims go with them through the foreign
+    key cascades; sources are kept even if left empty.
+    """
+    _require_criteria(where)
+    with get_db() as conn:
+        clause, params = _concept_filter_sql(conn, where)
+        return conn.execute(f"DELETE FROM concepts WHERE {clause}", params).rowcount
+
+
+# ============ PROGRESS ============
+
+_PROGRESS_COLUMNS = (
+    "p.id, p.concept_id, p.ease_factor, p.interval_days, "
+    f"{_iso_sql('p.due_date')}, p.review_count, p.last_score, {_iso_sql('p.created_at')}"
+)
+
+
+@_operation
+def get_due_concepts(limit: int | None = None) -> list[dict]:
+    """Get concepts due for review (not skipped)."""
+    if limit is None:
+        limit = 100  # Reasonable default
+
+    with get_db() as conn:
+        return _select_due(conn, _now_ms(), limit)
+
+
+def _select_due(conn: sqlite3.Connection, now: int, limit: int = -1) -> list[dict]:
+    """Active concepts due by ``now`` with progress and source title, soonest first."""
+    rows = conn.execute(
+        f"""
+        SELECT {_CONCEPT_COLUMNS}, p.ease_factor, p.interval_days, {_iso_sql("p.due_date")},
+               p.review_count, p.last_score,
+               s.title as source_title, s.url as source_url
+        FROM concepts c
+        JOIN progress p ON c.id = p.concept_id
+        JOIN sources s ON c.source_id = s.id
+        WHERE p.due_date <= ? AND c.skipped = 0
+        ORDER BY p.due_date ASC
+        LIMIT ?
+        """,
+        (now, limit),
+    ).fetchall()
+    return [dict(row) for row in rows]
+
+
+@_operation
+def get_study_queue() -> tuple[int, list[dict], dict[int, dict], Optional[datetime]]:
+    """Everything a study session queue loads, from one read snapshot.
+
+    Returns ``(data_version, due, sources, next_due)``: the connection's
+    ``PRAGMA data_version``, every concept due now as get_due_concepts()
+    rows (without its limit), their sources' get_source() rows by id, and
+    when the next active concept not yet due falls due (None if none is).
+    """
+    now = _now_ms()
+    with session(readonly=True) as unit:
+        conn = unit.conn
+        version = conn.execute("PRAGMA data_version").fetchone()[0]
+        due = _select_due(conn, now)
+        sources = {
+            row["id"]: dict(row)
+            for row in conn.execute(
+                f"""
+                SELECT {_SOURCE_COLUMNS} FROM sources s
+                WHERE s.id IN (
+                    SELECT c.source_id FROM concepts c JOIN progress p ON c.id = p.concept_id
+                    WHERE p.due_date <= ? AND c.skipped = 0
+                )
+                """,
+                (now,),
+            )
+        }
+        next_due = conn.execute(
+            """
+            SELECT MIN(p.due_date) FROM progress p JOIN concepts c ON c.id = p.concept_id
+            WHERE p.due_date > ? AND c.skipped = 0
+            """,
+            (now,),
+        ).fetchone()[0]
+    return version, due, sources, None if next_due is None else _EPOCH + next_due * _MILLISECOND
+
+
+@_operation
+def get_data_version() -> int:
+    """``PRAGMA data_version`` on this thread's connection.
+
+    It changes whenever another connection (another process, or the write
+    queue's thread) commits, so a cache can tell whether to reload.
+    """
+    with get_db() as conn:
+        return conn.execute("PRAGMA data_version").fetchone()[0]
+
+
+@_operation
+def get_progress(concept_id: int) -> Optional[dict]:
+    """Get progress for a concept, including the scheduler engine's state columns."""
+    with get_db() as conn:
+        row = conn.execute(
+            f"SELECT {_PROGRESS_COLUMNS}, p.stability, p.difficulty "
+            "FROM progress p WHERE p.concept_id = ?",
+            (concept_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+
+@_write_operation
+def update_progress(
+    concept_id: int,
+    ease_factor: float,
+    interval_days: float,
+    due_date: datetime,
+    review_count: int,
+    last_score: int,
+    *,
+    stability: float | None = None,
+    difficulty: float | None = None,
+) -> None:
+    """Update progress for a concept.
+
+    ``stability``/``difficulty`` are the FSRS engine's state; other engines
+    leave them NULL.
+    """
+    with get_db() as conn:
+        conn.execute(
+            """
+            UPDATE progress
+            SET ease_factor = ?, interval_days = ?, due_date = ?,
+                review_count = ?, last_score = ?, stability = ?, difficulty = ?
+            WHERE concept_id = ?
+        """,
+            (
+                ease_factor,
+                interval_days,
+                _epoch_ms(due_date),
+                review_count,
+                last_score,
+                stability,
+                difficulty,
+                concept_id,
+            ),
+        )
+
+
+@_operation
+def get_schedule_inputs() -> tuple[list[tuple], list[tuple]]:
+    """Everything a bulk reschedule reads, as plain tuples with epoch-ms times.
+
+    Returns ``(progress, reviews)``: progress rows are (concept_id,
+    ease_factor, interval_days, due_date, review_count, last_score,
+    stability, difficulty) in concept order; reviews are the scored
+    (concept_id, created_at, score) events in replay order. Both come from
+    one read snapshot.
+    """
+    with session(readonly=True) as unit:
+        cursor = unit.conn.cursor()
+        cursor.row_factory = None
+        progress = cursor.execute(
+            """
+            SELECT concept_id, ease_factor, interval_days, due_date, review_count, last_score,
+                   stability, difficulty
+            FROM progress ORDER BY concept_id
+            """
+        ).fetchall()
+        reviews = cursor.execute(
+            """
+            SELECT concept_id, created_at, score FROM review_events
+            WHERE score IS NOT NULL
+            ORDER BY concept_id, created_at, id
+            """
+        ).fetchall()
+    return progress, reviews
+
+
+@_operation
+def get_forecast_inputs(until: datetime) -> tuple[list[tuple], list[tuple]]:
+    """What a due-load forecast reads: active concepts due before ``until``.
+
+    Returns ``(progress, failures)``: progress rows are (concept_id,
+    due_date, ease_factor, interval_days, review_count, stability,
+    difficulty, scored_reviews), ``due_date`` in epoch ms; failures are
+    (concept_id, reviews scored below SCORE_PASS_THRESHOLD) over the whole
+    review log. Neither is in any particular order. Both come from one read
+    snapshot.
+    """
+    # Both read whole tables in storage order (the unary + keeps the planner
+    # off the due and concept indexes): the window usually covers most of the
+    # library, and a sequential scan beats an index walk's random row lookups.
+    with session(readonly=True) as unit:
+        cursor = unit.conn.cursor()
+        cursor.row_factory = None
+        progress = cursor.execute(
+            """
+            SELECT p.concept_id, p.due_date, p.ease_factor, p.interval_days, p.review_count,
+                   p.stability, p.difficulty, COALESCE(r.scored_reviews, 0)
+            FROM progress p
+            LEFT JOIN review_concepts r ON r.concept_id = p.concept_id
+            WHERE +p.due_date < ?
+              AND p.concept_id NOT IN (SELECT id FROM concepts WHERE skipped = 1)
+            """,
+            (_epoch_ms(until),),
+        ).fetchall()
+        failures = cursor.execute(
+            """
+            SELECT concept_id, COUNT(*) FROM review_events
+            WHERE score < ?
+            GROUP BY +concept_id
+            """,
+            (config.SCORE_PASS_THRESHOLD,),
+        ).fetchall()
+    return progress, failures
+
+
+@_operation
+def get_due_histogram(first_day: int, days: int) -> list[int]:
+    """Active concepts due on each of ``days`` UTC days from ``first_day`` (days since epoch)."""
+    with get_db() as conn:
+        counts = dict(
+            conn.execute(
+                "SELECT day, due FROM due_daily WHERE day >= ? AND day < ?",
+                (first_day, first_day + days),
+            ).fetchall()
+        )
+    return [counts.get(day, 0) for day in range(first_day, first_day + days)]
+
+
+@_write_operation
+def reschedule_progress(rows: Iterable[tuple]) -> int:
+    """Write recomputed schedules with one executemany. Returns rows updated.
+
+    Each row is (ease_factor, interval_days, due_date, review_count,
+    last_score, stability, difficulty, concept_id) with ``due_date`` in
+    epoch ms.
+    """
+    with get_db() as conn:
+        return conn.executemany(
+            """
+            UPDATE progress
+            SET ease_factor = ?, interval_days = ?, due_date = ?,
+                review_count = ?, last_score = ?, stability = ?, difficulty = ?
+            WHERE concept_id = ?
+            """,
+            rows,
+        ).rowcount
+
+
+# ============ REVIEW LOG ============
+
+_REVIEW_COLUMNS = (
+    "e.id, e.concept_id, e.score, e.turns, e.error_codes, e.text_hash, t.codec, t.data, "
+    + _iso_sql("e.created_at")
+)
+_REVIEW_FROM = "FROM review_events e LEFT JOIN review_text t ON t.event_id = e.id"
+
+
+def _review_row(row: sqlite3.Row) -> dict:
+    """Explanation-shaped dict for a review event, with its free text inflated."""
+    review = dict(row)
+    review.update(_unpack_review_text(review.pop("codec"), review.pop("data")))
+    return review
+
+
+@_write_operation
+def add_explanation(
+    concept_id: int,
+    text: str,
+    score: int | None = None,
+    covered: str | None = None,
+    missed: str | None = None,
+    feedback: str | None = None,
+    *,
+    turns: int | None = None,
+    error_codes: str | None = None,
+) -> int:
+    """Append a review event with evaluation results. Returns the event id."""
+    with get_db() as conn:
+        return _insert_review(
+            conn,
+            concept_id,
+            {
+                "text": text,
+                "score": score,
+                "covered": covered,
+                "missed": missed,
+                "feedback": feedback,
+                "turns": turns,
+                "error_codes": error_codes,
+                "created_at": _now_ms(),
+            },
+        )
+
+
+@_operation
+def get_explanations(concept_id: int) -> list[dict]:
+    """Get all review events for a concept, newest first, with their free text."""
+    with get_db() as conn:
+        rows = conn.execute(
+            f"SELECT {_REVIEW_COLUMNS} {_REVIEW_FROM} WHERE e.concept_id = ? "
+            "ORDER BY e.created_at DESC, e.id DESC",
+            (concept_id,),
+        ).fetchall()
+        return [_review_row(row) for row in rows]
+
+
+@_operation
+def get_review_rollup(concept_id: int) -> Optional[dict]:
+    """Per-concept review aggregates, or None if the concept was never reviewed."""
+    with get_db() as conn:
+        row = conn.execute(
+            f"""
+            SELECT concept_id, reviews, scored_reviews, score_sum, successful_reviews,
+                   {_iso_sql("last_review_at")}, last_score
+            FROM review_concepts WHERE concept_id = ? AND reviews > 0
+            """,
+            (concept_id,),
+        ).fetchone()
+    if row is None:
+        return None
+    rollup = dict(row)
+    scored = rollup.pop("scored_reviews")
+    score_sum = rollup.pop("score_sum")
+    rollup["avg_score"] = round(score_sum / scored, 1) if scored else None
+    return rollup
+
+
+@_operation
+def get_daily_reviews(days: int = 30) -> list[dict]:
+    """Review counts per UTC day for the last ``days`` days, oldest first; idle days omitted."""
+    first_day = _now_ms() // _DAY_MS - days + 1
+    with get_db() as conn:
+        rows = conn.execute(
+            """
+            SELECT date(day * 86400, 'unixepoch') AS day, reviews, successful_reviews,
+                   CASE WHEN scored_reviews > 0
+                        THEN ROUND(score_sum / scored_reviews, 1) END AS avg_score
+            FROM review_daily
+            WHERE day >= ? AND reviews > 0
+            ORDER BY day
+            """,
+            (first_day,),
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+
+@_write_operation
+def archive_review_text(
+    older_than_days: int | None = None, *, db_path: Path | str | None = None
+) -> dict:
+    """Move the free text of reviews older than the retention window to a gzip archive.
+
+    Streams one NDJSON line per review to ``archive/review-text-<first>-<last>.ndjson.gz``
+    next to the database, then deletes those review_text rows, all under the
+    write lock. The archive is written as a ``.partial`` file and renamed once
+    the delete has committed, so a failed run leaves no duplicate lines.
+    Archived text is not part of exports. Defaults to
+    config.REVIEW_TEXT_RETENTION_DAYS; 0 keeps text forever. Returns the number
+    of reviews archived and the archive path.
+    """
+    if older_than_days is None:
+        older_than_days = config.REVIEW_TEXT_RETENTION_DAYS
+    if db_path is None:
+        db_path = _default_db_path()
+    # In-memory databases have no directory to archive into.
+    if older_than_days <= 0 or not isinstance(db_path, Path):
+        return {"archived": 0, "path": None}
+
+    cutoff = _now_ms() - older_than_days * _DAY_MS
+    archive_dir = db_path.parent / "archive"
+    partial = fp = None
+    first = last = None
+    archived = 0
+    with get_db(db_path) as conn:
+        try:
+            for row in conn.execute(
+                f"SELECT {_REVIEW_COLUMNS} {_REVIEW_FROM} "
+                "WHERE e.created_at < ? AND t.event_id IS NOT NULL ORDER BY e.id",
+                (cutoff,),
+            ):
+                if fp is None:
+                    first = row["id"]
+                    archive_dir.mkdir(parents=True, exist_ok=True)
+                    partial = archive_dir / f"review-text-{first}.ndjson.gz.partial"
+                    fp = gzip.open(partial, "wt", encoding="utf-8")
+                fp.write(json.dumps(_review_row(row)))
+                fp.write("\n")
+                last = row["id"]
+                archived += 1
+        finally:
+            if fp is not None:
+                fp.close()
+        if not archived:
+            return {"archived": 0, "path": None}
+        conn.execute(
+            """
+            DELETE FROM review_text WHERE event_id IN (
+                SELECT id FROM review_events WHERE created_at < ? AND id BETWEEN ? AND ?
+            )
+            """,
+            (cutoff, first, last),
+        )
+    path = archive_dir / f"review-text-{first}-{last}.ndjson.gz"
+    os.replace(partial, path)
+    try:
+        os.chmod(path, 0o600)
+    except OSError:
+        pass
+    return {"archived": archived, "path": str(path)}
+
+
+# ============ STATS ============
+
+
+@_operation
+def get_stats() -> dict:
+    """Get overall statistics.
+
+    Totals come from the trigger-maintained stats_counters row and the
+    review_daily rollup; only the due count is computed, as an indexed range
+    count.
+    """
+    with get_db() as conn:
+        counters = _stats_counters(conn)
+        recent_reviews = conn.execute(
+            "SELECT COALESCE(SUM(reviews), 0) FROM review_daily WHERE day > ?",
+            (_now_ms() // _DAY_MS - 7,),
+        ).fetchone()[0]
+        due_count = conn.execute(
+            """
+            SELECT COUNT(*) FROM progress p
+            JOIN concepts c ON p.concept_id = c.id
+            WHERE p.due_date <= ? AND c.skipped = 0
+        """,
+            (_now_ms(),),
+        ).fetchone()[0]
+
+    scored = counters["scored_reviews"]
+    avg_score = counters["score_sum"] / scored if scored else None
+    return {
+        "total_sources": counters["sources"],
+        "total_concepts": counters["active_concepts"],
+        "skipped_concepts": counters["skipped_concepts"],
+        "total_reviews": counters["reviews"],
+        "reviews_last_7_days": recent_reviews,
+        "successful_reviews": counters["successful_reviews"],
+        "due_now": due_count,
+        "avg_score": round(avg_score, 1) if avg_score else 0,
+        "mastered": counters["mastered"],
+    }
+
+
+@_operation
+def count_successful_reviews() -> int:
+    """Reviews scored 4 or higher, read from the stats counters."""
+    with get_db() as conn:
+        return _stats_counters(conn)["successful_reviews"]
+
+
+# ============ MAINTENANCE ============
+
+
+def _file_size(path: Path | str | None) -> int:
+    if not isinstance(path, Path):
+        return 0
+    try:
+        return path.stat().st_size
+    except OSError:
+        return 0
+
+
+def _wal_path(db_path: Path | str) -> Path | None:
+    if not isinstance(db_path, Path):
+        return None
+    return db_path.with_name(db_path.name + "-wal")
+
+
+def _page_counts(conn: sqlite3.Connection) -> tuple[int, int]:
+    """(page_count, freelist_count) for the main database."""
+    return (
+        conn.execute("PRAGMA page_count").fetchone()[0],
+        conn.execute("PRAGMA freelist_count").fetchone()[0],
+    )
+
+
+def maintenance_reasons(db_path: Path | str | None = None) -> list[str]:
+    """Which maintenance thresholds are crossed: "wal" and/or "freelist"."""
+    if db_path is None:
+        db_path = _default_db_path()
+    reasons = []
+    if _file_size(_wal_path(db_path)) >= config.MAINTAIN_WAL_BYTES:
+        reasons.append("wal")
+    with get_db(db_path) as conn:
+        pages, free = _page_counts(conn)
+    if pages and free / pages >= config.MAINTAIN_FREE_RATIO:
+        reasons.append("freelist")
+    return reasons
+
+
+def maintain(*, vacuum: bool = False, db_path: Path | str | None = None) -> dict:
+    """Refresh planner statistics, optionally reclaim free pages, truncate the WAL.
+
+    Archives review text past the retention window (archive_review_text()),
+    runs ANALYZE and PRAGMA optimize, then with ``vacuum`` an incremental
+    vacuum, then a TRUNCATE checkpoint. A database created before incremental
+    auto-vacuum was enabled is converted by one full VACUUM instead. Must not
+    be called inside a session.
+    """
+    if db_path is None:
+        db_path = _default_db_path()
+    init_db(db_path)
+    conn = _pooled_connection(db_path)
+    if str(db_path) in _local.sessions or conn.in_transaction:
+        raise RuntimeError("maintain() cannot run inside an open transaction.")
+
+    wal_path = _wal_path(db_path)
+    wal_before = _file_size(wal_path)
+    size_before = _file_size(db_path) + wal_before
+    _, free_before = _page_counts(conn)
+    started = time.perf_counter()
+
+    archived = archive_review_text(db_path=db_path)["archived"]
+    conn.execute("ANALYZE")
+    conn.execute("PRAGMA optimize").fetchall()
+    vacuumed = None
+    if vacuum:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL:
+            # executescript() steps the pragma to completion; execute() frees one page.
+            conn.executescript("PRAGMA incremental_vacuum;")
+            vacuumed = "incremental"
+        else:
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            vacuumed = "full"
+    busy = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()[0]
+
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    wal_after = _file_size(wal_path)
+    _, free_after = _page_counts(conn)
+    return {
+        "size_before": size_before,
+        "size_after": _file_size(db_path) + wal_after,
+        "wal_before": wal_before,
+        "wal_after": wal_after,
+        "free_pages_before": free_before,
+        "free_pages_after": free_after,
+        "vacuumed": vacuumed,
+        "reviews_archived": archived,
+        "checkpoint_blocked": bool(busy),
+        "elapsed_ms": round(elapsed_ms, 1),
+    }
+
+
+def maintain_if_needed(db_path: Path | str | None = None) -> dict | None:
+    """Startup pass: maintain() when a threshold is crossed, else None.
+
+    Only vacuums databases already in incremental auto-vacuum mode, so startup
+    never pays for a full VACUUM, and skips quietly if the database is busy.
+    """
+    try:
+        reasons = maintenance_reasons(db_path)
+        if not reasons:
+            return None
+        with get_db(db_path) as conn:
+            incremental = (
+                conn.execute("PRAGMA auto_vacuum").fetchone()[0] == _AUTO_VACUUM_INCREMENTAL
+            )
+        report = maintain(vacuum="freelist" in reasons and incremental, db_path=db_path)
+    except sqlite3.OperationalError:
+        return None
+    return {**report, "reasons": reasons}
+
+
+# ============ DUEL MEMORY ============
+
+
+@_write_operation
+def save_duel_memory(concept_id: int, belief: str, errors: str, attack: str) -> None:
+    """Save last duel state for a concept."""
+    with get_db() as conn:
+        conn.execute(
+            """
+            INSERT INTO duel_memory (concept_id, last_belief, last_errors, last_attack, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(concept_id) DO UPDATE SET
+                last_belief = excluded.last_belief,
+                last_errors = excluded.last_errors,
+                last_attack = excluded.last_attack,
+                updated_at = excluded.updated_at
+        """,
+            (concept_id, belief, errors, attack, _now_ms()),
+        )
+
+
+@_operation
+def get_duel_memory(concept_id: int) -> Optional[dict]:
+    """Get last duel state for a concept."""
+    with get_db() as conn:
+        row = conn.execute(
+            "SELECT last_belief, last_errors, last_attack FROM duel_memory WHERE concept_id = ?",
+            (concept_id,),
+        ).fetchone()
+        if row:
+            return {
+                "last_belief": row[0],
+                "last_errors": row[1],
+                "last_attack": row[2],
+            }
+        return None
+
+
+# ============ CACHED CLAIMS ============
+
+
+@_operation
+def get_cached_claims(concept_id: int) -> list[dict] | None:
+    """Get cached claims for a concept. Returns None if no cache exists."""
+    with get_db() as conn:
+        rows = conn.execute(
+            "SELECT statement, claim_type, claim_index FROM cached_claims "
+            "WHERE concept_id = ? ORDER BY claim_index",
+            (concept_id,),
+        ).fetchall()
+
+        if not rows:
+            return None
+
+        return [{"statement": row[0], "claim_type": row[1], "claim_index": row[2]} for row in rows]
+
+
+@_write_operation
+def save_cached_claims(concept_id: int, claims: list[dict]) -> None:
+    """Cache parsed claims for a concept. Replaces any existing cache."""
+    with get_db() as conn:
+        conn.execute(
+            "DELETE FROM cached_claims WHERE concept_id = ?",
+            (concept_id,),
+        )
+        now = _now_ms()
+        for claim in claims:
+            conn.execute(
+                "INSERT INTO cached_claims "
+                "(concept_id, statement, claim_type, claim_index, created_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    concept_id,
+                    claim["statement"],
+                    claim["claim_type"],
+                    claim["claim_index"],
+                    now,
+                ),
+            )
+
+
+def _replace_claim(
+    conn: sqlite3.Connection, concept_id: int, claim_index: int, statement: str, now: int
+) -> bool:
+    cursor = conn.execute(
+        "UPDATE cached_claims SET statement = ?, created_at = ? "
+        "WHERE concept_id = ? AND claim_index = ?",
+        (statement, now, concept_id, claim_index),
+    )
+    return cursor.rowcount > 0
+
+
+def _shift_claims(
+    conn: sqlite3.Connection, concept_id: int, start: int, stop: int | None, delta: int, now: int
+) -> None:
+    # One set-based UPDATE moves every claim in [start, stop) by delta. The
+    # (concept_id, claim_index) index is not unique, so the shift may pass
+    # through transient duplicates.
+    sql = (
+        "UPDATE cached_claims SET claim_index = claim_index + ?, created_at = ? "
+        "WHERE concept_id = ? AND claim_index >= ?"
+    )
+    params: tuple = (delta, now, concept_id, start)
+    if stop is not None:
+        sql += " AND claim_index < ?"
+        params += (stop,)
+    conn.execute(sql, params)
+
+
+def _delete_claim(conn: sqlite3.Connection, concept_id: int, claim_index: int, now: int) -> bool:
+    cursor = conn.execute(
+        "DELETE FROM cached_claims WHERE concept_id = ? AND claim_index = ?",
+        (concept_id, claim_index),
+    )
+    if cursor.rowcount == 0:
+        return False
+    _shift_claims(conn, concept_id, claim_index + 1, None, -1, now)
+    return True
+
+
+@_write_operation
+def update_cached_claim(
+    concept_id: int, claim_index: int, statement: str
+) -> bool:
+    """Update a single cached claim's statement. Returns True if updated."""
+    with get_db() as conn:
+        return _replace_claim(conn, concept_id, claim_index, statement, _now_ms())
+
+
+@_write_operation
+def delete_cached_claim(concept_id: int, claim_index: int) -> bool:
+    """Delete a single cached claim. Returns True if deleted."""
+    with get_db() as conn:
+        return _delete_claim(conn, concept_id, claim_index, _now_ms())
+
+
+class ClaimEdit(NamedTuple):
+    """One step of an apply_claim_edits() script.
+
+    ``op`` is "replace", "delete", "insert" or "move". Indexes are positions
+    in the claim list as left by the previous steps; ``insert`` accepts
+    ``index == len(claims)`` to append.
+    """
+
+    op: str
+    index: int
+    statement: Optional[str] = None
+    claim_type: Optional[str] = None
+    to_index: Optional[int] = None
+
+
+class ClaimEditError(ValueError):
+    """Raised when a claim edit script is malformed or out of range."""
+
+
+@_write_operation
+def apply_claim_edits(concept_id: int, edits: Iterable[ClaimEdit]) -> list[dict]:
+    """Apply a claim edit script in one transaction and return the new claims.
+
+    Each delete, insert or move renumbers the affected claims with a single
+    set-based UPDATE. A bad step raises ClaimEditError and rolls back the
+    whole script.
+    """
+    with get_db() as conn:
+        now = _now_ms()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM cached_claims WHERE concept_id = ?", (concept_id,)
+        ).fetchone()[0]
+
+        for step, edit in enumerate(edits, 1):
+            op, index = edit.op, edit.index
+            limit = count + 1 if op == "insert" else count
+            if not 0 <= index < limit:
+                raise ClaimEditError(f"Step {step}: claim index {index} out of range")
+            if op in ("replace", "insert") and not edit.statement:
+                raise ClaimEditError(f"Step {step}: {op} needs a statement")
+
+            if op == "replace":
+                _replace_claim(conn, concept_id, index, edit.statement, now)
+            elif op == "delete":
+                _delete_claim(conn, concept_id, index, now)
+                count -= 1
+            elif op == "insert":
+                if not edit.claim_type:
+                    raise ClaimEditError(f"Step {step}: insert needs a claim_type")
+                _shift_claims(conn, concept_id, index, None, 1, now)
+                conn.execute(
+                    "INSERT INTO cached_claims "
+                    "(concept_id, statement, claim_type, claim_index, created_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (concept_id, edit.statement, edit.claim_type, index, now),
+                )
+                count += 1
+            elif op == "move":
+                target = edit.to_index
+                if target is None or not 0 <= target < count:
+                    raise ClaimEditError(f"Step {step}: move target {target} out of range")
+                if target == index:
+                    continue
+                # Park the moved claim, shift the span it crosses, then drop it in.
+                conn.execute(
+                    "UPDATE cached_claims SET claim_index = -1 "
+                    "WHERE concept_id = ? AND claim_index = ?",
+                    (concept_id, index),
+                )
+                if target < index:
+                    _shift_claims(conn, concept_id, target, index, 1, now)
+                else:
+                    _shift_claims(conn, concept_id, index + 1, target + 1, -1, now)
+                conn.execute(
+                    "UPDATE cached_claims SET claim_index = ?, created_at = ? "
+                    "WHERE concept_id = ? AND claim_index = -1",
+                    (target, now, concept_id),
+                )
+            else:
+                raise ClaimEditError(f"Step {step}: unknown claim edit {op!r}")
+
+        rows = conn.execute(
+            "SELECT statement, claim_type, claim_index FROM cached_claims "
+            "WHERE concept_id = ? ORDER BY claim_index",
+            (concept_id,),
+        ).fetchall()
+        return [{"statement": row[0], "claim_type": row[1], "claim_index": row[2]} for row in rows]
+
+
+# ============ EXPORT / IMPORT ============
+
+
+# Export table -> (SELECT without ORDER BY, row id column, change_log table),
+# in _REQUIRED_EXPORT_FIELDS order.
+_EXPORT_SELECTS = {
+    "sources": (_SOURCE_EXPORT_SQL, "s.id", "sources"),
+    "concepts": (f"SELECT {_CONCEPT_COLUMNS} FROM concepts c", "c.id", "concepts"),
+    "progress": (f"SELECT {_PROGRESS_COLUMNS} FROM progress p", "p.id", "progress"),
+    "explanations": (f"SELECT {_REVIEW_COLUMNS} {_REVIEW_FROM}", "e.id", "review_events"),
+    "duel_memory": (
+        "SELECT id, concept_id, last_belief, last_errors, last_attack, "
+        f"{_iso_sql('updated_at')} FROM duel_memory",
+        "id",
+        "duel_memory",
+    ),
+    "cached_claims": (
+        "SELECT id, concept_id, statement, claim_type, claim_index, "
+        f"{_iso_sql('created_at')} FROM cached_claims",
+        "id",
+        "cached_claims",
+    ),
+}
+_EXPORT_QUERIES = {
+    table: f"{select} ORDER BY {id_column}"
+    for table, (select, id_column, _) in _EXPORT_SELECTS.items()
+}
+# Delta exports read the rows listed in temp.export_scope (_fill_export_scope).
+_DELTA_EXPORT_QUERIES = {
+    table: (
+        f"{select} WHERE {id_column} IN "
+        f"(SELECT row_id FROM temp.export_scope WHERE table_name = '{log_table}') "
+        f"ORDER BY {id_column}"
+    )
+    for table, (select, id_column, log_table) in _EXPORT_SELECTS.items()
+}
+# Sources that are only in a delta as the parent of a changed row carry no
+# content; the merge keeps the richer local text (_prefer_text).
+_DELTA_EXPORT_QUERIES["sources"] = f"""
+    SELECT s.id, s.url, s.title, s.source_type,
+           COALESCE(ll_inflate(c.codec, c.data), '') AS raw_content,
+           ll_inflate(g.codec, g.data) AS segments,
+           {_iso_sql("s.created_at")}
+    FROM temp.export_scope x
+    JOIN sources s ON s.id = x.row_id
+    LEFT JOIN content_blobs c ON x.changed AND c.hash = s.content_hash
+    LEFT JOIN content_blobs g ON x.changed AND g.hash = s.segments_hash
+    WHERE x.table_name = 'sources'
+    ORDER BY s.id
+"""
+# Tables whose query rows need decoding into the export row shape.
+_EXPORT_ROW_BUILDERS = {"explanations": _review_row}
+
+
+def _export_row(table: str, row: sqlite3.Row) -> dict:
+    build = _EXPORT_ROW_BUILDERS.get(table)
+    return build(row) if build else dict(row)
+
+
+def _fill_export_scope(conn: sqlite3.Connection, since: int) -> None:
+    """List the rows of a delta export in temp.export_scope.
+
+    Rows changed after ``since``, plus what the merge needs to place them:
+    the whole claim set of a concept with a changed claim (claim sets merge as
+    a unit) and the parent concept and source of every exported row.
+    """
+    conn.execute(
+        """
+        CREATE TEMP TABLE IF NOT EXISTS export_scope (
+            table_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            changed INTEGER NOT NULL,
+            PRIMARY KEY (table_name, row_id)
+        ) WITHOUT ROWID
+        """
+    )
+    conn.execute("DELETE FROM temp.export_scope")
+    conn.execute(
+        "INSERT INTO temp.export_scope SELECT table_name, row_id, 1 FROM change_log WHERE rev > ?",
+        (since,),
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO temp.export_scope
+        SELECT 'cached_claims', id, 0 FROM cached_claims
+        WHERE concept_id IN (
+            SELECT concept_id FROM cached_claims
+            WHERE id IN (SELECT row_id FROM temp.export_scope
+                         WHERE table_name = 'cached_claims')
+        )
+        """
+    )
+    for child in ("progress", "review_events", "duel_memory", "cached_claims"):
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO temp.export_scope
+            SELECT 'concepts', concept_id, 0 FROM {child}
+            WHERE id IN (SELECT row_id FROM temp.export_scope WHERE table_name = '{child}')
+            """
+        )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO temp.export_scope
+        SELECT 'sources', source_id, 0 FROM concepts
+        WHERE id IN (SELECT row_id FROM temp.export_scope WHERE table_name = 'concepts')
+        """
+    )
+
+
+def _export_queries(conn: sqlite3.Connection, since: int | None) -> dict[str, str]:
+    if since is None:
+        return _EXPORT_QUERIES
+    _fill_export_scope(conn, since)
+    return _DELTA_EXPORT_QUERIES
+
+
+def _export_header(conn: sqlite3.Connection, since: int | None) -> dict:
+    header = {
+        "schema_version": EXPORT_SCHEMA_VERSION,
+        "version": __version__,
+        "exported_at": _utcnow().isoformat(),
+        "revision": _current_revision(conn),
+    }
+    if since is not None:
+        header["since"] = since
+    return header
+
+
+@_operation
+def current_revision() -> int:
+    """Latest change-log revision; pass it as ``since`` to export what changes next."""
+    with get_db() as conn:
+        return _current_revision(conn)
+
+
+@_operation
+def export_all_data(*, since: int | None = None) -> dict:
+    """Export entire database to a JSON-serializable dict.
+
+    With ``since`` (a revision from an earlier export's "revision"), export
+    only the rows changed after it, plus the parent rows the merge needs to
+    place them. Importing the result merges like a full export, so deltas
+    assume the target already holds everything up to ``since``.
+    """
+    with session(readonly=True) as unit:
+        header = _export_header(unit.conn, since)
+        tables = {
+            table: [_export_row(table, r) for r in unit.conn.execute(query).fetchall()]
+            for table, query in _export_queries(unit.conn, since).items()
+        }
+
+    return {**header, **tables}
+
+
+def _merge_progress_row(
+    conn: sqlite3.Connection,
+    concept_id: int,
+    imported: Mapping[str, object] | None,
+    imported_activity_at: int,
+    now: int,
+) -> bool:
+    """Merge progress by keeping the row with stronger evidence of recency.
+
+    Exports carry no engine state, so a winning imported row clears the local
+    stability/difficulty; the FSRS engine rebuilds them from the imported
+    interval.
+    """
+    existing = conn.execute(
+        "SELECT * FROM progress WHERE concept_id = ?",
+        (concept_id,),
+    ).fetchone()
+
+    if imported is None:
+        if existing is None:
+            conn.execute(
+                "INSERT INTO progress (concept_id, due_date, created_at) VALUES (?, ?, ?)",
+                (concept_id, now, now),
+            )
+        return False
+
+    if existing is None:
+        conn.execute(
+            """
+            INSERT INTO progress
+            (concept_id, ease_factor, interval_days, due_date, review_count, last_score, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                concept_id,
+                imported.get("ease_factor", 2.5),
+                imported.get("interval_days", 1.0),
+                _stamp(imported["due_date"], now),
+                imported.get("review_count", 0),
+                imported.get("last_score"),
+                _stamp(imported.get("created_at"), now),
+            ),
+        )
+        return True
+
+    rollup = conn.execute(
+        "SELECT last_review_at FROM review_concepts WHERE concept_id = ?",
+        (concept_id,),
+    ).fetchone()
+    existing_activity_at = (rollup and rollup[0]) or existing["due_date"]
+
+    imported_rank = (
+        int(imported.get("review_count", 0) or 0),
+        imported_activity_at,
+        _ts_rank(imported["due_date"]),
+    )
+    existing_rank = (
+        int(existing["review_count"] or 0),
+        existing_activity_at,
+        existing["due_date"],
+    )
+
+    if imported_rank > existing_rank:
+        conn.execute(
+            """
+            UPDATE progress
+            SET ease_factor = ?, interval_days = ?, due_date = ?,
+                review_count = ?, last_score = ?, created_at = ?,
+                stability = NULL, difficulty = NULL
+            WHERE concept_id = ?
+            """,
+            (
+                imported.get("ease_factor", existing["ease_factor"]),
+                imported.get("interval_days", existing["interval_days"]),
+                _stamp(imported["due_date"], existing["due_date"]),
+                imported.get("review_count", existing["review_count"]),
+                imported.get("last_score", existing["last_score"]),
+                _stamp(imported.get("created_at"), existing["created_at"]),
+                concept_id,
+            ),
+        )
+        return True
+    return False
+
+
+def _merge_duel_memory(
+    conn: sqlite3.Connection,
+    concept_id: int,
+    imported: Mapping[str, object] | None,
+    *,
+    prefer_import: bool = False,
+) -> bool:
+    if imported is None:
+        return False
+
+    existing = conn.execute(
+        "SELECT updated_at FROM duel_memory WHERE concept_id = ?",
+        (concept_id,),
+    ).fetchone()
+    imported_updated_at = _stamp(imported.get("updated_at"), _now_ms())
+    if existing and not prefer_import and existing["updated_at"] > imported_updated_at:
+        return False
+
+    conn.execute(
+        """
+        INSERT INTO duel_memory (concept_id, last_belief, last_errors, last_attack, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(concept_id) DO UPDATE SET
+            last_belief = excluded.last_belief,
+            last_errors = excluded.last_errors,
+            last_attack = excluded.last_attack,
+            updated_at = excluded.updated_at
+        """,
+        (
+            concept_id,
+            imported.get("last_belief"),
+            imported.get("last_errors"),
+            imported.get("last_attack"),
+            imported_updated_at,
+        ),
+    )
+    return True
+
+
+def _replace_cached_claims(
+    conn: sqlite3.Connection,
+    concept_id: int,
+    claims: list[dict],
+) -> None:
+    conn.execute("DELETE FROM cached_claims WHERE concept_id = ?", (concept_id,))
+    for claim in sorted(claims, key=lambda row: row["claim_index"]):
+        conn.execute(
+            """
+            INSERT INTO cached_claims
+            (concept_id, statement, claim_type, claim_index, created_at)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                concept_id,
+                claim["statement"],
+                claim["claim_type"],
+                claim["claim_index"],
+                _stamp(claim.get("created_at"), _now_ms()),
+            ),
+        )
+
+
+def _merge_cached_claims(
+    conn: sqlite3.Connection,
+    concept_id: int,
+    imported_claims: list[dict],
+    *,
+    prefer_import: bool = False,
+) -> bool:
+    if not imported_claims:
+        return False
+
+    existing = conn.execute(
+        """
+        SELECT statement, claim_type, claim_index, created_at
+        FROM cached_claims
+        WHERE concept_id = ?
+        ORDER BY claim_index
+        """,
+        (concept_id,),
+    ).fetchall()
+    existing_rows = [dict(row) for row in existing]
+    if not existing_rows:
+        _replace_cached_claims(conn, concept_id, imported_claims)
+        return True
+
+    imported_latest = max(_ts_rank(claim.get("created_at")) for claim in imported_claims)
+    existing_latest = max(claim["created_at"] for claim in existing_rows)
+
+    normalized_imported = [
+        (claim["statement"], claim["claim_type"], claim["claim_index"]) for claim in imported_claims
+    ]
+    normalized_existing = [
+        (claim["statement"], claim["claim_type"], claim["claim_index"]) for claim in existing_rows
+    ]
+
+    if (
+        (prefer_import or imported_latest >= existing_latest)
+        and normalized_imported != normalized_existing
+    ):
+        _replace_cached_claims(conn, concept_id, imported_claims)
+        return True
+
+    return False
+
+
+def _merge_explanations(
+    conn: sqlite3.Connection,
+    concept_id: int,
+    explanations: list[dict],
+) -> int:
+    existing_keys = {
+        (row["text_hash"], row["created_at"])
+        for row in conn.execute(
+            "SELECT text_hash, created_at FROM review_events WHERE concept_id = ?",
+            (concept_id,),
+        ).fetchall()
+    }
+    added = 0
+    for explanation in explanations:
+        row = {**explanation, "created_at": _stamp(explanation.get("created_at"), _now_ms())}
+        key = (_review_text_hash(row), row["created_at"])
+        if key in existing_keys:
+            continue
+        _insert_review(conn, concept_id, row)
+        existing_keys.add(key)
+        added += 1
+    return added
+
+
+def _merge_rows(conn: sqlite3.Connection, payload: dict, now: int) -> dict:
+    """Row-by-row merge. Cheapest for small payloads such as a handful of sources."""
+    sources, concepts, progress_rows, explanations, duel_mem, claims = (
+        [_epoch_row(row) for row in payload[key]] for key in _REQUIRED_EXPORT_FIELDS
+    )
+
+    concepts_by_source: dict[int, list[dict]] = {}
+    for concept in concepts:
+        concepts_by_source.setdefault(concept["source_id"], []).append(concept)
+
+    progress_by_concept = {row["concept_id"]: row for row in progress_rows}
+    explanations_by_concept: dict[int, list[dict]] = {}
+    for explanation in explanations:
+        explanations_by_concept.setdefault(explanation["concept_id"], []).append(explanation)
+    mem_by_concept = {row["concept_id"]: row for row in duel_mem}
+    claims_by_concept: dict[int, list[dict]] = {}
+    for claim in claims:
+        claims_by_concept.setdefault(claim["concept_id"], []).append(claim)
+
+    sources_added = 0
+    sources_merged = 0
+    concepts_added = 0
+    concepts_merged = 0
+    explanations_added = 0
+    duel_memories_updated = 0
+    cached_claim_sets_updated = 0
+
+    for src in sources:
+        existing_source = conn.execute(
+            f"{_SOURCE_MERGE_SQL} WHERE s.url = ?",
+            (src["url"],),
+        ).fetchone()
+
+        if existing_source:
+            source_id = existing_source["id"]
+            conn.execute(
+                """
+                UPDATE sources
+                SET title = ?, source_type = ?, content_hash = ?, segments_hash = ?,
+                    created_at = ?
+                WHERE id = ?
+                """,
+                (
+                    _prefer_text(existing_source["title"], src["title"])
+                    or existing_source["title"],
+                    existing_source["source_type"] or src["source_type"],
+                    _store_content(
+                        conn,
+                        _prefer_text(existing_source["raw_content"], src["raw_content"])
+                        or existing_source["raw_content"],
+                    ),
+                    _store_content(
+                        conn, _prefer_text(existing_source["segments"], src.get("segments"))
+                    ),
+                    _earliest_timestamp(
+                        now, existing_source["created_at"], src.get("created_at")
+                    ),
+                    source_id,
+                ),
+            )
+            sources_merged += 1
+        else:
+            source_id = _insert_source(
+                conn,
+                src["url"],
+                src["title"],
+                src["source_type"],
+                _pack_content(src["raw_content"]),
+                _pack_content(src.get("segments")),
+                _stamp(src.get("created_at"), now),
+            )
+            sources_added += 1
+
+        for concept in concepts_by_source.get(src["id"], []):
+            existing_concept = conn.execute(
+                """
+                SELECT *
+                FROM concepts
+                WHERE source_id = ? AND LOWER(name) = LOWER(?)
+                ORDER BY id
+                LIMIT 1
+                """,
+                (source_id, concept["name"]),
+            ).fetchone()
+
+            if existing_concept:
+                concept_id = existing_concept["id"]
+                conn.execute(
+                    """
+                    UPDATE concepts
+                    SET source_quote = ?, ground_truth = ?, question = ?,
+                        skipped = ?, created_at = ?
+                    WHERE id = ?
+                    """,
+                    (
+                        _prefer_text(existing_concept["source_quote"], concept["source_quote"])
+                        or existing_concept["source_quote"],
+                        _prefer_text(
+                            existing_concept["ground_truth"],
+                            concept.get("ground_truth"),
+                        ),
+                        _prefer_text(existing_concept["question"], concept.get("question")),
+                        max(
+                            int(existing_concept["skipped"]),
+                            int(concept.get("skipped", 0) or 0),
+                        ),
+                        _earliest_timestamp(
+                            now,
+                            existing_concept["created_at"],
+                            concept.get("created_at"),
+                        ),
+                        concept_id,
+                    ),
+                )
+                concepts_merged += 1
+            else:
+                cursor = conn.execute(
+                    """
+                    INSERT INTO concepts
+                    (source_id, name, source_quote, ground_truth, question, skipped, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        source_id,
+                        concept["name"],
+                        concept["source_quote"],
+                        concept.get("ground_truth"),
+                        concept.get("question"),
+                        concept.get("skipped", 0),
+                        _stamp(concept.get("created_at"), now),
+                    ),
+                )
+                concept_id = cursor.lastrowid
+                concepts_added += 1
+
+            imported_explanations = explanations_by_concept.get(concept["id"], [])
+            imported_activity_at = max(
+                (
+                    _stamp(explanation.get("created_at"), now)
+                    for explanation in imported_explanations
+                ),
+                default=_stamp(
+                    progress_by_concept.get(concept["id"], {}).get("due_date"), now
+                ),
+            )
+            imported_state_won = _merge_progress_row(
+                conn,
+                concept_id,
+                progress_by_concept.get(concept["id"]),
+                imported_activity_at,
+                now,
+            )
+            explanations_added += _merge_explanations(conn, concept_id, imported_explanations)
+
+            if _merge_duel_memory(
+                conn,
+                concept_id,
+                mem_by_concept.get(concept["id"]),
+                prefer_import=imported_state_won,
+            ):
+                duel_memories_updated += 1
+
+            if _merge_cached_claims(
+                conn,
+                concept_id,
+                claims_by_concept.get(concept["id"], []),
+                prefer_import=imported_state_won,
+            ):
+                cached_claim_sets_updated += 1
+
+    _prune_content(conn)
+    return {
+        "sources_added": sources_added,
+        "sources_merged": sources_merged,
+        "concepts_added": concepts_added,
+        "concepts_merged": concepts_merged,
+        "explanations_added": explanations_added,
+        "duel_memories_updated": duel_memories_updated,
+        "cached_claim_sets_updated": cached_claim_sets_updated,
+    }
+
+
+# ---- Set-based bulk import ----
+#
+# The payload is staged into TEMP tables with executemany, then matched against
+# local rows through indexed joins (sources.url, concepts(source_id, lower(name)))
+# and merged with a fixed number of statements. The merge rules mirror the
+# row-by-row helpers above; when one payload repeats a source URL or a concept
+# name, the first occurrence supplies the merged fields.
+
+BULK_IMPORT_MIN_CONCEPTS = 200
+
+_IMPORT_STAGING_SCHEMA = """
+    CREATE TEMP TABLE import_sources (
+        seq INTEGER PRIMARY KEY, id, url, title, source_type, content_hash, content_length,
+        segments_hash, segments_length, created_at
+    );
+    CREATE TEMP TABLE import_concepts (
+        seq INTEGER PRIMARY KEY, id, source_id, name, source_quote, ground_truth, question,
+        skipped, created_at
+    );
+    CREATE TEMP TABLE import_progress (
+        seq INTEGER PRIMARY KEY, concept_id, ease_factor, interval_days, due_date,
+        review_count, last_score, created_at
+    );
+    CREATE TEMP TABLE import_explanations (
+        seq INTEGER PRIMARY KEY, concept_id, text_hash, score, turns, error_codes, codec, data,
+        created_at
+    );
+    CREATE TEMP TABLE import_duel_memory (
+        seq INTEGER PRIMARY KEY, concept_id, last_belief, last_errors, last_attack, updated_at
+    );
+    CREATE TEMP TABLE import_claims (
+        seq INTEGER PRIMARY KEY, concept_id, statement, claim_type, claim_index, created_at
+    );
+    CREATE TEMP TABLE import_source_map (import_id PRIMARY KEY, source_id INTEGER NOT NULL);
+    CREATE TEMP TABLE import_concept_map (
+        import_id PRIMARY KEY, seq INTEGER, source_id INTEGER, name_key TEXT, concept_id INTEGER
+    );
+    CREATE TEMP TABLE import_progress_won (concept_id INTEGER PRIMARY KEY, seq INTEGER);
+"""
+
+_IMPORT_STAGING_TABLES = (
+    "import_sources",
+    "import_concepts",
+    "import_progress",
+    "import_explanations",
+    "import_duel_memory",
+    "import_claims",
+    "import_source_map",
+    "import_concept_map",
+    "import_progress_won",
+    "import_existing_activity",
+    "import_progress_choice",
+    "import_memory_choice",
+    "import_claims_replace",
+    "import_explanation_keys",
+)
+
+# Column order used when staging each export table.
+_IMPORT_STAGING_COLUMNS = {
+    "sources": (
+        "id", "url", "title", "source_type", "content_hash", "content_length", "segments_hash",
+        "segments_length", "created_at",
+    ),
+    "concepts": (
+        "id", "source_id", "name", "source_quote", "ground_truth", "question", "skipped",
+        "created_at",
+    ),
+    "progress": (
+        "concept_id", "ease_factor", "interval_days", "due_date", "review_count",
+        "last_score", "created_at",
+    ),
+    "explanations": (
+        "concept_id", "text_hash", "score", "turns", "error_codes", "codec", "data",
+        "created_at",
+    ),
+    "duel_memory": ("concept_id", "last_belief", "last_errors", "last_attack", "updated_at"),
+    "cached_claims": ("concept_id", "statement", "claim_type", "claim_index", "created_at"),
+}
+
+_IMPORT_STAGING_TARGETS = {
+    "sources": "import_sources",
+    "concepts": "import_concepts",
+    "progress": "import_progress",
+    "explanations": "import_explanations",
+    "duel_memory": "import_duel_memory",
+    "cached_claims": "import_claims",
+}
+
+
+def _prefer_text_sql(existing: str, incoming: str) -> str:
+    """SQL version of _prefer_text()."""
+    return (
+        f"CASE WHEN typeof({existing}) != 'text' OR {existing} = '' "
+        f"THEN CASE WHEN typeof({incoming}) = 'text' THEN {incoming} END "
+        f"WHEN typeof({incoming}) != 'text' OR {incoming} = '' THEN {existing} "
+        f"WHEN length({incoming}) > length({existing}) THEN {incoming} "
+        f"ELSE {existing} END"
+    )
+
+
+def _prefer_content_sql(existing_hash: str, incoming_hash: str, incoming_length: str) -> str:
+    """_prefer_text() over content-store hashes, comparing stored text lengths."""
+    return (
+        f"CASE WHEN {existing_hash} IS NULL THEN {incoming_hash} "
+        f"WHEN {incoming_hash} IS NULL THEN {existing_hash} "
+        f"WHEN {incoming_length} > "
+        f"(SELECT text_length FROM content_blobs WHERE hash = {existing_hash}) "
+        f"THEN {incoming_hash} "
+        f"ELSE {existing_hash} END"
+    )
+
+
+def _earliest_timestamp_sql(existing: str, incoming: str) -> str:
+    """SQL version of _earliest_timestamp() for two values."""
+    # Scalar MIN() is NULL when either side is.
+    return f"COALESCE(MIN({existing}, {incoming}), {existing}, {incoming}, :now)"
+
+
+def _ts_key_sql(value: str) -> str:
+    return f"COALESCE({value}, {_MISSING_TS})"
+
+
+def _execute_statements(conn: sqlite3.Connection, script: str) -> None:
+    """Run a multi-statement script without executescript()'s implicit COMMIT."""
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            conn.execute(statement)
+            statement = ""
+
+
+def _create_import_staging(conn: sqlite3.Connection) -> None:
+    _drop_import_staging(conn)
+    _execute_statements(conn, _IMPORT_STAGING_SCHEMA)
+
+
+def _drop_import_staging(conn: sqlite3.Connection) -> None:
+    for table in _IMPORT_STAGING_TABLES:
+        conn.execute(f"DROP TABLE IF EXISTS temp.{table}")
+
+
+@contextmanager
+def _temp_store_on_disk():
+    """Keep this thread's temp tables in a temporary file for the block.
+
+    Streaming imports stage the whole export in temp tables before merging,
+    which config.SQLITE_TEMP_STORE = "memory" would hold in RAM. SQLite drops
+    a connection's temp tables when the setting changes and refuses to change
+    it inside a transaction, so a block that joins an open one keeps the
+    configured store.
+    """
+    db_path = _default_db_path()
+    conn = _thread_pool().get(str(db_path))
+    if conn is None:
+        init_db(db_path)
+        conn = _pooled_connection(db_path)
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute(f"PRAGMA temp_store = {_TEMP_STORE_MODES['file']}")
+    try:
+        yield
+    finally:
+        conn.execute(f"PRAGMA temp_store = {_TEMP_STORE_MODES.get(config.SQLITE_TEMP_STORE, 2)}")
+
+
+def _staged_content(conn: sqlite3.Connection, text: object) -> tuple[str | None, int | None]:
+    content_hash = _store_content(conn, text)
+    return (content_hash, len(text)) if content_hash else (None, None)
+
+
+def _stage_rows(conn: sqlite3.Connection, key: str, rows: list[dict], now: int) -> None:
+    """Append validated export rows for ``key`` to its staging table."""
+    columns = _IMPORT_STAGING_COLUMNS[key]
+    rows = [_epoch_row(row) for row in rows]
+    if key == "sources":
+        # Content goes straight to the content store; staging keeps hash + length.
+        values = (
+            (
+                row.get("id"),
+                row.get("url"),
+                row.get("title"),
+                row.get("source_type"),
+                *_staged_content(conn, row.get("raw_content")),
+                *_staged_content(conn, row.get("segments")),
+                row.get("created_at"),
+            )
+            for row in rows
+        )
+    elif key == "explanations":
+        # Free text is hashed and compressed here; staging keeps the review_text payload.
+        # Matches _merge_explanations(): a missing timestamp becomes "now".
+        values = (
+            (
+                row.get("concept_id"),
+                _review_text_hash(row),
+                row.get("score"),
+                row.get("turns"),
+                row.get("error_codes") or None,
+                *(_pack_review_text(row) or (None, None)),
+                _stamp(row.get("created_at"), now),
+            )
+            for row in rows
+        )
+    else:
+        values = (tuple(row.get(column) for column in columns) for row in rows)
+    placeholders = ", ".join("?" for _ in columns)
+    conn.executemany(
+        f"INSERT INTO {_IMPORT_STAGING_TARGETS[key]} ({', '.join(columns)}) "
+        f"VALUES ({placeholders})",
+        values,
+    )
+
+
+def _merge_staged(conn: sqlite3.Connection, now: int) -> dict:
+    """Merge the staged payload into the local tables with set-based SQL."""
+    params = {"now": now}
+    _execute_statements(conn, """
+        CREATE INDEX temp.import_sources_url ON import_sources(url);
+        CREATE INDEX temp.import_concepts_source ON import_concepts(source_id);
+        CREATE INDEX temp.import_explanations_concept ON import_explanations(concept_id);
+        CREATE INDEX temp.import_claims_concept ON import_claims(concept_id);
+        CREATE INDEX temp.import_concept_map_local ON import_concept_map(concept_id);
+    """)
+
+    # ---- Sources: merge by URL, then insert the rest ----
+    total_sources = conn.execute("SELECT COUNT(*) FROM import_sources").fetchone()[0]
+    sources_added = conn.execute(
+        "SELECT COUNT(DISTINCT url) FROM import_sources "
+        "WHERE url NOT IN (SELECT url FROM sources)"
+    ).fetchone()[0]
+    conn.execute(
+        f"""
+        UPDATE sources
+        SET (title, source_type, content_hash, segments_hash, created_at) = (
+            SELECT COALESCE(NULLIF({_prefer_text_sql("sources.title", "i.title")}, ''),
+                            sources.title),
+                   COALESCE(NULLIF(sources.source_type, ''), i.source_type),
+                   {_prefer_content_sql("sources.content_hash", "i.content_hash",
+                                        "i.content_length")},
+                   {_prefer_content_sql("sources.segments_hash", "i.segments_hash",
+                                        "i.segments_length")},
+                   {_earliest_timestamp_sql("sources.created_at", "i.created_at")}
+            FROM import_sources i
+            WHERE i.seq = (SELECT MIN(seq) FROM import_sources WHERE url = sources.url)
+        )
+        WHERE url IN (SELECT url FROM import_sources)
+        """,
+        params,
+    )
+    conn.execute(
+        """
+        INSERT INTO sources (url, title, source_type, content_hash, segments_hash, created_at)
+        SELECT url, title, source_type, content_hash, segments_hash, COALESCE(created_at, :now)
+        FROM import_sources
+        WHERE seq IN (SELECT MIN(seq) FROM import_sources GROUP BY url)
+          AND url NOT IN (SELECT url FROM sources)
+        ORDER BY seq
+        """,
+        params,
+    )
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO import_source_map (import_id, source_id)
+        SELECT i.id, s.id FROM import_sources i JOIN sources s ON s.url = i.url ORDER BY i.seq
+        """
+    )
+
+    # ---- Concepts: match on (source_id, lower(name)), merge, insert the rest ----
+    conn.execute(
+        """
+        INSERT OR IGNORE INTO import_concept_map (import_id, seq, source_id, name_key)
+        SELECT c.id, c.seq, m.source_id, lower(c.name)
+        FROM import_concepts c JOIN import_source_map m ON m.import_id = c.source_id
+        ORDER BY c.seq
+        """
+    )
+    resolve_concepts = """
+        UPDATE import_concept_map
+        SET concept_id = (
+            SELECT MIN(id) FROM concepts
+            WHERE source_id = import_concept_map.source_id AND lower(name) = name_key
+        )
+        WHERE concept_id IS NULL
+    """
+    conn.execute(resolve_concepts)
+    total_concepts = conn.execute("SELECT COUNT(*) FROM import_concept_map").fetchone()[0]
+    conn.execute(
+        f"""
+        UPDATE concepts
+        SET (source_quote, ground_truth, question, skipped, created_at) = (
+            SELECT COALESCE(
+                       NULLIF({_prefer_text_sql("concepts.source_quote", "i.source_quote")}, ''),
+                       concepts.source_quote),
+                   {_prefer_text_sql("concepts.ground_truth", "i.ground_truth")},
+                   {_prefer_text_sql("concepts.question", "i.question")},
+                   MAX(COALESCE(concepts.skipped, 0), COALESCE(i.skipped, 0)),
+                   {_earliest_timestamp_sql("concepts.created_at", "i.created_at")}
+            FROM import_concepts i
+            WHERE i.seq = (SELECT MIN(seq) FROM import_concept_map WHERE concept_id = concepts.id)
+        )
+        WHERE id IN (SELECT concept_id FROM import_concept_map)
+        """,
+        params,
+    )
+    concepts_added = conn.execute(
+        """
+        INSERT INTO concepts
+        (source_id, name, source_quote, ground_truth, question, skipped, created_at)
+        SELECT m.source_id, i.name, i.source_quote, i.ground_truth, i.question,
+               COALESCE(i.skipped, 0), COALESCE(i.created_at, :now)
+        FROM import_concept_map m JOIN import_concepts i ON i.seq = m.seq
+        WHERE m.seq IN (
+            SELECT MIN(seq) FROM import_concept_map
+            WHERE concept_id IS NULL GROUP BY source_id, name_key
+        )
+        ORDER BY m.seq
+        """,
+        params,
+    ).rowcount
+    conn.execute(resolve_concepts)
+
+    # ---- Progress: keep whichever side has stronger evidence of recency ----
+    conn.execute(
+        """
+        CREATE TEMP TABLE import_existing_activity AS
+        SELECT concept_id, last_review_at AS last_at
+        FROM review_concepts
+        WHERE concept_id IN (SELECT concept_id FROM import_concept_map)
+        """
+    )
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE import_progress_choice AS
+        SELECT seq, local_id, review_rank, activity_rank, due_rank,
+               ROW_NUMBER() OVER (
+                   PARTITION BY local_id
+                   ORDER BY review_rank DESC, activity_rank DESC, due_rank DESC, concept_seq
+               ) AS pick
+        FROM (
+            SELECT p.seq, m.concept_id AS local_id, m.seq AS concept_seq,
+                   CAST(COALESCE(p.review_count, 0) AS INTEGER) AS review_rank,
+                   COALESCE(
+                       (SELECT MAX({_ts_key_sql("e.created_at")})
+                        FROM import_explanations e WHERE e.concept_id = p.concept_id),
+                       {_ts_key_sql("COALESCE(p.due_date, :now)")}
+                   ) AS activity_rank,
+                   {_ts_key_sql("p.due_date")} AS due_rank
+            FROM import_progress p JOIN import_concept_map m ON m.import_id = p.concept_id
+            WHERE p.seq IN (SELECT MAX(seq) FROM import_progress GROUP BY concept_id)
+        )
+        """,
+        params,
+    )
+    conn.execute(
+        f"""
+        INSERT INTO import_progress_won (concept_id, seq)
+        SELECT c.local_id, c.seq
+        FROM import_progress_choice c
+        LEFT JOIN progress p ON p.concept_id = c.local_id
+        LEFT JOIN import_existing_activity a ON a.concept_id = c.local_id
+        WHERE c.pick = 1 AND (
+            p.id IS NULL
+            OR (c.review_rank, c.activity_rank, c.due_rank) > (
+                CAST(COALESCE(p.review_count, 0) AS INTEGER),
+                {_ts_key_sql("COALESCE(a.last_at, p.due_date)")},
+                {_ts_key_sql("p.due_date")}
+            )
+        )
+        """
+    )
+    conn.execute(
+        """
+        UPDATE progress
+        SET (ease_factor, interval_days, due_date, review_count, last_score, created_at) = (
+            SELECT COALESCE(i.ease_factor, progress.ease_factor),
+                   COALESCE(i.interval_days, progress.interval_days),
+                   COALESCE(i.due_date, progress.due_date),
+                   COALESCE(i.review_count, progress.review_count),
+                   i.last_score,
+                   COALESCE(i.created_at, progress.created_at)
+            FROM import_progress_won w JOIN import_progress i ON i.seq = w.seq
+            WHERE w.concept_id = progress.concept_id
+        ), stability = NULL, difficulty = NULL
+        WHERE concept_id IN (SELECT concept_id FROM import_progress_won)
+        """
+    )
+    conn.execute(
+        """
+        INSERT INTO progress
+        (concept_id, ease_factor, interval_days, due_date, review_count, last_score, created_at)
+        SELECT w.concept_id, COALESCE(i.ease_factor, 2.5), COALESCE(i.interval_days, 1.0),
+               COALESCE(i.due_date, :now), COALESCE(i.review_count, 0), i.last_score,
+               COALESCE(i.created_at, :now)
+        FROM import_progress_won w JOIN import_progress i ON i.seq = w.seq
+        WHERE w.concept_id NOT IN (SELECT concept_id FROM progress)
+        """,
+        params,
+    )
+    conn.execute(
+        """
+        INSERT INTO progress (concept_id, due_date, created_at)
+        SELECT DISTINCT concept_id, :now, :now FROM import_concept_map
+        WHERE concept_id NOT IN (SELECT concept_id FROM progress)
+        """,
+        params,
+    )
+
+    # ---- Explanations: append review events not already present (text, created_at) ----
+    conn.execute(
+        """
+        CREATE TEMP TABLE import_explanation_keys AS
+        SELECT concept_id, text_hash, created_at FROM review_events
+        WHERE concept_id IN (SELECT concept_id FROM import_concept_map)
+        """
+    )
+    _execute_statements(conn, """
+        CREATE INDEX temp.import_explanation_keys_idx
+            ON import_explanation_keys(concept_id, created_at);
+        CREATE INDEX temp.import_explanations_key
+            ON import_explanations(concept_id, text_hash, created_at);
+    """)
+    first_new_event = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM review_events"
+    ).fetchone()[0]
+    explanations_added = conn.execute(
+        """
+        INSERT INTO review_events
+        (concept_id, created_at, score, turns, error_codes, text_hash)
+        SELECT m.concept_id, i.created_at, i.score, i.turns, i.error_codes, i.text_hash
+        FROM import_explanations i JOIN import_concept_map m ON m.import_id = i.concept_id
+        WHERE i.seq IN (
+            SELECT MIN(i2.seq)
+            FROM import_explanations i2 JOIN import_concept_map m2 ON m2.import_id = i2.concept_id
+            GROUP BY m2.concept_id, i2.text_hash, i2.created_at
+        )
+        AND NOT EXISTS (
+            SELECT 1 FROM import_explanation_keys k
+            WHERE k.concept_id = m.concept_id AND k.created_at = i.created_at
+              AND k.text_hash = i.text_hash
+        )
+        ORDER BY i.seq
+        """
+    ).rowcount
+    # New events are unique on (concept, text_hash, created_at); find their staged text.
+    conn.execute(
+        """
+        INSERT INTO review_text (event_id, codec, data)
+        SELECT e.id, i.codec, i.data
+        FROM review_events e
+        JOIN import_explanations i ON i.seq = (
+            SELECT MIN(i2.seq)
+            FROM import_concept_map m2 JOIN import_explanations i2
+                ON i2.concept_id = m2.import_id
+               AND i2.text_hash = e.text_hash AND i2.created_at = e.created_at
+            WHERE m2.concept_id = e.concept_id
+        )
+        WHERE e.id >= ? AND i.data IS NOT NULL
+        """,
+        (first_new_event,),
+    )
+
+    # ---- Duel memory: newer wins unless the imported progress already won ----
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE import_memory_choice AS
+        SELECT local_id, last_belief, last_errors, last_attack, stamp,
+               ROW_NUMBER() OVER (
+                   PARTITION BY local_id ORDER BY {_ts_key_sql("stamp")} DESC, seq DESC
+               ) AS pick
+        FROM (
+            SELECT d.seq, m.concept_id AS local_id, d.last_belief, d.last_errors,
+                   d.last_attack, COALESCE(d.updated_at, :now) AS stamp
+            FROM import_duel_memory d JOIN import_concept_map m ON m.import_id = d.concept_id
+            WHERE d.seq IN (SELECT MAX(seq) FROM import_duel_memory GROUP BY concept_id)
+        )
+        """,
+        params,
+    )
+    duel_memories_updated = conn.execute(
+        f"""
+        INSERT INTO duel_memory (concept_id, last_belief, last_errors, last_attack, updated_at)
+        SELECT c.local_id, c.last_belief, c.last_errors, c.last_attack, c.stamp
+        FROM import_memory_choice c LEFT JOIN duel_memory d ON d.concept_id = c.local_id
+        WHERE c.pick = 1 AND (
+            d.id IS NULL
+            OR c.local_id IN (SELECT concept_id FROM import_progress_won)
+            OR {_ts_key_sql("d.updated_at")} <= {_ts_key_sql("c.stamp")}
+        )
+        ON CONFLICT(concept_id) DO UPDATE SET
+            last_belief = excluded.last_belief,
+            last_errors = excluded.last_errors,
+            last_attack = excluded.last_attack,
+            updated_at = excluded.updated_at
+        """
+    ).rowcount
+
+    # ---- Cached claims: replace the whole set when the import is newer and differs ----
+    conn.execute(
+        f"""
+        CREATE TEMP TABLE import_claims_replace AS
+        SELECT local_id, import_id FROM (
+            SELECT m.concept_id AS local_id, m.import_id,
+                   ROW_NUMBER() OVER (PARTITION BY m.concept_id ORDER BY m.seq) AS pick
+            FROM import_concept_map m
+            WHERE m.import_id IN (SELECT concept_id FROM import_claims)
+        ) c
+        WHERE pick = 1 AND (
+            NOT EXISTS (SELECT 1 FROM cached_claims WHERE concept_id = c.local_id)
+            OR (
+                (
+                    c.local_id IN (SELECT concept_id FROM import_progress_won)
+                    OR (SELECT MAX({_ts_key_sql("created_at")}) FROM import_claims
+                        WHERE concept_id = c.import_id)
+                       >= (SELECT MAX({_ts_key_sql("created_at")}) FROM cached_claims
+                           WHERE concept_id = c.local_id)
+                )
+                AND (
+                    (SELECT COUNT(*) FROM import_claims WHERE concept_id = c.import_id)
+                    != (SELECT COUNT(*) FROM cached_claims WHERE concept_id = c.local_id)
+                    OR EXISTS (
+                        SELECT 1 FROM import_claims i
+                        WHERE i.concept_id = c.import_id AND NOT EXISTS (
+                            SELECT 1 FROM cached_claims e
+                            WHERE e.concept_id = c.local_id
+                              AND e.claim_index = i.claim_index
+                              AND e.statement = i.statement
+                              AND e.claim_type = i.claim_type
+                        )
+                    )
+                )
+            )
+        )
+        """
+    )
+    conn.execute(
+        "DELETE FROM cached_claims "
+        "WHERE concept_id IN (SELECT local_id FROM import_claims_replace)"
+    )
+    conn.execute(
+        """
+        INSERT INTO cached_claims (concept_id, statement, claim_type, claim_index, created_at)
+        SELECT r.local_id, i.statement, i.claim_type, i.claim_index, COALESCE(i.created_at, :now)
+        FROM import_claims_replace r JOIN import_claims i ON i.concept_id = r.import_id
+        ORDER BY r.local_id, i.claim_index
+        """,
+        params,
+    )
+    cached_claim_sets_updated = conn.execute(
+        "SELECT COUNT(*) FROM import_claims_replace"
+    ).fetchone()[0]
+
+    # Staged content that lost to longer local text is no longer referenced.
+    _prune_content(conn)
+    return {
+        "sources_added": sources_added,
+        "sources_merged": total_sources - sources_added,
+        "concepts_added": concepts_added,
+        "concepts_merged": total_concepts - concepts_added,
+        "explanations_added": explanations_added,
+        "duel_memories_updated": duel_memories_updated,
+        "cached_claim_sets_updated": cached_claim_sets_updated,
+    }
+
+
+def _merge_bulk(conn: sqlite3.Connection, payload: dict, now: int) -> dict:
+    _create_import_staging(conn)
+    try:
+        for key in _IMPORT_STAGING_TARGETS:
+            _stage_rows(conn, key, payload[key], now)
+        return _merge_staged(conn, now)
+    finally:
+        _drop_import_staging(conn)
+
+
+@_write_operation
+def import_all_data(data: dict, *, bulk: bool | None = None) -> dict:
+    """Import data from an export dict and merge it into the local database.
+
+    ``bulk`` forces the set-based (True) or row-by-row (False) merge; by default
+    payloads with at least BULK_IMPORT_MIN_CONCEPTS concepts use the bulk path.
+    """
+    payload = validate_import_data(data)
+    if bulk is None:
+        bulk = len(payload["concepts"]) >= BULK_IMPORT_MIN_CONCEPTS
+    merge = _merge_bulk if bulk else _merge_rows
+
+    with get_db() as conn:
+        result = merge(conn, payload, _now_ms())
+    return {"schema_version": payload["schema_version"], **result}
+
+
+# ---- Streaming NDJSON export / import ----
+#
+# One JSON object per line: a {"table": "meta", ...} header carrying the
+# schema version, then {"table": <name>, "row": {...}} records in
+# _REQUIRED_EXPORT_FIELDS order. Rows are read through a cursor in chunks and
+# imported through the bulk staging tables, kept in a temporary file (see
+# _temp_store_on_disk()), so neither side holds the whole library in memory.
+
+EXPORT_CHUNK_ROWS = 500
+
+
+@_operation
+def iter_export_records(
+    chunk_rows: int = EXPORT_CHUNK_ROWS, *, since: int | None = None
+) -> Iterator[dict]:
+    """Yield the NDJSON export records from one consistent read snapshot.
+
+    ``since`` limits the records to a delta, as for export_all_data().
+    """
+    with session(readonly=True) as unit:
+        yield {"table": "meta", **_export_header(unit.conn, since)}
+        for table, query in _export_queries(unit.conn, since).items():
+            cursor = unit.conn.execute(query)
+            while rows := cursor.fetchmany(chunk_rows):
+                for row in rows:
+                    yield {"table": table, "row": _export_row(table, row)}
+
+
+@_operation
+def export_ndjson(fp: IO[str], *, since: int | None = None) -> dict[str, int]:
+    """Stream an NDJSON export (a delta with ``since``) into ``fp``. Returns per-table counts."""
+    counts = dict.fromkeys(_REQUIRED_EXPORT_FIELDS, 0)
+    for record in iter_export_records(since=since):
+        fp.write(json.dumps(record))
+        fp.write("\n")
+        if record["table"] in counts:
+            counts[record["table"]] += 1
+    return counts
+
+
+def _parse_ndjson_lines(lines: Iterable[str]) -> Iterator[dict]:
+    for number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ImportValidationError(f"Invalid export: line {number} is not JSON ({e}).")
+        yield record
+
+
+def _check_staged_references(conn: sqlite3.Connection) -> None:
+    """Referential checks from validate_import_data(), run against staged rows."""
+    orphan = conn.execute(
+        "SELECT 1 FROM import_concepts "
+        "WHERE source_id NOT IN (SELECT id FROM import_sources) LIMIT 1"
+    ).fetchone()
+    if orphan:
+        raise ImportValidationError(
+            "Invalid export: one or more concepts reference unknown source ids."
+        )
+    for key in ("progress", "explanations", "duel_memory", "cached_claims"):
+        orphan = conn.execute(
+            f"SELECT 1 FROM {_IMPORT_STAGING_TARGETS[key]} "
+            "WHERE concept_id NOT IN (SELECT id FROM import_concepts) LIMIT 1"
+        ).fetchone()
+        if orphan:
+            raise ImportValidationError(
+                f"Invalid export: '{key}' references unknown concept ids."
+            )
+
+
+@_write_operation
+def import_records(records: Iterable[object], chunk_rows: int = EXPORT_CHUNK_ROWS) -> dict:
+    """Validate and merge a stream of NDJSON export records in bounded memory."""
+    records = iter(records)
+    header = next(records, None)
+    if not isinstance(header, Mapping) or header.get("table") != "meta":
+        raise ImportValidationError("Invalid export: first record must be the 'meta' header.")
+    schema_version = _validated_schema_version(header)
+
+    now = _now_ms()
+    buffers: dict[str, list[dict]] = {key: [] for key in _REQUIRED_EXPORT_FIELDS}
+    seen = dict.fromkeys(_REQUIRED_EXPORT_FIELDS, 0)
+
+    with _temp_store_on_disk(), get_db() as conn:
+        _create_import_staging(conn)
+        try:
+            for record in records:
+                if not isinstance(record, Mapping):
+                    raise ImportValidationError("Invalid export: every record must be an object.")
+                key = record.get("table")
+                if key not in buffers:
+                    raise ImportValidationError(f"Invalid export: unknown table {key!r}.")
+                row = record.get("row")
+                if not isinstance(row, Mapping):
+                    raise ImportValidationError(
+                        f"Invalid export: '{key}[{seen[key]}]' must be an object."
+                    )
+                _require_keys(row, key, _REQUIRED_EXPORT_FIELDS[key], seen[key])
+                seen[key] += 1
+                buffers[key].append(dict(row))
+                if len(buffers[key]) >= chunk_rows:
+                    _stage_rows(conn, key, buffers[key], now)
+                    buffers[key].clear()
+
+            for key, rows in buffers.items():
+                _stage_rows(conn, key, rows, now)
+            _check_staged_references(conn)
+            result = _merge_staged(conn, now)
+        finally:
+            _drop_import_staging(conn)
+
+    return {"schema_version": schema_version, **result}
+
+
+@_write_operation
+def import_ndjson(lines: Iterable[str]) -> dict:
+    """Import an NDJSON export from any iterable of lines (e.g. an open file)."""
+    return import_records(_parse_ndjson_lines(lines))
+
+
+# ---- SQLite snapshots ----
+#
+# A snapshot is a copy of the database file made with the online backup API,
+# optionally gzipped. Importing one attaches a migrated working copy and
+# stages its rows into the bulk-import tables with INSERT ... SELECT, so it
+# merges with the same rules as a JSON import without building any rows in
+# Python.
+
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+_GZIP_MAGIC = b"\x1f\x8b"
+
+
+def is_snapshot(path: Path) -> bool:
+    """Whether ``path`` holds a SQLite snapshot, plain or gzipped."""
+    try:
+        with open(path, "rb") as fp:
+            head = fp.read(len(_SQLITE_MAGIC))
+        if head.startswith(_GZIP_MAGIC):
+            with gzip.open(path, "rb") as fp:
+                head = fp.read(len(_SQLITE_MAGIC))
+    except (OSError, EOFError):
+        return False
+    return head == _SQLITE_MAGIC
+
+
+@_operation
+def export_snapshot(path: Path, *, compress: bool = False) -> dict:
+    """Write a consistent copy of the database to ``path``, gzipped with ``compress``.
+
+    The backup runs in one step inside a read transaction; under WAL that does
+    not block writers, so a study session can keep recording reviews. Returns
+    source/concept counts, the snapshot's change-log revision and its size.
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    partial = path.with_name(path.name + ".partial")
+    with get_db() as conn:
+        target = sqlite3.connect(partial)
+        try:
+            conn.backup(target)
+            # One self-contained file: no -wal to carry alongside it.
+            target.execute("PRAGMA journal_mode = DELETE")
+            counts = target.execute(
+                "SELECT (SELECT COUNT(*) FROM sources), (SELECT COUNT(*) FROM concepts)"
+            ).fetchone()
+            revision = _current_revision(target)
+        finally:
+            target.close()
+    try:
+        if compress:
+            packed = path.with_name(path.name + ".gz.partial")
+            try:
+                with open(partial, "rb") as src, gzip.open(packed, "wb") as dst:
+                    shutil.copyfileobj(src, dst)
+                os.replace(packed, path)
+            finally:
+                packed.unlink(missing_ok=True)
+        else:
+            os.replace(partial, path)
+    finally:
+        partial.unlink(missing_ok=True)
+    try:
+        os.chmod(path, 0o600)
+    except OSError:
+        pass
+    return {
+        "sources": counts[0],
+        "concepts": counts[1],
+        "revision": revision,
+        "bytes": path.stat().st_size,
+    }
+
+
+def _normal_sql(sql: str | None) -> str:
+    return " ".join((sql or "").split())
+
+
+@functools.cache
+def _schema_code() -> frozenset[tuple[str, str, str]]:
+    """(type, name, SQL) of every trigger and view some schema version defines."""
+    known = set()
+    conn = _connect(":memory:")
+    try:
+        for version in range(1, SCHEMA_VERSION + 1):
+            _apply_migrations(conn, version)
+            known.update(
+                (kind, name, _normal_sql(sql))
+                for kind, name, sql in conn.execute(
+                    "SELECT type, name, sql FROM sqlite_master WHERE type IN ('trigger', 'view')"
+                )
+            )
+    finally:
+        conn.close()
+    return frozenset(known)
+
+
+def _open_snapshot_copy(path: Path, workdir: str) -> Path:
+    """Copy (and gunzip) the snapshot into ``workdir`` and migrate it to this schema.
+
+    Rejects files whose triggers or views are not ones some version of our
+    schema creates, before anything runs against them.
+    """
+    working = Path(workdir) / "snapshot.db"
+    with open(path, "rb") as fp:
+        gzipped = fp.read(len(_GZIP_MAGIC)) == _GZIP_MAGIC
+    try:
+        with (gzip.open(path, "rb") if gzipped else open(path, "rb")) as src:
+            with open(working, "wb") as dst:
+                shutil.copyfileobj(src, dst)
+    except (EOFError, gzip.BadGzipFile, zlib.error) as e:
+        raise ImportValidationError(f"Invalid snapshot: {e}.") from e
+
+    conn = _connect(working)
+    try:
+        # The file is untrusted: its triggers and views must not call our SQL functions.
+        conn.execute("PRAGMA trusted_schema = OFF")
+        try:
+            version = _schema_version(conn)
+            objects = conn.execute("SELECT type, name, sql FROM sqlite_master").fetchall()
+        except sqlite3.DatabaseError as e:
+            raise ImportValidationError(f"Invalid snapshot: {e}.") from e
+        if "sources" not in {name for kind, name, _ in objects if kind == "table"}:
+            raise ImportValidationError("Invalid snapshot: not a learnlock database.")
+        foreign = sorted(
+            name
+            for kind, name, sql in objects
+            if kind in ("trigger", "view") and (kind, name, _normal_sql(sql)) not in _schema_code()
+        )
+        if foreign:
+            raise ImportValidationError(
+                f"Invalid snapshot: unknown triggers or views ({', '.join(foreign)})."
+            )
+        if version > SCHEMA_VERSION:
+            raise ImportValidationError(
+                f"Unsupported snapshot schema version {version}. "
+                f"This build supports up to {SCHEMA_VERSION}."
+            )
+        if version < SCHEMA_VERSION:
+            _apply_migrations(conn)
+    finally:
+        conn.close()
+    return working
+
+
+def _stage_snapshot(conn: sqlite3.Connection) -> None:
+    """Fill the bulk-import staging tables from the attached ``snapshot`` schema."""
+    _execute_statements(conn, """
+        INSERT OR IGNORE INTO content_blobs (hash, codec, text_length, raw_size, data)
+        SELECT hash, codec, text_length, raw_size, data FROM snapshot.content_blobs
+        WHERE hash IN (SELECT content_hash FROM snapshot.sources
+                       UNION SELECT segments_hash FROM snapshot.sources);
+
+        INSERT INTO import_sources
+        (id, url, title, source_type, content_hash, content_length, segments_hash,
+         segments_length, created_at)
+        SELECT s.id, s.url, s.title, s.source_type, s.content_hash, c.text_length,
+               s.segments_hash, g.text_length, s.created_at
+        FROM snapshot.sources s
+        LEFT JOIN snapshot.content_blobs c ON c.hash = s.content_hash
+        LEFT JOIN snapshot.content_blobs g ON g.hash = s.segments_hash
+        ORDER BY s.id;
+
+        INSERT INTO import_concepts
+        (id, source_id, name, source_quote, ground_truth, question, skipped, created_at)
+        SELECT id, source_id, name, source_quote, ground_truth, question, skipped, created_at
+        FROM snapshot.concepts ORDER BY id;
+
+        INSERT INTO import_progress
+        (concept_id, ease_factor, interval_days, due_date, review_count, last_score, created_at)
+        SELECT concept_id, ease_factor, interval_days, due_date, review_count, last_score,
+               created_at
+        FROM snapshot.progress ORDER BY id;
+
+        INSERT INTO import_explanations
+        (concept_id, text_hash, score, turns, error_codes, codec, data, created_at)
+        SELECT e.concept_id, e.text_hash, e.score, e.turns, e.error_codes, t.codec, t.data,
+               e.created_at
+        FROM snapshot.review_events e
+        LEFT JOIN snapshot.review_text t ON t.event_id = e.id
+        ORDER BY e.id;
+
+        INSERT INTO import_duel_memory
+        (concept_id, last_belief, last_errors, last_attack, updated_at)
+        SELECT concept_id, last_belief, last_errors, last_attack, updated_at
+        FROM snapshot.duel_memory ORDER BY id;
+
+        INSERT INTO import_claims (concept_id, statement, claim_type, claim_index, created_at)
+        SELECT concept_id, statement, claim_type, claim_index, created_at
+        FROM snapshot.cached_claims ORDER BY id;
+    """)
+
+
+@_write_operation
+def import_snapshot(path: Path) -> dict:
+    """Merge a SQLite snapshot (see export_snapshot()) into the local database.
+
+    The file itself is never modified: a working copy is migrated to this
+    schema, attached, and merged with the bulk-import rules. Must not be
+    called inside a session (SQLite cannot ATTACH inside a transaction).
+    """
+    path = Path(path)
+    if not is_snapshot(path):
+        raise ImportValidationError("Invalid snapshot: not a SQLite database file.")
+    db_path = _default_db_path()
+    init_db(db_path)
+    conn = _pooled_connection(db_path)
+    if str(db_path) in _local.sessions or conn.in_transaction:
+        raise RuntimeError("import_snapshot() cannot run inside an open transaction.")
+
+    with tempfile.TemporaryDirectory(prefix="learnlock-snapshot-") as workdir:
+        try:
+            working = _open_snapshot_copy(path, workdir)
+            conn.execute("ATTACH DATABASE ? AS snapshot", (str(working),))
+            try:
+                with get_db(db_path) as conn:
+                    _create_import_staging(conn)
+                    try:
+                        _stage_snapshot(conn)
+                        result = _merge_staged(conn, _now_ms())
+                    finally:
+                        _drop_import_staging(conn)
+            finally:
+                conn.execute("DETACH DATABASE snapshot")
+        except sqlite3.OperationalError:
+            raise  # locks and I/O on our side, not a bad file
+        except sqlite3.DatabaseError as e:
+            # A truncated or corrupt file passes is_snapshot() but not a full read.
+            raise ImportValidationError(f"Invalid snapshot: {e}.") from e
+    return result
+
+
+# ============ BACKENDS ============
+
+
+@runtime_checkable
+class StorageBackend(Protocol):
+    """Everything the rest of learnlock needs from a store.
+
+    The module-level functions above are facades over the active backend
+    (see use_backend()), so callers never name a backend. A backend only has
+    to provide these methods; results use the same dicts and records as the
+    SQLite implementation.
+    """
+
+    def session(self, existing: Session | None = None): ...
+
+    # Sources
+    def add_source(
+        self, url: str, title: str, source_type: str, raw_content: str, segments: str | None = None,
+    ) -> int: ...
+    def add_source_with_concepts(
+        self,
+        *,
+        url: str,
+        title: str,
+        source_type: str,
+        raw_content: str,
+        concepts: list[dict],
+        segments: str | None = None,
+    ) -> int: ...
+    def get_source_by_url(self, url: str) -> Optional[dict]: ...
+    def get_all_sources(self) -> list[dict]: ...
+    def get_source(self, source_id: int) -> Optional[dict]: ...
+    def get_source_content(self, source_id: int) -> Optional[str]: ...
+    def get_source_segments(self, source_id: int) -> Optional[str]: ...
+    def get_content_stats(self, sample: int = 20) -> dict: ...
+    def delete_source(self, source_id: int) -> int: ...
+
+    # Concepts
+    def add_concept(
+        self,
+        source_id: int,
+        name: str,
+        source_quote: str,
+        question: str | None = None,
+        ground_truth: str | None = None,
+    ) -> int: ...
+    def get_concept(self, concept_id: int) -> Optional[dict]: ...
+    def get_concepts_for_source(self, source_id: int) -> list[dict]: ...
+    def get_all_concepts(self) -> list[dict]: ...
+    def skip_concept(self, concept_id: int) -> None: ...
+    def unskip_concept(self, concept_id: int) -> None: ...
+    def get_skipped_concepts(self) -> list[dict]: ...
+
+    # Listings
+    def list_source_summaries(self) -> list[SourceSummary]: ...
+    def count_concepts_for_source(self, source_id: int) -> int: ...
+    def iter_concepts_with_progress(
+        self, *, skipped: bool = False, chunk_rows: int = LISTING_CHUNK_ROWS,
+    ) -> Iterator[ConceptListing]: ...
+    def list_concepts(self, *, skipped: bool = False) -> list[ConceptListing]: ...
+    def list_due_concepts(self, limit: int = 100) -> list[DueConcept]: ...
+    def count_due_concepts(self) -> int: ...
+
+    # Search
+    def search(
+        self, query: str, limit: int = 20, *, mark: tuple[str, str] = ("[", "]"),
+    ) -> list[SearchHit]: ...
+    def resolve_concepts(
+        self, query: str, *, skipped: bool | None = None,
+    ) -> list[ConceptListing]: ...
+    def resolve_sources(self, query: str) -> list[SourceSummary]: ...
+
+    # Bulk administration
+    def count_concepts_matching(self, where: ConceptFilter) -> int: ...
+    def list_concepts_matching(
+        self, where: ConceptFilter, limit: int = 20,
+    ) -> list[ConceptListing]: ...
+    def skip_concepts_matching(self, where: ConceptFilter) -> int: ...
+    def unskip_concepts_matching(self, where: ConceptFilter) -> int: ...
+    def delete_concepts_matching(self, where: ConceptFilter) -> int: ...
+
+    # Progress
+    def get_due_concepts(self, limit: int | None = None) -> list[dict]: ...
+    def get_progress(self, concept_id: int) -> Optional[dict]: ...
+    def update_progress(
+        self,
+        concept_id: int,
+        ease_factor: float,
+        interval_days: float,
+        due_date: datetime,
+        review_count: int,
+        last_score: int,
+        *,
+        stability: float | None = None,
+        difficulty: float | None = None,
+    ) -> None: ...
+    def get_schedule_inputs(self) -> tuple[list[tuple], list[tuple]]: ...
+    def get_forecast_inputs(self, until: datetime) -> tuple[list[tuple], list[tuple]]: ...
+    def get_due_histogram(self, first_day: int, days: int) -> list[int]: ...
+    def get_study_queue(
+        self,
+    ) -> tuple[int, list[dict], dict[int, dict], Optional[datetime]]: ...
+    def get_data_version(self) -> int: ...
+    def reschedule_progress(self, rows: Iterable[tuple]) -> int: ...
+
+    # Review Log
+    def add_explanation(
+        self,
+        concept_id: int,
+        text: str,
+        score: int | None = None,
+        covered: str | None = None,
+        missed: str | None = None,
+        feedback: str | None = None,
+        *,
+        turns: int | None = None,
+        error_codes: str | None = None,
+    ) -> int: ...
+    def get_explanations(self, concept_id: int) -> list[dict]: ...
+    def get_review_rollup(self, concept_id: int) -> Optional[dict]: ...
+    def get_daily_reviews(self, days: int = 30) -> list[dict]: ...
+    def archive_review_text(
+        self, older_than_days: int | None = None, *, db_path: Path | str | None = None
+    ) -> dict: ...
+
+    # Stats
+    def get_stats(self) -> dict: ...
+    def count_successful_reviews(self) -> int: ...
+
+    # Duel Memory
+    def save_duel_memory(self, concept_id: int, belief: str, errors: str, attack: str) -> None: ...
+    def get_duel_memory(self, concept_id: int) -> Optional[dict]: ...
+
+    # Cached Claims
+    def get_cached_claims(self, concept_id: int) -> list[dict] | None: ...
+    def save_cached_claims(self, concept_id: int, claims: list[dict]) -> None: ...
+    def update_cached_claim(self, concept_id: int, claim_index: int, statement: str) -> bool: ...
+    def delete_cached_claim(self, concept_id: int, claim_index: int) -> bool: ...
+    def apply_claim_edits(self, concept_id: int, edits: Iterable[ClaimEdit]) -> list[dict]: ...
+
+    # Export / Import
+    def current_revision(self) -> int: ...
+    def export_all_data(self, *, since: int | None = None) -> dict: ...
+    def import_all_data(self, data: dict, *, bulk: bool | None = None) -> dict: ...
+    def iter_export_records(
+        self, chunk_rows: int = EXPORT_CHUNK_ROWS, *, since: int | None = None,
+    ) -> Iterator[dict]: ...
+    def export_ndjson(self, fp: IO[str], *, since: int | None = None) -> dict[str, int]: ...
+    def import_records(
+        self, records: Iterable[object], chunk_rows: int = EXPORT_CHUNK_ROWS,
+    ) -> dict: ...
+    def import_ndjson(self, lines: Iterable[str]) -> dict: ...
+    def export_snapshot(self, path: Path, *, compress: bool = False) -> dict: ...
+    def import_snapshot(self, path: Path) -> dict: ...
+
+
+class SQLiteBackend:
+    """The default backend: a SQLite database at ``db_path``.
+
+    Without a path it follows config.DB_PATH at call time. Methods run the
+    module functions against this backend's database, so two instances can be
+    used side by side on one thread.
+    """
+
+    def __init__(self, db_path: Path | str | None = None):
+        self._db_path = db_path
+
+    @property
+    def db_path(self) -> Path | str:
+        return self._db_path if self._db_path is not None else config.DB_PATH
+
+    def session(self, existing: Session | None = None):
+        return session(existing, db_path=self.db_path)
+
+    def close(self) -> None:
+        """Nothing to release beyond the shared connection pool (see close())."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}({self.db_path!r})"
+
+
+_memory_ids = itertools.count(1)
+
+
+class MemoryBackend(SQLiteBackend):
+    """A private in-memory SQLite database with the full schema.
+
+    A named shared-cache database, so every pooled connection in the process
+    sees it (shared cache locks whole tables, so use it from one thread at a
+    time). It lives until close(); nothing touches the disk, which makes it
+    suited to tests and to benchmarks that isolate engine cost from file I/O.
+    Retention archiving is a no-op.
+    """
+
+    def __init__(self):
+        super().__init__(
+            f"file:learnlock-{os.getpid()}-{next(_memory_ids)}?mode=memory&cache=shared"
+        )
+        # The database is freed with its last connection; this one pins it
+        # across close()/reset_init_cache() of the pool.
+        self._anchor: sqlite3.Connection | None = _connect(self.db_path)
+
+    def close(self) -> None:
+        """Release the database once pooled connections are closed too."""
+        if self._anchor is not None:
+            self._anchor.close()
+            self._anchor = None
+        _initialized_dbs.discard(self.db_path)
+
+
+class _DictSession:
+    """Unit-of-work handle for DictBackend."""
+
+    __slots__ = ("active",)
+
+    def __init__(self):
+        self.active = True
+
+
+# DictBackend undo-journal markers: the key did not exist, an item was
+# appended, or an entry went into / out of a sorted index.
+_UNSET = object()
+_APPENDED = object()
+_INSERTED = object()
+_REMOVED = object()
+_NO_REVIEW_TEXT = dict.fromkeys(_REVIEW_TEXT_FIELDS)
+_SNIPPET_WORDS = 12
+
+
+def _iso(ms: int | None) -> str | None:
+    """Python twin of _iso_sql(): epoch ms -> ISO-8601 UTC."""
+    if ms is None:
+        return None
+    return (_EPOCH + ms * _MILLISECOND).isoformat(timespec="milliseconds")
+
+
+def _newest_first(rows: Iterable[dict]) -> list[dict]:
+    """``ORDER BY created_at DESC`` over rows in id order."""
+    return sorted(rows, key=lambda row: (-row["created_at"], row["id"]))
+
+
+def _snippet(text: str, pattern: re.Pattern, mark: tuple[str, str]) -> str:
+    """Stand-in for FTS5 snippet(): a window of words from the first hit, matches marked."""
+    words = text.split()
+    first = next((i for i, word in enumerate(words) if pattern.search(word)), 0)
+    start = max(0, min(first - _SNIPPET_WORDS // 4, len(words) - _SNIPPET_WORDS))
+    stop = start + _SNIPPET_WORDS
+    window = " ".join(
+        pattern.sub(lambda hit: f"{mark[0]}{hit.group(0)}{mark[1]}", word)
+        for word in words[start:stop]
+    )
+    return ("…" if start else "") + window + ("…" if stop < len(words) else "")
+
+
+def _shift_claim_rows(
+    rows: list[dict], start: int, stop: int | None, delta: int, now: int
+) -> None:
+    """_shift_claims() over a list of claim rows."""
+    for row in rows:
+        if row["claim_index"] >= start and (stop is None or row["claim_index"] < stop):
+            row["claim_index"] += delta
+            row["created_at"] = now
+
+
+def _replace_claim_rows(rows: list[dict], claim_index: int, statement: str, now: int) -> bool:
+    """_replace_claim() over a list of claim rows."""
+    hits = [row for row in rows if row["claim_index"] == claim_index]
+    for row in hits:
+        row["statement"] = statement
+        row["created_at"] = now
+    return bool(hits)
+
+
+def _delete_claim_row(rows: list[dict], claim_index: int, now: int) -> bool:
+    """_delete_claim() over a list of claim rows."""
+    kept = [row for row in rows if row["claim_index"] != claim_index]
+    if len(kept) == len(rows):
+        return False
+    rows[:] = kept
+    _shift_claim_rows(rows, claim_index + 1, None, -1, now)
+    return True
+
+
+def _atomic(method: Callable) -> Callable:
+    """Run a DictBackend write inside a session, so an error undoes all of it."""
+
+    @functools.wraps(method)
+    def write(self, *args, **kwargs):
+        with self.session():
+            return method(self, *args, **kwargs)
+
+    return write
+
+
+class DictBackend:
+    """A pure-Python backend over dicts, with no SQL engine in the loop.
+
+    Implements the whole protocol with the SQLite backend's result shapes and
+    merge rules, and keeps the rollups its triggers maintain (review totals
+    per concept and per day, the due histogram, the change log) as dicts.
+    Writes journal what they overwrite, so an error inside a session, or
+    inside any single write, undoes every change it made; what SQLite's
+    constraints reject (a duplicate URL, an unknown parent) raises ValueError.
+    Imports always use the row-by-row merge. Search matches terms by
+    case-insensitive substring rather than through FTS5, and snapshots go
+    through a scratch MemoryBackend because the file format is SQLite's; like
+    JSON exports they drop the FSRS engine state. Nothing else writes to the
+    dicts, so get_data_version() is always 0. Use it from one thread. Suited
+    to simulations and to benchmarks that separate engine cost from SQLite's.
+    """
+
+    def __init__(self):
+        self._sources: dict[int, dict] = {}
+        self._source_urls: dict[str, int] = {}
+        self._source_concepts: dict[int, list[int]] = {}
+        # content_blobs: hash -> (codec, text_length, raw_size, data)
+        self._blobs: dict[str, tuple[str, int, int, bytes]] = {}
+        self._concepts: dict[int, dict] = {}
+        self._progress: dict[int, dict] = {}  # By concept id
+        self._reviews: dict[int, dict] = {}
+        self._review_text: dict[int, dict] = {}
+        self._concept_reviews: dict[int, list[int]] = {}
+        # review_concepts: (reviews, scored, score_sum, successful, last_review_at, last_score)
+        self._review_concepts: dict[int, tuple] = {}
+        # review_daily: (reviews, scored, score_sum, successful)
+        self._review_daily: dict[int, tuple] = {}
+        self._due_daily: dict[int, tuple[int, int]] = {}  # Day -> (due, new)
+        # (due_date, concept_id) of active concepts, sorted: idx_progress_due_concept.
+        self._due_index: list[tuple[int, int]] = []
+        self._duel_memory: dict[int, dict] = {}  # By concept id
+        self._claims: dict[int, list[dict]] = {}  # By concept id, in claim_index order
+        self._change_log: dict[tuple[str, int], int] = {}
+        self._sequences = dict.fromkeys((*_CHANGE_LOG_COLUMNS, "change_log"), 0)
+        self._session: _DictSession | None = None
+        self._journal: list[tuple] = []
+        # Inflated and lower-cased blobs; the text under a hash never changes.
+        self._texts: dict[str, str] = {}
+        self._folded: dict[str, str] = {}
+
+    @contextmanager
+    def session(self, existing: _DictSession | None = None):
+        if existing is not None and existing.active:
+            yield existing
+            return
+        if self._session is not None:
+            yield self._session
+            return
+        self._session = unit = _DictSession()
+        try:
+            yield unit
+        except BaseException:
+            self._rollback()
+            raise
+        finally:
+            unit.active = False
+            self._session = None
+            self._journal.clear()
+
+    def close(self) -> None:
+        """Nothing to release."""
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}()"
+
+    # ---- Journaled writes ----
+
+    def _rollback(self) -> None:
+        for container, key, old in reversed(self._journal):
+            if old is _APPENDED:
+                container.pop()
+            elif old is _INSERTED:
+                del container[bisect.bisect_left(container, key)]
+            elif old is _REMOVED:
+                bisect.insort(container, key)
+            elif old is _UNSET:
+                container.pop(key, None)
+            else:
+                container[key] = old
+
+    def _set(self, container: dict, key, value) -> None:
+        self._journal.append((container, key, container.get(key, _UNSET)))
+        container[key] = value
+
+    def _unset(self, container: dict, key) -> None:
+        if key in container:
+            self._journal.append((container, key, container.pop(key)))
+
+    def _append(self, index: dict, key, item) -> None:
+        items = index.get(key)
+        if items is None:
+            self._set(index, key, [item])
+        else:
+            items.append(item)
+            self._journal.append((items, None, _APPENDED))
+
+    def _next_id(self, table: str) -> int:
+        row_id = self._sequences[table] + 1
+        self._set(self._sequences, table, row_id)
+        return row_id
+
+    def _log(self, table: str, row_id: int) -> None:
+        self._set(self._change_log, (table, row_id), self._next_id("change_log"))
+
+    def _add(self, table: str, container: dict, key, row: dict) -> None:
+        self._set(container, key, row)
+        self._log(table, row["id"])
+
+    def _update(self, table: str, row: dict, values: Mapping[str, object]) -> None:
+        """Set ``values`` on a stored row; logs it when a synced column really changed."""
+        changed = False
+        for column, value in values.items():
+            if row[column] != value:
+                self._set(row, column, value)
+                changed = changed or column in _CHANGE_LOG_COLUMNS[table]
+        if changed:
+            self._log(table, row["id"])
+
+    def _drop(self, table: str, container: dict, key) -> dict:
+        row = container[key]
+        self._unset(container, key)
+        self._unset(self._change_log, (table, row["id"]))
+        return row
+
+    # ---- Rows and rollups ----
+
+    def _store(self, packed: tuple[str, str, int, int, bytes] | None) -> str | None:
+        if packed is None:
+            return None
+        if packed[0] not in self._blobs:
+            self._set(self._blobs, packed[0], packed[1:])
+        return packed[0]
+
+    def _text(self, blob_hash: str | None) -> str | None:
+        text = self._texts.get(blob_hash)
+        if text is None:
+            blob = self._blobs.get(blob_hash) if blob_hash else None
+            if blob is None:
+                return None
+            text = self._texts[blob_hash] = _inflate(blob[0], blob[3])
+        return text
+
+    def _folded_text(self, blob_hash: str | None) -> str:
+        folded = self._folded.get(blob_hash)
+        if folded is None:
+            folded = (self._text(blob_hash) or "").lower()
+            if blob_hash:
+                self._folded[blob_hash] = folded
+        return folded
+
+    def _prune_blobs(self) -> None:
+        used = {
+            blob_hash
+            for source in self._sources.values()
+            for blob_hash in (source["content_hash"], source["segments_hash"])
+        }
+        for blob_hash in [blob_hash for blob_hash in self._blobs if blob_hash not in used]:
+            self._unset(self._blobs, blob_hash)
+            self._texts.pop(blob_hash, None)
+            self._folded.pop(blob_hash, None)
+
+    def _insert_source(
+        self,
+        url: str,
+        title: str,
+        source_type: str,
+        content: tuple[str, str, int, int, bytes] | None,
+        segments: tuple[str, str, int, int, bytes] | None,
+        created_at: int,
+    ) -> int:
+        if url in self._source_urls:
+            raise ValueError(f"A source with URL {url!r} already exists.")
+        row = {
+            "id": self._next_id("sources"),
+            "url": url,
+            "title": title,
+            "source_type": source_type,
+            "content_hash": self._store(content),
+            "segments_hash": self._store(segments),
+            "created_at": created_at,
+        }
+        self._add("sources", self._sources, row["id"], row)
+        self._set(self._source_urls, url, row["id"])
+        return row["id"]
+
+    def _insert_concept(
+        self,
+        source_id: int,
+        name: str,
+        source_quote: str,
+        ground_truth: str | None,
+        question: str | None,
+        created_at: int,
+        skipped: int = 0,
+    ) -> int:
+        if source_id not in self._sources:
+            raise ValueError(f"Unknown source id {source_id}.")
+        row = {
+            "id": self._next_id("concepts"),
+            "source_id": source_id,
+            "name": name,
+            "source_quote": source_quote,
+            "ground_truth": ground_truth,
+            "question": question,
+            "skipped": skipped,
+            "created_at": created_at,
+        }
+        self._add("concepts", self._concepts, row["id"], row)
+        self._append(self._source_concepts, source_id, row["id"])
+        return row["id"]
+
+    def _is_active(self, concept_id: int) -> bool:
+        concept = self._concepts.get(concept_id)
+        return concept is not None and not concept["skipped"]
+
+    def _require_concept(self, concept_id: int) -> None:
+        if concept_id not in self._concepts:
+            raise ValueError(f"Unknown concept id {concept_id}.")
+
+    def _tally_due(self, progress: dict, sign: int) -> None:
+        """due_daily and due-order bookkeeping for the progress row of an active concept."""
+        day = progress["due_date"] // _DAY_MS
+        due, new = self._due_daily.get(day, (0, 0))
+        self._set(
+            self._due_daily, day, (due + sign, new + sign * (progress["last_score"] is None))
+        )
+        entry = (progress["due_date"], progress["concept_id"])
+        if sign > 0:
+            bisect.insort(self._due_index, entry)
+            self._journal.append((self._due_index, entry, _INSERTED))
+        else:
+            del self._due_index[bisect.bisect_left(self._due_index, entry)]
+            self._journal.append((self._due_index, entry, _REMOVED))
+
+    def _update_concept(self, concept: dict, values: Mapping[str, object]) -> None:
+        progress = self._progress.get(concept["id"])
+        toggled = (
+            progress is not None
+            and "skipped" in values
+            and bool(values["skipped"]) != bool(concept["skipped"])
+        )
+        if toggled and not concept["skipped"]:
+            self._tally_due(progress, -1)
+        self._update("concepts", concept, values)
+        if toggled and not concept["skipped"]:
+            self._tally_due(progress, 1)
+
+    def _delete_concept(self, concept_id: int) -> None:
+        """Delete a concept and what the foreign keys cascade to."""
+        concept = self._concepts[concept_id]
+        progress = self._progress.get(concept_id)
+        if progress is not None:
+            if not concept["skipped"]:
+                self._tally_due(progress, -1)
+            self._drop("progress", self._progress, concept_id)
+        for event_id in self._concept_reviews.get(concept_id, ()):
+            self._tally_daily(self._drop("review_events", self._reviews, event_id), -1)
+            self._unset(self._review_text, event_id)
+        self._unset(self._concept_reviews, concept_id)
+        self._unset(self._review_concepts, concept_id)
+        if concept_id in self._duel_memory:
+            self._drop("duel_memory", self._duel_memory, concept_id)
+        for claim in self._claims.get(concept_id, ()):
+            self._unset(self._change_log, ("cached_claims", claim["id"]))
+        self._unset(self._claims, concept_id)
+        self._drop("concepts", self._concepts, concept_id)
+        siblings = self._source_concepts[concept["source_id"]]
+        self._set(
+            self._source_concepts,
+            concept["source_id"],
+            [sibling for sibling in siblings if sibling != concept_id],
+        )
+
+    def _insert_progress(self, concept_id: int, due_date: int, created_at: int, **values) -> None:
+        row = {
+            "id": self._next_id("progress"),
+            "concept_id": concept_id,
+            "ease_factor": 2.5,
+            "interval_days": 1.0,
+            "due_date": due_date,
+            "review_count": 0,
+            "last_score": None,
+            "created_at": created_at,
+            "stability": None,
+            "difficulty": None,
+            **values,
+        }
+        self._add("progress", self._progress, concept_id, row)
+        if self._is_active(concept_id):
+            self._tally_due(row, 1)
+
+    def _update_progress(self, progress: dict, values: Mapping[str, object]) -> None:
+        active = self._is_active(progress["concept_id"])
+        if active:
+            self._tally_due(progress, -1)
+        self._update("progress", progress, values)
+        if active:
+            self._tally_due(progress, 1)
+
+    def _intake_due_dates(self, now: int, count: int) -> list[int]:
+        """_intake_due_dates() over the due histogram dict."""
+        cap = config.NEW_CONCEPTS_PER_DAY
+        if cap <= 0:
+            return [now] * count
+        today = now // _DAY_MS
+        taken = {day: new for day, (_, new) in self._due_daily.items() if day > today and new > 0}
+        taken[today] = sum(new for day, (_, new) in self._due_daily.items() if day <= today)
+        dates: list[int] = []
+        day = today
+        while len(dates) < count:
+            free = min(cap - taken.get(day, 0), count - len(dates))
+            dates.extend([now if day == today else day * _DAY_MS] * max(free, 0))
+            day += 1
+        return dates
+
+    def _tally_daily(self, event: dict, sign: int) -> None:
+        day = event["created_at"] // _DAY_MS
+        score = event["score"]
+        reviews, scored, score_sum, successful = self._review_daily.get(day, (0, 0, 0, 0))
+        self._set(
+            self._review_daily,
+            day,
+            (
+                reviews + sign,
+                scored + sign * (score is not None),
+                score_sum + sign * (score or 0),
+                successful + sign * (score is not None and score >= 4),
+            ),
+        )
+
+    def _insert_review(self, concept_id: int, row: Mapping[str, object]) -> int:
+        """Append one review event; ``row`` is export-shaped with an epoch created_at."""
+        self._require_concept(concept_id)
+        event = {
+            "id": self._next_id("review_events"),
+            "concept_id": concept_id,
+            "score": row.get("score"),
+            "turns": row.get("turns"),
+            "error_codes": row.get("error_codes") or None,
+            "text_hash": _review_text_hash(row),
+            "created_at": row["created_at"],
+        }
+        self._add("review_events", self._reviews, event["id"], event)
+        text = {field: row.get(field) or None for field in _REVIEW_TEXT_FIELDS}
+        if any(text.values()):
+            self._set(self._review_text, event["id"], text)
+        self._append(self._concept_reviews, concept_id, event["id"])
+        self._tally_daily(event, 1)
+
+        score, created_at = event["score"], event["created_at"]
+        reviews, scored, score_sum, successful, last_at, last_score = self._review_concepts.get(
+            concept_id, (0, 0, 0, 0, None, None)
+        )
+        if last_at is None or created_at >= last_at:
+            last_at, last_score = created_at, score
+        self._set(
+            self._review_concepts,
+            concept_id,
+            (
+                reviews + 1,
+                scored + (score is not None),
+                score_sum + (score or 0),
+                successful + (score is not None and score >= 4),
+                last_at,
+                last_score,
+            ),
+        )
+        return event["id"]
+
+    def _save_duel_memory(
+        self, concept_id: int, belief: object, errors: object, attack: object, updated_at: int
+    ) -> None:
+        values = {
+            "last_belief": belief,
+            "last_errors": errors,
+            "last_attack": attack,
+            "updated_at": updated_at,
+        }
+        existing = self._duel_memory.get(concept_id)
+        if existing is not None:
+            self._update("duel_memory", existing, values)
+            return
+        self._require_concept(concept_id)
+        row = {"id": self._next_id("duel_memory"), "concept_id": concept_id, **values}
+        self._add("duel_memory", self._duel_memory, concept_id, row)
+
+    @staticmethod
+    def _new_claim(
+        concept_id: int, statement: str, claim_type: str, claim_index: int, created_at: int
+    ) -> dict:
+        return {
+            "id": None,  # Assigned by _write_claims()
+            "concept_id": concept_id,
+            "statement": statement,
+            "claim_type": claim_type,
+            "claim_index": claim_index,
+            "created_at": created_at,
+        }
+
+    def _claim_rows(self, concept_id: int) -> list[dict]:
+        """Working copies of a concept's claim rows, for the edit helpers."""
+        return [dict(row) for row in self._claims.get(concept_id, ())]
+
+    def _write_claims(self, concept_id: int, rows: list[dict]) -> None:
+        """Store ``rows`` as the concept's claim set; rows with no id are inserted."""
+        previous = {row["id"]: row for row in self._claims.get(concept_id, ())}
+        for row in rows:
+            if row["id"] is None:
+                self._require_concept(concept_id)
+                row["id"] = self._next_id("cached_claims")
+                self._log("cached_claims", row["id"])
+            elif previous.pop(row["id"]) != row:
+                self._log("cached_claims", row["id"])
+        for claim_id in previous:
+            self._unset(self._change_log, ("cached_claims", claim_id))
+        if rows:
+            self._set(
+                self._claims,
+                concept_id,
+                sorted(rows, key=lambda row: (row["claim_index"], row["id"])),
+            )
+        else:
+            self._unset(self._claims, concept_id)
+
+    def _source_row(self, source: dict) -> dict:
+        return {**source, "created_at": _iso(source["created_at"])}
+
+    def _concept_row(self, concept: dict, *, with_source: bool = False) -> dict:
+        row = {**concept, "created_at": _iso(concept["created_at"])}
+        if with_source:
+            source = self._sources[concept["source_id"]]
+            row.update(source_title=source["title"], source_url=source["url"])
+        return row
+
+    @staticmethod
+    def _progress_row(progress: dict) -> dict:
+        return {
+            "id": progress["id"],
+            "concept_id": progress["concept_id"],
+            "ease_factor": progress["ease_factor"],
+            "interval_days": progress["interval_days"],
+            "due_date": _iso(progress["due_date"]),
+            "review_count": progress["review_count"],
+            "last_score": progress["last_score"],
+            "created_at": _iso(progress["created_at"]),
+        }
+
+    def _review_row(self, event: dict) -> dict:
+        text = self._review_text.get(event["id"], _NO_REVIEW_TEXT)
+        return {
+            **event,
+            "created_at": _iso(event["created_at"]),
+            **text,
+            "text": text["text"] or "",
+        }
+
+    def _listing(self, concept: dict) -> ConceptListing:
+        progress = self._progress.get(concept["id"])
+        return ConceptListing(
+            concept["id"],
+            concept["name"],
+            concept["source_id"],
+            self._sources[concept["source_id"]]["title"],
+            (progress and progress["review_count"]) or 0,
+            progress and progress["last_score"],
+        )
+
+    def _summary(self, source: dict) -> SourceSummary:
+        return SourceSummary(
+            source["id"],
+            source["title"],
+            source["url"],
+            len(self._source_concepts.get(source["id"], ())),
+        )
+
+    def _active_progress(self) -> Iterator[dict]:
+        concepts = self._concepts
+        return (
+            progress
+            for concept_id, progress in self._progress.items()
+            if not concepts[concept_id]["skipped"]
+        )
+
+    def _due_count(self, now: int) -> int:
+        """How many active concepts are due by ``now``: a prefix of the due index."""
+        return bisect.bisect_left(self._due_index, (now + 1,))
+
+    def _due(self, now: int, limit: int = -1) -> list[dict]:
+        """Progress rows of active concepts due by ``now``, soonest first."""
+        stop = self._due_count(now)
+        if limit >= 0:
+            stop = min(stop, limit)
+        return [self._progress[concept_id] for _, concept_id in self._due_index[:stop]]
+
+    def _due_row(self, progress: dict) -> dict:
+        concept = self._concepts[progress["concept_id"]]
+        row = self._concept_row(concept)
+        row.update(
+            ease_factor=progress["ease_factor"],
+            interval_days=progress["interval_days"],
+            due_date=_iso(progress["due_date"]),
+            review_count=progress["review_count"],
+            last_score=progress["last_score"],
+        )
+        source = self._sources[concept["source_id"]]
+        row.update(source_title=source["title"], source_url=source["url"])
+        return row
+
+    # ---- Sources ----
+
+    @_atomic
+    def add_source(
+        self, url: str, title: str, source_type: str, raw_content: str, segments: str | None = None
+    ) -> int:
+        return self._insert_source(
+            url, title, source_type, _pack_content(raw_content), _pack_content(segments), _now_ms()
+        )
+
+    @_atomic
+    def add_source_with_concepts(
+        self,
+        *,
+        url: str,
+        title: str,
+        source_type: str,
+        raw_content: str,
+        concepts: list[dict],
+        segments: str | None = None,
+    ) -> int:
+        now = _now_ms()
+        source_id = self._insert_source(
+            url, title, source_type, _pack_content(raw_content), _pack_content(segments), now
+        )
+        for concept, due in zip(concepts, self._intake_due_dates(now, len(concepts))):
+            concept_id = self._insert_concept(
+                source_id,
+                concept["name"],
+                concept["source_quote"],
+                concept.get("ground_truth", concept["source_quote"]),
+                concept.get("question"),
+                now,
+            )
+            self._insert_progress(concept_id, due, now)
+        return source_id
+
+    def get_source_by_url(self, url: str) -> Optional[dict]:
+        source_id = self._source_urls.get(url)
+        return None if source_id is None else self._source_row(self._sources[source_id])
+
+    def get_all_sources(self) -> list[dict]:
+        return [self._source_row(source) for source in _newest_first(self._sources.values())]
+
+    def get_source(self, source_id: int) -> Optional[dict]:
+        source = self._sources.get(source_id)
+        return None if source is None else self._source_row(source)
+
+    def get_source_content(self, source_id: int) -> Optional[str]:
+        source = self._sources.get(source_id)
+        return None if source is None else self._text(source["content_hash"])
+
+    def get_source_segments(self, source_id: int) -> Optional[str]:
+        source = self._sources.get(source_id)
+        return None if source is None else self._text(source["segments_hash"])
+
+    def get_content_stats(self, sample: int = 20) -> dict:
+        blobs = self._blobs
+        referenced_bytes = sum(
+            blobs[blob_hash][2]
+            for source in self._sources.values()
+            for blob_hash in {source["content_hash"], source["segments_hash"]} - {None}
+        )
+        timings = []
+        for codec, _, _, data in sorted(blobs.values(), key=lambda blob: -blob[2])[:sample]:
+            started = time.perf_counter()
+            _inflate(codec, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        return {
+            "sources": len(self._sources),
+            "blobs": len(blobs),
+            "referenced_bytes": referenced_bytes,
+            "unique_bytes": sum(blob[2] for blob in blobs.values()),
+            "stored_bytes": sum(len(blob[3]) for blob in blobs.values()),
+            "sampled": len(timings),
+            "avg_load_ms": round(sum(timings) / len(timings), 3) if timings else 0.0,
+            "max_load_ms": round(max(timings), 3) if timings else 0.0,
+        }
+
+    @_atomic
+    def delete_source(self, source_id: int) -> int:
+        concept_ids = list(self._source_concepts.get(source_id, ()))
+        for concept_id in concept_ids:
+            self._delete_concept(concept_id)
+        if source_id in self._sources:
+            source = self._drop("sources", self._sources, source_id)
+            self._unset(self._source_urls, source["url"])
+            self._unset(self._source_concepts, source_id)
+            self._prune_blobs()
+        return len(concept_ids)
+
+    # ---- Concepts ----
+
+    @_atomic
+    def add_concept(
+        self,
+        source_id: int,
+        name: str,
+        source_quote: str,
+        question: str | None = None,
+        ground_truth: str | None = None,
+    ) -> int:
+        now = _now_ms()
+        (due,) = self._intake_due_dates(now, 1)
+        concept_id = self._insert_concept(
+            source_id, name, source_quote, ground_truth or source_quote, question, now
+        )
+        self._insert_progress(concept_id, due, now)
+        return concept_id
+
+    def get_concept(self, concept_id: int) -> Optional[dict]:
+        concept = self._concepts.get(concept_id)
+        return None if concept is None else self._concept_row(concept, with_source=True)
+
+    def get_concepts_for_source(self, source_id: int) -> list[dict]:
+        return [
+            self._concept_row(self._concepts[concept_id])
+            for concept_id in sorted(self._source_concepts.get(source_id, ()))
+        ]
+
+    def get_all_concepts(self) -> list[dict]:
+        active = (concept for concept in self._concepts.values() if not concept["skipped"])
+        return [self._concept_row(concept, with_source=True) for concept in _newest_first(active)]
+
+    @_atomic
+    def skip_concept(self, concept_id: int) -> None:
+        if concept_id in self._concepts:
+            self._update_concept(self._concepts[concept_id], {"skipped": 1})
+
+    @_atomic
+    def unskip_concept(self, concept_id: int) -> None:
+        if concept_id in self._concepts:
+            self._update_concept(self._concepts[concept_id], {"skipped": 0})
+
+    def get_skipped_concepts(self) -> list[dict]:
+        rows = []
+        for concept_id in sorted(self._concepts):
+            concept = self._concepts[concept_id]
+            if concept["skipped"]:
+                row = self._concept_row(concept, with_source=True)
+                del row["source_url"]
+                rows.append(row)
+        return rows
+
+    # ---- Listings ----
+
+    def list_source_summaries(self) -> list[SourceSummary]:
+        return [self._summary(source) for source in _newest_first(self._sources.values())]
+
+    def count_concepts_for_source(self, source_id: int) -> int:
+        return len(self._source_concepts.get(source_id, ()))
+
+    def iter_concepts_with_progress(
+        self, *, skipped: bool = False, chunk_rows: int = LISTING_CHUNK_ROWS
+    ) -> Iterator[ConceptListing]:
+        """As the SQLite version; ``chunk_rows`` has no effect here."""
+        sources = self._sources
+
+        def order(concept: dict) -> tuple:
+            source = sources[concept["source_id"]]
+            return (-source["created_at"], -source["id"], -concept["created_at"], concept["id"])
+
+        matching = [
+            concept for concept in self._concepts.values() if bool(concept["skipped"]) == skipped
+        ]
+        for concept in sorted(matching, key=order):
+            yield self._listing(concept)
+
+    def list_concepts(self, *, skipped: bool = False) -> list[ConceptListing]:
+        return list(self.iter_concepts_with_progress(skipped=skipped))
+
+    def list_due_concepts(self, limit: int = 100) -> list[DueConcept]:
+        records = []
+        for progress in self._due(_now_ms(), max(limit, 0)):
+            concept = self._concepts[progress["concept_id"]]
+            records.append(
+                DueConcept(
+                    concept["id"],
+                    concept["name"],
+                    self._sources[concept["source_id"]]["title"],
+                    _iso(progress["due_date"]),
+                )
+            )
+        return records
+
+    def count_due_concepts(self) -> int:
+        return self._due_count(_now_ms())
+
+    # ---- Search ----
+
+    def _search_entries(self) -> Iterator[tuple[int, str, int, str, str, str, str]]:
+        """(rowid, kind, id, title, name, body, lower-cased body) per search_index row."""
+        for concept_id, concept in self._concepts.items():
+            name = concept["name"]
+            body = f"{concept['question'] or ''} {concept['ground_truth'] or ''}"
+            yield concept_id * 4, "concept", concept_id, name, name, body, body.lower()
+        for concept_id, claims in self._claims.items():
+            name = self._concepts[concept_id]["name"]
+            for claim in claims:
+                body = claim["statement"]
+                yield claim["id"] * 4 + 1, "claim", concept_id, name, "", body, body.lower()
+        for source_id, source in self._sources.items():
+            title, content_hash = source["title"], source["content_hash"]
+            body, folded = self._text(content_hash) or "", self._folded_text(content_hash)
+            yield source_id * 4 + 2, "source", source_id, title, title, body, folded
+
+    def search(
+        self, query: str, limit: int = 20, *, mark: tuple[str, str] = ("[", "]")
+    ) -> list[SearchHit]:
+        """As the SQLite version, with every term matched as a case-insensitive substring.
+
+        Hits rank by term occurrences, a name hit counting four times a body
+        hit (the bm25 column weights).
+        """
+        terms = [term.lower() for term in query.split() if len(term) >= _SEARCH_MIN_TERM]
+        if terms:
+            ranked = []
+            for rowid, kind, row_id, title, name, body, folded in self._search_entries():
+                folded_name = name.lower()
+                if not all(term in folded_name or term in folded for term in terms):
+                    continue
+                weight = sum(4 * folded_name.count(term) + folded.count(term) for term in terms)
+                ranked.append((-weight, rowid, kind, row_id, title, name, body))
+            ranked.sort(key=lambda hit: hit[:2])
+            any_term = re.compile(
+                "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)),
+                re.IGNORECASE,
+            )
+            hits = []
+            for _, _, kind, row_id, title, name, body in ranked[:limit]:
+                text = body if any_term.search(body) else name
+                hits.append(SearchHit(kind, row_id, title, _snippet(text, any_term, mark)))
+            return hits
+
+        text = query.strip().lower()
+        if not text:
+            return []
+        hits = [
+            SearchHit("concept", concept_id, concept["name"], concept["name"])
+            for concept_id, concept in sorted(self._concepts.items())
+            if text in concept["name"].lower()
+        ]
+        hits += [
+            SearchHit("source", source_id, source["title"], source["title"])
+            for source_id, source in sorted(self._sources.items())
+            if text in source["title"].lower()
+        ]
+        return hits[:limit]
+
+    def resolve_concepts(self, query: str, *, skipped: bool | None = None) -> list[ConceptListing]:
+        query = query.strip()
+        if not query:
+            return []
+
+        def wanted(concept: dict | None) -> bool:
+            return concept is not None and (skipped is None or bool(concept["skipped"]) == skipped)
+
+        if query.isdigit() and wanted(self._concepts.get(int(query))):
+            return [self._listing(self._concepts[int(query)])]
+        needle = query.lower()
+        matches = [
+            self._listing(self._concepts[concept_id])
+            for concept_id in sorted(self._concepts)
+            if wanted(self._concepts[concept_id])
+            and needle in self._concepts[concept_id]["name"].lower()
+        ]
+        return _prefer_exact(matches, "name", query)
+
+    def resolve_sources(self, query: str) -> list[SourceSummary]:
+        query = query.strip()
+        if not query:
+            return []
+        if query.isdigit() and int(query) in self._sources:
+            return [self._summary(self._sources[int(query)])]
+        needle = query.lower()
+        matches = [
+            self._summary(source)
+            for source in _newest_first(self._sources.values())
+            if needle in source["title"].lower()
+        ]
+        return _prefer_exact(matches, "title", query)
+
+    # ---- Bulk administration ----
+
+    def _matching(self, where: ConceptFilter) -> list[dict]:
+        """Concepts ``where`` selects, in id order (_concept_filter_sql() in Python)."""
+        name = where.name.lower() if where.name else None
+        cutoff = (
+            None
+            if where.older_than_days is None
+            else _now_ms() - int(where.older_than_days * _DAY_MS)
+        )
+        selected = []
+        for concept_id in sorted(self._concepts):
+            concept = self._concepts[concept_id]
+            if where.source_id is not None and concept["source_id"] != where.source_id:
+                continue
+            if name and name not in concept["name"].lower():
+                continue
+            if where.max_score is not None or where.max_ease is not None:
+                progress = self._progress.get(concept_id)
+                if progress is None:
+                    continue
+                if where.max_score is not None and (
+                    progress["last_score"] is None or progress["last_score"] > where.max_score
+                ):
+                    continue
+                if where.max_ease is not None and progress["ease_factor"] > where.max_ease:
+                    continue
+            if cutoff is not None and concept["created_at"] >= cutoff:
+                continue
+            if where.skipped is not None and bool(concept["skipped"]) != where.skipped:
+                continue
+            selected.append(concept)
+        return selected
+
+    def count_concepts_matching(self, where: ConceptFilter) -> int:
+        return len(self._matching(where))
+
+    def list_concepts_matching(self, where: ConceptFilter, limit: int = 20) -> list[ConceptListing]:
+        return [self._listing(concept) for concept in self._matching(where)[: max(limit, 0)]]
+
+    @_atomic
+    def skip_concepts_matching(self, where: ConceptFilter) -> int:
+        _require_criteria(where)
+        selected = self._matching(where._replace(skipped=False))
+        for concept in selected:
+            self._update_concept(concept, {"skipped": 1})
+        return len(selected)
+
+    @_atomic
+    def unskip_concepts_matching(self, where: ConceptFilter) -> int:
+        _require_criteria(where)
+        selected = self._matching(where._replace(skipped=True))
+        for concept in selected:
+            self._update_concept(concept, {"skipped": 0})
+        return len(selected)
+
+    @_atomic
+    def delete_concepts_matching(self, where: ConceptFilter) -> int:
+        _require_criteria(where)
+        selected = self._matching(where)
+        for concept in selected:
+            self._delete_concept(concept["id"])
+        return len(selected)
+
+    # ---- Progress ----
+
+    def get_due_concepts(self, limit: int | None = None) -> list[dict]:
+        if limit is None:
+            limit = 100
+        return [self._due_row(progress) for progress in self._due(_now_ms(), limit)]
+
+    def get_progress(self, concept_id: int) -> Optional[dict]:
+        progress = self._progress.get(concept_id)
+        if progress is None:
+            return None
+        return {
+            **self._progress_row(progress),
+            "stability": progress["stability"],
+            "difficulty": progress["difficulty"],
+        }
+
+    @_atomic
+    def update_progress(
+        self,
+        concept_id: int,
+        ease_factor: float,
+        interval_days: float,
+        due_date: datetime,
+        review_count: int,
+        last_score: int,
+        *,
+        stability: float | None = None,
+        difficulty: float | None = None,
+    ) -> None:
+        progress = self._progress.get(concept_id)
+        if progress is not None:
+            self._update_progress(
+                progress,
+                {
+                    "ease_factor": ease_factor,
+                    "interval_days": interval_days,
+                    "due_date": _epoch_ms(due_date),
+                    "review_count": review_count,
+                    "last_score": last_score,
+                    "stability": stability,
+                    "difficulty": difficulty,
+                },
+            )
+
+    def get_schedule_inputs(self) -> tuple[list[tuple], list[tuple]]:
+        progress = [
+            (
+                row["concept_id"], row["ease_factor"], row["interval_days"], row["due_date"],
+                row["review_count"], row["last_score"], row["stability"], row["difficulty"],
+            )
+            for _, row in sorted(self._progress.items())
+        ]
+        reviews = sorted(
+            (event["concept_id"], event["created_at"], event["id"], event["score"])
+            for event in self._reviews.values()
+            if event["score"] is not None
+        )
+        return progress, [(concept_id, at, score) for concept_id, at, _, score in reviews]
+
+    def get_forecast_inputs(self, until: datetime) -> tuple[list[tuple], list[tuple]]:
+        cutoff = _epoch_ms(until)
+        rollups = self._review_concepts
+        progress = [
+            (
+                row["concept_id"], row["due_date"], row["ease_factor"], row["interval_days"],
+                row["review_count"], row["stability"], row["difficulty"],
+                rollups[row["concept_id"]][1] if row["concept_id"] in rollups else 0,
+            )
+            for row in self._active_progress()
+            if row["due_date"] < cutoff
+        ]
+        failures: dict[int, int] = {}
+        for event in self._reviews.values():
+            if event["score"] is not None and event["score"] < config.SCORE_PASS_THRESHOLD:
+                failures[event["concept_id"]] = failures.get(event["concept_id"], 0) + 1
+        return progress, sorted(failures.items())
+
+    def get_due_histogram(self, first_day: int, days: int) -> list[int]:
+        return [self._due_daily.get(day, (0, 0))[0] for day in range(first_day, first_day + days)]
+
+    def get_study_queue(self) -> tuple[int, list[dict], dict[int, dict], Optional[datetime]]:
+        """As the SQLite version; the data version is always 0."""
+        now = _now_ms()
+        due = [self._due_row(progress) for progress in self._due(now)]
+        sources = {row["source_id"]: self.get_source(row["source_id"]) for row in due}
+        later = self._due_index[len(due) :]
+        next_due = _EPOCH + later[0][0] * _MILLISECOND if later else None
+        return 0, due, sources, next_due
+
+    def get_data_version(self) -> int:
+        """Always 0: nothing else can write to this backend."""
+        return 0
+
+    @_atomic
+    def reschedule_progress(self, rows: Iterable[tuple]) -> int:
+        updated = 0
+        for *values, concept_id in rows:
+            progress = self._progress.get(concept_id)
+            if progress is None:
+                continue
+            self._update_progress(
+                progress,
+                dict(
+                    zip(
+                        (
+                            "ease_factor", "interval_days", "due_date", "review_count",
+                            "last_score", "stability", "difficulty",
+                        ),
+                        values,
+                    )
+                ),
+            )
+            updated += 1
+        return updated
+
+    # ---- Review log ----
+
+    @_atomic
+    def add_explanation(
+        self,
+        concept_id: int,
+        text: str,
+        score: int | None = None,
+        covered: str | None = None,
+        missed: str | None = None,
+        feedback: str | None = None,
+        *,
+        turns: int | None = None,
+        error_codes: str | None = None,
+    ) -> int:
+        return self._insert_review(
+            concept_id,
+            {
+                "text": text,
+                "score": score,
+                "covered": covered,
+                "missed": missed,
+                "feedback": feedback,
+                "turns": turns,
+                "error_codes": error_codes,
+                "created_at": _now_ms(),
+            },
+        )
+
+    def get_explanations(self, concept_id: int) -> list[dict]:
+        events = [self._reviews[i] for i in self._concept_reviews.get(concept_id, ())]
+        events.sort(key=lambda event: (event["created_at"], event["id"]), reverse=True)
+        return [self._review_row(event) for event in events]
+
+    def get_review_rollup(self, concept_id: int) -> Optional[dict]:
+        rollup = self._review_concepts.get(concept_id)
+        if rollup is None or rollup[0] <= 0:
+            return None
+        reviews, scored, score_sum, successful, last_review_at, last_score = rollup
+        return {
+            "concept_id": concept_id,
+            "reviews": reviews,
+            "successful_reviews": successful,
+            "last_review_at": _iso(last_review_at),
+            "last_score": last_score,
+            "avg_score": round(score_sum / scored, 1) if scored else None,
+        }
+
+    def get_daily_reviews(self, days: int = 30) -> list[dict]:
+        first_day = _now_ms() // _DAY_MS - days + 1
+        return [
+            {
+                "day": (_EPOCH + timedelta(days=day)).date().isoformat(),
+                "reviews": reviews,
+                "successful_reviews": successful,
+                # SQLite's ROUND() takes halves up, where round() takes them to even.
+                "avg_score": int(score_sum * 10 / scored + 0.5) / 10 if scored > 0 else None,
+            }
+            for day, (reviews, scored, score_sum, successful) in sorted(self._review_daily.items())
+            if day >= first_day and reviews > 0
+        ]
+
+    @_atomic
+    def archive_review_text(
+        self, older_than_days: int | None = None, *, db_path: Path | str | None = None
+    ) -> dict:
+        """As the SQLite version, archiving next to ``db_path``; without one it is a no-op."""
+        if older_than_days is None:
+            older_than_days = config.REVIEW_TEXT_RETENTION_DAYS
+        if older_than_days <= 0 or not isinstance(db_path, Path):
+            return {"archived": 0, "path": None}
+
+        cutoff = _now_ms() - older_than_days * _DAY_MS
+        events = [
+            self._reviews[event_id]
+            for event_id in sorted(self._review_text)
+            if self._reviews[event_id]["created_at"] < cutoff
+        ]
+        if not events:
+            return {"archived": 0, "path": None}
+        archive_dir = db_path.parent / "archive"
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        path = archive_dir / f"review-text-{events[0]['id']}-{events[-1]['id']}.ndjson.gz"
+        partial = path.with_name(path.name + ".partial")
+        with gzip.open(partial, "wt", encoding="utf-8") as fp:
+            for event in events:
+                fp.write(json.dumps(self._review_row(event)))
+                fp.write("\n")
+        for event in events:
+            self._unset(self._review_text, event["id"])
+        os.replace(partial, path)
+        try:
+            os.chmod(path, 0o600)
+        except OSError:
+            pass
+        return {"archived": len(events), "path": str(path)}
+
+    # ---- Stats ----
+
+    def get_stats(self) -> dict:
+        today = _now_ms() // _DAY_MS
+        reviews = scored = score_sum = successful = recent = 0
+        for day, (day_reviews, day_scored, day_sum, day_successful) in self._review_daily.items():
+            reviews += day_reviews
+            scored += day_scored
+            score_sum += day_sum
+            successful += day_successful
+            if day > today - 7:
+                recent += day_reviews
+        active = sum(not concept["skipped"] for concept in self._concepts.values())
+        avg_score = score_sum / scored if scored else None
+        return {
+            "total_sources": len(self._sources),
+            "total_concepts": active,
+            "skipped_concepts": len(self._concepts) - active,
+            "total_reviews": reviews,
+            "reviews_last_7_days": recent,
+            "successful_reviews": successful,
+            "due_now": self.count_due_concepts(),
+            "avg_score": round(avg_score, 1) if avg_score else 0,
+            "mastered": sum(
+                row["ease_factor"] >= config.MASTERY_MIN_EASE
+                and row["review_count"] >= config.MASTERY_MIN_REVIEWS
+                for row in self._progress.values()
             ),
-        )
-        return True
-    return False
+        }
 
+    def count_successful_reviews(self) -> int:
+        return sum(rollup[3] for rollup in self._review_daily.values())
 
-def _merge_duel_memory(
-    conn: sqlite3.Connection,
-    concept_id: int,
-    imported: Mapping[str, object] | None,
-    *,
-    prefer_import: bool = False,
-) -> bool:
-    if imported is None:
-        return False
+    # ---- Duel memory ----
 
-    existing = conn.execute(
-        "SELECT updated_at FROM duel_memory WHERE concept_id = ?",
-        (concept_id,),
-    ).fetchone()
-    imported_updated_at = imported.get("updated_at") or _utcnow().isoformat()
-    if (
-        existing
-        and not prefer_import
-        and _parse_timestamp(existing["updated_at"])
-        > _parse_timestamp(imported_updated_at)
-    ):
-        return False
+    @_atomic
+    def save_duel_memory(self, concept_id: int, belief: str, errors: str, attack: str) -> None:
+        self._save_duel_memory(concept_id, belief, errors, attack, _now_ms())
 
-    conn.execute(
-        """
-        INSERT INTO duel_memory (concept_id, last_belief, last_errors, last_attack, updated_at)
-        VALUES (?, ?, ?, ?, ?)
-        ON CONFLICT(concept_id) DO UPDATE SET
-            last_belief = excluded.last_belief,
-            last_errors = excluded.last_errors,
-            last_attack = excluded.last_attack,
-            updated_at = excluded.updated_at
-        """,
-        (
-            concept_id,
-            imported.get("last_belief"),
-            imported.get("last_errors"),
-            imported.get("last_attack"),
-            imported_updated_at,
-        ),
-    )
-    return True
+    def get_duel_memory(self, concept_id: int) -> Optional[dict]:
+        memory = self._duel_memory.get(concept_id)
+        if memory is None:
+            return None
+        return {
+            "last_belief": memory["last_belief"],
+            "last_errors": memory["last_errors"],
+            "last_attack": memory["last_attack"],
+        }
 
+    # ---- Cached claims ----
 
-def _replace_cached_claims(
-    conn: sqlite3.Connection,
-    concept_id: int,
-    claims: list[dict],
-) -> None:
-    conn.execute("DELETE FROM cached_claims WHERE concept_id = ?", (concept_id,))
-    for claim in sorted(claims, key=lambda row: row["claim_index"]):
-        conn.execute(
-            """
-            INSERT INTO cached_claims
-            (concept_id, statement, claim_type, claim_index, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (
-                concept_id,
-                claim["statement"],
-                claim["claim_type"],
-                claim["claim_index"],
-                claim.get("created_at", _utcnow().isoformat()),
-            ),
-        )
+    def get_cached_claims(self, concept_id: int) -> list[dict] | None:
+        claims = self._claims.get(concept_id)
+        if not claims:
+            return None
+        return [
+            {
+                "statement": claim["statement"],
+                "claim_type": claim["claim_type"],
+                "claim_index": claim["claim_index"],
+            }
+            for claim in claims
+        ]
 
+    @_atomic
+    def save_cached_claims(self, concept_id: int, claims: list[dict]) -> None:
+        now = _now_ms()
+        self._write_claims(
+            concept_id,
+            [
+                self._new_claim(
+                    concept_id, claim["statement"], claim["claim_type"], claim["claim_index"], now
+                )
+                for claim in claims
+            ],
+        )
 
-def _merge_cached_claims(
-    conn: sqlite3.Connection,
-    concept_id: int,
-    imported_claims: list[dict],
-    *,
-    prefer_import: bool = False,
-) -> bool:
-    if not imported_claims:
-        return False
+    @_atomic
+    def update_cached_claim(self, concept_id: int, claim_index: int, statement: str) -> bool:
+        rows = self._claim_rows(concept_id)
+        if not _replace_claim_rows(rows, claim_index, statement, _now_ms()):
+            return False
+        self._write_claims(concept_id, rows)
+        return True
 
-    existing = conn.execute(
-        """
-        SELECT statement, claim_type, claim_index, created_at
-        FROM cached_claims
-        WHERE concept_id = ?
-        ORDER BY claim_index
-        """,
-        (concept_id,),
-    ).fetchall()
-    existing_rows = [dict(row) for row in existing]
-    if not existing_rows:
-        _replace_cached_claims(conn, concept_id, imported_claims)
+    @_atomic
+    def delete_cached_claim(self, concept_id: int, claim_index: int) -> bool:
+        rows = self._claim_rows(concept_id)
+        if not _delete_claim_row(rows, claim_index, _now_ms()):
+            return False
+        self._write_claims(concept_id, rows)
         return True
 
-    imported_latest = max(
-        (_parse_timestamp(claim.get("created_at")) for claim in imported_claims),
-        default=datetime.min.replace(tzinfo=timezone.utc),
-    )
-    existing_latest = max(
-        (_parse_timestamp(claim.get("created_at")) for claim in existing_rows),
-        default=datetime.min.replace(tzinfo=timezone.utc),
-    )
+    @_atomic
+    def apply_claim_edits(self, concept_id: int, edits: Iterable[ClaimEdit]) -> list[dict]:
+        """As the SQLite version; the script runs on a copy, stored once every step passed."""
+        now = _now_ms()
+        rows = self._claim_rows(concept_id)
+        count = len(rows)
+
+        for step, edit in enumerate(edits, 1):
+            op, index = edit.op, edit.index
+            limit = count + 1 if op == "insert" else count
+            if not 0 <= index < limit:
+                raise ClaimEditError(f"Step {step}: claim index {index} out of range")
+            if op in ("replace", "insert") and not edit.statement:
+                raise ClaimEditError(f"Step {step}: {op} needs a statement")
+
+            if op == "replace":
+                _replace_claim_rows(rows, index, edit.statement, now)
+            elif op == "delete":
+                _delete_claim_row(rows, index, now)
+                count -= 1
+            elif op == "insert":
+                if not edit.claim_type:
+                    raise ClaimEditError(f"Step {step}: insert needs a claim_type")
+                _shift_claim_rows(rows, index, None, 1, now)
+                rows.append(
+                    self._new_claim(concept_id, edit.statement, edit.claim_type, index, now)
+                )
+                count += 1
+            elif op == "move":
+                target = edit.to_index
+                if target is None or not 0 <= target < count:
+                    raise ClaimEditError(f"Step {step}: move target {target} out of range")
+                if target == index:
+                    continue
+                moved = [row for row in rows if row["claim_index"] == index]
+                for row in moved:
+                    row["claim_index"] = -1
+                if target < index:
+                    _shift_claim_rows(rows, target, index, 1, now)
+                else:
+                    _shift_claim_rows(rows, index + 1, target + 1, -1, now)
+                for row in moved:
+                    row["claim_index"] = target
+                    row["created_at"] = now
+            else:
+                raise ClaimEditError(f"Step {step}: unknown claim edit {op!r}")
 
-    normalized_imported = [
-        (claim["statement"], claim["claim_type"], claim["claim_index"]) for claim in imported_claims
-    ]
-    normalized_existing = [
-        (claim["statement"], claim["claim_type"], claim["claim_index"]) for claim in existing_rows
-    ]
+        self._write_claims(concept_id, rows)
+        return self.get_cached_claims(concept_id) or []
 
-    if (
-        (prefer_import or imported_latest >= existing_latest)
-        and normalized_imported != normalized_existing
-    ):
-        _replace_cached_claims(conn, concept_id, imported_claims)
-        return True
+    # ---- Export / import ----
 
-    return False
+    def current_revision(self) -> int:
+        return self._sequences["change_log"]
 
+    def _export_header(self, since: int | None) -> dict:
+        header = {
+            "schema_version": EXPORT_SCHEMA_VERSION,
+            "version": __version__,
+            "exported_at": _utcnow().isoformat(),
+            "revision": self.current_revision(),
+        }
+        if since is not None:
+            header["since"] = since
+        return header
+
+    def _export_tables(self, since: int | None) -> dict[str, list[dict]]:
+        """Export rows by table, in id order; a delta with ``since`` (_fill_export_scope())."""
+        tables = {
+            "sources": self._sources,
+            "concepts": self._concepts,
+            "progress": {row["id"]: row for row in self._progress.values()},
+            "explanations": self._reviews,
+            "duel_memory": {row["id"]: row for row in self._duel_memory.values()},
+            "cached_claims": {row["id"]: row for rows in self._claims.values() for row in rows},
+        }
+        if since is None:
+            scope = {table: dict.fromkeys(rows, True) for table, rows in tables.items()}
+        else:
+            # Row id -> whether the row itself changed (parents are only there to place it).
+            scope = {table: {} for table in tables}
+            export_tables = {log: table for table, (_, _, log) in _EXPORT_SELECTS.items()}
+            for (log_table, row_id), revision in self._change_log.items():
+                if revision > since:
+                    scope[export_tables[log_table]][row_id] = True
+            claims = tables["cached_claims"]
+            for concept_id in {claims[row_id]["concept_id"] for row_id in scope["cached_claims"]}:
+                for claim in self._claims[concept_id]:
+                    scope["cached_claims"].setdefault(claim["id"], False)
+            for child in ("progress", "explanations", "duel_memory", "cached_claims"):
+                for row_id in scope[child]:
+                    scope["concepts"].setdefault(tables[child][row_id]["concept_id"], False)
+            for concept_id in scope["concepts"]:
+                scope["sources"].setdefault(tables["concepts"][concept_id]["source_id"], False)
+
+        def source_row(source: dict, changed: bool) -> dict:
+            return {
+                "id": source["id"],
+                "url": source["url"],
+                "title": source["title"],
+                "source_type": source["source_type"],
+                "raw_content": (self._text(source["content_hash"]) or "") if changed else "",
+                "segments": self._text(source["segments_hash"]) if changed else None,
+                "created_at": _iso(source["created_at"]),
+            }
 
-def _merge_explanations(
-    conn: sqlite3.Connection,
-    concept_id: int,
-    explanations: list[dict],
-) -> int:
-    existing_keys = {
-        (row["text"], row["created_at"])
-        for row in conn.execute(
-            "SELECT text, created_at FROM explanations WHERE concept_id = ?",
-            (concept_id,),
-        ).fetchall()
-    }
-    added = 0
-    for explanation in explanations:
-        key = (
-            explanation["text"],
-            explanation.get("created_at") or _utcnow().isoformat(),
+        builders = {
+            "sources": source_row,
+            "concepts": lambda row, _: self._concept_row(row),
+            "progress": lambda row, _: self._progress_row(row),
+            "explanations": lambda row, _: self._review_row(row),
+            "duel_memory": lambda row, _: {**row, "updated_at": _iso(row["updated_at"])},
+            "cached_claims": lambda row, _: {**row, "created_at": _iso(row["created_at"])},
+        }
+        return {
+            table: [
+                builders[table](tables[table][row_id], changed)
+                for row_id, changed in sorted(scope[table].items())
+            ]
+            for table in tables
+        }
+
+    def export_all_data(self, *, since: int | None = None) -> dict:
+        return {**self._export_header(since), **self._export_tables(since)}
+
+    def _merge_source(self, source: dict, imported: dict, now: int) -> None:
+        raw = self._text(source["content_hash"]) or ""
+        segments = self._text(source["segments_hash"])
+        content = _prefer_text(raw, imported["raw_content"]) or raw
+        merged_segments = _prefer_text(segments, imported.get("segments"))
+        self._update(
+            "sources",
+            source,
+            {
+                "title": _prefer_text(source["title"], imported["title"]) or source["title"],
+                "source_type": source["source_type"] or imported["source_type"],
+                "content_hash": (
+                    source["content_hash"]
+                    if content == raw
+                    else self._store(_pack_content(content))
+                ),
+                "segments_hash": (
+                    source["segments_hash"]
+                    if merged_segments == segments
+                    else self._store(_pack_content(merged_segments))
+                ),
+                "created_at": _earliest_timestamp(
+                    now, source["created_at"], imported.get("created_at")
+                ),
+            },
         )
-        if key in existing_keys:
-            continue
-        conn.execute(
-            """
-            INSERT INTO explanations
-            (concept_id, text, score, covered, missed, feedback, created_at)
-            VALUES (?, ?, ?, ?, ?, ?, ?)
-            """,
-            (
+
+    def _find_concept(self, source_id: int, name: str) -> dict | None:
+        key = name.lower()
+        for concept_id in self._source_concepts.get(source_id, ()):
+            concept = self._concepts[concept_id]
+            if concept["name"].lower() == key:
+                return concept
+        return None
+
+    def _merge_progress(
+        self,
+        concept_id: int,
+        imported: Mapping[str, object] | None,
+        imported_activity_at: int,
+        now: int,
+    ) -> bool:
+        """_merge_progress_row() over the dicts."""
+        existing = self._progress.get(concept_id)
+        if imported is None:
+            if existing is None:
+                self._insert_progress(concept_id, now, now)
+            return False
+
+        if existing is None:
+            self._insert_progress(
                 concept_id,
-                explanation["text"],
-                explanation.get("score"),
-                explanation.get("covered"),
-                explanation.get("missed"),
-                explanation.get("feedback"),
-                key[1],
-            ),
-        )
-        existing_keys.add(key)
-        added += 1
-    return added
+                _stamp(imported["due_date"], now),
+                _stamp(imported.get("created_at"), now),
+                ease_factor=imported.get("ease_factor", 2.5),
+                interval_days=imported.get("interval_days", 1.0),
+                review_count=imported.get("review_count", 0),
+                last_score=imported.get("last_score"),
+            )
+            return True
 
+        rollup = self._review_concepts.get(concept_id)
+        existing_activity_at = (rollup and rollup[4]) or existing["due_date"]
+        imported_rank = (
+            int(imported.get("review_count", 0) or 0),
+            imported_activity_at,
+            _ts_rank(imported["due_date"]),
+        )
+        existing_rank = (
+            int(existing["review_count"] or 0),
+            existing_activity_at,
+            existing["due_date"],
+        )
+        if imported_rank <= existing_rank:
+            return False
+        self._update_progress(
+            existing,
+            {
+                "ease_factor": imported.get("ease_factor", existing["ease_factor"]),
+                "interval_days": imported.get("interval_days", existing["interval_days"]),
+                "due_date": _stamp(imported["due_date"], existing["due_date"]),
+                "review_count": imported.get("review_count", existing["review_count"]),
+                "last_score": imported.get("last_score", existing["last_score"]),
+                "created_at": _stamp(imported.get("created_at"), existing["created_at"]),
+                "stability": None,
+                "difficulty": None,
+            },
+        )
+        return True
 
-def import_all_data(data: dict) -> dict:
-    """Import data from an export dict and merge it into the local database."""
-    payload = validate_import_data(data)
-    sources = payload["sources"]
-    concepts = payload["concepts"]
-    progress_rows = payload["progress"]
-    explanations = payload["explanations"]
-    duel_mem = payload["duel_memory"]
-    claims = payload["cached_claims"]
+    def _merge_explanations(self, concept_id: int, explanations: list[dict]) -> int:
+        existing_keys = {
+            (self._reviews[event_id]["text_hash"], self._reviews[event_id]["created_at"])
+            for event_id in self._concept_reviews.get(concept_id, ())
+        }
+        added = 0
+        for explanation in explanations:
+            row = {**explanation, "created_at": _stamp(explanation.get("created_at"), _now_ms())}
+            key = (_review_text_hash(row), row["created_at"])
+            if key in existing_keys:
+                continue
+            self._insert_review(concept_id, row)
+            existing_keys.add(key)
+            added += 1
+        return added
+
+    def _merge_duel_memory(
+        self, concept_id: int, imported: Mapping[str, object] | None, *, prefer_import: bool
+    ) -> bool:
+        if imported is None:
+            return False
+        existing = self._duel_memory.get(concept_id)
+        imported_updated_at = _stamp(imported.get("updated_at"), _now_ms())
+        if existing and not prefer_import and existing["updated_at"] > imported_updated_at:
+            return False
+        self._save_duel_memory(
+            concept_id,
+            imported.get("last_belief"),
+            imported.get("last_errors"),
+            imported.get("last_attack"),
+            imported_updated_at,
+        )
+        return True
 
-    concepts_by_source: dict[int, list[dict]] = {}
-    for concept in concepts:
-        concepts_by_source.setdefault(concept["source_id"], []).append(concept)
+    def _merge_cached_claims(
+        self, concept_id: int, imported_claims: list[dict], *, prefer_import: bool
+    ) -> bool:
+        if not imported_claims:
+            return False
+        existing = self._claims.get(concept_id)
+        if existing:
+            imported_latest = max(_ts_rank(claim.get("created_at")) for claim in imported_claims)
+            existing_latest = max(claim["created_at"] for claim in existing)
+
+            def normalized(claims: list[dict]) -> list[tuple]:
+                return [
+                    (claim["statement"], claim["claim_type"], claim["claim_index"])
+                    for claim in claims
+                ]
+
+            if not (prefer_import or imported_latest >= existing_latest) or (
+                normalized(imported_claims) == normalized(existing)
+            ):
+                return False
+
+        now = _now_ms()
+        self._write_claims(
+            concept_id,
+            [
+                self._new_claim(
+                    concept_id,
+                    claim["statement"],
+                    claim["claim_type"],
+                    claim["claim_index"],
+                    _stamp(claim.get("created_at"), now),
+                )
+                for claim in sorted(imported_claims, key=lambda row: row["claim_index"])
+            ],
+        )
+        return True
 
-    progress_by_concept = {row["concept_id"]: row for row in progress_rows}
-    explanations_by_concept: dict[int, list[dict]] = {}
-    for explanation in explanations:
-        explanations_by_concept.setdefault(explanation["concept_id"], []).append(explanation)
-    mem_by_concept = {row["concept_id"]: row for row in duel_mem}
-    claims_by_concept: dict[int, list[dict]] = {}
-    for claim in claims:
-        claims_by_concept.setdefault(claim["concept_id"], []).append(claim)
+    def _merge(self, payload: dict, now: int) -> dict:
+        """_merge_rows() over the dicts."""
+        sources, concepts, progress_rows, explanations, duel_mem, claims = (
+            [_epoch_row(row) for row in payload[key]] for key in _REQUIRED_EXPORT_FIELDS
+        )
 
-    sources_added = 0
-    sources_merged = 0
-    concepts_added = 0
-    concepts_merged = 0
-    explanations_added = 0
-    duel_memories_updated = 0
-    cached_claim_sets_updated = 0
-    now = _utcnow().isoformat()
+        concepts_by_source: dict[int, list[dict]] = {}
+        for concept in concepts:
+            concepts_by_source.setdefault(concept["source_id"], []).append(concept)
+        progress_by_concept = {row["concept_id"]: row for row in progress_rows}
+        explanations_by_concept: dict[int, list[dict]] = {}
+        for explanation in explanations:
+            explanations_by_concept.setdefault(explanation["concept_id"], []).append(explanation)
+        mem_by_concept = {row["concept_id"]: row for row in duel_mem}
+        claims_by_concept: dict[int, list[dict]] = {}
+        for claim in claims:
+            claims_by_concept.setdefault(claim["concept_id"], []).append(claim)
 
-    with get_db() as conn:
+        result = dict.fromkeys(
+            (
+                "sources_added", "sources_merged", "concepts_added", "concepts_merged",
+                "explanations_added", "duel_memories_updated", "cached_claim_sets_updated",
+            ),
+            0,
+        )
         for src in sources:
-            existing_source = conn.execute(
-                "SELECT * FROM sources WHERE url = ?",
-                (src["url"],),
-            ).fetchone()
-
-            if existing_source:
-                source_id = existing_source["id"]
-                conn.execute(
-                    """
-                    UPDATE sources
-                    SET title = ?, source_type = ?, raw_content = ?, segments = ?, created_at = ?
-                    WHERE id = ?
-                    """,
-                    (
-                        _prefer_text(existing_source["title"], src["title"])
-                        or existing_source["title"],
-                        existing_source["source_type"] or src["source_type"],
-                        _prefer_text(existing_source["raw_content"], src["raw_content"])
-                        or existing_source["raw_content"],
-                        _prefer_text(existing_source["segments"], src.get("segments")),
-                        _earliest_timestamp(existing_source["created_at"], src.get("created_at")),
-                        source_id,
-                    ),
-                )
-                sources_merged += 1
+            source_id = self._source_urls.get(src["url"])
+            if source_id is not None:
+                self._merge_source(self._sources[source_id], src, now)
+                result["sources_merged"] += 1
             else:
-                cursor = conn.execute(
-                    """
-                    INSERT INTO sources (url, title, source_type, raw_content, segments, created_at)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                    """,
-                    (
-                        src["url"],
-                        src["title"],
-                        src["source_type"],
-                        src["raw_content"],
-                        src.get("segments"),
-                        src.get("created_at", now),
-                    ),
+                source_id = self._insert_source(
+                    src["url"],
+                    src["title"],
+                    src["source_type"],
+                    _pack_content(src["raw_content"]),
+                    _pack_content(src.get("segments")),
+                    _stamp(src.get("created_at"), now),
                 )
-                source_id = cursor.lastrowid
-                sources_added += 1
+                result["sources_added"] += 1
 
             for concept in concepts_by_source.get(src["id"], []):
-                existing_concept = conn.execute(
-                    """
-                    SELECT *
-                    FROM concepts
-                    WHERE source_id = ? AND LOWER(name) = LOWER(?)
-                    ORDER BY id
-                    LIMIT 1
-                    """,
-                    (source_id, concept["name"]),
-                ).fetchone()
-
-                if existing_concept:
-                    concept_id = existing_concept["id"]
-                    conn.execute(
-                        """
-                        UPDATE concepts
-                        SET source_quote = ?, ground_truth = ?, question = ?,
-                            skipped = ?, created_at = ?
-                        WHERE id = ?
-                        """,
-                        (
-                            _prefer_text(existing_concept["source_quote"], concept["source_quote"])
-                            or existing_concept["source_quote"],
-                            _prefer_text(
-                                existing_concept["ground_truth"],
-                                concept.get("ground_truth"),
+                existing = self._find_concept(source_id, concept["name"])
+                if existing is not None:
+                    concept_id = existing["id"]
+                    self._update_concept(
+                        existing,
+                        {
+                            "source_quote": _prefer_text(
+                                existing["source_quote"], concept["source_quote"]
+                            )
+                            or existing["source_quote"],
+                            "ground_truth": _prefer_text(
+                                existing["ground_truth"], concept.get("ground_truth")
                             ),
-                            _prefer_text(existing_concept["question"], concept.get("question")),
-                            max(
-                                int(existing_concept["skipped"]),
-                                int(concept.get("skipped", 0) or 0),
+                            "question": _prefer_text(existing["question"], concept.get("question")),
+                            "skipped": max(
+                                int(existing["skipped"]), int(concept.get("skipped", 0) or 0)
                             ),
-                            _earliest_timestamp(
-                                existing_concept["created_at"],
-                                concept.get("created_at"),
+                            "created_at": _earliest_timestamp(
+                                now, existing["created_at"], concept.get("created_at")
                             ),
-                            concept_id,
-                        ),
+                        },
                     )
-                    concepts_merged += 1
+                    result["concepts_merged"] += 1
                 else:
-                    cursor = conn.execute(
-                        """
-                        INSERT INTO concepts
-                        (source_id, name, source_quote, ground_truth, question, skipped, created_at)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                        """,
-                        (
-                            source_id,
-                            concept["name"],
-                            concept["source_quote"],
-                            concept.get("ground_truth"),
-                            concept.get("question"),
-                            concept.get("skipped", 0),
-                            concept.get("created_at", now),
-                        ),
+                    concept_id = self._insert_concept(
+                        source_id,
+                        concept["name"],
+                        concept["source_quote"],
+                        concept.get("ground_truth"),
+                        concept.get("question"),
+                        _stamp(concept.get("created_at"), now),
+                        concept.get("skipped", 0) or 0,
                     )
-                    concept_id = cursor.lastrowid
-                    concepts_added += 1
+                    result["concepts_added"] += 1
 
                 imported_explanations = explanations_by_concept.get(concept["id"], [])
                 imported_activity_at = max(
                     (
-                        explanation.get("created_at", now)
+                        _stamp(explanation.get("created_at"), now)
                         for explanation in imported_explanations
                     ),
-                    default=progress_by_concept.get(concept["id"], {}).get("due_date", now),
-                    key=_parse_timestamp,
+                    default=_stamp(
+                        progress_by_concept.get(concept["id"], {}).get("due_date"), now
+                    ),
                 )
-                imported_state_won = _merge_progress_row(
-                    conn,
+                imported_state_won = self._merge_progress(
                     concept_id,
                     progress_by_concept.get(concept["id"]),
                     imported_activity_at,
                     now,
                 )
-                explanations_added += _merge_explanations(conn, concept_id, imported_explanations)
-
-                if _merge_duel_memory(
-                    conn,
+                result["explanations_added"] += self._merge_explanations(
+                    concept_id, imported_explanations
+                )
+                if self._merge_duel_memory(
                     concept_id,
                     mem_by_concept.get(concept["id"]),
                     prefer_import=imported_state_won,
                 ):
-                    duel_memories_updated += 1
-
-                if _merge_cached_claims(
-                    conn,
+                    result["duel_memories_updated"] += 1
+                if self._merge_cached_claims(
                     concept_id,
                     claims_by_concept.get(concept["id"], []),
                     prefer_import=imported_state_won,
                 ):
-                    cached_claim_sets_updated += 1
+                    result["cached_claim_sets_updated"] += 1
+
+        self._prune_blobs()
+        return result
+
+    @_atomic
+    def import_all_data(self, data: dict, *, bulk: bool | None = None) -> dict:
+        """As the SQLite version; ``bulk`` has no effect, every import merges row by row."""
+        payload = validate_import_data(data)
+        return {"schema_version": payload["schema_version"], **self._merge(payload, _now_ms())}
+
+    def iter_export_records(
+        self, chunk_rows: int = EXPORT_CHUNK_ROWS, *, since: int | None = None
+    ) -> Iterator[dict]:
+        """As the SQLite version; ``chunk_rows`` has no effect here."""
+        yield {"table": "meta", **self._export_header(since)}
+        for table, rows in self._export_tables(since).items():
+            for row in rows:
+                yield {"table": table, "row": row}
+
+    def export_ndjson(self, fp: IO[str], *, since: int | None = None) -> dict[str, int]:
+        counts = dict.fromkeys(_REQUIRED_EXPORT_FIELDS, 0)
+        for record in self.iter_export_records(since=since):
+            fp.write(json.dumps(record))
+            fp.write("\n")
+            if record["table"] in counts:
+                counts[record["table"]] += 1
+        return counts
+
+    @_atomic
+    def import_records(
+        self, records: Iterable[object], chunk_rows: int = EXPORT_CHUNK_ROWS
+    ) -> dict:
+        """As the SQLite version, collecting the records and merging them row by row."""
+        records = iter(records)
+        header = next(records, None)
+        if not isinstance(header, Mapping) or header.get("table") != "meta":
+            raise ImportValidationError("Invalid export: first record must be the 'meta' header.")
+        _validated_schema_version(header)
+
+        tables: dict[str, list[dict]] = {key: [] for key in _REQUIRED_EXPORT_FIELDS}
+        for record in records:
+            if not isinstance(record, Mapping):
+                raise ImportValidationError("Invalid export: every record must be an object.")
+            key = record.get("table")
+            if key not in tables:
+                raise ImportValidationError(f"Invalid export: unknown table {key!r}.")
+            row = record.get("row")
+            if not isinstance(row, Mapping):
+                raise ImportValidationError(
+                    f"Invalid export: '{key}[{len(tables[key])}]' must be an object."
+                )
+            _require_keys(row, key, _REQUIRED_EXPORT_FIELDS[key], len(tables[key]))
+            tables[key].append(dict(row))
+        return self.import_all_data({**header, **tables})
+
+    def import_ndjson(self, lines: Iterable[str]) -> dict:
+        return self.import_records(_parse_ndjson_lines(lines))
+
+    def export_snapshot(self, path: Path, *, compress: bool = False) -> dict:
+        """As the SQLite version, written through a scratch MemoryBackend."""
+        scratch = MemoryBackend()
+        try:
+            scratch.import_all_data(self.export_all_data())
+            result = scratch.export_snapshot(path, compress=compress)
+        finally:
+            scratch.close()
+        return {**result, "revision": self.current_revision()}
+
+    def import_snapshot(self, path: Path) -> dict:
+        """As the SQLite version: the snapshot is read through a scratch MemoryBackend."""
+        scratch = MemoryBackend()
+        try:
+            scratch.import_snapshot(path)
+            data = scratch.export_all_data()
+        finally:
+            scratch.close()
+        result = self.import_all_data(data)
+        del result["schema_version"]
+        return result
+
+
+def _bind_iterator(backend: SQLiteBackend, items: Iterator) -> Iterator:
+    """Re-bind ``backend`` around each step of a lazily evaluated operation."""
+    try:
+        while True:
+            token = _bound_backend.set(backend)
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            finally:
+                _bound_backend.reset(token)
+            yield item
+    finally:
+        items.close()
 
-    return {
-        "schema_version": payload["schema_version"],
-        "sources_added": sources_added,
-        "sources_merged": sources_merged,
-        "concepts_added": concepts_added,
-        "concepts_merged": concepts_merged,
-        "explanations_added": explanations_added,
-        "duel_memories_updated": duel_memories_updated,
-        "cached_claim_sets_updated": cached_claim_sets_updated,
-    }
+
+def _bound_operation(fn: Callable) -> Callable:
+    lazy = inspect.isgeneratorfunction(fn)
+
+    @functools.wraps(fn)
+    def method(self, *args, **kwargs):
+        token = _bound_backend.set(self)
+        try:
+            result = fn(*args, **kwargs)
+        finally:
+            _bound_backend.reset(token)
+        return _bind_iterator(self, result) if lazy else result
+
+    return method
+
+
+for _name, _fn in _OPERATIONS.items():
+    setattr(SQLiteBackend, _name, _bound_operation(_fn))
+del _name, _fn
+
+_backend: StorageBackend = SQLiteBackend()
+
+
+def get_backend() -> StorageBackend:
+    """The backend the module-level functions currently use."""
+    return _backend
+
+
+def use_backend(backend: StorageBackend) -> StorageBackend:
+    """Route the module-level functions to ``backend``; returns the previous one."""
+    global _backend
+    previous, _backend = _backend, backend
+    return previous
@@ -6,10 +6,42 @@ import pytest
 
 from learnlock import config, storage
 
+# Test modules whose tmp_db tests also run against the in-memory backends.
+BACKEND_MODULES = {"test_storage", "test_scheduler"}
+BACKENDS = {"memory": storage.MemoryBackend, "dict": storage.DictBackend}
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers", "file_db: needs the on-disk database, so skip the in-memory backend runs"
+    )
+    config.addinivalue_line(
+        "markers", "sql: inspects the SQLite engine directly, so skip the dict backend run"
+    )
+
+
+def pytest_generate_tests(metafunc):
+    """Run storage and scheduler tests against the file and in-memory backends."""
+    if (
+        "db_backend" in metafunc.fixturenames
+        and metafunc.module.__name__.rpartition(".")[2] in BACKEND_MODULES
+        and metafunc.definition.get_closest_marker("file_db") is None
+    ):
+        backends = ["sqlite", *BACKENDS]
+        if metafunc.definition.get_closest_marker("sql") is not None:
+            backends.remove("dict")
+        metafunc.parametrize("db_backend", backends, indirect=True)
+
+
+@pytest.fixture()
+def db_backend(request):
+    """Which backend tmp_db routes storage to: "sqlite" (the file), "memory" or "dict"."""
+    return getattr(request, "param", "sqlite")
+
 
 @pytest.fixture()
-def tmp_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
-    """Provide a fresh temporary database for each test."""
+def db_file(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
+    """A fresh temporary database file, with storage routed to it."""
     db_path = tmp_path / "test.db"
     monkeypatch.setattr(config, "DB_PATH", db_path)
     monkeypatch.setattr(config, "DATA_DIR", tmp_path)
@@ -18,6 +50,33 @@ def tmp_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch):
     return db_path
 
 
+@pytest.fixture()
+def tmp_db(db_file: Path, db_backend: str):
+    """Provide a fresh temporary database for each test.
+
+    The file is always created; with db_backend "memory" or "dict" storage
+    calls go to a MemoryBackend or DictBackend instead and the file stays empty.
+    """
+    if db_backend == "sqlite":
+        yield db_file
+        return
+    backend = BACKENDS[db_backend]()
+    previous = storage.use_backend(backend)
+    yield db_file
+    storage.use_backend(previous)
+    backend.close()
+
+
+@pytest.fixture()
+def memory_db(db_file):
+    """Route storage to a fresh in-memory backend; the file database stays empty."""
+    backend = storage.MemoryBackend()
+    previous = storage.use_backend(backend)
+    yield backend
+    storage.use_backend(previous)
+    backend.close()
+
+
 @pytest.fixture()
 def mock_llm(monkeypatch: pytest.MonkeyPatch):
     """Mock llm.call() to avoid real API calls. Returns a controller object.
@@ -1,12 +1,17 @@
 """Tests for CLI utilities and command routing."""
 
+import io
 import json
+import re
 import time
 from contextlib import nullcontext
 from types import SimpleNamespace
 
+import pytest
+from rich.console import Console
+
 import learnlock.cli as cli
-from learnlock import storage
+from learnlock import config, scheduler, storage
 from learnlock.cli import _is_github, _is_pdf, _is_url, _is_youtube, handle_input
 
 
@@ -90,6 +95,17 @@ class TestHandleInput:
         result = handle_input("/help")
         assert result is True
 
+    def test_help_descriptions_share_a_column(self):
+        out = io.StringIO()
+        Console(file=out, width=200).print(cli.HELP_TEXT)
+        commands = out.getvalue().split("Commands:")[1].split("How It Works:")[0]
+        columns = {
+            list(re.finditer(" {2,}", line))[-1].end()
+            for line in commands.splitlines()
+            if line.startswith("  /")
+        }
+        assert len(columns) == 1
+
     def test_quit_command(self, tmp_db):
         result = handle_input("/quit")
         assert result is False
@@ -112,6 +128,212 @@ class TestPhase3Commands:
         assert cli.cmd_export("~/learnlock-export.json") is True
         assert (tmp_path / "learnlock-export.json").exists()
 
+    def test_list_renders_progress_and_source_counts(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        widget = next(c for c in storage.list_concepts() if c.name == "Widget")
+        scheduler.update_after_review(widget.id, 4)
+
+        assert cli.cmd_list() is True
+        assert any("Widget" in m and "1x, last: 4/5" in m for m in stub.messages)
+        assert any("Gadget" in m and "(new)" in m for m in stub.messages)
+
+        stub.messages.clear()
+        assert cli.cmd_list("-s") is True
+        assert any("Test Source" in m and "(2 concepts)" in m for m in stub.messages)
+
+    def test_list_pages_and_stops_on_quit(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        monkeypatch.setattr(cli.config, "LIST_PAGE_SIZE", 1)
+        monkeypatch.setattr(cli.sys.stdin, "isatty", lambda: True, raising=False)
+        prompts = []
+        monkeypatch.setattr(cli, "_input", lambda prompt="": prompts.append(prompt) or "q")
+
+        assert cli.cmd_list() is True
+        assert len(prompts) == 1
+        assert sum("•" in m for m in stub.messages) == 1
+
+    def test_search_prints_ranked_hits(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_search("gadgets") is True
+        assert any("[bold cyan]" in m for m in stub.messages)
+
+    def test_skip_resolves_exact_name_before_substring(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        storage.add_concept(seeded_db, "Widget Factory", "Factories build widgets")
+
+        assert cli.cmd_skip("widget") is True
+        assert [c.name for c in storage.list_concepts(skipped=True)] == ["Widget"]
+
+    def test_bulk_skip_dry_run_then_delete_by_filter(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        storage.add_concept(seeded_db, "Widget Factory", "Factories build widgets")
+
+        assert cli.cmd_skip('--name "widget" --dry-run') is True
+        assert any("2 concepts would be skipped" in m for m in stub.messages)
+        assert storage.list_concepts(skipped=True) == []
+
+        assert cli.cmd_skip(f"--source {seeded_db} --name widget") is True
+        assert len(storage.list_concepts(skipped=True)) == 2
+        assert cli.cmd_unskip("--name factory") is True
+        assert [c.name for c in storage.list_concepts(skipped=True)] == ["Widget"]
+
+        monkeypatch.setattr("builtins.input", lambda *args, **kwargs: "yes")
+        assert cli.cmd_delete("--name widget") is True
+        assert [c.name for c in storage.list_concepts()] == ["Gadget"]
+        assert storage.get_source(seeded_db) is not None
+
+        stub.messages.clear()
+        assert cli.cmd_skip("--max-score low") is True
+        assert any("Usage" in m for m in stub.messages)
+
+    def test_reschedule_dry_run_lists_changes(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_reschedule() is True
+        assert any("All 2 schedules are current" in m for m in stub.messages)
+
+        monkeypatch.setattr(cli.config, "SM2_MIN_EASE", 3.0)
+        assert cli.cmd_reschedule("--dry-run") is True
+        assert any("Dry run: would reschedule 2 of 2" in m for m in stub.messages)
+        assert storage.get_progress(storage.list_concepts()[0].id)["ease_factor"] == 2.5
+
+    def test_tune_saves_fitted_engine(self, seeded_db, monkeypatch, tmp_path):
+        pytest.importorskip("numpy")
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        monkeypatch.setattr(cli, "_spinner", lambda message: nullcontext())
+        monkeypatch.setattr(cli.config, "SCHEDULER", "sm2")
+        monkeypatch.setattr(cli.config, "FSRS_WEIGHTS", None)
+        monkeypatch.setenv("LEARNLOCK_SCHEDULER", "sm2")
+        monkeypatch.setenv("LEARNLOCK_FSRS_WEIGHTS", "")
+        monkeypatch.setattr(scheduler, "tune", lambda: None)
+        assert cli.cmd_tune() is True
+        assert any("Not enough history" in m for m in stub.messages)
+
+        metrics = {"log_loss": 0.4, "rmse": 0.05, "predicted": 0.8, "actual": 0.85}
+        result = {
+            "weights": (0.5, 1.5),
+            "reviews": 400,
+            "holdout": 100,
+            "in_sample": False,
+            "engines": {
+                "sm2": {**metrics, "log_loss": 0.7},
+                "fsrs": metrics,
+                "fsrs-tuned": {**metrics, "log_loss": 0.35},
+            },
+        }
+        monkeypatch.setattr(scheduler, "tune", lambda: result)
+        monkeypatch.setattr("builtins.input", lambda *args, **kwargs: "yes")
+        assert cli.cmd_tune() is True
+        assert any("100 held-out repeat reviews" in m for m in stub.messages)
+        assert cli.config.SCHEDULER == "fsrs"
+        assert cli.config.FSRS_WEIGHTS == (0.5, 1.5)
+        env = (tmp_path / ".env").read_text().splitlines()
+        assert "LEARNLOCK_SCHEDULER=fsrs" in env
+        assert "LEARNLOCK_FSRS_WEIGHTS=0.5,1.5" in env
+
+    def test_forecast_renders_daily_load(self, seeded_db, monkeypatch):
+        pytest.importorskip("numpy")
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_forecast("0") is True
+        assert any("Usage" in m for m in stub.messages)
+        assert cli.cmd_forecast("5") is True
+        assert any("over 2 concepts" in m for m in stub.messages)
+
+    def test_forecast_usage_keeps_the_days_placeholder(self, tmp_db, monkeypatch):
+        out = io.StringIO()
+        monkeypatch.setattr(cli, "console", Console(file=out, width=120))
+        assert cli.cmd_forecast("0") is True
+        assert "Usage: /forecast [days]" in out.getvalue()
+
+    def test_startup_forecast_follows_the_data(self, seeded_db, monkeypatch):
+        pytest.importorskip("numpy")
+        runs = []
+        forecast = scheduler.forecast
+        monkeypatch.setattr(
+            scheduler, "forecast", lambda days: runs.append(days) or forecast(days)
+        )
+        cli._forecast_tomorrow()
+        for concept in storage.get_all_concepts():
+            storage.skip_concept(concept["id"])
+        assert cli._forecast_tomorrow() == 0
+        assert runs == [2, 2]
+        assert not (config.DATA_DIR / "forecast.json").exists()
+
+    def test_due_lists_due_concepts(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_due() is True
+        assert any("2 concepts due" in m for m in stub.messages)
+
+    def test_storage_reports_content_store(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_storage() is True
+        assert stub.messages
+
+    def test_maintain_reports_sizes(self, seeded_db, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        assert cli.cmd_maintain("--vacuum") is True
+        assert stub.messages
+
+    def test_ndjson_export_roundtrip(self, seeded_db, tmp_path, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        out = tmp_path / "backup.txt"
+
+        assert cli.cmd_export(f"{out} --format ndjson") is True
+        first = json.loads(out.read_text(encoding="utf-8").splitlines()[0])
+        assert first["table"] == "meta"
+
+        assert cli.cmd_import(str(out)) is True
+        assert any("Merged 1 existing sources" in message for message in stub.messages)
+
+    def test_export_since_writes_only_changes(self, seeded_db, tmp_path, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        revision = storage.current_revision()
+        assert cli.cmd_export(str(tmp_path / "full.json")) is True
+        assert any(f"--since {revision}" in m for m in stub.messages)
+
+        widget = storage.get_all_concepts()[0]
+        storage.add_explanation(widget["id"], "only change", 4)
+        out = tmp_path / "delta.json"
+        assert cli.cmd_export(f"{out} --since {revision}") is True
+        data = json.loads(out.read_text(encoding="utf-8"))
+        assert data["since"] == revision
+        assert [e["text"] for e in data["explanations"]] == ["only change"]
+        assert len(data["concepts"]) == 1
+
+        stub.messages.clear()
+        assert cli.cmd_export(f"{out} --since soon") is True
+        assert any("Usage" in m for m in stub.messages)
+
+    def test_export_since_usage_keeps_the_file_placeholder(self, tmp_db, monkeypatch):
+        out = io.StringIO()
+        monkeypatch.setattr(cli, "console", Console(file=out, width=120))
+        assert cli.cmd_export("backup.json --since soon") is True
+        assert "Usage: /export [file] --since <revision>" in out.getvalue()
+
+    def test_sqlite_snapshot_export_roundtrip(self, seeded_db, tmp_path, monkeypatch):
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        out = tmp_path / "backup.sqlite.gz"
+
+        assert cli.cmd_export(str(out)) is True
+        assert any("Exported snapshot" in m for m in stub.messages)
+        assert out.read_bytes()[:2] == b"\x1f\x8b"
+
+        assert cli.cmd_import(str(out)) is True
+        assert any("Merged 1 existing sources" in message for message in stub.messages)
+
     def test_import_invalid_payload_reports_error(self, tmp_db, tmp_path, monkeypatch):
         stub = StubConsole()
         monkeypatch.setattr(cli, "console", stub)
@@ -175,6 +397,34 @@ class TestPhase3Commands:
         assert cli.cmd_claims(str(widget["id"])) is True
         assert storage.get_cached_claims(widget["id"])[0]["statement"] == "Generated claim"
 
+    def test_claims_edits_commit_once_at_done(self, seeded_db, monkeypatch):
+        widget = next(
+            concept for concept in storage.get_all_concepts() if concept["name"] == "Widget"
+        )
+        storage.save_cached_claims(widget["id"], [
+            {"statement": "A claim", "claim_type": "definition", "claim_index": 0},
+            {"statement": "B claim", "claim_type": "mechanism", "claim_index": 1},
+            {"statement": "C claim", "claim_type": "boundary", "claim_index": 2},
+        ])
+        answers = iter(["delete 1", "edit 2 Rewritten third claim", "delete 9", "done"])
+        stub = StubConsole()
+        monkeypatch.setattr(cli, "console", stub)
+        monkeypatch.setattr("builtins.input", lambda *a, **kw: next(answers))
+        applied = []
+        real_apply = storage.apply_claim_edits
+        monkeypatch.setattr(
+            storage,
+            "apply_claim_edits",
+            lambda cid, edits: applied.append(list(edits)) or real_apply(cid, edits),
+        )
+
+        assert cli.cmd_claims(str(widget["id"])) is True
+
+        assert len(applied) == 1
+        cached = storage.get_cached_claims(widget["id"])
+        assert [c["statement"] for c in cached] == ["B claim", "Rewritten third claim"]
+        assert any("Claim 9 not found" in line for line in stub.messages)
+
     def test_visual_extracts_frame_for_specific_concept(self, tmp_db, monkeypatch):
         source_id = storage.add_source_with_concepts(
             url="https://www.youtube.com/watch?v=abcdefghijk",
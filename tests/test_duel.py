@@ -16,6 +16,7 @@ from learnlock.duel import (
     _sharpen_claims,
     _verify_claims,
     belief_to_score,
+    record_outcome,
     save_duel_data,
 )
 
@@ -293,6 +294,31 @@ class TestDuelEngineWithCachedClaims:
         assert engine.state.claims[0].statement == "Cached claim 1"
 
 
+class TestRecordOutcome:
+    def test_saves_memory_and_explanation_in_session(self, seeded_db):
+        from learnlock import storage
+
+        cid = storage.get_all_concepts()[0]["id"]
+        reveal = {
+            "belief": "Widgets hold state",
+            "errors": [BeliefError("superficial", "Too vague", 1, "claim", 0)],
+            "attacks": ["Why?", "How?"],
+            "evidence": ["first answer", "second answer"],
+        }
+
+        with storage.session() as unit:
+            errors = record_outcome(cid, reveal, 4, session=unit)
+            assert unit.conn.in_transaction
+
+        assert errors == "Too vague"
+        memory = storage.get_duel_memory(cid)
+        assert memory["last_attack"] == "How?"
+        explanation = storage.get_explanations(cid)[0]
+        assert explanation["text"] == "first answer | second answer"
+        assert explanation["score"] == 4
+        assert explanation["error_codes"] == "superficial"
+
+
 class TestCalcClaimCount:
     def test_short_content(self):
         min_c, max_c = _calc_claim_count(50)
@@ -1,8 +1,14 @@
-"""Tests for SM-2 spaced repetition scheduler."""
+"""Tests for the SM-2 and FSRS spaced repetition schedulers."""
+
+import random
+import sqlite3
+import sys
+from datetime import datetime, timezone
 
 import pytest
 
 from learnlock import config, scheduler, storage
+from learnlock.fsrs import DEFAULT_WEIGHTS, FSRSEngine
 
 
 class TestUpdateAfterReview:
@@ -64,6 +70,28 @@ class TestUpdateAfterReview:
         result = scheduler.update_after_review(cid, 99)
         assert result["passed"] is True  # 99 clamped to SCORE_MAX (5)
 
+    def test_load_balance_moves_review_to_emptiest_day(self, seeded_db, monkeypatch):
+        cid = storage.get_all_concepts()[0]["id"]
+        monkeypatch.setattr(config, "LOAD_BALANCE", True)
+        windows = []
+
+        def histogram(first_day, days):
+            windows.append((first_day, days))
+            return [0] + [9] * (days - 1)
+
+        monkeypatch.setattr(storage, "get_due_histogram", histogram)
+        assert scheduler.update_after_review(cid, 4)["interval_days"] == 1.0  # no fuzz yet
+        assert windows == []
+
+        result = scheduler.update_after_review(cid, 4)
+        (first_day, days), = windows
+        assert days >= 3
+        assert 6.0 - scheduler._fuzz_days(6.0) <= result["interval_days"] < 6.0
+        due = datetime.fromisoformat(result["due_date"]).timestamp() // 86_400
+        assert due == first_day
+        stored = storage.get_progress(cid)["interval_days"]
+        assert stored == pytest.approx(result["interval_days"], abs=0.05)
+
     def test_missing_progress_raises(self, tmp_db):
         with pytest.raises(ValueError, match="No progress found"):
             scheduler.update_after_review(99999, 3)
@@ -88,6 +116,60 @@ class TestGetDue:
         assert len(scheduler.get_all_due()) == 0
 
 
+class TestStudyQueue:
+    def test_serves_due_concepts_in_memory(self, seeded_db):
+        queue = scheduler.StudyQueue()
+        assert len(queue) == 2
+        first = queue.peek()
+        assert queue.source(first["source_id"])["title"] == "Test Source"
+
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            result = scheduler.update_after_review(first["id"], 5)
+            queue.reviewed(first["id"], result["due_date"])
+            second = queue.peek()
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+        assert second["id"] != first["id"]
+        assert len(queue) == 1
+        assert not any("FROM concepts" in sql for sql in statements)
+
+        queue.discard(second["id"])
+        assert queue.peek() is None and len(queue) == 0
+
+    def test_requeues_a_concept_still_due(self, seeded_db):
+        queue = scheduler.StudyQueue()
+        first = queue.peek()
+        queue.reviewed(first["id"], datetime.now(timezone.utc))
+        assert queue.peek()["id"] != first["id"]
+        assert len(queue) == 2
+
+    def test_skipped_concepts_do_not_wake_the_queue(self, seeded_db):
+        widget, gadget = (c["id"] for c in storage.get_all_concepts())
+        scheduler.update_after_review(widget, 5)
+        storage.skip_concept(widget)
+        assert storage.get_study_queue()[3] is None
+
+        storage.unskip_concept(widget)
+        assert storage.get_study_queue()[3] is not None
+
+    @pytest.mark.file_db
+    def test_reloads_after_another_writer(self, seeded_db):
+        queue = scheduler.StudyQueue()
+        skipped = queue.peek()["id"]
+        other = sqlite3.connect(config.DB_PATH)
+        try:
+            other.execute("UPDATE concepts SET skipped = 1 WHERE id = ?", (skipped,))
+            other.commit()
+        finally:
+            other.close()
+        assert queue.peek()["id"] != skipped
+        assert len(queue) == 1
+
+
 class TestStudySummary:
     def test_summary_keys(self, seeded_db):
         summary = scheduler.get_study_summary()
@@ -118,3 +200,240 @@ class TestFormatInterval:
 
     def test_months(self):
         assert scheduler._format_interval(60) == "in 2 months"
+
+
+class TestRescheduleAll:
+    def _review(self, concept_id, score):
+        with storage.session() as unit:
+            scheduler.update_after_review(concept_id, score, session=unit)
+            storage.add_explanation(concept_id, f"answer {score}", score)
+
+    def _history(self, seeded_db):
+        widget, gadget = (c["id"] for c in storage.get_concepts_for_source(seeded_db))
+        for score in (5, 4, 5, 5, 2, 4, 5, 5, 5):
+            self._review(widget, score)
+        self._review(gadget, 3)
+        return widget, gadget
+
+    def test_replay_matches_live_reviews(self, seeded_db):
+        self._history(seeded_db)
+        result = scheduler.reschedule_all(dry_run=True)
+        assert result["concepts"] == 2
+        assert result["changed"] == 0
+
+    def test_lower_max_interval_pulls_due_dates_in(self, seeded_db, monkeypatch):
+        widget, _ = self._history(seeded_db)
+        before = storage.get_progress(widget)
+        monkeypatch.setattr(config, "SM2_MAX_INTERVAL", 3.0)
+
+        preview = scheduler.reschedule_all(dry_run=True)
+        assert preview["changed"] == preview["earlier"] == 1
+        change = preview["changes"][0]
+        assert change.concept_id == widget and change.interval_after == 3.0
+        assert storage.get_progress(widget) == before
+
+        assert scheduler.reschedule_all()["changed"] == 1
+        progress = storage.get_progress(widget)
+        assert progress["interval_days"] == 3.0
+        assert progress["review_count"] == before["review_count"]
+        assert scheduler.reschedule_all(dry_run=True)["changed"] == 0
+
+    def test_unreviewed_concepts_are_clamped_without_numpy(self, seeded_db, monkeypatch):
+        monkeypatch.setitem(sys.modules, "numpy", None)
+        monkeypatch.setattr(config, "SM2_MIN_EASE", 2.6)
+        result = scheduler.reschedule_all()
+        assert result["engine"] == "python"
+        assert result["changed"] == 2
+        assert all(
+            storage.get_progress(c["id"])["ease_factor"] == 2.6
+            for c in storage.get_concepts_for_source(seeded_db)
+        )
+
+    @pytest.mark.parametrize("numpy", [True, False])
+    def test_partial_log_keeps_stored_progress(self, seeded_db, monkeypatch, numpy):
+        if numpy:
+            pytest.importorskip("numpy")
+        else:
+            monkeypatch.setitem(sys.modules, "numpy", None)
+        widget, gadget = (c["id"] for c in storage.get_concepts_for_source(seeded_db))
+        for score in (5, 5, 5):
+            scheduler.update_after_review(widget, score)  # no logged event
+        self._review(widget, 5)
+        self._review(gadget, 4)
+        before = storage.get_progress(widget)
+        assert before["review_count"] == 4
+
+        assert scheduler.reschedule_all()["changed"] == 0
+        assert storage.get_progress(widget) == before
+
+        monkeypatch.setattr(config, "SM2_MAX_INTERVAL", 3.0)
+        scheduler.reschedule_all()
+        progress = storage.get_progress(widget)
+        assert progress["interval_days"] == 3.0
+        assert progress["ease_factor"] == before["ease_factor"]
+        assert progress["review_count"] == 4
+
+    def test_engines_agree(self, seeded_db, monkeypatch):
+        pytest.importorskip("numpy")
+        self._history(seeded_db)
+        monkeypatch.setattr(config, "SM2_MAX_INTERVAL", 10.0)
+        monkeypatch.setattr(config, "SM2_MIN_EASE", 2.4)
+        inputs = storage.get_schedule_inputs()
+        expected = scheduler._replay_python(scheduler.SM2Engine(), *inputs)
+        actual = scheduler._replay_numpy(scheduler.SM2Engine(), *inputs)
+        assert len(expected) == len(actual) == 2
+        for got, want in zip(actual, expected):
+            assert got == pytest.approx(want)
+
+
+
+def _synthetic_reviews(concepts, per_concept, seed=7):
+    """Review log of a learner whose memory follows FSRS with non-default weights."""
+    rnd = random.Random(seed)
+    weights = list(DEFAULT_WEIGHTS)
+    weights[0], weights[2], weights[10] = 1.2, 8.0, 1.6
+    truth = FSRSEngine(weights)
+    reviews = []
+    for concept_id in range(1, concepts + 1):
+        at, elapsed, state = 1_700_000_000_000, 0.0, truth.initial()
+        for k in range(per_concept):
+            if k:
+                elapsed = state.interval_days * rnd.uniform(0.5, 3.0)
+                at += round(elapsed * 86_400_000)
+                recalled = rnd.random() < truth.recall(scheduler._ScalarOps, state, elapsed)
+                score = rnd.choice((4, 5) if recalled else (1, 2))
+            else:
+                score = rnd.choice((1, 3, 4, 5))
+            reviews.append((concept_id, at, score))
+            state = truth.step(scheduler._ScalarOps, state, score, elapsed)
+    return reviews
+
+
+class TestFSRSEngine:
+    @pytest.fixture
+    def fsrs(self, monkeypatch):
+        monkeypatch.setattr(config, "SCHEDULER", "fsrs")
+        return scheduler.get_engine()
+
+    def _review(self, concept_id, score):
+        with storage.session() as unit:
+            scheduler.update_after_review(concept_id, score, session=unit)
+            storage.add_explanation(concept_id, f"answer {score}", score)
+
+    def test_first_review_sets_stability_and_difficulty(self, seeded_db, fsrs):
+        cid = storage.get_all_concepts()[0]["id"]
+        result = scheduler.update_after_review(cid, 4)
+        progress = storage.get_progress(cid)
+        assert progress["stability"] == pytest.approx(fsrs.weights[2])
+        assert progress["difficulty"] == pytest.approx(fsrs.weights[4])
+        assert result["interval_days"] == round(fsrs.weights[2], 1)
+
+        scheduler.update_after_review(cid, 1)
+        progress = storage.get_progress(cid)
+        assert progress["stability"] < fsrs.weights[2]
+        assert progress["difficulty"] > fsrs.weights[4]
+        assert progress["review_count"] == 0
+
+    def test_fsrs_45_forgetting_curve(self):
+        engine = FSRSEngine()
+        state = engine.initial()._replace(stability=10.0, difficulty=5.0)
+        assert engine.recall(scheduler._ScalarOps, state, 10.0) == pytest.approx(0.9)
+        assert engine.recall(scheduler._ScalarOps, state, 100.0) == pytest.approx(
+            (1 + 19 / 81 * 10) ** -0.5
+        )
+        assert FSRSEngine()._interval_factor() == pytest.approx(1.0)
+        lenient = FSRSEngine(retention=0.8)
+        assert lenient.recall(scheduler._ScalarOps, state, 10 * lenient._interval_factor()) == (
+            pytest.approx(0.8)
+        )
+
+    def test_sm2_state_is_carried_over(self, seeded_db, monkeypatch):
+        cid = storage.get_all_concepts()[0]["id"]
+        scheduler.update_after_review(cid, 4)
+        scheduler.update_after_review(cid, 4)
+        assert storage.get_progress(cid)["stability"] is None
+
+        monkeypatch.setattr(config, "SCHEDULER", "fsrs")
+        scheduler.update_after_review(cid, 4)
+        # Reviewed again at once: recall is certain, so the 6-day stability stands.
+        assert storage.get_progress(cid)["stability"] == pytest.approx(6.0, rel=1e-3)
+
+    def test_replay_matches_live_reviews(self, seeded_db, fsrs):
+        widget, gadget = (c["id"] for c in storage.get_concepts_for_source(seeded_db))
+        for score in (5, 4, 5, 2, 4):
+            self._review(widget, score)
+        self._review(gadget, 3)
+        assert scheduler.reschedule_all(dry_run=True)["changed"] == 0
+
+    def test_engines_agree_after_switching(self, seeded_db, monkeypatch):
+        pytest.importorskip("numpy")
+        widget, gadget = (c["id"] for c in storage.get_concepts_for_source(seeded_db))
+        for score in (5, 4, 5, 2, 4):
+            self._review(widget, score)
+        self._review(gadget, 1)
+        inputs = storage.get_schedule_inputs()
+        engine = FSRSEngine(retention=0.8)
+        expected = scheduler._replay_python(engine, *inputs)
+        actual = scheduler._replay_numpy(engine, *inputs)
+        assert len(expected) == len(actual) == 2
+        for got, want in zip(actual, expected):
+            assert got == pytest.approx(want)
+
+
+class TestTune:
+    def test_fitted_weights_beat_defaults(self):
+        pytest.importorskip("numpy")
+        reviews = _synthetic_reviews(300, 6)
+        result = scheduler.tune(reviews)
+        assert not result["in_sample"]
+        assert result["holdout"] == 60 * 5
+        engines = result["engines"]
+        assert engines["fsrs-tuned"]["log_loss"] < engines["fsrs"]["log_loss"]
+        assert engines["fsrs"]["log_loss"] < engines["sm2"]["log_loss"]
+
+        tuned = scheduler.evaluate(FSRSEngine(result["weights"]), reviews)
+        default = scheduler.evaluate(FSRSEngine(), reviews)
+        assert tuned["reviews"] == default["reviews"] == 300 * 5
+        assert tuned["rmse"] < default["rmse"]
+
+    def test_needs_enough_history(self, seeded_db):
+        pytest.importorskip("numpy")
+        assert scheduler.tune() is None
+        assert scheduler.tune(_synthetic_reviews(10, 3)) is None
+        assert scheduler.evaluate(reviews=[]) is None
+
+
+class TestForecast:
+    def test_passing_history_follows_the_schedule(self, seeded_db):
+        pytest.importorskip("numpy")
+        concepts = storage.get_concepts_for_source(seeded_db)
+        for concept in concepts:
+            storage.add_explanation(concept["id"], "answer", 5)
+        result = scheduler.forecast(10, seed=0)
+        # Never failed, so every run passes: due now, then after 1 and 6 more days.
+        assert result.pass_rate == 1.0
+        assert result.concepts == 2
+        assert result.expected == [2, 2, 0, 0, 0, 0, 0, 2, 0, 0]
+        assert result.low == result.high == [2, 2, 0, 0, 0, 0, 0, 2, 0, 0]
+
+    def test_failures_bring_reviews_back_sooner(self, seeded_db):
+        pytest.importorskip("numpy")
+        widget, gadget = (c["id"] for c in storage.get_concepts_for_source(seeded_db))
+        for score in (1, 1, 1, 4):
+            storage.add_explanation(widget, "answer", score)
+        storage.skip_concept(gadget)
+        result = scheduler.forecast(7, runs=500, seed=0)
+        assert result.concepts == 1
+        assert result.pass_rate == 0.25
+        assert result.expected[0] == 1
+        assert result.expected[1] == 1
+        # Passing twice in a row (p = 0.25 each) is the only way to skip day 2.
+        assert result.expected[2] == pytest.approx(1 - 0.25**2, abs=0.05)
+
+    def test_concepts_due_after_the_window_are_left_out(self, seeded_db):
+        pytest.importorskip("numpy")
+        cid = storage.get_all_concepts()[0]["id"]
+        scheduler.update_after_review(cid, 4)
+        scheduler.update_after_review(cid, 4)
+        assert scheduler.forecast(3).concepts == 1
+        assert scheduler.forecast(8).concepts == 2
@@ -1,8 +1,14 @@
 """Tests for storage module."""
 
+import json
+import multiprocessing
+import sqlite3
+import threading
+import time
+
 import pytest
 
-from learnlock import __version__, config, storage
+from learnlock import __version__, config, scheduler, storage
 
 
 class TestInitDb:
@@ -15,11 +21,13 @@ class TestInitDb:
 
         assert "sources" in names
         assert "concepts" in names
-        assert "explanations" in names
+        assert {"review_events", "review_text", "review_daily", "review_concepts"} <= names
+        assert "explanations" not in names
         assert "progress" in names
         assert "duel_memory" in names
         assert "cached_claims" in names
 
+    @pytest.mark.file_db
     def test_lazy_init_runs_once(self, tmp_db, monkeypatch):
         """init_db should not re-run schema creation on subsequent calls."""
         call_count = 0
@@ -32,15 +40,14 @@ class TestInitDb:
 
         monkeypatch.setattr(storage, "_connect", counting_connect)
 
-        # First get_db triggers init_db which is already cached from fixture
         with storage.get_db():
             pass
         with storage.get_db():
             pass
 
-        # _connect is called by get_db each time, but init_db should NOT call it again
-        # (init_db was already run by fixture, so the cache prevents re-init)
-        assert call_count == 2  # Only from get_db, not from init_db
+        # The fixture's init_db already opened this thread's pooled connection,
+        # so neither init_db nor get_db needs to connect again.
+        assert call_count == 0
 
     def test_reset_init_cache(self, tmp_db):
         storage.reset_init_cache()
@@ -48,6 +55,463 @@ class TestInitDb:
         storage.init_db(tmp_db)
 
 
+class TestQueryPlans:
+    """Pin EXPLAIN QUERY PLAN for the hot queries so index regressions show up."""
+
+    @staticmethod
+    def _plans(call, marker):
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            call()
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+        matching = [
+            sql for sql in statements if marker in sql and sql.lstrip().startswith("SELECT")
+        ]
+        assert matching, f"no statement containing {marker!r}"
+        with storage.get_db() as conn:
+            return [
+                " | ".join(row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}"))
+                for sql in matching
+            ]
+
+    @pytest.mark.sql
+    def test_due_queue_ranges_over_due_index(self, seeded_db):
+        for call in (storage.get_due_concepts, storage.list_due_concepts):
+            (plan,) = self._plans(call, "due_date <=")
+            driver = plan.split(" | ")[0]
+            assert driver.startswith("SEARCH p USING")
+            assert driver.endswith("INDEX idx_progress_due_concept (due_date<?)")
+            assert "TEMP B-TREE" not in plan
+
+    @pytest.mark.sql
+    def test_due_counts_use_covering_index(self, seeded_db):
+        for call in (storage.count_due_concepts, storage.get_stats):
+            (plan,) = self._plans(call, "due_date <=")
+            assert plan.startswith(
+                "SEARCH p USING COVERING INDEX idx_progress_due_concept (due_date<?)"
+            )
+
+    @pytest.mark.sql
+    def test_per_concept_history_is_indexed_and_presorted(self, seeded_db):
+        (plan,) = self._plans(lambda: storage.get_explanations(1), "FROM review_events")
+        assert plan.startswith(
+            "SEARCH e USING INDEX idx_review_events_concept_created (concept_id=?)"
+        )
+        (plan,) = self._plans(lambda: storage.get_cached_claims(1), "FROM cached_claims")
+        assert plan == (
+            "SEARCH cached_claims USING INDEX idx_cached_claims_concept_index (concept_id=?)"
+        )
+
+    @pytest.mark.sql
+    def test_skipped_listing_uses_partial_index(self, seeded_db):
+        (plan,) = self._plans(lambda: storage.list_concepts(skipped=True), "c.skipped")
+        assert "idx_concepts_skipped_only" in plan
+
+    @pytest.mark.sql
+    def test_import_name_match_uses_expression_index(self, seeded_db):
+        payload = storage.export_all_data()
+        plans = self._plans(
+            lambda: storage.import_all_data(payload, bulk=False), "LOWER(name) = LOWER("
+        )
+        assert all(
+            "idx_concepts_source_name (source_id=? AND <expr>=?)" in plan for plan in plans
+        )
+
+    def test_superseded_indexes_are_dropped(self, tmp_path, monkeypatch):
+        db_path = tmp_path / "legacy.db"
+        monkeypatch.setattr(config, "DB_PATH", db_path)
+        storage.reset_init_cache()
+        # The baseline schema shipped idx_progress_due and idx_concepts_skipped.
+        _build_legacy_db(db_path, "baseline")
+        storage.init_db(db_path)
+        with storage.get_db() as conn:
+            names = {
+                row[0]
+                for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+            }
+        assert not names & {"idx_progress_due", "idx_concepts_skipped"}
+        assert "idx_progress_due_concept" in names
+
+
+_BASELINE_TABLES = """
+    CREATE TABLE sources (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        url TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        source_type TEXT NOT NULL,
+        raw_content TEXT NOT NULL,
+        segments TEXT,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE concepts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        source_id INTEGER NOT NULL,
+        name TEXT NOT NULL,
+        source_quote TEXT NOT NULL,
+        ground_truth TEXT,
+        question TEXT,
+        skipped INTEGER DEFAULT 0,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (source_id) REFERENCES sources(id) ON DELETE CASCADE
+    );
+    CREATE TABLE explanations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concept_id INTEGER NOT NULL,
+        text TEXT NOT NULL,
+        score INTEGER,
+        covered TEXT,
+        missed TEXT,
+        feedback TEXT,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+    CREATE TABLE progress (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concept_id INTEGER UNIQUE NOT NULL,
+        ease_factor REAL DEFAULT 2.5,
+        interval_days REAL DEFAULT 1.0,
+        due_date TEXT NOT NULL,
+        review_count INTEGER DEFAULT 0,
+        last_score INTEGER,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+    CREATE INDEX idx_progress_due ON progress(due_date);
+    CREATE INDEX idx_concepts_source ON concepts(source_id);
+    CREATE INDEX idx_concepts_skipped ON concepts(skipped);
+"""
+
+_DUEL_TABLE = """
+    CREATE TABLE duel_memory (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concept_id INTEGER UNIQUE NOT NULL,
+        last_belief TEXT,
+        last_errors TEXT,
+        last_attack TEXT,
+        updated_at TEXT NOT NULL,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+"""
+
+_CLAIMS_TABLE = """
+    CREATE TABLE cached_claims (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        concept_id INTEGER NOT NULL,
+        statement TEXT NOT NULL,
+        claim_type TEXT NOT NULL,
+        claim_index INTEGER NOT NULL,
+        created_at TEXT NOT NULL,
+        FOREIGN KEY (concept_id) REFERENCES concepts(id) ON DELETE CASCADE
+    );
+    CREATE INDEX idx_cached_claims_concept ON cached_claims(concept_id);
+"""
+
+# Every schema learnlock has shipped before user_version was tracked.
+_LEGACY_SHAPES = {
+    "pre_segments": _BASELINE_TABLES.replace("segments TEXT,", "").replace(
+        "ground_truth TEXT,", ""
+    ),
+    "pre_duel": _BASELINE_TABLES,
+    "pre_claims": _BASELINE_TABLES + _DUEL_TABLE,
+    "baseline": _BASELINE_TABLES + _DUEL_TABLE + _CLAIMS_TABLE,
+}
+
+
+def _build_legacy_db(db_path, shape):
+    import sqlite3
+
+    conn = sqlite3.connect(db_path)
+    conn.executescript(_LEGACY_SHAPES[shape])
+    source_cols = ["url", "title", "source_type", "raw_content", "created_at"]
+    values = ["https://old.com", "Old", "youtube", "legacy widget body", "2024-01-01T00:00:00"]
+    if shape != "pre_segments":
+        source_cols.append("segments")
+        values.append('[{"start": 0}]')
+    conn.execute(
+        f"INSERT INTO sources ({', '.join(source_cols)}) "
+        f"VALUES ({', '.join('?' * len(values))})",
+        values,
+    )
+    conn.execute(
+        "INSERT INTO concepts (source_id, name, source_quote, question, created_at) "
+        "VALUES (1, 'Widget', 'Widgets are reusable', 'What?', '2024-01-01T00:00:00')"
+    )
+    if shape != "pre_segments":
+        conn.execute("UPDATE concepts SET ground_truth = 'Widgets encapsulate state'")
+    conn.execute(
+        "INSERT INTO progress (concept_id, due_date, review_count, last_score, created_at) "
+        "VALUES (1, '2024-01-02T00:00:00', 1, 4, '2024-01-01T00:00:00')"
+    )
+    conn.execute(
+        "INSERT INTO explanations (concept_id, text, score, created_at) "
+        "VALUES (1, 'they are reusable', 4, '2024-01-01T00:00:00')"
+    )
+    conn.commit()
+    conn.close()
+
+
+def _schema_shape(conn):
+    objects = {
+        (row[0], row[1])
+        for row in conn.execute(
+            "SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'"
+        )
+    }
+    columns = {
+        name: {row[1] for row in conn.execute(f"PRAGMA table_info({name})")}
+        for kind, name in objects
+        if kind == "table"
+    }
+    return objects, columns
+
+
+class TestMigrations:
+    @pytest.fixture()
+    def legacy_db(self, tmp_path, monkeypatch):
+        db_path = tmp_path / "legacy.db"
+        monkeypatch.setattr(config, "DB_PATH", db_path)
+        storage.reset_init_cache()
+        return db_path
+
+    @pytest.fixture()
+    def fresh_shape(self, tmp_path):
+        conn = storage._connect(tmp_path / "fresh.db")
+        try:
+            storage._apply_migrations(conn)
+            return _schema_shape(conn)
+        finally:
+            conn.close()
+
+    def _assert_current(self, fresh_shape, *, ground_truth):
+        with storage.get_db() as conn:
+            assert storage._schema_version(conn) == storage.SCHEMA_VERSION
+            assert _schema_shape(conn) == fresh_shape
+        source = storage.get_source_by_url("https://old.com")
+        assert storage.get_source_content(source["id"]) == "legacy widget body"
+        concept = storage.get_all_concepts()[0]
+        assert concept["ground_truth"] == ground_truth
+        assert [hit.title for hit in storage.search("widget") if hit.kind == "concept"] == [
+            "Widget"
+        ]
+        stats = storage.get_stats()
+        assert (stats["total_sources"], stats["total_concepts"]) == (1, 1)
+        assert stats["total_reviews"] == 1
+        (review,) = storage.get_explanations(concept["id"])
+        assert (review["id"], review["text"], review["score"]) == (1, "they are reusable", 4)
+        with storage.get_db() as conn:
+            kinds = conn.execute(
+                "SELECT typeof(due_date), typeof(created_at) FROM progress"
+            ).fetchone()
+        assert tuple(kinds) == ("integer", "integer")
+        assert storage.get_progress(concept["id"])["due_date"] == "2024-01-02T00:00:00.000+00:00"
+
+    @pytest.mark.parametrize("shape", sorted(_LEGACY_SHAPES))
+    def test_upgrades_legacy_shape(self, legacy_db, fresh_shape, shape):
+        _build_legacy_db(legacy_db, shape)
+        storage.init_db(legacy_db)
+        # pre_segments predates ground_truth; the upgrade backfills it from the quote
+        if shape == "pre_segments":
+            expected = "Widgets are reusable"
+        else:
+            expected = "Widgets encapsulate state"
+        self._assert_current(fresh_shape, ground_truth=expected)
+
+    @pytest.mark.parametrize("version", range(1, storage.SCHEMA_VERSION))
+    def test_upgrades_from_each_version(self, legacy_db, fresh_shape, version):
+        _build_legacy_db(legacy_db, "baseline")
+        conn = storage._connect(legacy_db)
+        try:
+            storage._apply_migrations(conn, target=version)
+            assert storage._schema_version(conn) == version
+        finally:
+            conn.close()
+        storage.init_db(legacy_db)
+        self._assert_current(fresh_shape, ground_truth="Widgets encapsulate state")
+
+    def test_rebuild_keeps_autoincrement_high_water_mark(self, legacy_db):
+        _build_legacy_db(legacy_db, "baseline")
+        conn = storage._connect(legacy_db)
+        try:
+            storage._apply_migrations(conn, target=storage.SCHEMA_VERSION - 1)
+            with conn:
+                conn.execute(
+                    "INSERT INTO concepts (source_id, name, source_quote, created_at) "
+                    "VALUES (1, 'Gone', 'q', '2024-01-01T00:00:00')"
+                )
+                conn.execute("DELETE FROM concepts WHERE name = 'Gone'")
+        finally:
+            conn.close()
+        storage.init_db(legacy_db)
+        assert storage.add_concept(1, "Fresh", "quote") == 3
+
+    @pytest.mark.file_db
+    def test_current_database_costs_one_pragma(self, tmp_db):
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            # Keep the pooled connection so only init_db's own work is traced.
+            storage._initialized_dbs.clear()
+            storage.init_db(tmp_db)
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+        assert statements == ["PRAGMA user_version"]
+
+    @pytest.mark.file_db
+    def test_newer_schema_is_refused(self, tmp_db):
+        with storage.get_db() as conn:
+            conn.execute(f"PRAGMA user_version = {storage.SCHEMA_VERSION + 1}")
+        storage.reset_init_cache()
+        with pytest.raises(storage.SchemaVersionError):
+            storage.init_db(tmp_db)
+
+    def test_failed_migration_rolls_back(self, legacy_db, monkeypatch):
+        _build_legacy_db(legacy_db, "baseline")
+
+        def broken(conn):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr(storage, "_MIGRATIONS", storage._MIGRATIONS[:2] + (broken,))
+        with pytest.raises(RuntimeError, match="boom"):
+            storage.init_db(legacy_db)
+        with storage.get_db() as conn:
+            assert storage._schema_version(conn) == 0
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master")}
+            raw = conn.execute("SELECT raw_content FROM sources").fetchone()[0]
+        assert "content_blobs" not in tables
+        assert raw == "legacy widget body"
+
+
+class TestConnectionPool:
+    def test_connection_reused_within_thread(self, tmp_db):
+        with storage.get_db() as first:
+            pass
+        with storage.get_db() as second:
+            pass
+        assert first is second
+
+    def test_threads_get_their_own_connection(self, tmp_db):
+        import threading
+
+        with storage.get_db() as main_conn:
+            pass
+        seen = []
+
+        def worker():
+            with storage.get_db() as conn:
+                seen.append(conn)
+
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        assert seen and seen[0] is not main_conn
+
+    def test_error_rolls_back_and_leaves_connection_clean(self, tmp_db):
+        with pytest.raises(RuntimeError):
+            with storage.get_db() as conn:
+                conn.execute(
+                    "INSERT INTO sources (url, title, source_type, created_at) "
+                    "VALUES ('u', 't', 'article', 0)"
+                )
+                raise RuntimeError("boom")
+
+        with storage.get_db() as conn:
+            assert not conn.in_transaction
+        assert storage.get_source_by_url("u") is None
+
+    @pytest.mark.sql
+    def test_nested_block_joins_the_outer_transaction(self, tmp_db):
+        insert = (
+            "INSERT INTO sources (url, title, source_type, created_at) "
+            "VALUES (?, 't', 'article', 0)"
+        )
+        with pytest.raises(RuntimeError):
+            with storage.get_db() as conn:
+                conn.execute(insert, ("outer",))
+                with storage.get_db() as inner:
+                    inner.execute(insert, ("inner",))
+                assert conn.in_transaction
+                raise RuntimeError("boom")
+        assert storage.get_all_sources() == []
+
+        with storage.get_db() as conn:
+            conn.execute(insert, ("kept",))
+            with pytest.raises(RuntimeError):
+                with storage.get_db() as inner:
+                    inner.execute(insert, ("undone",))
+                    raise RuntimeError("inner only")
+        assert [s["url"] for s in storage.get_all_sources()] == ["kept"]
+
+    def test_exited_threads_close_their_connections(self, tmp_db):
+        import gc
+        from concurrent.futures import ThreadPoolExecutor
+
+        storage.get_stats()
+        baseline = len(storage._open_connections)
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            list(pool.map(lambda _: storage.get_stats(), range(16)))
+        gc.collect()
+        assert len(storage._open_connections) == baseline
+
+    def test_close_reopens_on_next_use(self, tmp_db):
+        with storage.get_db() as before:
+            pass
+        storage.close()
+        with storage.get_db() as after:
+            assert after.execute("SELECT 1").fetchone()[0] == 1
+        assert before is not after
+
+
+class TestSession:
+    @pytest.mark.sql
+    def test_review_writes_commit_once(self, seeded_db):
+        from learnlock import scheduler
+
+        cid = storage.get_all_concepts()[0]["id"]
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            with storage.session() as unit:
+                storage.save_duel_memory(cid, "belief", "errors", "attack")
+                storage.add_explanation(cid, "answer", 4)
+                scheduler.update_after_review(cid, 4, session=unit)
+                scheduler.get_next_due(session=unit)
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+
+        assert sum(1 for sql in statements if sql.strip().upper() == "COMMIT") == 1
+        assert storage.get_progress(cid)["review_count"] == 1
+        assert storage.get_duel_memory(cid)["last_belief"] == "belief"
+
+    def test_error_rolls_back_every_write(self, seeded_db):
+        cid = storage.get_all_concepts()[0]["id"]
+        with pytest.raises(RuntimeError):
+            with storage.session():
+                storage.save_duel_memory(cid, "belief", "errors", "attack")
+                storage.add_explanation(cid, "answer", 4)
+                raise RuntimeError("boom")
+
+        assert storage.get_duel_memory(cid) is None
+        assert storage.get_explanations(cid) == []
+
+    @pytest.mark.sql
+    def test_nested_sessions_share_one_transaction(self, seeded_db):
+        with storage.session() as outer:
+            with storage.session() as inner:
+                assert inner is outer
+            with storage.session(outer) as joined:
+                assert joined is outer
+            assert outer.conn.in_transaction
+        assert not outer.active
+
+
 class TestSources:
     def test_add_and_get_source(self, tmp_db):
         sid = storage.add_source("https://example.com", "Test", "article", "content")
@@ -84,6 +548,77 @@ class TestSources:
         assert "Gadget" in names
 
 
+class TestContentStore:
+    def test_getters_return_metadata_and_content_loads_lazily(self, tmp_db):
+        sid = storage.add_source(
+            "https://example.com", "Test", "youtube", "transcript text", '[{"start": 1}]'
+        )
+        source = storage.get_source(sid)
+        assert "raw_content" not in source
+        assert source["content_hash"] and source["segments_hash"]
+        assert storage.get_source_content(sid) == "transcript text"
+        assert storage.get_source_segments(sid) == '[{"start": 1}]'
+
+    def test_identical_content_is_stored_once_and_pruned(self, tmp_db):
+        body = "same transcript " * 200
+        first = storage.add_source("https://a.com", "A", "article", body)
+        second = storage.add_source("https://b.com", "B", "article", body)
+        stats = storage.get_content_stats()
+        assert stats["blobs"] == 1
+        assert stats["referenced_bytes"] == 2 * len(body)
+        assert stats["stored_bytes"] < len(body)
+
+        storage.delete_source(first)
+        assert storage.get_source_content(second) == body
+        storage.delete_source(second)
+        assert storage.get_content_stats()["blobs"] == 0
+
+    def test_migrates_inline_content(self, tmp_path, monkeypatch):
+        import sqlite3
+
+        db_path = tmp_path / "legacy.db"
+        legacy = sqlite3.connect(db_path)
+        legacy.executescript("""
+            CREATE TABLE sources (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                url TEXT UNIQUE NOT NULL,
+                title TEXT NOT NULL,
+                source_type TEXT NOT NULL,
+                raw_content TEXT NOT NULL,
+                segments TEXT,
+                created_at TEXT NOT NULL
+            );
+            INSERT INTO sources (url, title, source_type, raw_content, segments, created_at)
+            VALUES ('https://old.com', 'Old', 'youtube', 'legacy body', '[]', '2024-01-01');
+        """)
+        legacy.close()
+
+        monkeypatch.setattr(config, "DB_PATH", db_path)
+        storage.reset_init_cache()
+        storage.init_db(db_path)
+
+        source = storage.get_source_by_url("https://old.com")
+        assert storage.get_source_content(source["id"]) == "legacy body"
+        assert storage.get_source_segments(source["id"]) == "[]"
+        with storage.get_db() as conn:
+            columns = storage._table_columns(conn, "sources")
+        assert not columns & {"raw_content", "segments"}
+        assert storage.export_all_data()["sources"][0]["raw_content"] == "legacy body"
+        assert storage.get_stats()["total_sources"] == 1
+
+    def test_import_keeps_longer_content_without_orphans(self, tmp_db):
+        sid = storage.add_source("https://example.com", "Test", "article", "short")
+        payload = storage.export_all_data()
+        payload["sources"][0]["raw_content"] = "a much longer body"
+        storage.import_all_data(payload)
+        assert storage.get_source_content(sid) == "a much longer body"
+
+        payload["sources"][0]["raw_content"] = "tiny"
+        storage.import_all_data(payload, bulk=True)
+        assert storage.get_source_content(sid) == "a much longer body"
+        assert storage.get_content_stats()["blobs"] == 1
+
+
 class TestConcepts:
     def test_add_concept_with_progress(self, tmp_db):
         sid = storage.add_source("https://example.com", "Test", "article", "content")
@@ -117,6 +652,122 @@ class TestConcepts:
         assert len(concepts) == 2
 
 
+class TestListings:
+    def test_source_summaries_count_concepts(self, seeded_db):
+        storage.add_source("https://empty.com", "Empty", "article", "nothing")
+        summaries = {summary.title: summary for summary in storage.list_source_summaries()}
+        assert summaries["Test Source"].concept_count == 2
+        assert summaries["Empty"].concept_count == 0
+        assert storage.count_concepts_for_source(seeded_db) == 2
+
+    def test_list_concepts_includes_progress(self, seeded_db):
+        widget = next(c for c in storage.list_concepts() if c.name == "Widget")
+        assert widget.review_count == 0
+        scheduler.update_after_review(widget.id, 4)
+
+        listing = {c.name: c for c in storage.list_concepts()}
+        assert listing["Widget"].review_count == 1
+        assert listing["Widget"].last_score == 4
+        assert listing["Widget"].source_title == "Test Source"
+
+    def test_list_concepts_filters_skipped(self, seeded_db):
+        widget = next(c for c in storage.list_concepts() if c.name == "Widget")
+        storage.skip_concept(widget.id)
+        assert [c.name for c in storage.list_concepts()] == ["Gadget"]
+        assert [c.name for c in storage.list_concepts(skipped=True)] == ["Widget"]
+
+    def test_iter_concepts_groups_by_source_across_chunks(self, seeded_db):
+        storage.add_source_with_concepts(
+            url="https://example.com/newer",
+            title="Newer Source",
+            source_type="article",
+            raw_content="newer",
+            concepts=[
+                {"name": f"Newer {n}", "source_quote": "q", "question": "?"} for n in range(3)
+            ],
+        )
+        rows = list(storage.iter_concepts_with_progress(chunk_rows=2))
+        assert [row.name for row in rows] == [
+            "Newer 0", "Newer 1", "Newer 2", "Widget", "Gadget",
+        ]
+
+    def test_due_listing_and_count(self, seeded_db):
+        due = storage.list_due_concepts()
+        assert {d.name for d in due} == {"Widget", "Gadget"}
+        assert storage.count_due_concepts() == 2
+        assert len(storage.list_due_concepts(limit=1)) == 1
+
+
+class TestSearch:
+    def test_ranks_name_matches_and_covers_claims_and_sources(self, seeded_db):
+        widget = storage.resolve_concepts("Widget")[0]
+        storage.save_cached_claims(
+            widget.id,
+            [{"statement": "Sprockets drive the widget", "claim_type": "mechanism",
+              "claim_index": 0}],
+        )
+        hits = storage.search("widget")
+        assert (hits[0].kind, hits[0].title) == ("concept", "Widget")
+        assert any(hit.kind == "claim" and hit.id == widget.id for hit in hits)
+        assert any(hit.kind == "source" for hit in hits)
+
+        claim_hit = storage.search("sprockets")[0]
+        assert claim_hit.kind == "claim"
+        assert "[Sprockets]" in claim_hit.snippet
+
+    def test_index_follows_updates_and_cascading_deletes(self, seeded_db):
+        widget = storage.resolve_concepts("Widget")[0]
+        storage.save_cached_claims(
+            widget.id,
+            [{"statement": "Original statement", "claim_type": "definition",
+              "claim_index": 0}],
+        )
+        storage.update_cached_claim(widget.id, 0, "Rewritten statement")
+        assert storage.search("original") == []
+        assert storage.search("rewritten")
+
+        storage.delete_source(seeded_db)
+        with storage.get_db() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM search_index").fetchone()[0] == 0
+
+    def test_resolve_prefers_id_then_exact_name(self, seeded_db):
+        storage.add_concept(seeded_db, "Widget Factory", "Factories build widgets")
+        assert [c.name for c in storage.resolve_concepts("widget")] == ["Widget"]
+        assert len(storage.resolve_concepts("widg")) == 2
+        gadget = storage.resolve_concepts("Gadget")[0]
+        assert storage.resolve_concepts(str(gadget.id)) == [gadget]
+
+    def test_resolve_filters_skipped(self, seeded_db):
+        widget = storage.resolve_concepts("Widget")[0]
+        storage.skip_concept(widget.id)
+        assert storage.resolve_concepts("Widget", skipped=False) == []
+        assert storage.resolve_concepts("Widget", skipped=True)[0].id == widget.id
+        assert storage.resolve_concepts("Widget")[0].id == widget.id
+
+    def test_resolve_sources_by_title(self, seeded_db):
+        source = storage.resolve_sources("test source")[0]
+        assert (source.id, source.concept_count) == (seeded_db, 2)
+        assert storage.resolve_sources("missing") == []
+
+    @pytest.mark.sql
+    def test_works_without_fts5(self, seeded_db):
+        with storage.get_db() as conn:
+            triggers = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger' AND name LIKE 'search_%'"
+            ).fetchall()
+            for (name,) in triggers:
+                conn.execute(f"DROP TRIGGER {name}")
+            conn.execute("DROP TABLE search_index")
+
+        assert [c.name for c in storage.resolve_concepts("widget")] == ["Widget"]
+        assert [hit.title for hit in storage.search("gadget")] == ["Gadget"]
+
+    def test_short_and_wildcard_queries_fall_back_to_like(self, seeded_db):
+        storage.add_concept(seeded_db, "50% rule", "Half of the rule")
+        assert [hit.title for hit in storage.search("ga")] == ["Gadget"]
+        assert [c.name for c in storage.resolve_concepts("50%")] == ["50% rule"]
+
+
 class TestProgress:
     def test_due_concepts_immediately_due(self, seeded_db):
         due = storage.get_due_concepts()
@@ -138,6 +789,33 @@ class TestProgress:
         assert progress["last_score"] == 4
 
 
+    @pytest.mark.sql
+    def test_due_order_is_chronological_across_offsets(self, tmp_db):
+        payload = {
+            "sources": [
+                {"id": 1, "url": "u", "title": "T", "source_type": "article", "raw_content": "c"}
+            ],
+            "concepts": [
+                {"id": 1, "source_id": 1, "name": "Naive", "source_quote": "q"},
+                {"id": 2, "source_id": 1, "name": "Offset", "source_quote": "q"},
+            ],
+            "progress": [
+                # Lexically "T00:30" sorts first, but 05:00+05:00 is 00:00 UTC.
+                {"concept_id": 1, "due_date": "2024-01-01T00:30:00"},
+                {"concept_id": 2, "due_date": "2024-01-01T05:00:00+05:00"},
+            ],
+            "explanations": [],
+            "duel_memory": [],
+            "cached_claims": [],
+        }
+        storage.import_all_data(payload)
+        due = storage.get_due_concepts()
+        assert [row["name"] for row in due] == ["Offset", "Naive"]
+        assert due[0]["due_date"] == "2024-01-01T00:00:00.000+00:00"
+        with storage.get_db() as conn:
+            assert conn.execute("SELECT typeof(due_date) FROM progress").fetchone()[0] == "integer"
+
+
 class TestExplanations:
     def test_add_and_get_explanations(self, seeded_db):
         concepts = storage.get_all_concepts()
@@ -294,6 +972,56 @@ class TestDeleteCachedClaim:
         assert not storage.delete_cached_claim(concepts[0]["id"], 99)
 
 
+class TestApplyClaimEdits:
+    @pytest.fixture
+    def cid(self, seeded_db):
+        cid = storage.get_all_concepts()[0]["id"]
+        storage.save_cached_claims(cid, [
+            {"statement": s, "claim_type": "definition", "claim_index": i}
+            for i, s in enumerate("ABCD")
+        ])
+        return cid
+
+    def test_script_applies_in_order(self, cid):
+        edits = [
+            storage.ClaimEdit("delete", 0),
+            storage.ClaimEdit("replace", 0, "B2"),
+            storage.ClaimEdit("insert", 3, "E", "boundary"),
+            storage.ClaimEdit("move", 3, to_index=0),
+        ]
+        result = storage.apply_claim_edits(cid, edits)
+
+        assert [c["statement"] for c in result] == ["E", "B2", "C", "D"]
+        assert [c["claim_index"] for c in result] == [0, 1, 2, 3]
+        assert storage.get_cached_claims(cid) == result
+
+    def test_move_forward(self, cid):
+        result = storage.apply_claim_edits(cid, [storage.ClaimEdit("move", 0, to_index=2)])
+        assert [c["statement"] for c in result] == ["B", "C", "A", "D"]
+
+    def test_bad_step_rolls_back_whole_script(self, cid):
+        with pytest.raises(storage.ClaimEditError):
+            storage.apply_claim_edits(cid, [
+                storage.ClaimEdit("delete", 0),
+                storage.ClaimEdit("replace", 3, "out of range"),
+            ])
+        assert [c["statement"] for c in storage.get_cached_claims(cid)] == list("ABCD")
+
+    @pytest.mark.sql
+    def test_delete_reindexes_with_one_update(self, cid):
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                assert storage.delete_cached_claim(cid, 0)
+            finally:
+                conn.set_trace_callback(None)
+
+        # The trace repeats a statement for each trigger program it runs.
+        assert len({s for s in statements if s.lstrip().upper().startswith("UPDATE")}) == 1
+        assert [c["claim_index"] for c in storage.get_cached_claims(cid)] == [0, 1, 2]
+
+
 class TestExportImport:
     def test_export_has_all_tables(self, seeded_db):
         data = storage.export_all_data()
@@ -305,6 +1033,7 @@ class TestExportImport:
         assert len(data["sources"]) == 1
         assert len(data["concepts"]) == 2
 
+    @pytest.mark.file_db
     def test_import_into_empty_db(self, seeded_db, tmp_path, monkeypatch):
         # Export from seeded
         data = storage.export_all_data()
@@ -355,6 +1084,7 @@ class TestExportImport:
         assert prog["ease_factor"] == 3.0
         assert prog["review_count"] == 5
 
+    @pytest.mark.file_db
     def test_import_merges_progress_memory_and_claims(self, seeded_db, tmp_path, monkeypatch):
         from datetime import datetime, timezone
 
@@ -466,6 +1196,607 @@ class TestExportImport:
             )
 
 
+def _natural_snapshot() -> dict:
+    """Table contents keyed by natural keys so ids from different engines compare equal."""
+    with storage.get_db() as conn:
+        concept_key = """
+            SELECT c.id, s.url || '|' || c.name AS key
+            FROM concepts c JOIN sources s ON s.id = c.source_id
+        """
+        keys = {row["id"]: row["key"] for row in conn.execute(concept_key)}
+
+        def rows(sql, *fields):
+            return sorted(
+                (keys.get(row["concept_id"]),) + tuple(row[f] for f in fields)
+                for row in conn.execute(sql)
+            )
+
+        return {
+            "sources": sorted(
+                tuple(row)
+                for row in conn.execute(
+                    "SELECT url, title, source_type, content_hash, segments_hash, created_at "
+                    "FROM sources"
+                )
+            ),
+            "concepts": sorted(
+                (keys[row["id"]], row["source_quote"], row["ground_truth"], row["question"],
+                 row["skipped"], row["created_at"])
+                for row in conn.execute("SELECT * FROM concepts")
+            ),
+            "progress": rows(
+                "SELECT * FROM progress", "ease_factor", "interval_days", "due_date",
+                "review_count", "last_score", "created_at",
+            ),
+            "explanations": rows(
+                "SELECT e.*, ll_inflate(t.codec, t.data) AS body "
+                "FROM review_events e LEFT JOIN review_text t ON t.event_id = e.id",
+                "body", "score", "text_hash", "created_at",
+            ),
+            "duel_memory": rows(
+                "SELECT * FROM duel_memory", "last_belief", "last_errors", "updated_at"
+            ),
+            "cached_claims": rows(
+                "SELECT * FROM cached_claims", "statement", "claim_type", "claim_index"
+            ),
+        }
+
+
+class TestBulkImport:
+    def _build_export(self, tmp_path, monkeypatch):
+        from datetime import datetime, timezone
+
+        monkeypatch.setattr(config, "DB_PATH", tmp_path / "remote.db")
+        storage.reset_init_cache()
+        for n in range(3):
+            storage.add_source_with_concepts(
+                url=f"https://example.com/{n}",
+                title=f"Remote source {n} with a longer title",
+                source_type="article",
+                raw_content=f"remote content {n} " * 5,
+                concepts=[
+                    {"name": f"Concept {n}-{k}", "source_quote": f"quote {n}-{k}"}
+                    for k in range(4)
+                ],
+            )
+        concepts = storage.get_all_concepts()
+        for index, concept in enumerate(concepts):
+            if index % 2 == 0:
+                storage.update_progress(
+                    concept["id"], 2.7, 6.0, datetime(2031, 1, 1, tzinfo=timezone.utc), 2, 4
+                )
+                storage.add_explanation(concept["id"], f"remote answer {index}", 4)
+            if index % 3 == 0:
+                storage.save_duel_memory(concept["id"], f"remote belief {index}", "", "")
+                storage.save_cached_claims(
+                    concept["id"],
+                    [{"statement": f"remote claim {index}", "claim_type": "definition",
+                      "claim_index": 0}],
+                )
+        return storage.export_all_data()
+
+    def _build_local(self, db_path, monkeypatch):
+        from datetime import datetime, timezone
+
+        monkeypatch.setattr(config, "DB_PATH", db_path)
+        storage.reset_init_cache()
+        storage.add_source_with_concepts(
+            url="https://example.com/0",
+            title="Short",
+            source_type="article",
+            raw_content="local",
+            concepts=[
+                {"name": "concept 0-0", "source_quote": "a much longer local quote 0-0"},
+                {"name": "Concept 0-1", "source_quote": "q"},
+                {"name": "Local only", "source_quote": "local only quote"},
+            ],
+        )
+        storage.add_source("https://example.com/local", "Local", "article", "local content")
+        local = {c["name"]: c["id"] for c in storage.get_all_concepts()}
+        storage.update_progress(
+            local["Concept 0-1"], 2.2, 30.0, datetime(2032, 1, 1, tzinfo=timezone.utc), 7, 5
+        )
+        storage.save_duel_memory(local["Concept 0-1"], "local belief", "", "")
+        storage.save_cached_claims(
+            local["concept 0-0"],
+            [{"statement": "local claim", "claim_type": "mechanism", "claim_index": 0}],
+        )
+
+    def test_bulk_matches_row_by_row(self, tmp_path, monkeypatch):
+        from datetime import datetime, timezone
+
+        frozen = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        monkeypatch.setattr(storage, "_utcnow", lambda: frozen)
+        exported = self._build_export(tmp_path, monkeypatch)
+        results = {}
+        snapshots = {}
+        for bulk in (False, True):
+            self._build_local(tmp_path / f"local-{bulk}.db", monkeypatch)
+            results[bulk] = storage.import_all_data(exported, bulk=bulk)
+            snapshots[bulk] = _natural_snapshot()
+
+        assert results[True] == results[False]
+        assert results[True]["sources_added"] == 2
+        assert results[True]["concepts_merged"] == 2
+        for table, rows in snapshots[False].items():
+            assert snapshots[True][table] == rows, table
+
+    def test_bulk_reimport_is_idempotent(self, tmp_path, monkeypatch):
+        exported = self._build_export(tmp_path, monkeypatch)
+        before = _natural_snapshot()
+        result = storage.import_all_data(exported, bulk=True)
+
+        assert result["sources_added"] == 0
+        assert result["concepts_added"] == 0
+        assert result["explanations_added"] == 0
+        assert _natural_snapshot() == before
+
+    @pytest.mark.parametrize("bulk", [False, True])
+    def test_winning_import_clears_fsrs_state(self, seeded_db, monkeypatch, bulk):
+        monkeypatch.setattr(config, "SCHEDULER", "fsrs")
+        cid = storage.get_all_concepts()[0]["id"]
+        scheduler.update_after_review(cid, 4)
+        assert storage.get_progress(cid)["stability"] is not None
+
+        payload = storage.export_all_data()
+        (row,) = [p for p in payload["progress"] if p["concept_id"] == cid]
+        row.update(review_count=5, interval_days=30.0)
+        storage.import_all_data(payload, bulk=bulk)
+
+        progress = storage.get_progress(cid)
+        assert progress["interval_days"] == 30.0
+        assert (progress["stability"], progress["difficulty"]) == (None, None)
+
+    @pytest.mark.sql
+    def test_large_payload_defaults_to_bulk(self, seeded_db, monkeypatch):
+        calls = []
+        original = storage._merge_bulk
+        monkeypatch.setattr(storage, "BULK_IMPORT_MIN_CONCEPTS", 2)
+        monkeypatch.setattr(
+            storage, "_merge_bulk", lambda *args: calls.append(1) or original(*args)
+        )
+
+        storage.import_all_data(storage.export_all_data())
+        assert calls == [1]
+        with storage.get_db() as conn:
+            temp_tables = conn.execute(
+                "SELECT name FROM sqlite_temp_master WHERE type = 'table'"
+            ).fetchall()
+        assert temp_tables == []
+
+
+class TestNdjson:
+    @pytest.mark.file_db
+    def test_roundtrip_into_empty_db(self, seeded_db, tmp_path, monkeypatch):
+        import io
+
+        widget = storage.get_all_concepts()[0]
+        storage.add_explanation(widget["id"], "streamed answer", 4)
+        storage.save_cached_claims(
+            widget["id"],
+            [{"statement": "Streamed claim", "claim_type": "definition", "claim_index": 0}],
+        )
+        buffer = io.StringIO()
+        counts = storage.export_ndjson(buffer)
+        assert counts["sources"] == 1
+        assert counts["concepts"] == 2
+
+        lines = buffer.getvalue().splitlines()
+        assert '"table": "meta"' in lines[0]
+        assert len(lines) == 1 + sum(counts.values())
+
+        monkeypatch.setattr(config, "DB_PATH", tmp_path / "ndjson.db")
+        storage.reset_init_cache()
+        result = storage.import_ndjson(io.StringIO(buffer.getvalue()))
+        assert result["schema_version"] == storage.EXPORT_SCHEMA_VERSION
+        assert result["sources_added"] == 1
+        assert result["concepts_added"] == 2
+        assert result["explanations_added"] == 1
+        assert result["cached_claim_sets_updated"] == 1
+
+    @pytest.mark.file_db
+    def test_small_chunks_import_everything(self, seeded_db, tmp_path, monkeypatch):
+        records = list(storage.iter_export_records(chunk_rows=1))
+
+        monkeypatch.setattr(config, "DB_PATH", tmp_path / "chunks.db")
+        storage.reset_init_cache()
+        result = storage.import_records(records, chunk_rows=1)
+        assert result["concepts_added"] == 2
+        assert len(storage.get_due_concepts()) == 2
+
+    @pytest.mark.sql
+    def test_stages_in_a_temp_file_whatever_the_temp_store(self, seeded_db):
+        exported, stores = list(storage.iter_export_records()), []
+
+        def records():
+            yield from exported
+            with storage.get_db() as conn:
+                stores.append(conn.execute("PRAGMA temp_store").fetchone()[0])
+
+        storage.import_records(records())
+        with storage.get_db() as conn:
+            stores.append(conn.execute("PRAGMA temp_store").fetchone()[0])
+        assert stores == [1, 2]
+
+    def test_rejects_missing_header(self, tmp_db):
+        with pytest.raises(storage.ImportValidationError, match="meta"):
+            storage.import_ndjson(['{"table": "sources", "row": {}}'])
+
+    def test_rejects_future_schema_version(self, tmp_db):
+        header = f'{{"table": "meta", "schema_version": {storage.EXPORT_SCHEMA_VERSION + 1}}}'
+        with pytest.raises(storage.ImportValidationError, match="Unsupported"):
+            storage.import_ndjson([header])
+
+    def test_rejects_unknown_concept_reference_without_writing(self, tmp_db):
+        lines = [
+            '{"table": "meta", "schema_version": 1}',
+            '{"table": "sources", "row": {"id": 1, "url": "https://x.com", "title": "X", '
+            '"source_type": "article", "raw_content": "c"}}',
+            '{"table": "progress", "row": {"concept_id": 9, "due_date": "2030-01-01"}}',
+        ]
+        with pytest.raises(storage.ImportValidationError, match="unknown concept ids"):
+            storage.import_ndjson(lines)
+        assert storage.get_all_sources() == []
+
+
+class TestDeltaExport:
+    @staticmethod
+    def _claims(*statements):
+        return [
+            {"statement": text, "claim_type": "definition", "claim_index": index}
+            for index, text in enumerate(statements)
+        ]
+
+    def test_existing_rows_are_logged_by_the_migration(self, seeded_db):
+        data = storage.export_all_data(since=0)
+        assert data["revision"] == storage.current_revision() > 0
+        assert [len(data[key]) for key in ("sources", "concepts", "progress")] == [1, 2, 2]
+
+    def test_delta_holds_changed_rows_and_their_parents(self, seeded_db):
+        widget, gadget = storage.get_all_concepts()
+        storage.save_cached_claims(widget["id"], self._claims("A", "B"))
+        since = storage.current_revision()
+
+        storage.add_explanation(gadget["id"], "gadgets extend widgets", 4)
+        storage.update_cached_claim(widget["id"], 1, "B2")
+        delta = storage.export_all_data(since=since)
+
+        assert delta["since"] == since and delta["revision"] > since
+        (source,) = delta["sources"]
+        assert source["raw_content"] == "" and source["segments"] is None
+        assert sorted(c["name"] for c in delta["concepts"]) == ["Gadget", "Widget"]
+        assert delta["progress"] == [] and delta["duel_memory"] == []
+        assert [e["text"] for e in delta["explanations"]] == ["gadgets extend widgets"]
+        # Claim sets merge as a unit, so the unchanged claim travels too.
+        assert [c["statement"] for c in delta["cached_claims"]] == ["A", "B2"]
+        assert storage.export_all_data(since=delta["revision"])["concepts"] == []
+
+    def test_changed_source_carries_its_content(self, seeded_db):
+        since = storage.current_revision()
+        storage.add_source("https://example.com/new", "New", "article", "new body")
+        (source,) = storage.export_all_data(since=since)["sources"]
+        assert source["raw_content"] == "new body"
+
+    def test_merging_an_unchanged_export_logs_nothing(self, seeded_db):
+        widget = storage.get_all_concepts()[0]
+        storage.add_explanation(widget["id"], "answer", 4)
+        storage.save_duel_memory(widget["id"], "belief", "", "")
+        storage.save_cached_claims(widget["id"], self._claims("A"))
+        revision = storage.current_revision()
+        storage.import_all_data(storage.export_all_data())
+        assert storage.current_revision() == revision
+
+    @pytest.mark.file_db
+    def test_deltas_sync_two_databases(self, seeded_db, tmp_db):
+        laptop = storage.SQLiteBackend(tmp_db)
+        desk = storage.MemoryBackend()
+        desk.import_all_data(laptop.export_all_data())
+        synced = laptop.current_revision()
+
+        widget = laptop.get_all_concepts()[0]
+        scheduler.update_after_review(widget["id"], 4)
+        laptop.add_explanation(widget["id"], "synced answer", 4)
+        laptop.save_cached_claims(widget["id"], self._claims("A"))
+        delta = laptop.export_all_data(since=synced)
+        result = desk.import_all_data(delta)
+
+        assert result["explanations_added"] == 1
+        assert result["cached_claim_sets_updated"] == 1
+        assert desk.get_progress(widget["id"]) == laptop.get_progress(widget["id"])
+        assert desk.get_review_rollup(widget["id"])["reviews"] == 1
+        assert desk.get_source_content(seeded_db) == laptop.get_source_content(seeded_db)
+
+        # The delta's rows are already on the laptop, so echoing back is a no-op.
+        echo = desk.export_all_data(since=0)
+        assert laptop.import_all_data(echo)["explanations_added"] == 0
+        desk.close()
+
+    def test_ndjson_delta_matches_json_delta(self, seeded_db):
+        import io
+
+        since = storage.current_revision()
+        widget = storage.get_all_concepts()[0]
+        storage.add_explanation(widget["id"], "streamed delta", 3)
+        buffer = io.StringIO()
+        counts = storage.export_ndjson(buffer, since=since)
+        header = json.loads(buffer.getvalue().splitlines()[0])
+        assert header["since"] == since
+        assert (counts["sources"], counts["concepts"], counts["explanations"]) == (1, 1, 1)
+
+    def test_deleted_rows_leave_the_log(self, seeded_db):
+        storage.delete_source(seeded_db)
+        with storage.get_db() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+
+
+class TestSnapshots:
+    def _fresh_db(self, tmp_path, monkeypatch, name="restored.db"):
+        monkeypatch.setattr(config, "DB_PATH", tmp_path / name)
+        storage.reset_init_cache()
+
+    @pytest.mark.file_db
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_roundtrip_into_empty_db(self, seeded_db, tmp_path, monkeypatch, compress):
+        widget = storage.get_all_concepts()[0]
+        storage.add_explanation(widget["id"], "snapshot answer", 4)
+        storage.save_duel_memory(widget["id"], "belief", "", "")
+        storage.save_cached_claims(
+            widget["id"],
+            [{"statement": "Snap claim", "claim_type": "definition", "claim_index": 0}],
+        )
+        out = tmp_path / ("backup.sqlite.gz" if compress else "backup.sqlite")
+        report = storage.export_snapshot(out, compress=compress)
+        assert (report["sources"], report["concepts"]) == (1, 2)
+        assert report["revision"] == storage.current_revision()
+        assert storage.is_snapshot(out)
+        before = out.read_bytes()
+
+        self._fresh_db(tmp_path, monkeypatch)
+        result = storage.import_snapshot(out)
+        assert (result["sources_added"], result["concepts_added"]) == (1, 2)
+        assert result["explanations_added"] == 1
+        assert result["duel_memories_updated"] == 1
+        assert result["cached_claim_sets_updated"] == 1
+        assert storage.get_explanations(widget["id"])[0]["text"] == "snapshot answer"
+        source = storage.get_all_sources()[0]
+        assert storage.get_source_content(source["id"]).startswith("Some test content")
+        assert out.read_bytes() == before
+
+        again = storage.import_snapshot(out)
+        assert (again["sources_merged"], again["explanations_added"]) == (1, 0)
+
+    def test_snapshot_merges_like_json_import(self, seeded_db, tmp_path):
+        storage.add_explanation(storage.get_all_concepts()[0]["id"], "answer", 4)
+        out = tmp_path / "backup.db"
+        storage.export_snapshot(out)
+
+        other = storage.MemoryBackend()
+        via_json = storage.MemoryBackend()
+        expected = via_json.import_all_data(storage.export_all_data())
+        assert {"schema_version": 1, **other.import_snapshot(out)} == expected
+        assert other.export_all_data()["concepts"] == via_json.export_all_data()["concepts"]
+        other.close()
+        via_json.close()
+
+    def test_older_snapshot_is_migrated_on_a_copy(self, tmp_db, tmp_path):
+        legacy = tmp_path / "legacy.db"
+        _build_legacy_db(legacy, "baseline")
+        before = legacy.read_bytes()
+
+        result = storage.import_snapshot(legacy)
+        assert (result["sources_added"], result["explanations_added"]) == (1, 1)
+        source = storage.get_source_by_url("https://old.com")
+        assert storage.get_source_content(source["id"]) == "legacy widget body"
+        assert legacy.read_bytes() == before
+
+    def test_rejects_other_files(self, tmp_db, tmp_path):
+        import sqlite3
+
+        text = tmp_path / "export.json"
+        text.write_text("{}", encoding="utf-8")
+        other = tmp_path / "other.db"
+        sqlite3.connect(other).execute("CREATE TABLE notes (body)").connection.commit()
+
+        assert not storage.is_snapshot(text)
+        with pytest.raises(storage.ImportValidationError, match="not a SQLite"):
+            storage.import_snapshot(text)
+        with pytest.raises(storage.ImportValidationError, match="not a learnlock"):
+            storage.import_snapshot(other)
+        assert storage.get_all_sources() == []
+
+    @pytest.mark.parametrize("compress", [False, True])
+    def test_rejects_truncated_snapshots(self, seeded_db, tmp_path, compress):
+        out = tmp_path / ("backup.db.gz" if compress else "backup.db")
+        storage.export_snapshot(out, compress=compress)
+        out.write_bytes(out.read_bytes()[: out.stat().st_size // 2])
+
+        assert storage.is_snapshot(out)
+        with pytest.raises(storage.ImportValidationError, match="Invalid snapshot"):
+            storage.import_snapshot(out)
+        assert len(storage.get_all_concepts()) == 2
+
+    def test_rejects_foreign_triggers_and_views(self, seeded_db, tmp_path):
+        import sqlite3
+
+        for extra in (
+            "CREATE TRIGGER evil AFTER INSERT ON progress BEGIN DELETE FROM sources; END",
+            "CREATE VIEW peek AS SELECT * FROM sources",
+            # Our trigger's name with another body.
+            "DROP TRIGGER due_daily_progress_ad; CREATE TRIGGER due_daily_progress_ad "
+            "AFTER DELETE ON progress BEGIN DELETE FROM concepts; END",
+        ):
+            out = tmp_path / "tampered.sqlite"
+            out.unlink(missing_ok=True)
+            storage.export_snapshot(out)
+            conn = sqlite3.connect(out)
+            conn.executescript(extra)
+            conn.close()
+            with pytest.raises(storage.ImportValidationError, match="unknown triggers or views"):
+                storage.import_snapshot(out)
+        assert len(storage.get_all_concepts()) == 2
+
+    def test_interrupted_compressed_export_keeps_previous_backup(
+        self, seeded_db, tmp_path, monkeypatch
+    ):
+        out = tmp_path / "backup.sqlite.gz"
+        storage.export_snapshot(out, compress=True)
+        before = out.read_bytes()
+
+        def interrupted(src, dst):
+            dst.write(src.read(100))
+            raise KeyboardInterrupt
+
+        monkeypatch.setattr(storage.shutil, "copyfileobj", interrupted)
+        with pytest.raises(KeyboardInterrupt):
+            storage.export_snapshot(out, compress=True)
+        assert out.read_bytes() == before
+        assert not list(tmp_path.glob("*.partial"))
+
+    @pytest.mark.sql
+    def test_import_refuses_open_session(self, seeded_db, tmp_path):
+        out = tmp_path / "backup.sqlite"
+        storage.export_snapshot(out)
+        with storage.session():
+            with pytest.raises(RuntimeError):
+                storage.import_snapshot(out)
+
+
+class TestReviewLog:
+    @staticmethod
+    def _add_days_ago(monkeypatch, days, *args, **kwargs):
+        now = storage._now_ms()
+        with monkeypatch.context() as patch:
+            patch.setattr(storage, "_now_ms", lambda: now - days * storage._DAY_MS)
+            return storage.add_explanation(*args, **kwargs)
+
+    @staticmethod
+    def _rollups():
+        with storage.get_db() as conn:
+            daily = {tuple(r) for r in conn.execute("SELECT * FROM review_daily WHERE reviews")}
+            per_concept = {
+                tuple(r) for r in conn.execute("SELECT * FROM review_concepts WHERE reviews")
+            }
+            expected_daily = {
+                tuple(r)
+                for r in conn.execute(
+                    "SELECT created_at / 86400000, COUNT(*), COUNT(score), "
+                    "COALESCE(SUM(score), 0.0), COUNT(CASE WHEN score >= 4 THEN 1 END) "
+                    "FROM review_events GROUP BY 1"
+                )
+            }
+            expected_concepts = {
+                tuple(r)
+                for r in conn.execute(
+                    "SELECT concept_id, COUNT(*), COUNT(score), COALESCE(SUM(score), 0.0), "
+                    "COUNT(CASE WHEN score >= 4 THEN 1 END), MAX(created_at), "
+                    "(SELECT score FROM review_events l WHERE l.concept_id = e.concept_id "
+                    " ORDER BY created_at DESC, id DESC LIMIT 1) "
+                    "FROM review_events e GROUP BY concept_id"
+                )
+            }
+        return (daily, per_concept), (expected_daily, expected_concepts)
+
+    @pytest.mark.sql
+    def test_text_is_stored_compressed_apart_from_the_event(self, seeded_db):
+        cid = storage.get_all_concepts()[0]["id"]
+        answer = "widgets hold state " * 50
+        eid = storage.add_explanation(
+            cid, answer, 2, None, "missed it", "belief", turns=3, error_codes="wrong,vague"
+        )
+
+        with storage.get_db() as conn:
+            assert "text" not in storage._table_columns(conn, "review_events")
+            codec, size = conn.execute(
+                "SELECT codec, length(data) FROM review_text WHERE event_id = ?", (eid,)
+            ).fetchone()
+        assert codec == "zlib" and size < len(answer)
+        (review,) = storage.get_explanations(cid)
+        assert (review["text"], review["missed"], review["feedback"]) == (
+            answer, "missed it", "belief",
+        )
+        assert (review["turns"], review["error_codes"]) == (3, "wrong,vague")
+
+    @pytest.mark.sql
+    def test_rollups_track_every_write_path(self, seeded_db, monkeypatch):
+        widget, gadget = (c["id"] for c in storage.get_all_concepts())
+        storage.add_explanation(widget, "good", 5)
+        self._add_days_ago(monkeypatch, 3, widget, "meh", 2)
+        storage.add_explanation(gadget, "unscored", None)
+        payload = storage.export_all_data()
+        payload["sources"][0]["url"] = "https://example.com/copy"
+        storage.import_all_data(payload, bulk=True)
+        storage.import_all_data(payload, bulk=False)
+
+        maintained, expected = self._rollups()
+        assert maintained == expected
+        assert storage.get_review_rollup(widget)["last_score"] == 5
+
+        with storage.get_db() as conn:
+            conn.execute("DELETE FROM review_events WHERE concept_id = ?", (widget,))
+        maintained, expected = self._rollups()
+        assert maintained == expected
+        assert storage.get_review_rollup(widget) is None
+
+    def test_daily_reviews_and_stats_read_rollups(self, seeded_db, monkeypatch):
+        cid = storage.get_all_concepts()[0]["id"]
+        storage.add_explanation(cid, "today", 4)
+        self._add_days_ago(monkeypatch, 10, cid, "old", 2)
+
+        days = storage.get_daily_reviews(30)
+        assert [d["reviews"] for d in days] == [1, 1]
+        assert days[-1]["avg_score"] == 4.0
+        stats = storage.get_stats()
+        assert (stats["total_reviews"], stats["reviews_last_7_days"]) == (2, 1)
+        assert storage.get_review_rollup(cid)["avg_score"] == 3.0
+
+    @pytest.mark.file_db
+    def test_archive_moves_old_text_and_keeps_events(self, seeded_db, monkeypatch):
+        import gzip
+
+        cid = storage.get_all_concepts()[0]["id"]
+        self._add_days_ago(monkeypatch, 400, cid, "ancient answer", 4, None, None, "belief")
+        storage.add_explanation(cid, "fresh answer", 3)
+
+        result = storage.archive_review_text(365)
+
+        assert result["archived"] == 1
+        with gzip.open(result["path"], "rt") as fp:
+            (line,) = fp.read().splitlines()
+        assert json.loads(line)["text"] == "ancient answer"
+        texts = [review["text"] for review in storage.get_explanations(cid)]
+        assert texts == ["fresh answer", ""]
+        assert storage.get_stats()["total_reviews"] == 2
+        assert storage.archive_review_text(365)["archived"] == 0
+
+        # Archived rows export their hash, so a round trip adds nothing.
+        assert storage.import_all_data(storage.export_all_data())["explanations_added"] == 0
+
+    @pytest.mark.file_db
+    def test_maintain_applies_retention(self, seeded_db, monkeypatch):
+        cid = storage.get_all_concepts()[0]["id"]
+        self._add_days_ago(monkeypatch, 30, cid, "ancient", 4)
+        assert storage.maintain()["reviews_archived"] == 0  # opt-in
+        monkeypatch.setattr(config, "REVIEW_TEXT_RETENTION_DAYS", 7)
+
+        assert storage.maintain()["reviews_archived"] == 1
+        archives = (config.DB_PATH.parent / "archive").iterdir()
+        assert [path.suffixes[-2:] for path in archives] == [[".ndjson", ".gz"]]
+
+    @pytest.mark.file_db
+    def test_failed_archive_keeps_text_and_writes_no_archive(self, seeded_db, monkeypatch):
+        cid = storage.get_all_concepts()[0]["id"]
+        self._add_days_ago(monkeypatch, 30, cid, "ancient", 4)
+        with storage.get_db() as conn:
+            conn.execute(
+                "CREATE TRIGGER fail_archive BEFORE DELETE ON review_text "
+                "BEGIN SELECT RAISE(ABORT, 'busy'); END"
+            )
+        with pytest.raises(sqlite3.IntegrityError):
+            storage.archive_review_text(7)
+        assert not list((config.DB_PATH.parent / "archive").glob("*.ndjson.gz"))
+        assert storage.get_explanations(cid)[0]["text"] == "ancient"
+
+
 class TestStats:
     def test_stats_empty(self, tmp_db):
         stats = storage.get_stats()
@@ -481,3 +1812,505 @@ class TestStats:
         assert stats["total_concepts"] == 2
         assert stats["due_now"] == 2
         assert stats["successful_reviews"] == 1
+
+    def _recomputed(self):
+        with storage.get_db() as conn:
+            counters = dict(conn.execute("SELECT * FROM stats_counters").fetchone())
+            storage._recompute_stats(conn)
+            return counters, dict(conn.execute("SELECT * FROM stats_counters").fetchone())
+
+    @pytest.mark.sql
+    def test_counters_track_every_write_path(self, seeded_db, monkeypatch):
+        widget, gadget = (c["id"] for c in storage.get_all_concepts())
+        storage.add_explanation(widget, "good", 5)
+        storage.add_explanation(widget, "meh", 2)
+        storage.add_explanation(gadget, "unscored", None)
+        for _ in range(3):
+            scheduler.update_after_review(widget, 5)
+        storage.skip_concept(gadget)
+        storage.unskip_concept(gadget)
+        storage.skip_concept(gadget)
+        payload = storage.export_all_data()
+        payload["sources"][0]["url"] = "https://example.com/copy"
+        storage.import_all_data(payload, bulk=True)
+
+        maintained, recomputed = self._recomputed()
+        assert maintained == recomputed
+        assert maintained["mastered"] == 2
+
+        storage.delete_source(seeded_db)
+        maintained, recomputed = self._recomputed()
+        assert maintained == recomputed
+
+    def test_avg_and_mastery_thresholds(self, seeded_db, monkeypatch):
+        widget = storage.get_all_concepts()[0]["id"]
+        storage.add_explanation(widget, "a", 5)
+        storage.add_explanation(widget, "b", 2)
+        for _ in range(3):
+            scheduler.update_after_review(widget, 5)
+        assert storage.get_stats()["avg_score"] == 3.5
+        assert storage.get_stats()["mastered"] == 1
+
+        monkeypatch.setattr(config, "MASTERY_MIN_REVIEWS", 10)
+        assert storage.get_stats()["mastered"] == 0
+
+    def test_startup_check_reads_counters(self, seeded_db):
+        widget = storage.get_all_concepts()[0]["id"]
+        storage.add_explanation(widget, "good", 4)
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            assert storage.count_successful_reviews() == 1
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+        assert not any("explanations" in sql for sql in statements)
+
+
+class TestMaintenance:
+    @staticmethod
+    def _fill_and_delete(count=300):
+        body = "maintenance filler " * 400
+        ids = [
+            storage.add_source(f"https://example.com/{i}", f"S{i}", "article", f"{i} {body}")
+            for i in range(count)
+        ]
+        for source_id in ids:
+            storage.delete_source(source_id)
+
+    def test_connection_pragmas_follow_config(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(config, "SQLITE_CACHE_SIZE_KB", 4096)
+        monkeypatch.setattr(config, "SQLITE_MMAP_SIZE", 1 << 20)
+        monkeypatch.setattr(config, "SQLITE_TEMP_STORE", "bogus")
+        conn = storage._connect(tmp_path / "tuned.db")
+        try:
+            assert conn.execute("PRAGMA cache_size").fetchone()[0] == -4096
+            assert conn.execute("PRAGMA mmap_size").fetchone()[0] == 1 << 20
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2
+        finally:
+            conn.close()
+
+    def test_new_databases_use_incremental_auto_vacuum(self, tmp_db):
+        with storage.get_db() as conn:
+            assert conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    @pytest.mark.file_db
+    def test_maintain_analyzes_vacuums_and_truncates_wal(self, tmp_db):
+        self._fill_and_delete()
+        report = storage.maintain(vacuum=True)
+        assert report["vacuumed"] == "incremental"
+        assert report["free_pages_before"] > 0 and report["free_pages_after"] == 0
+        assert report["wal_after"] == 0
+        assert report["size_after"] < report["size_before"]
+        with storage.get_db() as conn:
+            assert conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0] > 0
+
+    def test_maintain_converts_legacy_database_with_full_vacuum(self, tmp_db):
+        with storage.get_db() as conn:
+            pass
+        conn.execute("PRAGMA auto_vacuum = NONE")
+        conn.execute("VACUUM")
+        assert storage.maintain(vacuum=True)["vacuumed"] == "full"
+        assert storage.maintain(vacuum=True)["vacuumed"] == "incremental"
+
+    @pytest.mark.sql
+    def test_maintain_refuses_open_session(self, tmp_db):
+        with storage.session():
+            with pytest.raises(RuntimeError):
+                storage.maintain()
+
+    @pytest.mark.sql
+    def test_startup_pass_runs_only_past_thresholds(self, tmp_db, monkeypatch):
+        assert storage.maintain_if_needed() is None
+
+        self._fill_and_delete()
+        monkeypatch.setattr(config, "MAINTAIN_WAL_BYTES", 1 << 40)
+        report = storage.maintain_if_needed()
+        assert report["reasons"] == ["freelist"]
+        assert report["vacuumed"] == "incremental"
+        assert storage.maintain_if_needed() is None
+
+
+class TestBackends:
+    def _add_source(self, url="https://example.com/b"):
+        return storage.add_source_with_concepts(
+            url=url, title="B", source_type="article", raw_content="body",
+            concepts=[{"name": "Widget", "source_quote": "q", "question": "What?"}],
+        )
+
+    def test_protocol_covers_every_operation(self):
+        members = {
+            name for name, value in vars(storage.StorageBackend).items()
+            if callable(value) and not name.startswith("_")
+        }
+        assert members == set(storage._OPERATIONS) | {"session"}
+        assert isinstance(storage.get_backend(), storage.StorageBackend)
+        assert isinstance(storage.MemoryBackend(), storage.StorageBackend)
+        assert isinstance(storage.DictBackend(), storage.StorageBackend)
+
+    def test_memory_backend_is_isolated_from_file_database(self, memory_db, db_file):
+        self._add_source()
+        assert storage.get_backend() is memory_db
+        assert [s["title"] for s in storage.get_all_sources()] == ["B"]
+        assert storage.SQLiteBackend(db_file).get_all_sources() == []
+
+    def test_memory_backend_runs_the_full_engine(self, memory_db):
+        self._add_source()
+        concept = storage.get_all_concepts()[0]
+        scheduler.update_after_review(concept["id"], 4)
+        storage.add_explanation(concept["id"], "widgets are reusable", 4)
+        with storage.session():
+            storage.save_cached_claims(
+                concept["id"], [{"statement": "c", "claim_type": "definition", "claim_index": 0}]
+            )
+        assert storage.get_stats()["total_reviews"] == 1
+        assert [hit.title for hit in storage.search("Widg")][:1] == ["Widget"]
+        assert storage.archive_review_text(1) == {"archived": 0, "path": None}
+        assert storage.maintain()["size_after"] == 0
+
+        other = storage.MemoryBackend()
+        assert other.import_all_data(storage.export_all_data())["concepts_added"] == 1
+        assert other.get_explanations(concept["id"])[0]["text"] == "widgets are reusable"
+        other.close()
+
+    def test_instances_bind_their_own_database(self, tmp_db):
+        memory = storage.MemoryBackend()
+        memory.add_source("https://example.com/m", "M", "article", "m")
+        self._add_source()
+        assert [s["title"] for s in memory.get_all_sources()] == ["M"]
+        assert [s["title"] for s in storage.get_all_sources()] == ["B"]
+
+        with memory.session():
+            memory.add_source("https://example.com/n", "N", "article", "n")
+        records = memory.iter_export_records()
+        storage.add_source("https://example.com/f", "F", "article", "f")
+        titles = [r["row"]["title"] for r in records if r["table"] == "sources"]
+        assert titles == ["M", "N"]
+        memory.close()
+
+    @staticmethod
+    def _study_round():
+        """A duel outcome plus its reschedule, as cmd_study records it."""
+        from learnlock.duel import record_outcome
+
+        source_id = storage.add_source_with_concepts(
+            url="https://example.com/d", title="D", source_type="article", raw_content="d",
+            concepts=[{"name": n, "source_quote": "q", "question": "Q?"} for n in ("A", "B")],
+        )
+        queue = scheduler.StudyQueue()
+        due = queue.peek()
+        reveal = {"belief": "b", "errors": [], "evidence": ["e"], "attacks": ["x"], "turns": 2}
+        with storage.session() as unit:
+            record_outcome(due["id"], reveal, 4, session=unit)
+            result = scheduler.update_after_review(due["id"], 4, session=unit)
+        queue.reviewed(due["id"], result["due_date"])
+        storage.save_cached_claims(
+            due["id"], [{"statement": "c", "claim_type": "definition", "claim_index": 0}]
+        )
+        progress = storage.get_progress(due["id"])
+        return {
+            "source": storage.get_source(source_id)["content_hash"],
+            "concepts": [c["name"] for c in storage.get_concepts_for_source(source_id)],
+            "remaining": (len(queue), queue.peek()["name"]),
+            "progress": {k: progress[k] for k in ("ease_factor", "interval_days", "review_count")},
+            "review": {
+                k: storage.get_explanations(due["id"])[0][k]
+                for k in ("text", "score", "missed", "feedback", "turns", "text_hash")
+            },
+            "memory": storage.get_duel_memory(due["id"]),
+            "claims": storage.get_cached_claims(due["id"]),
+            "stats": storage.get_stats(),
+            "schedule": scheduler.reschedule_all(dry_run=True)["changed"],
+        }
+
+    @pytest.mark.parametrize("backend_type", [storage.MemoryBackend, storage.DictBackend])
+    def test_in_memory_backends_match_sqlite_on_study_paths(self, tmp_db, backend_type):
+        expected = self._study_round()
+        backend = backend_type()
+        previous = storage.use_backend(backend)
+        try:
+            assert self._study_round() == expected
+        finally:
+            storage.use_backend(previous)
+            backend.close()
+
+    def test_dict_backend_session_undoes_every_write(self, db_file):
+        backend = storage.DictBackend()
+        previous = storage.use_backend(backend)
+        try:
+            self._add_source()
+            concept_id = storage.get_all_concepts()[0]["id"]
+            before = (storage.export_all_data(), storage.get_stats(), storage.current_revision())
+            with pytest.raises(RuntimeError):
+                with storage.session():
+                    storage.add_explanation(concept_id, "gone", 5)
+                    storage.skip_concept(concept_id)
+                    self._add_source("https://example.com/c")
+                    claim = {"statement": "c", "claim_type": "definition", "claim_index": 0}
+                    storage.save_cached_claims(concept_id, [claim])
+                    raise RuntimeError("boom")
+            with pytest.raises(ValueError):
+                self._add_source()
+            after = (storage.export_all_data(), storage.get_stats(), storage.current_revision())
+            assert {**after[0], "exported_at": None} == {**before[0], "exported_at": None}
+            assert after[1:] == before[1:]
+            assert storage.SQLiteBackend(db_file).get_all_sources() == []
+        finally:
+            storage.use_backend(previous)
+
+    def test_dict_backend_snapshots_round_trip_through_sqlite(self, tmp_db, tmp_path):
+        backend = storage.DictBackend()
+        backend.add_source_with_concepts(
+            url="https://example.com/s", title="S", source_type="article", raw_content="s body",
+            concepts=[{"name": "Widget", "source_quote": "q", "question": "What?"}],
+        )
+        concept_id = backend.get_all_concepts()[0]["id"]
+        backend.add_explanation(concept_id, "widgets are reusable", 4)
+        backend.export_snapshot(tmp_path / "dict.db")
+
+        assert storage.import_snapshot(tmp_path / "dict.db")["concepts_added"] == 1
+        assert storage.get_source_content(storage.get_all_sources()[0]["id"]) == "s body"
+        restored = storage.DictBackend()
+        assert restored.import_snapshot(tmp_path / "dict.db")["explanations_added"] == 1
+        assert restored.get_explanations(concept_id)[0]["text"] == "widgets are reusable"
+
+    def test_facades_dispatch_to_foreign_backends(self, tmp_db):
+        calls = []
+
+        class Recorder:
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: calls.append((name, args, kwargs)) or 7
+
+            def session(self, existing=None):
+                return storage.session(existing, db_path=tmp_db)
+
+        previous = storage.use_backend(Recorder())
+        try:
+            assert storage.add_explanation(1, "text", 4, turns=2) == 7
+            assert storage.get_stats() == 7
+            with storage.session() as unit:
+                assert unit.active
+        finally:
+            storage.use_backend(previous)
+        assert calls == [
+            ("add_explanation", (1, "text", 4), {"turns": 2}),
+            ("get_stats", (), {}),
+        ]
+
+
+class TestBulkAdministration:
+    def _library(self, seeded_db):
+        concepts = {c["name"]: c["id"] for c in storage.get_concepts_for_source(seeded_db)}
+        scheduler.update_after_review(concepts["Widget"], 1)
+        storage.add_explanation(concepts["Widget"], "wrong", 1)
+        scheduler.update_after_review(concepts["Gadget"], 5)
+        other = storage.add_source_with_concepts(
+            url="https://example.com/other", title="Other", source_type="article",
+            raw_content="other",
+            concepts=[{"name": "Widget Tree", "source_quote": "q", "question": "Q?"}],
+        )
+        return concepts, other
+
+    def test_filters_combine(self, seeded_db):
+        concepts, other = self._library(seeded_db)
+        match = storage.ConceptFilter
+        assert storage.count_concepts_matching(match()) == 3
+        assert storage.count_concepts_matching(match(name="widget")) == 2
+        assert storage.count_concepts_matching(match(name="widget", source_id=other)) == 1
+        assert storage.count_concepts_matching(match(max_score=2)) == 1
+        assert storage.count_concepts_matching(match(max_ease=2.5)) == 2
+        assert storage.count_concepts_matching(match(older_than_days=1)) == 0
+        assert [c.name for c in storage.list_concepts_matching(match(name="wid"), 1)] == [
+            "Widget"
+        ]
+
+    @pytest.mark.sql
+    def test_skip_unskip_and_delete_in_one_statement(self, seeded_db):
+        concepts, other = self._library(seeded_db)
+        statements = []
+        with storage.get_db() as conn:
+            conn.set_trace_callback(statements.append)
+        try:
+            assert storage.skip_concepts_matching(storage.ConceptFilter(name="widget")) == 2
+        finally:
+            with storage.get_db() as conn:
+                conn.set_trace_callback(None)
+        # The trace repeats the statement once per trigger step; count distinct ones.
+        assert len({s for s in statements if s.startswith("UPDATE concepts")}) == 1
+        assert storage.get_stats()["skipped_concepts"] == 2
+        assert storage.unskip_concepts_matching(storage.ConceptFilter(source_id=other)) == 1
+
+        before = storage.get_stats()["total_reviews"]
+        assert storage.delete_concepts_matching(storage.ConceptFilter(max_score=2)) == 1
+        assert storage.get_concept(concepts["Widget"]) is None
+        assert storage.get_progress(concepts["Widget"]) is None
+        assert storage.get_stats()["total_reviews"] == before - 1
+        assert storage.get_source(seeded_db) is not None
+
+    def test_writes_refuse_an_empty_filter(self, seeded_db):
+        for operation in (
+            storage.skip_concepts_matching,
+            storage.unskip_concepts_matching,
+            storage.delete_concepts_matching,
+        ):
+            for where in (
+                storage.ConceptFilter(),
+                storage.ConceptFilter(name=""),
+                storage.ConceptFilter(skipped=False),
+            ):
+                with pytest.raises(ValueError, match="at least one filter"):
+                    operation(where)
+        assert storage.count_concepts_matching(storage.ConceptFilter()) == 2
+        assert storage.get_stats()["skipped_concepts"] == 0
+
+
+class TestDueHistogram:
+    @staticmethod
+    def _histogram():
+        with storage.get_db() as conn:
+            maintained = [tuple(r) for r in conn.execute(
+                "SELECT day, due, new FROM due_daily WHERE due > 0 ORDER BY day"
+            )]
+            recomputed = [tuple(r) for r in conn.execute(
+                "SELECT p.due_date / 86400000, COUNT(*), SUM(p.last_score IS NULL)"
+                " FROM progress p JOIN concepts c ON c.id = p.concept_id"
+                " WHERE c.skipped = 0 GROUP BY 1 ORDER BY 1"
+            )]
+        return maintained, recomputed
+
+    @pytest.mark.sql
+    def test_triggers_track_every_write_path(self, seeded_db):
+        widget, gadget = (c["id"] for c in storage.get_all_concepts())
+        scheduler.update_after_review(widget, 5)
+        storage.skip_concept(gadget)
+        maintained, recomputed = self._histogram()
+        assert maintained == recomputed
+        assert sum(due for _, due, _ in maintained) == 1
+
+        storage.unskip_concept(gadget)
+        storage.skip_concept(widget)
+        storage.delete_concepts_matching(storage.ConceptFilter(name="widget"))
+        maintained, recomputed = self._histogram()
+        assert maintained == recomputed == [(time.time() * 1000 // 86_400_000, 1, 1)]
+
+        storage.delete_source(seeded_db)
+        assert self._histogram() == ([], [])
+
+    def test_histogram_is_zero_filled(self, seeded_db):
+        today = int(time.time() // 86_400)
+        assert storage.get_due_histogram(today - 1, 3) == [0, 2, 0]
+
+    def test_intake_cap_spreads_new_concepts(self, seeded_db, monkeypatch):
+        monkeypatch.setattr(config, "NEW_CONCEPTS_PER_DAY", 3)
+        source = storage.add_source_with_concepts(
+            url="https://example.com/more", title="More", source_type="article",
+            raw_content="more",
+            concepts=[{"name": f"C{i}", "source_quote": "q", "question": "Q?"} for i in range(5)],
+        )
+        storage.add_concept(source, "Late", "q")
+        today = int(time.time() // 86_400)
+        assert storage.get_due_histogram(today, 4) == [3, 3, 2, 0]
+        assert len(storage.get_due_concepts()) == 3
+
+
+def _stress_writer(db_path, worker, rounds, shared_concept_id):
+    """Child process for TestWriteCoordination: add sources and review them."""
+    config.DB_PATH = db_path
+    storage.reset_init_cache()
+    for i in range(rounds):
+        storage.add_source_with_concepts(
+            url=f"https://example.com/w{worker}/{i}", title=f"W{worker} {i}",
+            source_type="article", raw_content=f"body {worker} {i}",
+            concepts=[{"name": f"C{worker}-{i}", "source_quote": "q", "question": "Q?"}],
+        )
+        with storage.session() as unit:
+            scheduler.update_after_review(shared_concept_id, 4, session=unit)
+            storage.add_explanation(shared_concept_id, f"answer {worker} {i}", 4)
+    storage.close()
+
+
+class TestWriteCoordination:
+    @pytest.mark.file_db
+    def test_begin_waits_for_another_writer(self, seeded_db, tmp_db):
+        holder = sqlite3.connect(tmp_db, isolation_level=None, check_same_thread=False)
+        holder.execute("BEGIN IMMEDIATE")
+        threading.Timer(0.2, holder.rollback).start()
+        started = time.monotonic()
+        storage.add_explanation(1, "waited", 4)
+        assert time.monotonic() - started >= 0.15
+        assert storage.get_stats()["total_reviews"] == 1
+        holder.close()
+
+    @pytest.mark.file_db
+    def test_begin_gives_up_at_the_timeout(self, seeded_db, tmp_db, monkeypatch):
+        monkeypatch.setattr(config, "SQLITE_TIMEOUT_SECONDS", 0.1)
+        holder = sqlite3.connect(tmp_db, isolation_level=None)
+        holder.execute("BEGIN IMMEDIATE")
+        try:
+            with pytest.raises(sqlite3.OperationalError, match="locked"):
+                storage.add_explanation(1, "lost", 4)
+        finally:
+            holder.rollback()
+            holder.close()
+        with storage.get_db() as conn:
+            assert conn.execute("PRAGMA busy_timeout").fetchone()[0] == 100
+            assert not conn.in_transaction
+
+    @pytest.mark.sql
+    def test_write_queue_runs_writes_on_one_thread(self, seeded_db, monkeypatch):
+        monkeypatch.setattr(config, "SQLITE_WRITE_QUEUE", True)
+        writers = set()
+        record = storage._insert_source
+
+        def spy(*args):
+            writers.add(threading.current_thread().name)
+            return record(*args)
+
+        monkeypatch.setattr(storage, "_insert_source", spy)
+
+        def add(n):
+            for i in range(10):
+                storage.add_source(f"https://example.com/q{n}/{i}", "Q", "article", "q")
+
+        threads = [threading.Thread(target=add, args=(n,)) for n in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(writers) == 1 and writers.pop().startswith("learnlock-writer")
+        assert storage.get_stats()["total_sources"] == 41
+        with storage.session() as unit:
+            # Inside a session writes stay on this thread to join its transaction.
+            storage.add_source("https://example.com/s", "S", "article", "s")
+            assert unit.conn.in_transaction
+        assert threading.current_thread().name in writers
+
+    def test_write_queue_raises_in_caller(self, tmp_db, monkeypatch):
+        monkeypatch.setattr(config, "SQLITE_WRITE_QUEUE", True)
+        with pytest.raises(storage.ImportValidationError):
+            storage.import_all_data({"sources": "not a list"})
+
+    @pytest.mark.skipif(
+        "fork" not in multiprocessing.get_all_start_methods(), reason="needs fork"
+    )
+    @pytest.mark.file_db
+    def test_concurrent_processes_lose_no_writes(self, seeded_db, tmp_db):
+        workers, rounds = 4, 15
+        shared = storage.get_concepts_for_source(seeded_db)[0]["id"]
+        storage.close()
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=_stress_writer, args=(tmp_db, n, rounds, shared))
+            for n in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(60)
+            assert process.exitcode == 0
+
+        stats = storage.get_stats()
+        assert stats["total_sources"] == 1 + workers * rounds
+        assert stats["total_reviews"] == workers * rounds
+        assert storage.get_progress(shared)["review_count"] == workers * rounds